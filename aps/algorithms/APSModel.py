@@ -2,7 +2,15 @@
 # -*- coding: utf-8 -*-
 import collections
 import copy
+import functools
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
 import xml.etree.ElementTree as ET
+from collections.abc import MutableMapping
+from pathlib import Path
 from typing import List, Optional, Tuple, Union, Dict, TYPE_CHECKING
 from warnings import warn
 
@@ -17,7 +25,7 @@ from aps.utils.constants.simple import (
     ExtrapolationMethod,
     ProbabilityTolerances,
 )
-from aps.utils.exceptions.xml import MissingAttributeInKeyword
+from aps.utils.exceptions.xml import MissingAttributeInKeyword, ReadingXmlError
 from aps.utils.containers import FmuAttribute
 from aps.utils.numeric import isNumber
 from aps.utils.types import FilePath
@@ -30,12 +38,144 @@ from aps.utils.xmlUtils import (
     create_node,
 )
 from aps.utils.io import GlobalVariables, write_string_to_file
-from aps.utils.roxar.grid_model import create_zone_parameter, find_defined_cells
 
 if TYPE_CHECKING:
     from roxar import Project
 
 
+@functools.lru_cache(maxsize=None)
+def _code_version() -> str:
+    """Identify the version of the APS code, which defines the pickled model classes."""
+    sha = hashlib.sha1(sys.version.encode())
+    package_dir = Path(__file__).parents[1]
+    for path in sorted(package_dir.rglob('*.py')):
+        stat = path.stat()
+        sha.update(
+            f'{path.relative_to(package_dir)}:{stat.st_size}:{stat.st_mtime_ns}'.encode()
+        )
+    return sha.hexdigest()
+
+
+def _default_model_cache_dir() -> Path:
+    cache_home = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(cache_home) / 'aps' / 'model_cache'
+
+
+def _private_cache_dir(cache_dir: FilePath) -> Path:
+    """Create the cache directory if necessary, readable and writable by the current user only.
+    Raises PermissionError if the directory is owned by another user or is accessible by others,
+    since the pickled snapshots must not be written by anyone else.
+    """
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+    if hasattr(os, 'getuid'):
+        stat = cache_dir.stat()
+        if stat.st_uid != os.getuid() or stat.st_mode & 0o077:
+            raise PermissionError(
+                f'The APS model cache {cache_dir} must be private to the current user'
+            )
+    return cache_dir
+
+
+def _model_cache_path(
+    model_file: Path, cache_dir: Optional[FilePath], debug_level: Debug
+) -> Path:
+    if cache_dir is None:
+        cache_dir = _default_model_cache_dir()
+    sha = hashlib.sha1(model_file.read_bytes())
+    sha.update(f'{_code_version()}:{int(debug_level)}'.encode())
+    # The name identifies the model file and the suffix its content
+    name = hashlib.sha1(str(model_file.resolve()).encode()).hexdigest()[:12]
+    return Path(cache_dir) / f'{model_file.stem}-{name}_{sha.hexdigest()}.pkl'
+
+
+# Keywords every zone model must have
+_ZONE_MODEL_KEYWORDS = (
+    'UseConstProb',
+    'SimBoxThickness',
+    'FaciesProbForModel',
+    'GaussField',
+    'TruncationRule',
+)
+
+
+def _check_zone_keywords(zone, model_file_name: Optional[FilePath] = None) -> None:
+    """Check that the zone model has the required keywords, without interpreting them.
+    Zone models are created lazily, and this is the check done for zone models that are not used.
+    """
+    for keyword in _ZONE_MODEL_KEYWORDS:
+        getKeyword(zone, keyword, 'Zone', modelFile=model_file_name)
+    if len(zone.find('TruncationRule')) == 0:
+        raise ReadingXmlError(
+            'Trunc2D_Angle, Trunc2D_Cubic or Trunc3D_Bayfill',
+            'TruncationRule',
+            model_file_name,
+        )
+
+
+class _LazyZoneModel:
+    """Holds a zone model which is created from the model file the first time it is used."""
+
+    __slots__ = ('_factory', '_model')
+
+    def __init__(self, factory=None, model: Optional[APSZoneModel] = None):
+        self._factory = factory
+        self._model = model
+
+    def get(self) -> APSZoneModel:
+        if self._model is None:
+            self._model = self._factory()
+            self._factory = None
+        return self._model
+
+
+class _ZoneModelTable(MutableMapping):
+    """Dictionary with key = (zoneNumber, regionNumber) and zone models as values.
+    Zone models added by add_lazy are not interpreted from the model file
+    before they are accessed, such that only the zones in use are paid for.
+    Iterating over the keys or checking if a key exists does not create any zone model.
+    """
+
+    def __init__(
+        self, zone_models: Optional[Dict[Tuple[int, int], APSZoneModel]] = None
+    ):
+        self._holders = {}
+        if zone_models:
+            self.update(zone_models)
+
+    def add_lazy(self, key: Tuple[int, int], factory) -> None:
+        self._holders[key] = _LazyZoneModel(factory=factory)
+
+    def build(self) -> None:
+        """Create all zone models which are not created yet."""
+        for holder in self._holders.values():
+            holder.get()
+
+    def sorted(self) -> '_ZoneModelTable':
+        """A table with the keys in sorted order sharing the (lazy) zone models with this table."""
+        table = _ZoneModelTable()
+        table._holders = dict(sorted(self._holders.items()))
+        return table
+
+    def __getitem__(self, key: Tuple[int, int]) -> APSZoneModel:
+        return self._holders[key].get()
+
+    def __setitem__(self, key: Tuple[int, int], zone_model: APSZoneModel) -> None:
+        self._holders[key] = _LazyZoneModel(model=zone_model)
+
+    def __delitem__(self, key: Tuple[int, int]) -> None:
+        del self._holders[key]
+
+    def __contains__(self, key) -> bool:
+        return key in self._holders
+
+    def __iter__(self):
+        return iter(self._holders)
+
+    def __len__(self) -> int:
+        return len(self._holders)
+
+
 class APSModel:
     """
     Class APSModel  - contains the data structure for data read from model file
@@ -211,7 +351,7 @@ class APSModel:
         self.write_seeds = write_seeds
 
         self.__faciesTable = main_facies_table
-        self.__zoneModelTable = zone_model_table or {}
+        self.__zoneModelTable = _ZoneModelTable(zone_model_table)
         self.__selectedZoneAndRegionNumberTable = {}
         self.__selectAllZonesAndRegions = True
         self.__previewZone = preview_zone
@@ -276,6 +416,83 @@ class APSModel:
             project=project,
         )
 
+    @classmethod
+    def from_cache(
+        cls,
+        model_file_name: FilePath,
+        cache_dir: Optional[FilePath] = None,
+        debug_level: Debug = Debug.OFF,
+    ) -> 'APSModel':
+        """Read the model file, using a pickled snapshot of the interpreted model if one exists.
+        The snapshot is identified by the content of the model file, the debug level and the
+        version of the APS code, such that it is not used when the model file is changed.
+        If cache_dir is not specified, the snapshots are saved in the user's cache directory
+        ($XDG_CACHE_HOME or ~/.cache). The cache directory must be private to the current user.
+        The model file is parsed as usual if the snapshot can not be read or written.
+        """
+        if debug_level >= Debug.VERY_VERBOSE:
+            # Parse the model file to get the output when interpreting it
+            return cls(model_file_name, debug_level=debug_level)
+
+        model_file = Path(model_file_name)
+        cache_path = _model_cache_path(model_file, cache_dir, debug_level)
+        try:
+            _private_cache_dir(cache_path.parent)
+        except OSError as e:
+            warn(f'The APS model cache is not used: {e}')
+            return cls(model_file_name, debug_level=debug_level)
+
+        try:
+            with open(cache_path, 'rb') as file:
+                model = pickle.load(file)
+            if isinstance(model, cls):
+                if debug_level >= Debug.VERBOSE:
+                    print(f'-- Read APS model {model_file} from {cache_path}')
+                return model
+            warn(f'Ignoring the APS model cache {cache_path} with unexpected content')
+        except FileNotFoundError:
+            pass
+        except (
+            OSError,
+            EOFError,
+            pickle.UnpicklingError,
+            AttributeError,
+            ImportError,
+        ) as e:
+            warn(f'Can not read the APS model cache {cache_path}: {e!r}')
+
+        model = cls(model_file_name, debug_level=debug_level)
+        # The snapshot contains the interpreted zone models, not the model file
+        model.__zoneModelTable.build()
+        tmp_path = None
+        try:
+            # Remove snapshots of previous versions of the model file.
+            # Other jobs may remove the same snapshots at the same time.
+            for old_path in cache_path.parent.glob(
+                cache_path.name.rsplit('_', 1)[0] + '_*.pkl'
+            ):
+                try:
+                    old_path.unlink()
+                except FileNotFoundError:
+                    pass
+            # Write to a unique file and rename, such that other jobs read a complete snapshot
+            fd, tmp_path = tempfile.mkstemp(
+                prefix=cache_path.stem, suffix='.tmp', dir=cache_path.parent
+            )
+            with os.fdopen(fd, 'wb') as file:
+                pickle.dump(model, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+            tmp_path = None
+        except (OSError, pickle.PicklingError) as e:
+            warn(f'Can not save the APS model to {cache_path}: {e!r}')
+        finally:
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+        return model
+
     @classmethod
     def from_string(
         cls,
@@ -292,6 +509,8 @@ class APSModel:
             check_with_grid_model=check_with_grid_model,
             project=project,
         )
+        # Models from the GUI are validated by reading them, so all zone models are created
+        model.__zoneModelTable.build()
         return model
 
     def __interpretTree(
@@ -553,6 +772,7 @@ class APSModel:
                 )
                 self.__zones_removed = True
                 continue
+            _check_zone_keywords(zone, model_file_name)
 
             # The model is identified by the combination (zoneNumber, regionNumber)
             zoneModelKey = (zone_number, region_number)
@@ -568,7 +788,8 @@ class APSModel:
                             f'({zone_number}, {region_number})'
                         )
 
-                zone_model = APSZoneModel(
+                create_zone_model = functools.partial(
+                    APSZoneModel,
                     ET_Tree=self.__ET_Tree,
                     zoneNumber=zone_number,
                     regionNumber=region_number,
@@ -576,8 +797,13 @@ class APSModel:
                     debug_level=self.__debug_level,
                 )
                 # This zoneNumber, regionNumber combination is not defined previously
-                # and must be added to the dictionary
-                self.__zoneModelTable[zoneModelKey] = zone_model
+                # and must be added to the dictionary.
+                if self.__debug_level >= Debug.VERY_VERBOSE:
+                    # Interpret the zone model now to get the output in the order it is read
+                    self.__zoneModelTable[zoneModelKey] = create_zone_model()
+                else:
+                    # The zone model is interpreted the first time it is used
+                    self.__zoneModelTable.add_lazy(zoneModelKey, create_zone_model)
 
                 # Initially set all defined zone models active
                 selected_key = (zone_number, region_number)
@@ -614,10 +840,7 @@ class APSModel:
                 if len(text.strip()) == 0:
                     region_number = 0
                     # Empty list of region numbers
-                    zone_model = self.getZoneModel(
-                        zone_number=zone_number, region_number=region_number
-                    )
-                    if zone_model is None:
+                    if (zone_number, region_number) not in self.__zoneModelTable:
                         raise ValueError(
                             f'Can not select to use zone model with zone number: {zone_number} '
                             f'and region number: {region_number} '
@@ -632,10 +855,10 @@ class APSModel:
                         w2 = w.strip()
                         if isNumber(w2):
                             region_number = int(w2)
-                            zone_model = self.getZoneModel(
-                                zone_number=zone_number, region_number=region_number
-                            )
-                            if zone_model is None:
+                            if (
+                                zone_number,
+                                region_number,
+                            ) not in self.__zoneModelTable:
                                 raise ValueError(
                                     'Can not select to use zone model with '
                                     f'zone number: {zone_number} and region number: {region_number} '
@@ -662,7 +885,7 @@ class APSModel:
                 '--- Zone models are defined for the following combination '
                 'of zone and region numbers:'
             )
-            for key, value in self.sorted_zone_models.items():
+            for key in self.sorted_zone_models:
                 zone_number = key[0]
                 region_number = key[1]
                 if region_number == 0:
@@ -848,7 +1071,7 @@ class APSModel:
            is common and hence "overwrite" each other.
         """
         zoneNumbers = []
-        for key, _ in self.__zoneModelTable.items():
+        for key in self.__zoneModelTable:
             zone_number, region_number = key
             if zone_number in zoneNumbers and region_number == 0:
                 raise ValueError(
@@ -1046,7 +1269,7 @@ class APSModel:
     @property
     def sorted_zone_models(self) -> Dict[Tuple[int, int], APSZoneModel]:
         # Define sorted sequence of the zone models
-        return collections.OrderedDict(sorted(self.__zoneModelTable.items()))
+        return self.__zoneModelTable.sorted()
 
     @property
     def zone_models(self) -> List[APSZoneModel]:
@@ -1066,7 +1289,7 @@ class APSModel:
         """
         Can be used to redefine zone models of existing APSModel.
         """
-        self.__zoneModelTable = copy.deepcopy(input_zone_models)
+        self.__zoneModelTable = _ZoneModelTable(copy.deepcopy(input_zone_models))
 
     def getResultFaciesParamName(self):
         return copy.copy(self.__rmsFaciesParamName)
@@ -1204,7 +1427,7 @@ class APSModel:
 
     def setRmsRegionParamName(self, name: str) -> None:
         if not name:
-            for key, _ in self.__zoneModelTable.items():
+            for key in self.__zoneModelTable:
                 region_number = key[1]
                 current_zone_has_at_least_one_region = region_number > 0
                 if current_zone_has_at_least_one_region:
@@ -1244,7 +1467,7 @@ class APSModel:
         if input_key in self.__zoneModelTable:
             if self.__selectAllZonesAndRegions:
                 self.__selectAllZonesAndRegions = False
-                for key, _ in self.__zoneModelTable.items():
+                for key in self.__zoneModelTable:
                     self.__selectedZoneAndRegionNumberTable[key] = 1
             if input_key in self.__selectedZoneAndRegionNumberTable:
                 del self.__selectedZoneAndRegionNumberTable[input_key]
@@ -1526,6 +1749,8 @@ class APSModel:
         """
         Check if zone parameter exist and create it if not existing or empty
         """
+        from aps.utils.roxar.grid_model import create_zone_parameter
+
         grid_model = project.grid_models[self.grid_model_name]
         realization_number = project.current_realisation
         create_zone_parameter(
@@ -1541,6 +1766,8 @@ class APSModel:
         have active grid cells and remove the models for the (zone_number, region_number)
         combinations that has 0 active cells from the list of selected models.
         """
+        from aps.utils.roxar.grid_model import create_zone_parameter, find_defined_cells
+
         if debug_level >= Debug.VERBOSE:
             print('-- Check zones and regions in grid model for active cells.')
 
@@ -1564,7 +1791,7 @@ class APSModel:
                 )
             region_param = grid_model.properties[region_param_name]
             region_values = region_param.get_values(realisation_number)
-        for key, _ in all_zone_models.items():
+        for key in all_zone_models:
             (zone_number, region_number) = key
             if not self.isSelected(zone_number, region_number):
                 continue
@@ -2030,10 +2257,11 @@ class APSModel:
         count_grf = 0
         count_trend = 0
         count_zone_region = 0
-        for key, zone_model in zone_models.items():
+        for key in zone_models:
             zone_number, region_number = key
             if not self.isSelected(zone_number, region_number):
                 continue
+            zone_model = zone_models[key]
             gauss_field_names = zone_model.gaussian_fields_in_truncation_rule
             count_zone_region += 2
             for name in gauss_field_names:
@@ -16,7 +16,16 @@ from aps.algorithms.APSGaussModel import (
     Trend,
 )
 from aps.algorithms.APSMainFaciesTable import APSMainFaciesTable
-from aps.algorithms.Memoization import MemoizationItem, RoundOffConstant
+from aps.algorithms.Memoization import (
+    COMPACT_CHUNK_SIZE,
+    MemoizationItem,
+    MemoizationStatistics,
+    RoundOffConstant,
+    alpha_from_fixed_point,
+    alpha_to_fixed_point,
+    quantize,
+    quantize_probabilities,
+)
 from aps.algorithms.trend import (
     Trend3D_hyperbolic,
     Trend3D_elliptic,
@@ -52,13 +61,16 @@ class APSZoneModel:
        def __init__(self, ET_Tree=None, zoneNumber=0, regionNumber=0, modelFileName=None,
             useConstProb=False, simBoxThickness=10.0,
             faciesProbObject=None, gaussModelObject=None, truncRuleObject=None,
-            debug_level=Debug.OFF, keyResolution=100)
+            debug_level=Debug.OFF, keyResolution=100, grid_layout=None,
+            angleResolution=1.0, sfResolution=0.01)
 
      --- Properties ---
        debug_level
        zone_number
        region_number
        used_gaussian_field_names
+       truncation_param_resolution
+       memoization_statistics
 
      --- Get functions ---
        def getVariogramType(self,gaussFieldName)
@@ -101,9 +113,11 @@ class APSZoneModel:
      ---  Calculate function ---
        def applyTruncations(self,probDefined,alpha_fields,faciesReal,nDefinedCells,cellIndexDefined)
        def applyTruncations_vectorized(self, probDefined, alpha_fields, faciesReal, nDefinedCells, cellIndexDefined)
+       def applyTruncations_compact(self, probDefined, alpha_fields, faciesReal, cellIndexDefined)
        def simGaussFieldWithTrendAndTransform(
             self, (simBoxXsize, simBoxYsize, simBoxZsize),
             (gridNX, gridNY, gridNZ), gridAzimuthAngle, crossSectionType, crossSectionIndx)
+       def findDistinctTruncationCubes(self, probabilities, num_cells, num_facies, truncation_parameters=None)
 
 
      ---  write XML tree ---
@@ -135,6 +149,8 @@ class APSZoneModel:
         debug_level: Debug = Debug.OFF,
         keyResolution: int = 100,
         grid_layout: Optional[Union[str, Conform]] = None,
+        angleResolution: float = 1.0,
+        sfResolution: float = 0.01,
     ) -> None:
         """
         If the object is created by reading the xml tree for model parameters, it is required that
@@ -160,6 +176,9 @@ class APSZoneModel:
         self.__gaussModelObject = gaussModelObject
 
         self.__keyResolution = keyResolution
+        self.__angleResolution = angleResolution
+        self.__sfResolution = sfResolution
+        self.__memoizationStatistics = None
         self.__debug_level = debug_level
         self.grid_layout = grid_layout
 
@@ -208,6 +227,29 @@ class APSZoneModel:
             else:
                 self.__keyResolution = 0
 
+            # Resolution of the truncation parameters in the memoization key.
+            # The value 0 means that the truncation parameters are not rounded off.
+            self.__angleResolution = getFloatCommand(
+                obj,
+                'MemoizationResolutionAngle',
+                'Optimization',
+                minValue=0.0,
+                maxValue=90.0,
+                defaultValue=1.0,
+                modelFile=modelFileName,
+                required=False,
+            )
+            self.__sfResolution = getFloatCommand(
+                obj,
+                'MemoizationResolutionSF',
+                'Optimization',
+                minValue=0.0,
+                maxValue=1.0,
+                defaultValue=0.01,
+                modelFile=modelFileName,
+                required=False,
+            )
+
         mainFaciesTable = APSMainFaciesTable(ET_Tree, modelFileName)
 
         zone_models = getKeyword(root, 'ZoneModels', 'Root', modelFile=modelFileName)
@@ -375,6 +417,24 @@ class APSZoneModel:
     def key_resolution(self) -> int:
         return self.__keyResolution
 
+    @property
+    def truncation_param_resolution(self) -> float:
+        """Resolution used for the truncation parameters of the truncation rule in the memoization key.
+        Angles (in degrees) for Trunc2D_Angle and the slope factor (SF) for Trunc3D_bayfill."""
+        if self.truncation_rule is None:
+            return 0.0
+        truncRuleName = self.truncation_rule.getClassName()
+        if truncRuleName == 'Trunc2D_Angle':
+            return self.__angleResolution
+        if truncRuleName == 'Trunc3D_bayfill':
+            return self.__sfResolution
+        return 0.0
+
+    @property
+    def memoization_statistics(self) -> Optional[MemoizationStatistics]:
+        """Statistics for the memoization keys from the last call to findDistinctTruncationCubes."""
+        return self.__memoizationStatistics
+
     @property
     def use_constant_probabilities(self) -> bool:
         """Info about whether constant probabilities, or probability cubes are used."""
@@ -777,10 +837,17 @@ class APSZoneModel:
         return faciesReal, volFrac
 
     def applyTruncations_vectorized(
-        self, probDefined, alpha_fields, faciesReal, cellIndexDefined
+        self,
+        probDefined,
+        alpha_fields,
+        faciesReal,
+        cellIndexDefined,
+        compact_data_types=False,
     ):
         """This function calculate the truncations. It calculates facies realization for all grid cells that are defined in cellIndexDefined.
-        The input facies probabilities and transformed gauss fields are used together with the truncation rule."""
+        The input facies probabilities and transformed gauss fields are used together with the truncation rule.
+        With compact_data_types, the alpha values and probabilities of the cells are stored as small integers
+        (see applyTruncations_compact) if the truncation parameters are constant."""
 
         debug_level = self.__debug_level
         order_index = self.truncation_rule.getOrderIndex()
@@ -792,9 +859,16 @@ class APSZoneModel:
             )
 
         useConstTruncParam = self.truncation_rule.useConstTruncModelParam()
-        if not useConstTruncParam:
-            raise IOError(
-                'Cannot use optimization if the truncation parameters  (angles) are not constant in non-cubic rule'
+        isBayfill = self.truncation_rule.getClassName() == 'Trunc3D_bayfill'
+        if (
+            compact_data_types
+            and useConstTruncParam
+            and (self.__useConstProb or not isBayfill)
+        ):
+            # Bayfill with varying probabilities has many distinct truncation cubes,
+            # and is calculated in batches by the float version
+            return self.applyTruncations_compact(
+                probDefined, alpha_fields, faciesReal, cellIndexDefined
             )
 
         volFrac = np.zeros(nFacies, dtype=np.float32)
@@ -807,7 +881,7 @@ class APSZoneModel:
         nGaussFields, nDefinedCells = len(alpha_fields), len(cellIndexDefined)
 
         gaussFieldIndx = 0
-        if self.__useConstProb:
+        if self.__useConstProb and useConstTruncParam:
             # Constant probability
             if debug_level >= Debug.VERBOSE:
                 print('-- Using spatially constant probabilities for facies.')
@@ -856,7 +930,10 @@ class APSZoneModel:
             # Varying probability from cell to cell and / or
             # varying truncation parameter from cell to cell
             if debug_level >= Debug.VERBOSE:
-                print('-- Using spatially varying probabilities for facies.')
+                if not self.__useConstProb:
+                    print('-- Using spatially varying probabilities for facies.')
+                if not useConstTruncParam:
+                    print('-- Using spatially varying truncation parameters.')
             faciesProb = np.zeros((nDefinedCells, nFacies), dtype=np.float32)
 
             for f in range(nFacies):
@@ -876,9 +953,16 @@ class APSZoneModel:
                     ]
                 gaussFieldIndx += 1
 
+            # Truncation parameters for the selected cells if they vary from cell to cell
+            truncParam = None
+            if not useConstTruncParam:
+                truncParam = self.truncation_rule.getTruncationParamValues(
+                    cellIndexDefined
+                )
+
             # Calculate how many different truncation maps are necessary and add a set of grid cell indices to each item
             memo, num_maps = self.findDistinctTruncationCubes(
-                faciesProb, nDefinedCells, nFacies
+                faciesProb, nDefinedCells, nFacies, truncParam
             )
 
             nCells = 0
@@ -890,8 +974,7 @@ class APSZoneModel:
                 count_single_cell_truncation_cubes = 0
                 for key, item in memo.items():
                     # Calculate truncation map
-                    faciesProb = np.array(key)
-                    self.truncation_rule.setTruncRule(faciesProb)
+                    self.__setTruncRuleFromMemoizationKey(key, nFacies)
                     count_unique_truncation_cubes += 1
                     # Lookup facies
                     cell_indices_trunc_rule = item.get_cell_indices()
@@ -953,14 +1036,38 @@ class APSZoneModel:
                         f'is {count_unique_truncation_cubes} out of a total '
                         f'of {nDefinedCells} cells.'
                     )
+            elif isBayfill:
+                # Calculate the truncation cubes for all cells in batches,
+                # using the same round-off values as in the memoization keys
+                if debug_level >= Debug.VERY_VERBOSE:
+                    print('--- Calculate truncation cubes in batches')
+                faciesProbKey = np.zeros((nDefinedCells, nFacies), dtype=np.float64)
+                truncParamKey = None
+                if truncParam is not None:
+                    truncParamKey = np.zeros(truncParam.shape, dtype=np.float64)
+                for key, item in memo.items():
+                    cell_indices_trunc_rule = item.get_cell_indices()
+                    faciesProbKey[cell_indices_trunc_rule, :] = key[:nFacies]
+                    if truncParamKey is not None:
+                        truncParamKey[cell_indices_trunc_rule, :] = key[nFacies:]
+                fCode_vector, fIndx_vector = (
+                    self.truncation_rule.defineFaciesByTruncRule_batched(
+                        faciesProbKey,
+                        alpha_coord_vectors.astype(np.float64),
+                        cellIndexDefined,
+                        truncParam=truncParamKey,
+                    )
+                )
+                faciesReal[cellIndexDefined] = fCode_vector
+                volFrac += np.bincount(fIndx_vector, minlength=nFacies)[:nFacies]
+                nCells = nDefinedCells
             else:
                 # Don't use vectorization and look up facies for all cells one by one.
                 if debug_level >= Debug.VERY_VERBOSE:
                     print('--- No vectorization optimization')
                 for key, item in memo.items():
                     # Calculate truncation map
-                    faciesProb = np.array(key)
-                    self.truncation_rule.setTruncRule(faciesProb)
+                    self.__setTruncRuleFromMemoizationKey(key, nFacies)
                     count_unique_truncation_cubes += 1
                     # Lookup facies
                     cell_indices_trunc_rule = item.get_cell_indices()
@@ -1006,6 +1113,102 @@ class APSZoneModel:
             volFrac[f] = volFrac[f] / float(nDefinedCells)
         return faciesReal, volFrac
 
+    def applyTruncations_compact(
+        self,
+        probDefined,
+        alpha_fields,
+        faciesReal,
+        cellIndexDefined,
+        chunk_size=COMPACT_CHUNK_SIZE,
+    ):
+        """Calculate the truncations as applyTruncations_vectorized, for truncation rules with constant
+        truncation parameters, using less memory. The alpha values for the cells are stored as uint16 fixed-point
+        values, and varying probabilities are rounded off to the resolution of the memoization key and stored as
+        uint8 or uint16. The cells sharing the same truncation map/cube are found from the integer probabilities,
+        and the alpha values are converted back to floating point values for at most chunk_size cells at the time
+        when the facies are looked up. The facies differ from the float version only for cells
+        with alpha values closer than 1/131070 to a facies boundary."""
+        debug_level = self.__debug_level
+        nFacies = len(self.facies_in_zone_model)
+        if len(probDefined) != nFacies:
+            raise ValueError(
+                f'Error: In class: {self.__className}. Mismatch in input to applyTruncations '
+            )
+        if not self.truncation_rule.useConstTruncModelParam():
+            raise ValueError(
+                f'Error: In class: {self.__className}. Compact data types require constant truncation parameters'
+            )
+        nDefinedCells = len(cellIndexDefined)
+        if debug_level >= Debug.VERBOSE:
+            print(
+                f'-- Truncation rule: {self.truncation_rule.getClassName()} (compact data types)'
+            )
+
+        alpha_coord_vectors = np.zeros(
+            (nDefinedCells, len(alpha_fields)), dtype=np.uint16
+        )
+        for gaussFieldIndx, alphaDataArray in enumerate(alpha_fields.values()):
+            # Gauss fields not used for this zone are 0
+            if alphaDataArray is not None:
+                for start in range(0, nDefinedCells, chunk_size):
+                    cells = cellIndexDefined[start : start + chunk_size]
+                    alpha_to_fixed_point(
+                        alphaDataArray[cells],
+                        out=alpha_coord_vectors[
+                            start : start + chunk_size, gaussFieldIndx
+                        ],
+                    )
+
+        if self.__useConstProb:
+            faciesProb = np.zeros(nFacies, dtype=np.float32)
+            for f in range(nFacies):
+                faciesProb[f] = probDefined[f]
+            groups = [(faciesProb, np.arange(nDefinedCells))]
+        else:
+            resolution = self.__keyResolution if self.__keyResolution > 0 else 100
+            probabilities = quantize_probabilities(probDefined, resolution)
+            keys, key_index = np.unique(probabilities, axis=0, return_inverse=True)
+            del probabilities
+            key_index = key_index.ravel()
+            order = np.argsort(key_index, kind='stable')
+            ends = np.cumsum(np.bincount(key_index, minlength=len(keys)))
+            groups = [
+                (
+                    key.astype(np.float64) * (1.0 / resolution),
+                    order[end - count : end],
+                )
+                for key, end, count in zip(keys, ends, np.diff(ends, prepend=0))
+            ]
+            self.__memoizationStatistics = MemoizationStatistics(
+                NumCells=nDefinedCells,
+                NumKeys=len(keys),
+                CompressionRatio=nDefinedCells / len(keys) if len(keys) > 0 else 1.0,
+                MaxProbabilityError=0.5 / resolution,
+                MaxTruncationParamError=0.0,
+            )
+            if debug_level >= Debug.VERBOSE:
+                print(
+                    f'-- Memoization: {len(keys)} distinct truncation maps/cubes for {nDefinedCells} cells '
+                    f'(compression ratio: {self.__memoizationStatistics.CompressionRatio:.1f})'
+                )
+
+        volFrac = np.zeros(nFacies, dtype=np.float32)
+        for faciesProb, cells in groups:
+            self.truncation_rule.setTruncRule(faciesProb)
+            for start in range(0, len(cells), chunk_size):
+                selected = cells[start : start + chunk_size]
+                fCode_vector, fIndx_vector = (
+                    self.truncation_rule.defineFaciesByTruncRule_vectorized(
+                        alpha_from_fixed_point(alpha_coord_vectors[selected])
+                    )
+                )
+                faciesReal[cellIndexDefined[selected]] = fCode_vector
+                volFrac += np.bincount(fIndx_vector, minlength=nFacies)[:nFacies]
+
+        if nDefinedCells > 0:
+            volFrac /= float(nDefinedCells)
+        return faciesReal, volFrac
+
     def XMLAddElement(
         self, parent: Element, fmu_attributes: List[FmuAttribute]
     ) -> None:
@@ -1071,8 +1274,26 @@ class APSZoneModel:
             simulation_box_origin,
         )
 
-    def findDistinctTruncationCubes(self, probabilities, num_cells, num_facies):
+    def __setTruncRuleFromMemoizationKey(self, key, num_facies):
+        """Calculate the truncation map/cube for the round-off probabilities
+        and truncation parameters (if any) in the memoization key."""
+        faciesProb = np.array(key[:num_facies])
+        if len(key) > num_facies:
+            self.truncation_rule.setTruncRule(
+                faciesProb, truncParam=np.array(key[num_facies:])
+            )
+        else:
+            self.truncation_rule.setTruncRule(faciesProb)
+
+    def findDistinctTruncationCubes(
+        self, probabilities, num_cells, num_facies, truncation_parameters=None
+    ):
+        """Group the cells sharing the same truncation map/cube.
+        The key is the round-off probabilities, and if the truncation rule has
+        truncation parameters varying from cell to cell (truncation_parameters[cell, param]),
+        the truncation parameters rounded off to truncation_param_resolution are appended to the key."""
         # probabilities_for_selected_grid_cells[cell, facies]
+        original_probabilities = probabilities
         resolution = self.__keyResolution
         if self.__keyResolution <= 0:
             # The value used when memoization is not used
@@ -1112,9 +1333,23 @@ class APSZoneModel:
         # For each unique round-off probability or key, initialize an empty datastructure to keep truncation map/cube
         # and a data set with all grid cell indices for grid cells having the same round-off probabilities.
         # All these grid cells will then share the same truncation map/cube.
+        # Varying truncation parameters are rounded off and appended to the key.
+        max_param_error = 0.0
+        keys = probabilities
+        if truncation_parameters is not None:
+            truncation_parameters = np.asarray(truncation_parameters, dtype=np.float64)
+            parameters = quantize(
+                truncation_parameters, self.truncation_param_resolution
+            )
+            if num_cells > 0:
+                max_param_error = float(
+                    np.max(np.abs(parameters - truncation_parameters))
+                )
+            keys = np.hstack([probabilities, parameters])
+
         memo = {}
         for i in range(num_cells):
-            key = tuple(probabilities[i, :])
+            key = tuple(keys[i, :])
             if key not in memo:
                 # Create new item to keep truncation map/cube
                 memo[key] = MemoizationItem(cell_index=i)
@@ -1123,4 +1358,30 @@ class APSZoneModel:
                 memo[key].add_cell_index(i)
 
         num_maps = len(memo)
+        max_prob_error = 0.0
+        if num_cells > 0:
+            max_prob_error = float(
+                np.max(np.abs(probabilities - original_probabilities))
+            )
+        self.__memoizationStatistics = MemoizationStatistics(
+            NumCells=num_cells,
+            NumKeys=num_maps,
+            CompressionRatio=num_cells / num_maps if num_maps > 0 else 1.0,
+            MaxProbabilityError=max_prob_error,
+            MaxTruncationParamError=max_param_error,
+        )
+        if self.__debug_level >= Debug.VERBOSE:
+            statistics = self.__memoizationStatistics
+            print(
+                f'-- Memoization: {num_maps} distinct truncation maps/cubes for {num_cells} cells '
+                f'(compression ratio: {statistics.CompressionRatio:.1f})'
+            )
+            print(
+                f'-- Memoization: Max round-off error for probabilities: {max_prob_error:.4g}'
+            )
+            if truncation_parameters is not None:
+                print(
+                    '-- Memoization: Max round-off error for truncation parameters: '
+                    f'{max_param_error:.4g} (resolution: {self.truncation_param_resolution})'
+                )
         return memo, num_maps
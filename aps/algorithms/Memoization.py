@@ -1,5 +1,7 @@
 #!/bin/env python
 # -*- coding: utf-8 -*-
+from collections import namedtuple
+
 import numpy as np
 
 
@@ -23,3 +25,75 @@ class MemoizationItem:
 
     def get_cell_indices(self):
         return np.array(list(self.cell_index_set))
+
+
+# Statistics for the keys used for memoization of truncation maps/cubes.
+# The compression ratio is the number of cells per distinct key, and the errors are
+# the largest differences between the values used in the key and the values in the cells.
+MemoizationStatistics = namedtuple(
+    'MemoizationStatistics',
+    [
+        'NumCells',
+        'NumKeys',
+        'CompressionRatio',
+        'MaxProbabilityError',
+        'MaxTruncationParamError',
+    ],
+)
+
+
+def quantize(values, resolution):
+    """Round off the values to the nearest multiple of the resolution.
+    The values are not changed if the resolution is not positive."""
+    if resolution <= 0:
+        return values
+    return np.round(values / resolution) * resolution
+
+
+# Compact representations used by the truncation when compact data types are selected.
+# Alpha values in [0, 1] are stored as uint16 fixed-point values with resolution 1/ALPHA_FIXED_POINT_MAX,
+# and probabilities as the integer number of 1/resolution (the resolution of the memoization key).
+ALPHA_FIXED_POINT_MAX = np.iinfo(np.uint16).max
+# The number of cells converted back to floating point values at the time
+COMPACT_CHUNK_SIZE = 1 << 20
+
+
+def alpha_to_fixed_point(alpha, out=None):
+    """Alpha values in [0, 1] as uint16 fixed-point values."""
+    values = np.clip(alpha, 0.0, 1.0) * ALPHA_FIXED_POINT_MAX + 0.5
+    if out is None:
+        return values.astype(np.uint16)
+    out[...] = values
+    return out
+
+
+def alpha_from_fixed_point(values, dtype=np.float64):
+    """Alpha values from uint16 fixed-point values."""
+    return values.astype(dtype) * (1.0 / ALPHA_FIXED_POINT_MAX)
+
+
+def probability_dtype(resolution):
+    """The smallest unsigned integer type that can hold probabilities in units of 1/resolution."""
+    if resolution <= np.iinfo(np.uint8).max:
+        return np.uint8
+    return np.uint16
+
+
+def quantize_probabilities(probabilities, resolution):
+    """
+    Round off the probabilities (one array per facies) to the nearest multiple of 1/resolution,
+    and return them as integers[cell, facies] in units of 1/resolution.
+    The difference from the sum resolution is added to the largest probability in each cell,
+    such that the round-off probabilities are normalised.
+    """
+    num_cells = len(probabilities[0])
+    quantized = np.empty((num_cells, len(probabilities)), probability_dtype(resolution))
+    for index, values in enumerate(probabilities):
+        quantized[:, index] = np.clip(values, 0.0, 1.0) * resolution + 0.5
+    total = quantized.sum(axis=1, dtype=np.int32)
+    index_max = np.argmax(quantized, axis=1)
+    cells = np.flatnonzero(total != resolution)
+    quantized[cells, index_max[cells]] = (
+        quantized[cells, index_max[cells]].astype(np.int32) + resolution - total[cells]
+    )
+    return quantized
@@ -28,6 +28,16 @@ from aps.algorithms.properties import (
     make_ranged_property,
     CrossSection,
 )
+from aps.algorithms.trend.kernel import (
+    ConicTrendKernel,
+    TrendCells,
+    create_trend_cells,
+    elliptic_distance,
+    geometry_sample_cells,
+    get_trend_cells,
+    hyperbolic_distance,
+)
+from aps.utils.specification_cache import array_key
 from aps.utils.constants.simple import (
     Debug,
     OriginType,
@@ -389,24 +399,6 @@ class Trend3D:
             sim_box_attributes.y_length,
             sim_box_thickness,
         )
-        # For the selected and active cell numbers defined by cell_index_defined
-        # get the cell center points and the ijk indices in simbox indexing system.
-        # Cell center points are in real coordinates, not simbox coordinates.
-        # This is OK in FMU mode since the ERTBOX is used, and is OK for grid
-        # that does not have dual grid indexing. The only case where grid cell position
-        # is calculated explicitly in simbox is when running without FMU AHM mode
-        # and the grid has reverse staircase faults (dual index system).
-        cell_center_points = None
-        ijk_cell_indices = grid_indexer.get_indices(cell_index_defined)
-        if grid_3d.has_dual_index_system:
-            # Do not use cell center points (since they come from the real grid)
-            # but use x,y coordinates from simulation box coordinate system
-            cell_center_points = sim_box_attributes.calculate_cell_center_points(
-                ijk_cell_indices
-            )
-        else:
-            cell_center_points = grid_3d.get_cell_centers(cell_index_defined)
-
         zonation = grid_indexer.zonation
         layer_ranges = zonation[zone_number - 1]
         # In simbox there is only one interval of layers per zone and they
@@ -513,15 +505,59 @@ class Trend3D:
             if not keep_temporary_trend_param:
                 del grid_model.properties[trend_param_name]
         else:
-            num_defined_cells = len(cell_index_defined)
-            values_in_selected_cells = np.zeros(num_defined_cells, np.float32)
+
+            def create_trend_cells_for_grid(key):
+                # For the selected and active cell numbers defined by cell_index_defined
+                # get the cell center points and the ijk indices in simbox indexing system.
+                # Cell center points are in real coordinates, not simbox coordinates.
+                # This is OK in FMU mode since the ERTBOX is used, and is OK for grid
+                # that does not have dual grid indexing. The only case where grid cell position
+                # is calculated explicitly in simbox is when running without FMU AHM mode
+                # and the grid has reverse staircase faults (dual index system).
+                ijk_cell_indices = grid_indexer.get_indices(cell_index_defined)
+                if grid_3d.has_dual_index_system:
+                    # Do not use cell center points (since they come from the real grid)
+                    # but use x,y coordinates from simulation box coordinate system
+                    cell_center_points = (
+                        sim_box_attributes.calculate_cell_center_points(
+                            ijk_cell_indices
+                        )
+                    )
+                else:
+                    cell_center_points = grid_3d.get_cell_centers(cell_index_defined)
+                return create_trend_cells(
+                    cell_center_points,
+                    ijk_cell_indices[:, 2],
+                    sim_box_attributes.x0,
+                    sim_box_attributes.y0,
+                    key,
+                )
+
+            # The cells are shared by all trends for the same grid cells and geometry
+            geometry = {
+                'dimensions': [nx, ny, nz],
+                'sim_box': [
+                    sim_box_attributes.x0,
+                    sim_box_attributes.y0,
+                    sim_box_attributes.azimuth_angle,
+                    sim_box_attributes.x_length,
+                    sim_box_attributes.y_length,
+                ],
+                'dual_index': grid_3d.has_dual_index_system,
+                'cell_centers': array_key(
+                    grid_3d.get_cell_centers(geometry_sample_cells(cell_index_defined))
+                ),
+            }
+            cells = get_trend_cells(
+                grid_model.name,
+                realization_number,
+                cell_index_defined,
+                geometry,
+                create_trend_cells_for_grid,
+            )
             parameters_for_trend_calc = self._calculateTrendModelParam()
-            index_vector = np.arange(num_defined_cells)
-            x_vec = cell_center_points[index_vector, 0]
-            y_vec = cell_center_points[index_vector, 1]
-            k_vec = ijk_cell_indices[index_vector, 2]
             values_in_selected_cells = self._trendValueCalculation_vectorized(
-                parameters_for_trend_calc, x_vec, y_vec, k_vec, zinc
+                parameters_for_trend_calc, cells, zinc
             )
         if len(values_in_selected_cells) > 0:
             min_value = values_in_selected_cells.min()
@@ -844,13 +880,13 @@ class Trend3D_linear(Trend3D):
         return self._linearTrendFunction(parameters_for_trend_calc, xRel, yRel, zRel)
 
     def _trendValueCalculation_vectorized(
-        self, parameters_for_trend_calc, x_vec, y_vec, k_vec, zinc
+        self, parameters_for_trend_calc, cells: TrendCells, zinc
     ):
         # Calculate trend value for point(x,y,z) relative to origin defined by (xCenter, yCenter,zCenter)
         # Here only a shift in the global x,y coordinates are done. The z coordinate is relative to simulation box.
-        zRel_vec = (k_vec - self._start_layer + 0.5) * zinc - self._z_center
-        xRel_vec = x_vec - self._x_center
-        yRel_vec = y_vec - self._y_center
+        zRel_vec = (cells.layer - self._start_layer + 0.5) * zinc - self._z_center
+        xRel_vec = cells.x - np.float32(self._x_center - cells.x_origin)
+        yRel_vec = cells.y - np.float32(self._y_center - cells.y_origin)
         return self._linearTrendFunction_vectorized(
             parameters_for_trend_calc, xRel_vec, yRel_vec, zRel_vec
         )
@@ -1184,6 +1220,18 @@ class Trend3D_conic(Trend3D):
         )
         return representation
 
+    def _conicTrendKernel(
+        self, parameters_for_trend_calc, cells: TrendCells, zinc: float
+    ) -> Tuple[ConicTrendKernel, np.ndarray]:
+        # The cell coordinates rotated by azimuth around the trend center are shared by
+        # all conic trends with the same center and azimuth. Returns the kernel and the
+        # depth of each simulation box layer relative to the trend center.
+        sin_theta, cos_theta = parameters_for_trend_calc[:2]
+        kernel = ConicTrendKernel.get(
+            cells, self._x_center, self._y_center, sin_theta, cos_theta
+        )
+        return kernel, kernel.layer_depths(self._start_layer, zinc, self._z_center)
+
 
 ConicTrend = Trend3D_conic
 
@@ -1343,18 +1391,14 @@ class Trend3D_elliptic(Trend3D_conic):
         return self._ellipticTrendFunction(parameters_for_trend_calc, x1, y1, z1)
 
     def _trendValueCalculation_vectorized(
-        self, parameters_for_trend_calc, x_vec, y_vec, k_vec, zinc
+        self, parameters_for_trend_calc, cells: TrendCells, zinc
     ):
         # Elliptic
 
-        # Calculate x,y,z in sim box coordinates with origin in reference point
-        z1_vec = (k_vec - self._start_layer + 0.5) * zinc - self._z_center
-        x1_vec = x_vec - self._x_center
-        y1_vec = y_vec - self._y_center
-
         # Calculate trend value for point(x,y,z) relative to reference point (xCenter, yCenter, zCenter)
         return self._ellipticTrendFunction_vectorized(
-            parameters_for_trend_calc, x1_vec, y1_vec, z1_vec
+            parameters_for_trend_calc,
+            *self._conicTrendKernel(parameters_for_trend_calc, cells, zinc),
         )
 
     def _trendValueCalculationSimBox(
@@ -1404,27 +1448,15 @@ class Trend3D_elliptic(Trend3D_conic):
     @staticmethod
     def _ellipticTrendFunction_vectorized(
         parameters_for_trend_calc: Tuple[float, float, float, float, float],
-        x_vec,
-        y_vec,
-        z_vec,
+        kernel: ConicTrendKernel,
+        layer_depths: np.ndarray,
     ):
-        # Input(x,y,z) must be relative to reference point(xCenter, yCenter, zCenter)
-        sin_theta, cos_theta, tan_alpha, a, b = parameters_for_trend_calc
-        index_vec = np.arange(len(z_vec))
-        selected = index_vec[z_vec != 0]
-        L = np.zeros(len(z_vec), np.float32)
-        x_center = np.zeros(len(z_vec), np.float32)
-        y_center = np.zeros(len(z_vec), np.float32)
-
-        L[selected] = z_vec[selected] * tan_alpha
-        x_center[selected] = -L[selected] * sin_theta
-        y_center[selected] = -L[selected] * cos_theta
-
-        x_rel = x_vec - x_center
-        y_rel = y_vec - y_center
-        x_rotated = x_rel * cos_theta - y_rel * sin_theta
-        y_rotated = x_rel * sin_theta + y_rel * cos_theta
-        return np.sqrt(np.square(x_rotated / a) + np.square(y_rotated / b))
+        # The center point is shifted L = z * tan_alpha in azimuth direction,
+        # which only shifts the rotated y coordinate.
+        _, _, tan_alpha, a, b = parameters_for_trend_calc
+        x_rotated = kernel.rotated_x(layer_depths, 0.0)
+        y_rotated = kernel.rotated_y(layer_depths, tan_alpha)
+        return elliptic_distance(x_rotated, y_rotated, a, b)
 
     def _calculateTrendModelParam(
         self, use_relative_azimuth: bool = False
@@ -1560,18 +1592,14 @@ class Trend3D_hyperbolic(Trend3D_conic):
         return self._hyperbolicTrendFunction(parameters_for_trend_calc, x1, y1, z1)
 
     def _trendValueCalculation_vectorized(
-        self, parameters_for_trend_calc, x_vec, y_vec, k_vec, zinc
+        self, parameters_for_trend_calc, cells: TrendCells, zinc
     ):
         # Hyperbolic
 
-        # Calculate x,y,z in sim box coordinates with origin in reference point
-        z1_vec = (k_vec - self._start_layer + 0.5) * zinc - self._z_center
-        x1_vec = x_vec - self._x_center
-        y1_vec = y_vec - self._y_center
-
         # Calculate trend value for point(x,y,z) relative to reference point (xCenter, yCenter, zCenter)
         return self._hyperbolicTrendFunction_vectorized(
-            parameters_for_trend_calc, x1_vec, y1_vec, z1_vec
+            parameters_for_trend_calc,
+            *self._conicTrendKernel(parameters_for_trend_calc, cells, zinc),
         )
 
     def _trendValueCalculationSimBox(
@@ -1631,43 +1659,19 @@ class Trend3D_hyperbolic(Trend3D_conic):
 
     @staticmethod
     def _hyperbolicTrendFunction_vectorized(
-        parameters_for_trend_calc: HyperbolicTrendParameters, x_vec, y_vec, z_vec
+        parameters_for_trend_calc: HyperbolicTrendParameters,
+        kernel: ConicTrendKernel,
+        layer_depths: np.ndarray,
     ):
         # Hyperbolic
-        sin_theta, cos_theta, tan_alpha, tan_beta, a, b = parameters_for_trend_calc
+        _, _, tan_alpha, tan_beta, a, b = parameters_for_trend_calc
 
-        # The center point is changed by depth. There are two angles that can specify this
-        # The angle alpha (which is 90 -stacking angle) will shift the center point along azimuth direction.
-        # The angle beta (migration angle) will shift the center point orthogonal to azimuth direction.
-        # First shift the center point in azimuth direction
-        L = -z_vec * tan_alpha
-        x_center = L * sin_theta
-        y_center = L * cos_theta
-
-        # Secondly, shift the center point further, but now orthogonal to azimuth direction.
-        L = -z_vec * tan_beta
-        x_center = L * cos_theta + x_center
-        y_center = -L * sin_theta + y_center
-
-        x_rel = x_vec - x_center
-        y_rel = y_vec - y_center
-        x_rotated_by_theta = x_rel * cos_theta - y_rel * sin_theta
-        y_rotated_by_theta = x_rel * sin_theta + y_rel * cos_theta
-
-        zero_point = np.zeros(len(x_rotated_by_theta), np.float32)
-        index_vec = np.arange(len(x_rotated_by_theta))
-
-        selected = index_vec[x_rotated_by_theta > 0]
-        zero_point[selected] = a * np.sqrt(
-            1 + np.square(y_rotated_by_theta[selected] / b)
-        )
-
-        selected = index_vec[x_rotated_by_theta <= 0]
-        zero_point[selected] = -a * np.sqrt(
-            1 + np.square(y_rotated_by_theta[selected] / b)
-        )
-
-        return 1.0 - np.abs(x_rotated_by_theta / zero_point)
+        # The center point is shifted L = -z * tan_alpha in azimuth direction and
+        # L = -z * tan_beta orthogonal to azimuth direction (see _hyperbolicTrendFunction),
+        # which shifts the rotated coordinates by z * tan_beta and z * tan_alpha.
+        x_rotated_by_theta = kernel.rotated_x(layer_depths, tan_beta)
+        y_rotated_by_theta = kernel.rotated_y(layer_depths, tan_alpha)
+        return hyperbolic_distance(x_rotated_by_theta, y_rotated_by_theta, a, b)
 
     def _calculateTrendModelParam(
         self, use_relative_azimuth: bool = False
@@ -2187,18 +2191,15 @@ class Trend3D_elliptic_cone(Trend3D_conic):
         )
 
     def _trendValueCalculation_vectorized(
-        self, parameters_for_trend_calc, x_vec, y_vec, k_vec, zinc
+        self, parameters_for_trend_calc, cells: TrendCells, zinc
     ):
         # Elliptic cone
 
-        # Calculate x,y,z in sim box coordinates with origin in reference point
-        z1 = (k_vec - self._start_layer + 0.5) * zinc - self._z_center
-        x1 = x_vec - self._x_center
-        y1 = y_vec - self._y_center
-
         # Calculate trend value for point(x,y,z) relative to reference point (xCenter, yCenter, zCenter)
         return self._ellipticConeTrendFunction_vectorized(
-            parameters_for_trend_calc, x1, y1, z1, zinc
+            parameters_for_trend_calc,
+            *self._conicTrendKernel(parameters_for_trend_calc, cells, zinc),
+            zinc,
         )
 
     def _trendValueCalculationSimBox(
@@ -2266,44 +2267,32 @@ class Trend3D_elliptic_cone(Trend3D_conic):
     def _ellipticConeTrendFunction_vectorized(
         self,
         parameters_for_trend_calc: HyperbolicTrendParameters,
-        x_vec,
-        y_vec,
-        z_vec,
+        kernel: ConicTrendKernel,
+        layer_depths: np.ndarray,
         zinc: Union[int, float],
     ):
         # Elliptic cone
-        sin_theta, cos_theta, tan_alpha, tan_beta, a, _ = parameters_for_trend_calc
+        _, _, tan_alpha, tan_beta, a, _ = parameters_for_trend_calc
 
         z_top = 0.0
         z_thickness = (self._end_layer - self._start_layer + 1) * zinc
 
+        # The size of the ellipse (a, and b = a * curvature) changes linearly with depth
         a_base = a
         a_top = a * self.relative_size_of_ellipse.value
         da = a_base - a_top
-        a = a_top + da * (z_vec - z_top) / z_thickness
-        b = a * self.curvature.value
-
-        # The center point is changed by depth. There are two angles that can specify this
-        # The angle alpha (which is 90 -stacking angle) will shift the center point along azimuth direction.
-        # The angle beta (migration angle) will shift the center point orthogonal to azimuth direction.
-        # First shift the center point in azimuth direction
-        L = -z_vec * tan_alpha
-        x_center = L * sin_theta
-        y_center = L * cos_theta
-
-        # Secondly, shift the center point further, but now orthogonal to azimuth direction.
-        L = z_vec * tan_beta
-        x_center = L * cos_theta + x_center
-        y_center = -L * sin_theta + y_center
-
-        x_rel = x_vec - x_center
-        y_rel = y_vec - y_center
-        x_rotated_by_theta = x_rel * cos_theta - y_rel * sin_theta
-        y_rotated_by_theta = x_rel * sin_theta + y_rel * cos_theta
-
-        return np.sqrt(
-            np.square(x_rotated_by_theta / a) + np.square(y_rotated_by_theta / b)
+        a_in_layers = a_top + da * (layer_depths - z_top) / z_thickness
+
+        # The center point is shifted L = -z * tan_alpha in azimuth direction and
+        # L = z * tan_beta orthogonal to azimuth direction (see _ellipticConeTrendFunction),
+        # which shifts the rotated coordinates by -z * tan_beta and z * tan_alpha.
+        x_rotated_by_theta = kernel.rotated_x(layer_depths, -tan_beta)
+        y_rotated_by_theta = kernel.rotated_y(layer_depths, tan_alpha)
+        values = elliptic_distance(
+            x_rotated_by_theta, y_rotated_by_theta, 1.0, self.curvature.value
         )
+        values *= kernel.per_layer(1.0 / np.abs(a_in_layers))
+        return values
 
     def _calculateTrendModelParam(
         self, use_relative_azimuth: bool = False
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""Shared evaluation kernels for the conic (elliptic, hyperbolic and elliptic cone) trends.
+
+The conic trends rotate the cell coordinates by the trend azimuth around the trend center,
+and move the center of the cone with depth. Since moving the center is a translation, and the
+rotation is orthogonal, the rotated coordinates of a cell are
+
+    x_rotated = u + z * slope_x
+    y_rotated = v + z * slope_y
+
+where (u, v) is the position of the cell relative to the trend center rotated by the azimuth,
+and z is the depth of the layer relative to the trend center. The slopes are defined by the
+stacking and migration angles. (u, v) is therefore calculated once for each set of grid cells,
+trend center and azimuth, and is shared by all gaussian fields, in this and in other zones
+using the same grid cells, with a trend of the same origin and azimuth.
+The depth dependent terms only depend on the layer, and are calculated once per layer.
+
+The cached cells are keyed on the grid model, the realization, the selected cells and a fingerprint
+of the grid geometry (see geometry_sample_cells). Edits of the grid that do not change the fingerprint
+are not detected, and the cache is scoped to a job by with_trend_kernel_cache.
+"""
+
+from collections import namedtuple
+from functools import wraps
+from typing import Any, Callable
+
+import numpy as np
+
+from aps.utils.specification_cache import (
+    SpecificationCache,
+    array_key,
+    specification_key,
+)
+
+# x and y coordinates (float32) of the grid cells, relative to (x_origin, y_origin),
+# and simulation box layer number of the cells. The key identifies the grid cells.
+TrendCells = namedtuple('TrendCells', 'x y layer x_origin y_origin key')
+
+# Number of cells whose center points are part of the fingerprint of the grid geometry
+GEOMETRY_SAMPLE_SIZE = 64
+
+_CELLS_CACHE = SpecificationCache(max_size=1)
+_KERNEL_CACHE = SpecificationCache(max_size=4)
+
+
+def create_trend_cells(
+    cell_center_points: np.ndarray,
+    layers: np.ndarray,
+    x_origin: float,
+    y_origin: float,
+    key: str,
+) -> TrendCells:
+    # The coordinates are made relative to the origin before they are
+    # converted to float32, to keep the precision of large (UTM) coordinates
+    x = (cell_center_points[:, 0] - x_origin).astype(np.float32)
+    y = (cell_center_points[:, 1] - y_origin).astype(np.float32)
+    layer_type = np.min_scalar_type(layers.max()) if len(layers) > 0 else np.uint8
+    return TrendCells(x, y, layers.astype(layer_type), x_origin, y_origin, key)
+
+
+def geometry_sample_cells(cell_index_defined: np.ndarray) -> np.ndarray:
+    """Evenly spaced cells, including the first and the last, of the selected cells.
+    The center points of these cells are used as a fingerprint of the grid geometry."""
+    if len(cell_index_defined) <= GEOMETRY_SAMPLE_SIZE:
+        return cell_index_defined
+    return cell_index_defined[
+        np.linspace(0, len(cell_index_defined) - 1, GEOMETRY_SAMPLE_SIZE).astype(int)
+    ]
+
+
+def get_trend_cells(
+    grid_model_name: str,
+    realization_number: int,
+    cell_index_defined: np.ndarray,
+    geometry: Any,
+    create: Callable[[str], TrendCells],
+) -> TrendCells:
+    """The grid cells selected by cell_index_defined, which are only fetched
+    by create(key) when they are not the same as in the previous call.
+    geometry is a (JSON serializable) fingerprint of the grid geometry, such as the simulation box
+    and the center points of the cells from geometry_sample_cells, and cells of a modified grid are fetched again."""
+    specification = {
+        'grid_model': grid_model_name,
+        'realization': realization_number,
+        'cells': array_key(cell_index_defined),
+        'geometry': geometry,
+    }
+    return _CELLS_CACHE.get(
+        specification, lambda _: create(specification_key(specification))
+    )
+
+
+def clear_trend_kernel_cache() -> None:
+    _CELLS_CACHE.clear()
+    _KERNEL_CACHE.clear()
+
+
+def with_trend_kernel_cache(func):
+    """Scope the trend kernel cache to a job: the cache is cleared when the job starts,
+    since the grid may have changed since the last job, and when it ends, also by an error,
+    such that the grid cells are not kept in memory after the job."""
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        clear_trend_kernel_cache()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            clear_trend_kernel_cache()
+
+    return wrapper
+
+
+class ConicTrendKernel:
+    """Grid cell coordinates relative to a trend center, rotated by the trend azimuth."""
+
+    __slots__ = ('_u', '_v', '_layer')
+
+    def __init__(
+        self,
+        cells: TrendCells,
+        x_center: float,
+        y_center: float,
+        sin_theta: float,
+        cos_theta: float,
+    ):
+        x_rel = np.subtract(cells.x, x_center - cells.x_origin, dtype=np.float32)
+        y_rel = np.subtract(cells.y, y_center - cells.y_origin, dtype=np.float32)
+        sin_theta = np.float32(sin_theta)
+        cos_theta = np.float32(cos_theta)
+        self._u = x_rel * cos_theta
+        rotated = y_rel * sin_theta
+        self._u -= rotated
+        np.multiply(x_rel, sin_theta, out=rotated)
+        y_rel *= cos_theta
+        y_rel += rotated
+        self._v = y_rel
+        self._layer = cells.layer
+
+    @classmethod
+    def get(
+        cls,
+        cells: TrendCells,
+        x_center: float,
+        y_center: float,
+        sin_theta: float,
+        cos_theta: float,
+    ) -> 'ConicTrendKernel':
+        """The (cached) kernel of the grid cells for the given trend center and azimuth."""
+        specification = {
+            'cells': cells.key,
+            'center': [float(x_center), float(y_center)],
+            'azimuth': [float(sin_theta), float(cos_theta)],
+        }
+        return _KERNEL_CACHE.get(
+            specification,
+            lambda _: cls(cells, x_center, y_center, sin_theta, cos_theta),
+        )
+
+    def layer_depths(
+        self, start_layer: int, zinc: float, z_center: float
+    ) -> np.ndarray:
+        """Depth relative to the trend center of the center of each layer
+        (numbered from the top of the simulation box)."""
+        num_layers = int(self._layer.max()) + 1 if len(self._layer) > 0 else 0
+        return (np.arange(num_layers) - start_layer + 0.5) * zinc - z_center
+
+    def per_layer(self, values_in_layers: np.ndarray) -> np.ndarray:
+        """Values for each cell from values for each layer (as float32)."""
+        return np.take(values_in_layers.astype(np.float32), self._layer)
+
+    def rotated_x(self, layer_depths: np.ndarray, slope: float) -> np.ndarray:
+        """The rotated x coordinate, u + z * slope, as a new array."""
+        return self._shifted(self._u, layer_depths, slope)
+
+    def rotated_y(self, layer_depths: np.ndarray, slope: float) -> np.ndarray:
+        """The rotated y coordinate, v + z * slope, as a new array."""
+        return self._shifted(self._v, layer_depths, slope)
+
+    def _shifted(
+        self, coordinates: np.ndarray, layer_depths: np.ndarray, slope: float
+    ) -> np.ndarray:
+        if slope == 0.0:
+            return coordinates.copy()
+        shifted = self.per_layer(layer_depths * slope)
+        shifted += coordinates
+        return shifted
+
+    def __len__(self) -> int:
+        return len(self._u)
+
+
+def elliptic_distance(x_rotated: np.ndarray, y_rotated: np.ndarray, a, b) -> np.ndarray:
+    """sqrt((x / a)^2 + (y / b)^2), calculated in place in x_rotated and y_rotated."""
+    x_rotated /= np.float32(a)
+    np.square(x_rotated, out=x_rotated)
+    y_rotated /= np.float32(b)
+    np.square(y_rotated, out=y_rotated)
+    x_rotated += y_rotated
+    return np.sqrt(x_rotated, out=x_rotated)
+
+
+def hyperbolic_distance(
+    x_rotated: np.ndarray, y_rotated: np.ndarray, a, b
+) -> np.ndarray:
+    """1 - |x| / (a * sqrt(1 + (y / b)^2)), calculated in place in x_rotated and y_rotated."""
+    y_rotated /= np.float32(b)
+    np.square(y_rotated, out=y_rotated)
+    y_rotated += np.float32(1.0)
+    np.sqrt(y_rotated, out=y_rotated)
+    y_rotated *= np.float32(a)
+    np.abs(x_rotated, out=x_rotated)
+    x_rotated /= y_rotated
+    return np.subtract(np.float32(1.0), x_rotated, out=x_rotated)
@@ -51,7 +51,8 @@ class Trunc2D_Angle(Trunc2D_Base):
                     backGroundFaciesGroups, overlayFacies, overlayTruncCenter,
                     useConstTruncParam, debug_level)
      def getTruncationParam(self, get3DParamFunction, gridModel, realNumber)
-     def setTruncRule(self, faciesProb, cellIndx=0)
+     def setTruncRule(self, faciesProb, cellIndx=0, truncParam=None)
+     def getTruncationParamValues(self, cellIndx)
      def getClassName(self)
      def useConstTruncModelParam(self)
      def getNCountShiftAlpha(self)
@@ -434,7 +435,7 @@ class Trunc2D_Angle(Trunc2D_Base):
         """
         return [[0, 0], [0, 0.0001], [0.0001, 0.0001], [0, 0.0001], [0, 0]]
 
-    def __setFaciesLines(self, cellIndx):
+    def __setFaciesLines(self, cellIndx, truncParam=None):
         """
         Description:
         Input: Facies names and direction angles
@@ -490,6 +491,9 @@ class Trunc2D_Angle(Trunc2D_Base):
             # The angle is constant, not varying from cell to cell
             # The list self.__faciesBoundaryOrientation is one angle per polygon specified.
             faciesAlpha = self.__faciesBoundaryOrientation
+        elif truncParam is not None:
+            # The angles are specified, typically round off values used for memoization
+            faciesAlpha = list(truncParam)
         else:
             # The angle is constant, not varying from cell to cell
             # The list self.__faciesBoundaryOrientation is a list of arrays.
@@ -797,10 +801,17 @@ class Trunc2D_Angle(Trunc2D_Base):
 
         return outputPolyA, outputPolyB, closestPolygon
 
-    def setTruncRule(self, faciesProb: List[float], cellIndx: int = 0) -> None:
+    def setTruncRule(
+        self,
+        faciesProb: List[float],
+        cellIndx: int = 0,
+        truncParam: Optional[np.ndarray] = None,
+    ) -> None:
         """
         Description:
         Input: Facies names, direction angles for facies boundary lines and facies probabilities.
+               If truncParam is specified, these direction angles are used instead of the
+               angles for grid cell cellIndx when the angles vary from cell to cell.
         Output: A set of polygons that define the area for each facies
                 within the truncation map.
         """
@@ -827,17 +838,17 @@ class Trunc2D_Angle(Trunc2D_Base):
         area = self._modifyBackgroundFaciesArea(faciesProbRoundOff)
         # Call methods specific for this truncation rule with corrected area due to overprint facies
         # Calculate polygons the truncation map is divided into
-        polygons = self.__calculateFaciesPolygons(cellIndx, area)
+        polygons = self.__calculateFaciesPolygons(cellIndx, area, truncParam)
         self._faciesPolygons = polygons
 
-    def __calculateFaciesPolygons(self, cellIndx, area):
+    def __calculateFaciesPolygons(self, cellIndx, area, truncParam=None):
         """
         Description:  Calculate polygons in truncation map for given facies fraction (area)
         The result is saved in the internal variable self._faciesPolygons
         """
 
         # Call methods specific for this truncation rule with corrected area due to overprint facies
-        self.__setFaciesLines(cellIndx)
+        self.__setFaciesLines(cellIndx, truncParam)
         initialPolygon = self.__setUnitSquarePolygon()
         polygon = copy.copy(initialPolygon)
         nPolygons = self.num_polygons
@@ -909,6 +920,18 @@ class Trunc2D_Angle(Trunc2D_Base):
     def useConstTruncModelParam(self):
         return self.__useConstTruncModelParam
 
+    def getTruncationParamValues(self, cellIndx: np.ndarray) -> np.ndarray:
+        """Direction angles for the facies boundary lines for the grid cells cellIndx.
+        Returns an array with one row per grid cell and one column per polygon,
+        which is used as truncParam in setTruncRule. Requires that the angles vary from cell to cell."""
+        assert not self.__useConstTruncModelParam
+        return np.column_stack(
+            [
+                np.asarray(values)[cellIndx]
+                for values in self.__faciesBoundaryOrientation
+            ]
+        )
+
     def getNCountShiftAlpha(self) -> int:
         return self._nCountShiftBoundary
 
@@ -29,6 +29,7 @@ Description: This class is used as a base class for class Trunc2D_Cubic_Multi_Ov
    def __checkProbFrac(self)
    def __checkCenterTruncInterval(self)
    def __calcGroupIndxForBGFacies(self)
+   def __calcOverlayTruncationTables(self)
    def __addAlpha(self,alphaName,createErrorIfExist=False)
    def __interpretXMLTree_read_gauss_field_names(self,trRuleXML, gaussFieldsInZone, modelFileName)
    def __isFaciesInZone(self, fName)
@@ -44,6 +45,9 @@ Description: This class is used as a base class for class Trunc2D_Cubic_Multi_Ov
    def _setMinimumFaciesProb(self, faciesProb)
    def _modifyBackgroundFaciesArea(self, faciesProb)
    def _truncateOverlayFacies(self, indx, alphaCoord)
+   def _truncateOverlayFacies_vectorized(self, bg_index_in_trunc_rule, alpha_coord_vectors)
+   def _deterministic_facies_vectorized(self, alpha_coord_vectors)
+   def _facies_from_background_index_vectorized(self, bg_index_vector, alpha_coord_vectors)
    def _XMLAddElement(self, parent)
 
  Public functions:
@@ -200,6 +204,17 @@ class Trunc2D_Base:
         # different background facies while other overlay facies is limited to only a few background facies.
         self._overlayFaciesIndxInGroup = []
 
+        # Tables with the truncation intervals for overlay facies used in the vectorized truncation.
+        # Each table is a 2D array where the first index is the background facies index in faciesInTruncRule
+        # and the second index i refer to the alpha field in the group the background facies belongs to.
+        # The tables are padded with empty truncation intervals for background facies not belonging to any group
+        # and for groups having fewer alpha fields than the largest group.
+        # The tables are recalculated for each truncation map together with self._lowAlphaInGroup.
+        self._overlayAlphaIndxTable = None
+        self._overlayLowAlphaTable = None
+        self._overlayHighAlphaTable = None
+        self._overlayFaciesIndxTable = None
+
         # A 2D list with probability fractions for each overlay facies that is specified in any
         # group  (groupIndx) and for any alpha field (i) in the group.
         # The list elements are probFrac = self._probFracOverlayFacies[groupIndx][i]
@@ -496,6 +511,33 @@ class Trunc2D_Base:
                 indx = self._backgroundFaciesInGroup[groupIndx][i]
                 self._groupIndxForBackGroundFaciesIndx[indx] = groupIndx
 
+    def __calcOverlayTruncationTables(self) -> None:
+        """Collect the truncation intervals for overlay facies into tables indexed by background facies index,
+        such that the overlay facies for many grid cells can be found without loops over groups and alpha fields."""
+        nBackGroundFacies = len(self._groupIndxForBackGroundFaciesIndx)
+        nAlphaMax = max(len(alphaList) for alphaList in self._alphaInGroup)
+        self._overlayAlphaIndxTable = np.zeros(
+            (nBackGroundFacies, nAlphaMax), dtype=int
+        )
+        self._overlayLowAlphaTable = np.full((nBackGroundFacies, nAlphaMax), np.inf)
+        self._overlayHighAlphaTable = np.full((nBackGroundFacies, nAlphaMax), -np.inf)
+        self._overlayFaciesIndxTable = np.zeros(
+            (nBackGroundFacies, nAlphaMax), dtype=int
+        )
+        for indx in range(nBackGroundFacies):
+            groupIndx = self._groupIndxForBackGroundFaciesIndx[indx]
+            if groupIndx < 0:
+                continue
+            nAlpha = len(self._alphaInGroup[groupIndx])
+            self._overlayAlphaIndxTable[indx, :nAlpha] = self._alphaInGroup[groupIndx]
+            self._overlayLowAlphaTable[indx, :nAlpha] = self._lowAlphaInGroup[groupIndx]
+            self._overlayHighAlphaTable[indx, :nAlpha] = self._highAlphaInGroup[
+                groupIndx
+            ]
+            self._overlayFaciesIndxTable[indx, :nAlpha] = (
+                self._overlayFaciesIndxInGroup[groupIndx]
+            )
+
     def __addAlpha(self, alphaName: str, createErrorIfExist: bool = False) -> int:
         """
         Check that alphaName is a valid name of a gauss field for the zone.
@@ -1229,6 +1271,7 @@ Background facies:
             # End if sumprob of group is 0
             self._lowAlphaInGroup.append(lowAlphaThisGroup)
             self._highAlphaInGroup.append(highAlphaThisGroup)
+        self.__calcOverlayTruncationTables()
         if self._debug_level >= Debug.VERY_VERY_VERBOSE:
             if self._lowAlphaInGroup:
                 print('--- Low threshold values for overlay facies:')
@@ -1348,48 +1391,28 @@ Background facies:
         """
         order_index = np.asarray(self._orderIndex)
         facies_codes = np.asarray(self._faciesCode)
-        index_vector = bg_index_in_trunc_rule
-        num_index_values = index_vector.max() + 1
-        group_index_for_bg_facies_index = np.asarray(
-            self._groupIndxForBackGroundFaciesIndx
+        bg_index_vector = np.asarray(bg_index_in_trunc_rule)
+
+        # The truncation intervals for overlay facies for each grid cell are looked up in the tables
+        # for the background facies of the grid cell. Background facies not belonging to any group
+        # have only empty truncation intervals.
+        alpha_values = np.take_along_axis(
+            alpha_coord_vectors, self._overlayAlphaIndxTable[bg_index_vector], axis=1
+        )
+        inside_truncation_interval = (
+            alpha_values > self._overlayLowAlphaTable[bg_index_vector]
+        ) & (alpha_values <= self._overlayHighAlphaTable[bg_index_vector])
+
+        # The sequence of alpha fields in a group define the priority of the overlay facies,
+        # such that the first alpha field with the value inside the truncation interval define the facies.
+        first_alpha = np.argmax(inside_truncation_interval, axis=1)
+        cells = np.arange(len(bg_index_vector))
+        is_overlay_facies = inside_truncation_interval[cells, first_alpha]
+        index_vector = np.where(
+            is_overlay_facies,
+            self._overlayFaciesIndxTable[bg_index_vector, first_alpha],
+            bg_index_vector,
         )
-        groupIndx_vector = group_index_for_bg_facies_index[index_vector]
-        for m in range(num_index_values):
-            # Lookup which overlay group the background facies faciesInTruncRule[indx] belongs to if any.
-
-            groupIndx = self._groupIndxForBackGroundFaciesIndx[m]
-            if groupIndx >= 0:
-                index_selected = index_vector == m
-                num_selected = index_selected.sum()
-                # The background facies is defined by the input variable 'indx' and the facies name is
-                # faciesInTruncRule[indx]. This background facies belongs to the group with index groupIndx.
-                # The overlay facies in this group may overprint the background facies.
-                # The sequence of overlay facies is determined by the sequence
-                #  of alpha fields. So the sequence of alpha fields defined by the alphaInGroup and the corresponding
-                # sequence of facies define the internal priority of which overlay facies is truncated or not by the
-                # other overlay facies in this group. Note that overlay facies from different groups are independent of
-                # each other. This code can be extended to have multiple overlay facies defined by the same alpha field,
-                # by calculating threshold values for the alpha value for each facies, but so far only one overlay facies
-                # is defined for each alpha field.
-                set_overlay_facies_index = np.zeros(len(index_vector), dtype=int)
-                nAlpha = len(self._alphaInGroup[groupIndx])
-                for i in range(nAlpha):
-                    alphaIndx = self._alphaInGroup[groupIndx][i]
-                    alphaValue = alpha_coord_vectors[:, alphaIndx]
-
-                    # Check if value is within the interval which define the overlay facies.
-                    # Note that the loop over all alpha fields define the sequence in which the overlay facies is defined
-                    inside_truncation_interval = (
-                        index_selected
-                        & (alphaValue > self._lowAlphaInGroup[groupIndx][i])
-                        & (alphaValue <= self._highAlphaInGroup[groupIndx][i])
-                    )
-                    set_overlay_facies_index = (
-                        set_overlay_facies_index == False
-                    ) & inside_truncation_interval
-                    index_vector[set_overlay_facies_index] = (
-                        self._overlayFaciesIndxInGroup[groupIndx][i]
-                    )
 
         fIndx_vector = order_index[index_vector]
         faciesCode_vector = facies_codes[fIndx_vector]
@@ -1666,23 +1689,9 @@ Background facies:
         Description: Apply the truncation rule to find facies.
         """
         # Check if the facies is deterministic (100% probability)
-        for fIndx in range(len(self._faciesInZone)):
-            if self._faciesIsDetermined[fIndx]:
-                facies_code = self._faciesCode[fIndx]
-                fIndx_vector = (
-                    np.ones(
-                        len(alpha_coord_vectors[:, self._alphaIndxList[0]]), dtype=int
-                    )
-                    * fIndx
-                )
-                faciesCode_vector = (
-                    np.ones(
-                        len(alpha_coord_vectors[:, self._alphaIndxList[0]]),
-                        dtype=np.uint8,
-                    )
-                    * facies_code
-                )
-                return faciesCode_vector, fIndx_vector
+        determined = self._deterministic_facies_vectorized(alpha_coord_vectors)
+        if determined is not None:
+            return determined
 
         x_coordinates = alpha_coord_vectors[:, self._alphaIndxList[0]]
         y_coordinates = alpha_coord_vectors[:, self._alphaIndxList[1]]
@@ -1754,6 +1763,27 @@ Background facies:
         # This vector contains for each point the index in the list of facies in truncation rule table self._faciesInTruncRule
         # It means that self._faciesInTruncRule[index] is the name of the facies used in the truncation rule.
         bg_index_vector = bg_index_in_trunc_rule[polygon_number_all_vector]
+        return self._facies_from_background_index_vectorized(
+            bg_index_vector, alpha_coord_vectors
+        )
+
+    def _deterministic_facies_vectorized(self, alpha_coord_vectors):
+        """Facies codes and facies indices for all points if a facies has probability 1, otherwise None."""
+        for fIndx in range(len(self._faciesInZone)):
+            if self._faciesIsDetermined[fIndx]:
+                num_points = len(alpha_coord_vectors)
+                fIndx_vector = np.full(num_points, fIndx, dtype=int)
+                faciesCode_vector = np.full(
+                    num_points, self._faciesCode[fIndx], dtype=np.uint8
+                )
+                return faciesCode_vector, fIndx_vector
+        return None
+
+    def _facies_from_background_index_vectorized(
+        self, bg_index_vector, alpha_coord_vectors
+    ):
+        """Facies codes and facies indices for points with the given index of the background facies
+        in the truncation rule, taking overlay facies into account."""
         if self._className == 'Trunc3D_bayfill':
             # Special case for handling of the alpha3 coordinate to determine facies
             z_coordinates = alpha_coord_vectors[:, self._alphaIndxList[2]]
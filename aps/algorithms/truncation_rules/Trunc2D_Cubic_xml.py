@@ -51,6 +51,7 @@ Description: This class is derived from Trunc2D_Base which contain common data s
     def useConstTruncModelParam(self)
     def setTruncRule(self, faciesProb, cellIndx=0)
     def defineFaciesByTruncRule(self, alphaCoord)
+    def defineFaciesByTruncRule_vectorized(self, alpha_coord_vectors)
     def truncMapPolygons(self)
     def faciesIndxPerPolygon(self)
     def XMLAddElement(self, parent)
@@ -67,6 +68,7 @@ Description: This class is derived from Trunc2D_Base which contain common data s
     def __calcFaciesLevel3H(self, nodeListL3, alphaCoord)
     def __calcFaciesLevel3V(self, nodeListL3, alphaCoord)
     def __calcPolyLevel(self, direction, nodeList, polyLevelAbove, levelNumber)
+    def __background_index_by_thresholds(self, direction, nodeList, points, coordinates, bg_index_vector)
     def __writeDataForTruncRule(self)
     def __getPolygonAndFaciesList(self)
     def __setTruncStructure(self, truncStructureList)
@@ -754,6 +756,63 @@ class Trunc2D_Cubic(Trunc2D_Base):
             faciesCode, fIndx = self.__calcFaciesLevel1V(nodeListL1, alphaCoord)
         return faciesCode, fIndx
 
+    def defineFaciesByTruncRule_vectorized(self, alpha_coord_vectors):
+        """
+        Apply the truncation rule to find facies for a set of points.
+        The facies polygons of the cubic truncation rule are rectangles defined by the threshold values
+        at up to three levels, so the background facies is found by a binary search (np.searchsorted)
+        among the threshold values of each level instead of testing the points against the polygons.
+        """
+        determined = self._deterministic_facies_vectorized(alpha_coord_vectors)
+        if determined is not None:
+            return determined
+        coordinates = {
+            'V': alpha_coord_vectors[:, self._alphaIndxList[0]],
+            'H': alpha_coord_vectors[:, self._alphaIndxList[1]],
+        }
+        bg_index_vector = np.zeros(len(alpha_coord_vectors), dtype=int)
+        self.__background_index_by_thresholds(
+            self.__truncStructure[self.__node_index['direction']],
+            self.__truncStructure[self.__node_index['list of nodes']],
+            slice(None),
+            coordinates,
+            bg_index_vector,
+        )
+        return self._facies_from_background_index_vectorized(
+            bg_index_vector, alpha_coord_vectors
+        )
+
+    def __background_index_by_thresholds(
+        self, direction, nodeList, points, coordinates, bg_index_vector
+    ):
+        """Set the index of the background facies in the truncation rule for the points in the
+        rectangle covered by the nodes. As in __calcFaciesLevel1V etc., a point belongs to the
+        first node with threshold value (x max or y max) larger or equal to its coordinate."""
+        TYPE = self.__node_index['type']
+        DIR = self.__node_index['direction']
+        NLIST = self.__node_index['list of nodes']
+        INDX = self.__node_index['index']
+        THRESHOLD = self.__node_index['x max' if direction == 'V' else 'y max']
+        thresholds = np.array([item[THRESHOLD] for item in nodeList])
+        node_numbers = np.searchsorted(
+            thresholds, coordinates[direction][points], side='left'
+        )
+        # Points above the last threshold value due to round-off belong to the last node
+        np.minimum(node_numbers, len(nodeList) - 1, out=node_numbers)
+        bg_index_per_node = np.array(
+            [item[INDX] if item[TYPE] == 'F' else -1 for item in nodeList]
+        )
+        bg_index_vector[points] = bg_index_per_node[node_numbers]
+        for node_number, item in enumerate(nodeList):
+            if item[TYPE] == 'N':
+                selected = np.flatnonzero(node_numbers == node_number)
+                if isinstance(points, np.ndarray):
+                    selected = points[selected]
+                if len(selected) > 0:
+                    self.__background_index_by_thresholds(
+                        item[DIR], item[NLIST], selected, coordinates, bg_index_vector
+                    )
+
     def facies_index_in_truncation_rule_for_polygon(self, polygon_index):
         indx = self.__fIndxPerPolygon[polygon_index]
         if indx < 0:
@@ -2,7 +2,7 @@
 # -*- coding: utf-8 -*-
 import copy
 import math
-from typing import Optional, List, Union
+from typing import Optional, List, Tuple, Union
 
 import numpy as np
 from warnings import warn
@@ -10,6 +10,11 @@ from xml.etree.ElementTree import Element
 
 from aps.algorithms.APSMainFaciesTable import APSMainFaciesTable
 from aps.algorithms.truncation_rules.Trunc2D_Base_xml import Trunc2D_Base
+from aps.algorithms.truncation_rules.bayfill_batched import (
+    BATCH_SIZE,
+    bayfill_facies_index,
+    bayfill_polygons,
+)
 from aps.utils.constants.simple import Debug
 from aps.utils.containers import FmuAttribute
 from aps.utils.xmlUtils import (
@@ -62,14 +67,16 @@ Description: This truncation rule was the first truncation rule developed in thi
 
   --- Common functions for all Truncation classes ---
    def useConstTruncModelParam(self)
-   def setTruncRule(self,faciesProb, cellIndx=0)
+   def setTruncRule(self,faciesProb, cellIndx=0, truncParam=None)
    def defineFaciesByTruncRule(self, alphaCoord)
+   def defineFaciesByTruncRule_batched(self, faciesProb, alpha_coord_vectors, cellIndx, truncParam)
    def truncMapPolygons(self)
    def faciesIndxPerPolygon(self)
    def XMLAddElement(self, parent)
 
    --- Other get functions specific for this class ---
    def getTruncationParam(self, get3DParamFunction, gridModel, realNumber)
+   def getTruncationParamValues(self, cellIndx)
 
 
  Local functions
@@ -495,6 +502,12 @@ class Trunc3D_bayfill(Trunc2D_Base):
         values = getContinuous3DParameterValues(gridModel, paramName, realNumber)
         self.__param_sf = values
 
+    def getTruncationParamValues(self, cellIndx: np.ndarray) -> np.ndarray:
+        """Values of sf for the grid cells cellIndx as an array with one row per grid cell,
+        which is used as truncParam in setTruncRule. Requires that sf vary from cell to cell."""
+        assert not self.__useConstTruncModelParam
+        return np.asarray(self.__param_sf)[cellIndx].reshape(-1, 1)
+
     def faciesIndxPerPolygon(self):
         return copy.copy(self.__fIndxPerPolygon)
 
@@ -651,10 +664,15 @@ class Trunc3D_bayfill(Trunc2D_Base):
         self._is_param_sbhd_fmuupdatable = value
 
     def setTruncRule(
-        self, faciesProb: Union[np.ndarray, List[float]], cellIndx: int = 0
+        self,
+        faciesProb: Union[np.ndarray, List[float]],
+        cellIndx: int = 0,
+        truncParam: Optional[np.ndarray] = None,
     ) -> None:
         """setTruncRule: Calculate internal parameters and polygons that define the truncation rule.
         Input:  faciesProb - Probability for each facies.
+                truncParam - If specified, the value of sf to use instead of the value
+                             for grid cell cellIndx when sf vary from cell to cell.
         Model parameters:
               sf  - Floodplain slant line. Bigger value=more slant
               ysf - Define where subbay polygon in the truncation cube should start. Value 0 means that
@@ -686,6 +704,8 @@ class Trunc3D_bayfill(Trunc2D_Base):
 
         if self.__useConstTruncModelParam:
             sf = self.__param_sf
+        elif truncParam is not None:
+            sf = truncParam[0]
         else:
             sf = self.__param_sf[cellIndx]
 
@@ -1972,6 +1992,79 @@ class Trunc3D_bayfill(Trunc2D_Base):
         self._faciesPolygons = copy.copy(self.__polygons)
         self.num_polygons = len(self._faciesPolygons)
 
+    def defineFaciesByTruncRule_batched(
+        self,
+        faciesProb: np.ndarray,
+        alpha_coord_vectors: np.ndarray,
+        cellIndx: Optional[np.ndarray] = None,
+        truncParam: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Calculate facies for many grid cells where each cell has its own truncation cube.
+        This gives the same facies as calling setTruncRule(faciesProb[i], cellIndx[i]) and
+        defineFaciesByTruncRule(alpha_coord_vectors[i]) for each cell i, but the truncation
+        cubes are calculated for batches of cells at once. Use this when the SF parameter
+        or the facies probabilities vary from cell to cell.
+
+        Input:
+                   faciesProb          - Facies probabilities with shape (num_cells, num_facies_in_zone).
+                   alpha_coord_vectors - Coordinates in alpha space with shape (num_cells, num_gauss_fields).
+                   cellIndx            - Grid cell index for each cell, used to get the SF parameter
+                                         when it is not constant.
+                   truncParam          - Values of sf with shape (num_cells, 1) to use instead of
+                                         the values for the grid cells cellIndx.
+        Output:    faciesCode_vector, fIndx_vector
+        """
+        faciesProb = np.array(faciesProb, dtype=np.float64)
+        num_cells = faciesProb.shape[0]
+        if self.__useConstTruncModelParam:
+            sf = self.__param_sf
+        elif truncParam is not None:
+            sf = np.asarray(truncParam)[:, 0]
+        else:
+            sf = np.asarray(self.__param_sf)[cellIndx]
+
+        # Minimum probability and normalisation as in _setMinimumFaciesProb
+        eps = 0.1 * self._epsFaciesProb
+        faciesProb[faciesProb < eps] = eps
+        faciesProb[faciesProb >= 1.0] = 1.0 - eps
+        faciesProb /= faciesProb.sum(axis=1, keepdims=True)
+
+        order_index = np.asarray(self._orderIndex)
+        facies_codes = np.asarray(self._faciesCode)
+        fIndx_vector = np.full(num_cells, -1, dtype=int)
+
+        # Cells where one facies has probability 1
+        is_determined = np.zeros(faciesProb.shape, dtype=bool)
+        is_determined[:, order_index] = faciesProb[:, order_index] > (1.0 - self.__eps)
+        determined = is_determined.any(axis=1)
+        fIndx_vector[determined] = np.argmax(is_determined[determined], axis=1)
+
+        alpha_indices = self._alphaIndxList
+        for start in range(0, num_cells, BATCH_SIZE):
+            batch = np.arange(start, min(start + BATCH_SIZE, num_cells))
+            batch = batch[~determined[batch]]
+            if len(batch) == 0:
+                continue
+            polygons, Zm, useZ = bayfill_polygons(
+                faciesProb[np.ix_(batch, order_index)],
+                sf if np.ndim(sf) == 0 else sf[batch],
+                self.__param_ysf,
+                self.__param_sbhd,
+                self.__eps,
+            )
+            alpha = alpha_coord_vectors[batch]
+            indx = bayfill_facies_index(
+                polygons,
+                Zm,
+                useZ,
+                alpha[:, alpha_indices[0]],
+                alpha[:, alpha_indices[1]],
+                alpha[:, alpha_indices[2]],
+            )
+            fIndx_vector[batch] = order_index[indx]
+
+        return facies_codes[fIndx_vector], fIndx_vector
+
     def defineFaciesByTruncRule_old(self, alphaCoord):
         """defineFaciesByTruncRule: Calculate facies by applying the truncation rule.
 
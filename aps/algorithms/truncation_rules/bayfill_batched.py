@@ -0,0 +1,807 @@
+# -*- coding: utf-8 -*-
+"""Batched version of the geometry in Trunc3D_bayfill.setTruncRule.
+The truncation cube for the bayfill truncation rule is calculated for arrays of
+facies probabilities and truncation parameters at once, such that spatially varying
+truncation parameters (SF) does not require one call to setTruncRule per grid cell.
+The calculations follow Trunc3D_bayfill.setTruncRule, branch by branch, where each
+branch is selected by a mask instead of an if statement.
+
+The facies polygons for N cells are represented by an array of shape (5, 2, MAX_VERTICES, N)
+where the polygon with index i in the first dimension is used for facies i in the
+truncation rule (Floodplain, Subbay, WBF, BHD and Lagoon). Polygons with fewer vertices
+are padded with NaN, and polygons that are not used are all NaN. Edges with a NaN vertex
+never intersect a line, such that points are never inside these parts.
+"""
+
+from typing import Dict, List, Tuple, Union
+from warnings import warn
+
+import numpy as np
+
+from aps.algorithms.Memoization import RoundOffConstant
+
+MAX_VERTICES = 11
+
+# Number of cells for which the facies polygons are kept in memory at the same time
+BATCH_SIZE = 50000
+
+FloatArray = Union[np.ndarray, float]
+Vertex = Tuple[FloatArray, FloatArray]
+
+
+def _update(values: Dict[str, np.ndarray], mask: np.ndarray, **kwargs) -> None:
+    for name, value in kwargs.items():
+        values[name] = np.where(mask, value, values[name])
+
+
+def _limits_floodplain_subbay_lagoon(P1, P2, P3, P4, P5, sf, ysf, eps):
+    n = len(P1)
+    g = {
+        name: np.zeros(n)
+        for name in ['X1', 'X2', 'X3', 'X4', 'XL', 'YF', 'YF2', 'YL', 'YS', 'YS2']
+    }
+    fssit = np.select(
+        [
+            P1 > 1 - sf / 2.0,
+            (P1 > sf / 2.0) & (P2 > sf / 2.0),
+            P1 > sf / 2.0,
+            P1 + P2 > np.sqrt(2.0 * sf * P1),
+        ],
+        [1, 2, 3, 4],
+        default=0,
+    )
+    bhdsit = np.zeros(n, dtype=int)
+
+    # fssit == 1
+    mask = fssit == 1
+    YF2 = 1.0 - np.sqrt(2.0 / sf * (1.0 - P1))
+    X1 = 1.0 - sf * (1.0 - YF2)
+    X2 = 1.0
+    YL = 1.0 - np.sqrt(np.maximum(0, 1.0 - 2.0 * ((1.0 - 0.5 * YF2) * YF2 + P5 / sf)))
+    XL = 1.0 - sf * (YL - YF2)
+    YS = YL + ysf * (1 - np.sqrt(2.0 * P2 / sf) - YL)
+    X3 = np.where(YS < 1, X1 + 2.0 * P2 / (1.0 - YS), X1)
+    X4 = X2 - sf * (YS - YF2)
+    _update(
+        g,
+        mask,
+        YF2=YF2,
+        YF=1.0,
+        X1=X1,
+        X2=X2,
+        YL=YL,
+        XL=XL,
+        YS=YS,
+        YS2=1.0,
+        X3=X3,
+        X4=X4,
+    )
+    bhdsit[mask] = np.where(P3 < 0.5 * (X4 - X3) * (1.0 - YS), 4, 3)[mask]
+
+    # fssit == 2
+    mask = fssit == 2
+    X3 = P1 + P2
+    _update(
+        g,
+        mask,
+        YF=1.0,
+        YF2=0.0,
+        X1=P1 - 0.5 * sf,
+        X2=P1 + 0.5 * sf,
+        X3=X3,
+        X4=X3,
+        YS=0.0,
+        YS2=1.0,
+        XL=P1 + P2 + P3 + P4,
+        YL=0.0,
+    )
+    bhdsit[mask] = 1
+
+    # fssit == 3
+    mask = fssit == 3
+    X1 = P1 - 0.5 * sf
+    X2 = P1 + 0.5 * sf
+    lagoon_below = P5 <= 1 - X2
+    YL = np.where(
+        lagoon_below,
+        0.0,
+        1.0 - np.sqrt(np.maximum(0, 1.0 - (2.0 / sf) * (P5 - 1 + X2))),
+    )
+    XL = np.where(lagoon_below, 1.0 - P5, X2 - sf * YL)
+    YS = YL + ysf * (1 - np.sqrt(2.0 * P2 / sf) - YL)
+    X3 = np.where(np.abs(P2) < eps, X1, X1 + 2.0 * P2 / (1.0 - YS))
+    X4 = X2 - sf * YS
+    _update(
+        g,
+        mask,
+        YF=1.0,
+        YF2=0.0,
+        X1=X1,
+        X2=X2,
+        YL=YL,
+        XL=XL,
+        YS=YS,
+        YS2=1.0,
+        X3=X3,
+        X4=X4,
+    )
+    small_wbf = P3 < 0.5 * (X4 - X3) * (1.0 - YS)
+    bhdsit[mask] = np.where(
+        lagoon_below, np.where(small_wbf, 4, 2), np.where(small_wbf, 6, 3)
+    )[mask]
+
+    # fssit == 4
+    mask = fssit == 4
+    YF = np.sqrt(2.0 * P1 / sf)
+    X3 = P1 + P2
+    _update(
+        g,
+        mask,
+        X1=0.0,
+        YF2=0.0,
+        YF=YF,
+        X2=sf * YF,
+        X3=X3,
+        X4=X3,
+        YS=0.0,
+        YS2=1.0,
+        XL=P1 + P2 + P3 + P4,
+        YL=0.0,
+    )
+    bhdsit[mask] = 1
+
+    # fssit == 5 or fssit == 6
+    mask = fssit == 0
+    YF = np.sqrt(2.0 * P1 / sf)
+    X2 = sf * YF
+    lagoon_below = P5 <= 1 - X2
+    YL = np.where(
+        lagoon_below,
+        0.0,
+        1.0 - np.sqrt(np.maximum(0, 1.0 - (2.0 / sf) * (P5 - 1.0 + X2))),
+    )
+    XL = np.where(lagoon_below, 1.0 - P5, X2 - sf * YL)
+    YS = YL + ysf * (
+        1 - np.sqrt(np.maximum(0, (1.0 - YF) * (1.0 - YF) + 2.0 * P2 / sf)) - YL
+    )
+    X4 = sf * (YF - YS)
+    is_fssit_5 = P2 >= 0.5 * X4 * (1.0 - YF)
+    X3 = np.where(is_fssit_5, (2.0 * P2 - X4 * (1.0 - YF)) / (1.0 - YS), 0.0)
+    YS2 = np.where(is_fssit_5, 1.0, YF + 2.0 * P2 / X4)
+    _update(
+        g,
+        mask,
+        X1=0.0,
+        YF2=0.0,
+        YF=YF,
+        X2=X2,
+        YL=YL,
+        XL=XL,
+        YS=YS,
+        YS2=YS2,
+        X3=X3,
+        X4=X4,
+    )
+    fssit[mask] = np.where(is_fssit_5, 5, 6)[mask]
+    small_wbf = P3 < 0.5 * (X4 - X3) * (1.0 - YS)
+    bhdsit[mask] = np.where(
+        lagoon_below,
+        np.where(small_wbf, np.where(is_fssit_5, 4, 5), 2),
+        np.where(small_wbf, 6, 3),
+    )[mask]
+
+    g['fssit'] = fssit
+    g['bhdsit'] = bhdsit
+    return g
+
+
+def _limits_wbf_bhd(g, P3, P4, sf, sbhd):
+    X2, X3, X4, XL = g['X2'], g['X3'], g['X4'], g['XL']
+    YL, YS, YS2 = g['YL'], g['YS'], g['YS2']
+    bhdsit = g['bhdsit']
+    n = len(P3)
+    for name in ['Xm', 'Xm2', 'Ym', 'Ym2', 'Amax']:
+        g[name] = np.zeros(n)
+    g['YWIB'] = np.ones(n)
+
+    c = np.tan(0.5 * np.pi * sbhd)
+    c = np.where(c == 0, 0.00001, c)
+    c = np.where((bhdsit > 1) & (c < sf), sf + 0.00001, c)
+
+    no_bhd = P4 == 0
+    _update(g, no_bhd, Xm=X4, Xm2=X4, Ym=0.0, Ym2=0.0, Amax=0.0)
+    no_wbf = ~no_bhd & (P3 == 0)
+    _update(g, no_wbf, Xm=XL, Xm2=XL, Ym=1.0, Ym2=1.0, Amax=XL - X4)
+    remaining = ~no_bhd & ~no_wbf
+    dX = XL - X4
+
+    # bhdsit == 1
+    mask = remaining & (bhdsit == 1)
+    Amax = dX
+    AmP4sqrt = np.sqrt(P4 * Amax)
+    _update(g, mask, Amax=Amax)
+    empty = mask & (Amax == 0)
+    _update(g, empty, Xm=X4, Xm2=X4, Ym=0.0, Ym2=0.0)
+    mask = mask & ~empty
+    # T1
+    case_t = mask & (dX / c <= 1.0)
+    case_a = case_t & (AmP4sqrt <= 0.5 * dX * dX / c)
+    Ym = np.sqrt(2.0 * AmP4sqrt / c)
+    _update(g, case_a, Ym=Ym, Ym2=0.0, Xm=X4 + c * Ym, Xm2=X4)
+    case_t = case_t & ~case_a
+    case_a = case_t & (AmP4sqrt <= dX - 0.5 * dX * dX / c)
+    Ym = (AmP4sqrt - 0.5 * dX * dX / c + dX * dX / c) / dX
+    _update(g, case_a, Ym=Ym, Ym2=Ym - dX / c, Xm=XL, Xm2=X4)
+    case_a = case_t & ~case_a
+    Xm2 = XL - np.sqrt(np.maximum(0, 2.0 * c * (dX - AmP4sqrt)))
+    _update(g, case_a, Xm2=Xm2, Xm=XL, Ym2=1.0 - (XL - Xm2) / c, Ym=1.0)
+    # T2
+    case_t = mask & ~(dX / c <= 1.0)
+    case_a = case_t & (AmP4sqrt <= 0.5 * c)
+    Ym = np.sqrt(2.0 * AmP4sqrt / c)
+    _update(g, case_a, Ym=Ym, Ym2=0.0, Xm=X4 + c * Ym, Xm2=X4)
+    case_t = case_t & ~case_a
+    case_a = case_t & (AmP4sqrt <= dX - 0.5 * c)
+    Xm2 = X4 + AmP4sqrt - 0.5 * c
+    _update(g, case_a, Xm2=Xm2, Xm=Xm2 + c, Ym2=0.0, Ym=1.0)
+    case_a = case_t & ~case_a
+    Ym2 = 1.0 - np.sqrt(np.maximum(0, 2.0 * (dX - AmP4sqrt) / c))
+    _update(g, case_a, Ym2=Ym2, Ym=1.0, Xm2=XL - c * (1.0 - Ym2), Xm=XL)
+
+    # bhdsit == 2
+    mask = remaining & (bhdsit == 2)
+    Amax = dX - 0.5 * (X2 - X4) * YS
+    AmP4sqrt = np.sqrt(P4 * Amax)
+    _update(g, mask, Amax=Amax)
+    empty = mask & (Amax == 0)
+    _update(g, empty, Xm=X4, Xm2=X4, Ym=0.0, Ym2=0.0)
+    mask = mask & ~empty
+    # Common cases for T1, T2 and T3
+    Ym_a1 = np.sqrt(2.0 * AmP4sqrt / (c - sf))
+    Xm_a1 = X2 + 2.0 * AmP4sqrt / Ym_a1
+    Ym2_last = 1.0 - np.sqrt(
+        np.maximum(0, (2.0 / c) * (dX - 0.5 * (X2 - X4) * YS - AmP4sqrt))
+    )
+    Ym_low = np.sqrt(2.0 * (AmP4sqrt + 0.5 * (X2 - X4) * YS) / c)
+    Ym2_mid = (AmP4sqrt + 0.5 * (X2 - X4) * YS - 0.5 * dX * dX / c) / dX
+    # T2
+    case_t = mask & (dX / c <= YS)
+    case_a = case_t & (AmP4sqrt <= 0.5 * (XL - X2) * (XL - X2) / (c - sf))
+    _update(g, case_a, Ym=Ym_a1, Ym2=0.0, Xm=Xm_a1, Xm2=Xm_a1 - c * Ym_a1)
+    case_t = case_t & ~case_a
+    case_a = case_t & (AmP4sqrt <= dX * YS - 0.5 * dX * dX / c - 0.5 * (X2 - X4) * YS)
+    Ym = (
+        np.sqrt(
+            np.maximum(
+                0,
+                ((XL - X2) * (XL - X2) / (sf * sf))
+                + (c / (sf * (c - sf))) * ((XL - X2) * (XL - X2) / c + 2.0 * AmP4sqrt),
+            )
+        )
+        - (XL - X2) / sf
+    )
+    _update(
+        g,
+        case_a,
+        Ym=Ym,
+        Ym2=(1.0 - sf / c) * Ym - (XL - X2) / c,
+        Xm=XL,
+        Xm2=X2 - sf * Ym,
+    )
+    case_t = case_t & ~case_a
+    case_a = case_t & (AmP4sqrt <= dX - 0.5 * (X2 - X4) * YS - 0.5 * dX * dX / c)
+    _update(g, case_a, Ym2=Ym2_mid, Ym=Ym2_mid + dX / c, Xm=XL, Xm2=X4)
+    case_a = case_t & ~case_a
+    _update(g, case_a, Ym2=Ym2_last, Ym=1.0, Xm=XL, Xm2=XL - c * (1.0 - Ym2_last))
+    # T3
+    case_t = mask & ~(dX / c <= YS) & (dX / c >= 1)
+    case_a = case_t & (AmP4sqrt <= 0.5 * c * YS * YS - 0.5 * (X2 - X4) * YS)
+    _update(g, case_a, Ym=Ym_a1, Ym2=0.0, Xm=Xm_a1, Xm2=Xm_a1 - c * Ym_a1)
+    case_t = case_t & ~case_a
+    case_a = case_t & (AmP4sqrt <= 0.5 * c - 0.5 * (X2 - X4) * YS)
+    _update(g, case_a, Ym=Ym_low, Ym2=0.0, Xm=X4 + c * Ym_low, Xm2=X4)
+    case_t = case_t & ~case_a
+    case_a = case_t & (AmP4sqrt <= 0.5 * c - 0.5 * (X2 - X4) * YS + (dX - c))
+    Xm = AmP4sqrt - (0.5 * c - 0.5 * (X2 - X4) * YS) + X4 + c
+    _update(g, case_a, Xm=Xm, Xm2=Xm - c, Ym=1.0, Ym2=0.0)
+    case_a = case_t & ~case_a
+    _update(g, case_a, Ym2=Ym2_last, Ym=1.0, Xm=XL, Xm2=XL - c * (1.0 - Ym2_last))
+    # T1
+    case_t = mask & ~(dX / c <= YS) & ~(dX / c >= 1)
+    case_a = case_t & (AmP4sqrt <= 0.5 * c * YS * YS - 0.5 * (X2 - X4) * YS)
+    _update(g, case_a, Ym=Ym_a1, Ym2=0.0, Xm=Xm_a1, Xm2=Xm_a1 - c * Ym_a1)
+    case_t = case_t & ~case_a
+    case_a = case_t & (AmP4sqrt <= (0.5 / c) * dX * dX - 0.5 * (X2 - X4) * YS)
+    _update(g, case_a, Ym=Ym_low, Ym2=0.0, Xm=X4 + c * Ym_low, Xm2=X4)
+    case_t = case_t & ~case_a
+    case_a = case_t & (
+        AmP4sqrt <= (0.5 / c) * dX * dX - 0.5 * (X2 - X4) * YS + dX * (1.0 - dX / c)
+    )
+    _update(g, case_a, Ym2=Ym2_mid, Ym=Ym2_mid + dX / c, Xm=XL, Xm2=X4)
+    case_a = case_t & ~case_a
+    _update(g, case_a, Ym2=Ym2_last, Ym=1.0, Xm=XL, Xm2=XL - c * (1.0 - Ym2_last))
+
+    # bhdsit == 3
+    mask = remaining & (bhdsit == 3)
+    Amax = dX * ((1.0 - YS) + 0.5 * (YS - YL))
+    AmP4sqrt = np.sqrt(P4 * Amax)
+    _update(g, mask, Amax=Amax)
+    A1 = 0.5 * dX * (YS - YL - dX / c)
+    case_a = mask & (AmP4sqrt <= A1)
+    Ym = YL + np.sqrt(2.0 * AmP4sqrt / (sf * (1.0 - sf / c)))
+    Xm2 = XL - sf * (Ym - YL)
+    _update(g, case_a, Ym=Ym, Xm2=Xm2, Ym2=Ym - (XL - Xm2) / c, Xm=XL)
+    mask = mask & ~case_a
+    case_a = mask & (AmP4sqrt <= A1 + dX * (1.0 - YS))
+    Ym = YS + (AmP4sqrt - A1) / dX
+    _update(g, case_a, Ym=Ym, Ym2=Ym - dX / c, Xm=XL, Xm2=X4)
+    case_a = mask & ~case_a
+    Ym2 = 1.0 - np.sqrt(np.maximum(0, 2.0 / c * (Amax - AmP4sqrt)))
+    _update(g, case_a, Ym2=Ym2, Ym=1.0, Xm=XL, Xm2=XL - c * (1.0 - Ym2))
+
+    # bhdsit == 4, 5 and 6 (P3 > 0 for the remaining cells)
+    mask = remaining & (bhdsit == 4)
+    YWIB = YS + np.sqrt(
+        np.maximum(0, (YS2 - YS) * (YS2 - YS) - 2.0 * P3 * (YS2 - YS) / (X4 - X3))
+    )
+    _update(g, mask, YWIB=YWIB)
+    mask = remaining & (bhdsit == 5)
+    YWIB = np.where(
+        P3 < (X4 - X3) * (1.0 - YS2),
+        1.0 - P3 / (X4 - X3),
+        YS
+        + np.sqrt(
+            2.0 * ((YS2 - YS) * (1.0 - 0.5 * (YS2 + YS)) - (YS2 - YS) / (X4 - X3) * P3)
+        ),
+    )
+    _update(g, mask, YWIB=YWIB)
+    mask = remaining & (bhdsit == 6)
+    YWIB = YS + np.sqrt(
+        np.maximum(0, (1.0 - YS) * (1.0 - YS) - 2.0 * P3 * (1.0 - YS) / (X4 - X3))
+    )
+    _update(g, mask, YWIB=YWIB)
+
+    Amax = g['Amax']
+    g['Zm'] = np.where(Amax > 0, 1.0 - np.sqrt(P4 / np.where(Amax > 0, Amax, 1.0)), 1.0)
+    return g
+
+
+def _set_polygon(
+    polygons: np.ndarray, index: int, mask: np.ndarray, vertices: List[Vertex]
+) -> None:
+    rows = np.flatnonzero(mask)
+    if len(rows) == 0:
+        return
+    for i, (x, y) in enumerate(vertices):
+        polygons[index, 0, i, rows] = x[rows] if np.ndim(x) > 0 else x
+        polygons[index, 1, i, rows] = y[rows] if np.ndim(y) > 0 else y
+
+
+def _facies_polygons(g, P1, P2, P3, P4, P5) -> np.ndarray:
+    X1, X2, X3, X4, XL = g['X1'], g['X2'], g['X3'], g['X4'], g['XL']
+    YF, YF2, YL, YS, YS2 = g['YF'], g['YF2'], g['YL'], g['YS'], g['YS2']
+    Xm, Xm2, Ym, Ym2, YWIB = g['Xm'], g['Xm2'], g['Ym'], g['Ym2'], g['YWIB']
+    fssit, bhdsit = g['fssit'], g['bhdsit']
+    FP, SB, WBF, BHD = 0, 1, 2, 3
+
+    polygons = np.full((5, 2, MAX_VERTICES, len(P1)), np.nan)
+
+    # ------ Floodplain  and subbay   ------------
+    has_fp = P1 > 0.0
+    has_sb = P2 > 0.0
+    mask = fssit == 1
+    _set_polygon(
+        polygons,
+        FP,
+        mask & has_fp,
+        [(0.0, 0.0), (1.0, 0.0), (X2, YF2), (X1, YF), (0.0, YF), (0.0, 0.0)],
+    )
+    _set_polygon(polygons, SB, mask & has_sb, [(X4, YS), (X3, YF), (X1, YF), (X4, YS)])
+    mask = fssit == 2
+    _set_polygon(
+        polygons,
+        FP,
+        mask & has_fp,
+        [(0.0, 0.0), (X2, YS), (X1, YF), (0.0, YF), (0.0, 0.0)],
+    )
+    _set_polygon(
+        polygons,
+        SB,
+        mask & has_sb,
+        [(X4, YS), (X3, YF), (X1, YF), (X2, YS), (X4, YS)],
+    )
+    mask = fssit == 3
+    _set_polygon(
+        polygons,
+        FP,
+        mask & has_fp,
+        [(0.0, 0.0), (X2, YF2), (X1, YF), (0.0, YF), (0.0, 0.0)],
+    )
+    _set_polygon(polygons, SB, mask & has_sb, [(X4, YS), (X3, YF), (X1, YF), (X4, YS)])
+    mask = fssit == 4
+    _set_polygon(
+        polygons, FP, mask & has_fp, [(0.0, 0.0), (X2, YS), (X1, YF), (0.0, 0.0)]
+    )
+    _set_polygon(
+        polygons,
+        SB,
+        mask & has_sb,
+        [(X4, YS), (X3, 1.0), (X1, 1.0), (X1, YF), (X2, YS), (X4, YS)],
+    )
+    mask = fssit == 5
+    _set_polygon(
+        polygons, FP, mask & has_fp, [(0.0, 0.0), (X2, YF2), (X1, YF), (0.0, 0.0)]
+    )
+    _set_polygon(
+        polygons,
+        SB,
+        mask & has_sb,
+        [(X4, YS), (X3, 1.0), (X1, 1.0), (X1, YF), (X4, YS)],
+    )
+    mask = fssit == 6
+    _set_polygon(
+        polygons, FP, mask & has_fp, [(0.0, 0.0), (X2, YF2), (X1, YF), (0.0, 0.0)]
+    )
+    _set_polygon(polygons, SB, mask & has_sb, [(X4, YS), (X1, YS2), (X1, YF), (X4, YS)])
+
+    # -----------  WBF  and   BHD ------------------
+    # The polygons for WBF and BHD are not defined for all combinations of
+    # bhdsit and Xm, Ym. The Lagoon polygon is then the third polygon (index 2)
+    has_wbf = P3 > 0
+    has_bhd = P4 > 0
+    is_defined = np.zeros(len(P1), dtype=bool)
+
+    def set_wbf_and_bhd(mask, wbf, bhd):
+        _set_polygon(polygons, BHD, mask & has_bhd, bhd)
+        _set_polygon(polygons, WBF, mask & has_wbf, wbf)
+        is_defined[mask] = True
+
+    # bhdsit == 1
+    mask = (bhdsit == 1) & (Xm2 > X4)
+    set_wbf_and_bhd(
+        mask,
+        wbf=[(Xm, Ym2), (Xm2, Ym), (XL, 1.0), (XL, Ym2), (Xm, Ym2)],
+        bhd=[(Xm, Ym2), (Xm2, Ym), (X4, 1.0), (X4, 0.0), (Xm, 0.0), (Xm, Ym2)],
+    )
+    mask = (bhdsit == 1) & ~(Xm2 > X4)
+    set_wbf_and_bhd(
+        mask,
+        wbf=[(Xm, Ym2), (Xm2, Ym), (Xm2, 1.0), (XL, 1.0), (XL, YL), (Xm, Ym2)],
+        bhd=[(Xm, Ym2), (Xm2, Ym), (Xm2, 0.0), (Xm, 0.0), (Xm, Ym2)],
+    )
+
+    # bhdsit == 2
+    mask = (bhdsit == 2) & (Xm2 > X4) & (Ym < YS)
+    set_wbf_and_bhd(
+        mask,
+        wbf=[
+            (Xm, Ym2),
+            (Xm2, Ym),
+            (X4, YS),
+            (X3, YS2),
+            (X3, 1.0),
+            (X4, 1.0),
+            (XL, 1.0),
+            (XL, 0.0),
+            (Xm, Ym2),
+        ],
+        bhd=[(Xm, Ym2), (Xm2, Ym), (X2, 0.0), (XL, 0.0), (Xm, Ym2)],
+    )
+    mask = (bhdsit == 2) & (Xm2 > X4) & ~(Ym < YS) & (Ym == 1.0)
+    set_wbf_and_bhd(
+        mask,
+        wbf=[
+            (X4, 1.0),
+            (X3, 1.0),
+            (X3, YS2),
+            (X4, YS),
+            (X4, 1.0),
+            (Xm2, 1.0),
+            (XL, 1.0),
+            (XL, 0.0),
+            (Xm, Ym2),
+            (Xm2, Ym),
+            (X4, 1.0),
+        ],
+        bhd=[
+            (Xm, Ym2),
+            (Xm2, Ym),
+            (X4, 1.0),
+            (X4, YS),
+            (X2, YF2),
+            (XL, 0.0),
+            (Xm, Ym2),
+        ],
+    )
+    mask = (bhdsit == 2) & ~(Xm2 > X4) & (Ym == 0.0) & (Ym2 == 0.0)
+    set_wbf_and_bhd(
+        mask,
+        wbf=[
+            (X4, YS),
+            (X3, YS2),
+            (X3, 1.0),
+            (X4, 1.0),
+            (XL, 1.0),
+            (XL, 0.0),
+            (X2, 0.0),
+            (X4, YS),
+        ],
+        bhd=[(Xm, Ym2), (X4, Ym), (Xm, Ym2)],
+    )
+    mask = (bhdsit == 2) & ~(Xm2 > X4) & ~((Ym == 0.0) & (Ym2 == 0.0))
+    set_wbf_and_bhd(
+        mask,
+        wbf=[
+            (Xm, Ym2),
+            (X4, Ym),
+            (X4, YS),
+            (X3, YS2),
+            (X3, 1.0),
+            (X4, 1.0),
+            (XL, 1.0),
+            (XL, 0.0),
+            (Xm, Ym2),
+        ],
+        bhd=[(Xm, Ym2), (X4, Ym), (X4, YS), (X2, 0.0), (Xm, 0.0), (Xm, Ym2)],
+    )
+
+    # bhdsit == 3
+    mask = (bhdsit == 3) & (Xm2 > X4) & (Ym < YS)
+    set_wbf_and_bhd(
+        mask,
+        wbf=[
+            (Xm, Ym2),
+            (Xm2, Ym),
+            (X4, YS),
+            (X3, 1.0),
+            (X4, 1.0),
+            (XL, 1.0),
+            (XL, Ym2),
+            (Xm, Ym2),
+        ],
+        bhd=[(Xm, Ym2), (Xm2, Ym), (XL, YL), (Xm, Ym2)],
+    )
+    mask = (bhdsit == 3) & (Xm2 > X4) & ~(Ym < YS) & (Ym == 1.0)
+    set_wbf_and_bhd(
+        mask,
+        wbf=[
+            (X4, 1.0),
+            (X3, 1.0),
+            (X4, YS),
+            (X4, 1.0),
+            (Xm2, 1.0),
+            (XL, 1.0),
+            (Xm, Ym2),
+            (Xm2, Ym),
+            (X4, 1.0),
+        ],
+        bhd=[(Xm, Ym2), (Xm2, Ym), (X4, 1.0), (X4, YS), (XL, YL), (Xm, Ym2)],
+    )
+    mask = (bhdsit == 3) & ~(Xm2 > X4)
+    _set_polygon(
+        polygons,
+        BHD,
+        mask & has_bhd,
+        [(Xm, Ym2), (X4, Ym), (X4, YS), (XL, YL), (Xm, Ym2)],
+    )
+    _set_polygon(
+        polygons,
+        WBF,
+        mask & has_wbf & has_bhd,
+        [(Xm, Ym2), (X4, Ym), (X4, YS), (X3, 1.0), (X4, 1.0), (XL, 1.0), (Xm, Ym2)],
+    )
+    _set_polygon(
+        polygons,
+        WBF,
+        mask & has_wbf & ~has_bhd,
+        [(XL, YL), (X4, YS), (X3, 1.0), (X4, 1.0), (XL, 1.0), (XL, YL)],
+    )
+    is_defined[mask] = True
+
+    # bhdsit == 4, 5 and 6
+    # Intersection between y = YWIB and the line for boundary between Subbay and WFB
+    x2 = X3 + (YWIB - YS2) * (X4 - X3) / (YS - YS2)
+    wbf = [(X4, 1.0), (X4, YWIB), (x2, YWIB), (X3, YS2), (X4, 1.0)]
+    mask = (bhdsit == 4) & (X2 > XL)
+    set_wbf_and_bhd(
+        mask,
+        wbf=wbf,
+        bhd=[
+            (X4, 1.0),
+            (X4, YWIB),
+            (x2, YWIB),
+            (X4, YS),
+            (XL, YL),
+            (XL, 1.0),
+            (X4, 1.0),
+        ],
+    )
+    mask = (bhdsit == 4) & ~(X2 > XL)
+    set_wbf_and_bhd(
+        mask,
+        wbf=wbf,
+        bhd=[
+            (X4, 1.0),
+            (X4, YWIB),
+            (x2, YWIB),
+            (X4, YS),
+            (X2, YF2),
+            (XL, 0.0),
+            (XL, 1.0),
+            (X4, 1.0),
+        ],
+    )
+    mask = ((bhdsit == 5) | (bhdsit == 6)) & (YWIB > YS2)
+    set_wbf_and_bhd(
+        mask,
+        wbf=[(X4, 1.0), (X4, YWIB), (0.0, YWIB), (0.0, 1.0), (X4, 1.0)],
+        bhd=[
+            (X4, 1.0),
+            (X4, YWIB),
+            (0.0, YWIB),
+            (0.0, YS2),
+            (X4, YS),
+            (X2, YF2),
+            (XL, YL),
+            (XL, 1.0),
+            (X4, 1.0),
+        ],
+    )
+    mask = ((bhdsit == 5) | (bhdsit == 6)) & ~(YWIB > YS2)
+    set_wbf_and_bhd(
+        mask,
+        wbf=[(X4, 1.0), (X4, YWIB), (x2, YWIB), (X3, YS2), (X3, 1.0), (X4, 1.0)],
+        bhd=[
+            (X4, 1.0),
+            (X4, YWIB),
+            (x2, YWIB),
+            (X4, YS),
+            (X2, YF2),
+            (XL, YL),
+            (XL, 1.0),
+            (X4, 1.0),
+        ],
+    )
+
+    # ------ Lagoon ------------------
+    has_lg = P5 > 0
+    # Intersection between Floodplain line and Lagoon line
+    y2 = np.where(X2 >= XL, (YF2 - YF) * (XL - X1) / (X2 - X1) + YF, 0.0)
+    for index, mask in [(4, is_defined), (2, ~is_defined)]:
+        _set_polygon(
+            polygons,
+            index,
+            mask & has_lg & (bhdsit == 1),
+            [(1.0, 0.0), (1.0, 1.0), (XL, 1.0), (XL, 0.0), (1.0, 0.0)],
+        )
+        _set_polygon(
+            polygons,
+            index,
+            mask & has_lg & (bhdsit != 1) & (X2 > XL),
+            [(X2, YF2), (1.0, 0.0), (1.0, 1.0), (XL, 1.0), (XL, y2), (X2, YF2)],
+        )
+        _set_polygon(
+            polygons,
+            index,
+            mask & has_lg & (bhdsit != 1) & ~(X2 > XL),
+            [(XL, 0.0), (1.0, 0.0), (1.0, 1.0), (XL, 1.0), (XL, 0.0)],
+        )
+    return polygons
+
+
+def bayfill_polygons(
+    probabilities: np.ndarray,
+    sf: FloatArray,
+    ysf: FloatArray,
+    sbhd: FloatArray,
+    eps: float,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Calculate the truncation cubes for the bayfill truncation rule for many cells.
+    Input:  probabilities - Facies probabilities with shape (N, 5) where the facies are in
+                            the same sequence as in the truncation rule
+                            (Floodplain, Subbay, WBF, BHD, Lagoon).
+            sf, ysf, sbhd - Truncation parameters, either one value per cell or a constant.
+            eps           - Tolerance used for probabilities.
+    Output: polygons - Facies polygons with shape (5, 2, MAX_VERTICES, N).
+            Zm       - Truncation value for the third gaussian field (BHD/WBF) for each cell.
+            useZ     - True for the cells where the third gaussian field is used.
+    """
+    probabilities = np.array(probabilities, dtype=np.float64)
+    n = probabilities.shape[0]
+    sf = np.maximum(np.broadcast_to(np.asarray(sf, dtype=np.float64), n), 0.0001)
+    ysf = np.broadcast_to(np.asarray(ysf, dtype=np.float64), n)
+    sbhd = np.clip(np.broadcast_to(np.asarray(sbhd, dtype=np.float64), n), 0.001, 0.999)
+
+    if (probabilities < 0).any():
+        warn(' Warning: Negative probabilities as input. Is set to 0.')
+        probabilities[probabilities < 0] = 0.0
+    probabilities[np.abs(probabilities) < eps] = 0.0
+
+    P1, P2, P3, P4, P5 = probabilities.T
+    sumProb = P1 + P2 + P3 + P4 + P5
+    if (sumProb == 0.0).any():
+        raise ValueError('Error: All input probabilities are <= 0.0')
+    num_not_normalised = np.count_nonzero(
+        ~((1.0 + 2.0 * eps >= sumProb) & (sumProb >= 1.0 - 2.0 * eps))
+    )
+    if num_not_normalised > 0:
+        print(
+            f' Warning: In truncation rule type: bayfill.\n'
+            f'          Sum of input probabilities is not within 1.0 +/- {2.0 * eps} '
+            f'for {num_not_normalised} cells.\n'
+            f'          Adjust all probabilities by normalizing the probabilities.'
+        )
+    P1, P2, P3, P4, P5 = (
+        P1 / sumProb,
+        P2 / sumProb,
+        P3 / sumProb,
+        P4 / sumProb,
+        P5 / sumProb,
+    )
+
+    # The expressions are evaluated for all cells, also in the branches
+    # not used by a cell, and may then be undefined
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        g = _limits_floodplain_subbay_lagoon(P1, P2, P3, P4, P5, sf, ysf, eps)
+        g = _limits_wbf_bhd(g, P3, P4, sf, sbhd)
+        polygons = _facies_polygons(g, P1, P2, P3, P4, P5)
+    return polygons, g['Zm'], g['bhdsit'] <= 3
+
+
+def _polygon_index(
+    polygons: np.ndarray, x: np.ndarray, y: np.ndarray, polygon_index: np.ndarray
+) -> None:
+    """Set the index of the first polygon containing the point (x, y)
+    for the points where polygon_index is -1."""
+    for index in range(polygons.shape[0]):
+        selected = np.flatnonzero(polygon_index == -1)
+        if len(selected) == 0:
+            return
+        x_selected = x[selected]
+        y_selected = y[selected]
+        vertices = polygons[index][:, :, selected]
+        # Count intersections between the polygon and a line from the point in positive x direction,
+        # as in Trunc2D_Base._isInsidePolygon
+        num_intersections_found = np.zeros(len(selected), dtype=int)
+        for i in range(1, MAX_VERTICES):
+            x0, y0 = vertices[:, i - 1]
+            x1, y1 = vertices[:, i]
+            vyp = y1 - y0
+            with np.errstate(divide='ignore', invalid='ignore'):
+                s = (y_selected - y0) / vyp
+                t = x0 + s * (x1 - x0) - x_selected
+            num_intersections_found += (vyp != 0.0) & (0.0 <= s) & (s <= 1.0) & (t > 0)
+        inside = num_intersections_found % 2 != 0
+        polygon_index[selected[inside]] = index
+
+
+def bayfill_facies_index(
+    polygons: np.ndarray,
+    Zm: np.ndarray,
+    useZ: np.ndarray,
+    x: np.ndarray,
+    y: np.ndarray,
+    z: np.ndarray,
+) -> np.ndarray:
+    """Index of the facies in the truncation rule for each cell,
+    given the truncation cubes from bayfill_polygons and the coordinates in alpha space."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    polygon_index = np.full(len(x), -1, dtype=int)
+    _polygon_index(polygons, x, y, polygon_index)
+    if (polygon_index == -1).any():
+        # Shift the points slightly and check again
+        x_new = x + RoundOffConstant.shift_tolerance
+        x_new[x_new >= 1.0] = x[x_new >= 1.0] - RoundOffConstant.shift_tolerance
+        y_new = y + RoundOffConstant.shift_tolerance
+        y_new[y_new >= 1.0] = y[y_new >= 1.0] - RoundOffConstant.shift_tolerance
+        _polygon_index(polygons, x_new, y_new, polygon_index)
+        num_points_not_in_polygons = np.count_nonzero(polygon_index == -1)
+        if num_points_not_in_polygons > 0:
+            raise ValueError(
+                f'Internal error: Number of points with alpha coordinates outside unit square is: {num_points_not_in_polygons}'
+            )
+    # The polygon for BHD is shared with WBF, where the third gaussian field is used
+    is_wbf = useZ & (polygon_index == 3) & (z < Zm)
+    polygon_index[is_wbf] = 2
+    return polygon_index
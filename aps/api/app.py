@@ -1,11 +1,12 @@
 # -*- coding: utf-8 -*-
 from os import environ, urandom
-from flask import Flask, jsonify, request
+from flask import Flask, Response, abort, jsonify, request
 from flask.cli import main
 from flask_cors import CORS, cross_origin
 
+from aps.api.encoding import BINARY_MIMETYPE, ENCODINGS
 from aps.utils.parsing import parse_signature
-from aps.api.ui import call
+from aps.api.ui import call, supports_encoding
 
 
 def _get_environ(variable_name, default, divider=':'):
@@ -26,10 +27,33 @@ cors = CORS(app)
 
 @app.route('/api/<path:method>', methods=['POST'])
 @cross_origin()
-def call_python(method: str) -> str:
+def call_python(method: str) -> Response:
     signature = f'{method}({request.data.decode()})'
     method_name, args = parse_signature(signature)
-    return jsonify(call(method_name, *args))
+    encoding = _requested_encoding()
+    if encoding == 'json' or not supports_encoding(method_name):
+        return jsonify(call(method_name, *args))
+    result = call(method_name, *args, encoding=encoding)
+    if encoding == 'binary':
+        return Response(result, mimetype=BINARY_MIMETYPE)
+    return jsonify(result)
+
+
+def _requested_encoding() -> str:
+    """The encoding of arrays in the response, given by the query parameter 'encoding',
+    or 'binary' if the client only accepts application/octet-stream.
+    An unknown encoding is a bad request (400)."""
+    encoding = request.args.get('encoding')
+    if encoding is None:
+        if request.accept_mimetypes.best == BINARY_MIMETYPE:
+            return 'binary'
+        return 'json'
+    if encoding not in ENCODINGS:
+        abort(
+            400,
+            description=f"Unknown encoding '{encoding}'. Must be one of {ENCODINGS}",
+        )
+    return encoding
 
 
 @app.route('/favicon.ico')
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""Encoding of the results from the API.
+Numpy arrays in the results are either written as (nested) lists in JSON,
+or as little-endian buffers, which are much smaller and faster to create and parse:
+
+- 'json': Arrays are converted to lists (the default).
+- 'base64': Each array is replaced by {'dtype', 'shape', 'data'} where data is
+  the base64 encoded buffer, and the result is written as JSON.
+- 'binary': The response consists of
+    * the length of the header (uint32, little-endian),
+    * the header; the result as JSON (UTF-8) where each array is replaced by
+      {'dtype', 'shape', 'offset', 'length'},
+    * the buffers of the arrays, each starting at the given offset (in bytes)
+      relative to the end of the header, aligned to 8 bytes.
+Floating point arrays are sent as float32 and integer arrays with the
+smallest unsigned or signed integer type that holds the values (at most int64).
+"""
+
+import json
+import struct
+from base64 import b64encode
+from typing import Any, List
+
+import numpy as np
+
+ENCODINGS = ('json', 'base64', 'binary')
+BINARY_MIMETYPE = 'application/octet-stream'
+
+_ALIGNMENT = 8
+
+
+def _compact_array(values: np.ndarray) -> np.ndarray:
+    if np.issubdtype(values.dtype, np.floating):
+        dtype = np.dtype('<f4')
+    elif np.issubdtype(values.dtype, np.integer) or values.dtype == bool:
+        dtype = np.dtype('<i4')
+        if values.size > 0:
+            min_value, max_value = int(values.min()), int(values.max())
+            for candidate in ['<u1', '<i2', '<i4', '<i8']:
+                info = np.iinfo(candidate)
+                if info.min <= min_value and max_value <= info.max:
+                    dtype = np.dtype(candidate)
+                    break
+            else:
+                raise ValueError(
+                    f'The values in [{min_value}, {max_value}] can not be encoded as int64'
+                )
+    else:
+        raise ValueError(f'Arrays of type {values.dtype} can not be encoded')
+    return np.ascontiguousarray(values, dtype=dtype)
+
+
+def _padded_size(values: np.ndarray) -> int:
+    return values.nbytes + (-values.nbytes) % _ALIGNMENT
+
+
+def _array_header(values: np.ndarray) -> dict:
+    return {'dtype': values.dtype.str.lstrip('<|'), 'shape': list(values.shape)}
+
+
+def to_json_compatible(result: Any) -> Any:
+    """Convert the numpy arrays (and numpy scalars) in the result to lists (and python scalars)."""
+    if isinstance(result, (np.ndarray, np.generic)):
+        return result.tolist()
+    if isinstance(result, dict):
+        return {key: to_json_compatible(value) for key, value in result.items()}
+    if isinstance(result, (list, tuple)):
+        return [to_json_compatible(value) for value in result]
+    return result
+
+
+def _replace_arrays(result: Any, buffers: List[np.ndarray], encoding: str) -> Any:
+    if isinstance(result, np.ndarray):
+        values = _compact_array(result)
+        header = _array_header(values)
+        if encoding == 'base64':
+            header['data'] = b64encode(values.tobytes()).decode('ascii')
+        else:
+            header['offset'] = sum(_padded_size(buffer) for buffer in buffers)
+            header['length'] = values.nbytes
+            buffers.append(values)
+        return header
+    if isinstance(result, np.generic):
+        return result.item()
+    if isinstance(result, dict):
+        return {
+            key: _replace_arrays(value, buffers, encoding)
+            for key, value in result.items()
+        }
+    if isinstance(result, (list, tuple)):
+        return [_replace_arrays(value, buffers, encoding) for value in result]
+    return result
+
+
+def encode_base64(result: Any) -> Any:
+    """The result with the arrays replaced by base64 encoded buffers, ready to be written as JSON."""
+    return _replace_arrays(result, [], 'base64')
+
+
+def encode_binary(result: Any) -> bytes:
+    """Header and buffers with the arrays in the result, as described in the module documentation."""
+    buffers = []
+    content = _replace_arrays(result, buffers, 'binary')
+    header = json.dumps(content, separators=(',', ':')).encode()
+    # Pad the header with spaces such that the buffers are aligned
+    header += b' ' * ((-len(header) - 4) % _ALIGNMENT)
+    parts = [struct.pack('<I', len(header)), header]
+    for values in buffers:
+        parts.append(values.tobytes())
+        parts.append(b'\x00' * (_padded_size(values) - values.nbytes))
+    return b''.join(parts)
+
+
+def decode_binary(content: bytes) -> Any:
+    """Inverse of encode_binary. The arrays are read only views of the content."""
+    (header_length,) = struct.unpack_from('<I', content)
+    start = 4 + header_length
+    result = json.loads(content[4:start].decode())
+    return _restore_arrays(result, memoryview(content)[start:])
+
+
+def _restore_arrays(result: Any, buffer: memoryview) -> Any:
+    if isinstance(result, dict):
+        if 'dtype' in result and 'shape' in result and 'offset' in result:
+            dtype = np.dtype('<' + result['dtype'])
+            values = np.frombuffer(
+                buffer,
+                dtype=dtype,
+                count=result['length'] // dtype.itemsize,
+                offset=result['offset'],
+            )
+            return values.reshape(result['shape'])
+        return {key: _restore_arrays(value, buffer) for key, value in result.items()}
+    if isinstance(result, list):
+        return [_restore_arrays(value, buffer) for value in result]
+    return result
+
+
+def encode(result: Any, encoding: str = 'json') -> Any:
+    """Encode the result. It is bytes for the 'binary' encoding,
+    and should be written as JSON otherwise."""
+    if encoding == 'json':
+        return to_json_compatible(result)
+    if encoding == 'base64':
+        return encode_base64(result)
+    if encoding == 'binary':
+        return encode_binary(result)
+    raise ValueError(f"Unknown encoding '{encoding}'. Must be one of {ENCODINGS}")
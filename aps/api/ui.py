@@ -1,4 +1,6 @@
 # -*- coding: utf-8 -*-
+from inspect import signature
+
 from aps.utils.roxar.rms_project_data import RMSData
 import roxar.rms
 
@@ -7,3 +9,8 @@ def call(method_name, *args, **kwargs):
     # TODO: Separate rms methods from 'static' methods
     func = getattr(RMSData(roxar, project), method_name)
     return func(*args, **kwargs)
+
+
+def supports_encoding(method_name):
+    """Whether the method can return its arrays as buffers (see aps.api.encoding)."""
+    return 'encoding' in signature(getattr(RMSData, method_name)).parameters
@@ -13,10 +13,9 @@ Output:
 from collections import OrderedDict
 
 import numpy as np
-from scipy.stats import norm
 
 from aps.algorithms.APSModel import APSModel
-from aps.utils.checks import check_probability_values, check_probability_normalisation
+from aps.utils.checks import check_and_normalise_probability
 from aps.utils.constants.simple import (
     Debug,
     ProbabilityTolerances,
@@ -39,215 +38,7 @@ from aps.utils.roxar.grid_model import (
 )
 from aps.utils.roxar.progress_bar import APSProgressBar
 from aps.utils.simulation import initialize_rms_parameters
-
-
-def transform_empiric(cell_index_defined, gauss_values, alpha_values):
-    """
-    For the defined cells, transform the input Gaussian fields by the
-    cumulative empiric distribution to get uniform distribution of the cells.
-    The result is assigned to the input vectors alpha which also is returned.
-    The input vectors gauss_values and alpha_values are both of length equal to
-    the number of active cells in the grid model. The list cell_index_defined is an
-    index array with indices in the gauss_values and alpha_values arrays. The length of cell_index_defined
-    is num_defined_cells and is usually less than the number of active grid cells in the grid model.
-    Typically the cell indices defined in cell_index_defined are all cells within a zone or a (zone,region) combination.
-
-    :param cell_index_defined: Index array. The length is num_defined_cells.
-                             The content is cell index which is used in the
-                             grid parameter gauss_values or alpha_values.
-    :type cell_index_defined: numpy vector
-    :param gauss_values: Gaussian fields to be transformed. The length is the
-                        same as the list of active cells in the grid model.
-                        Only the subset of cells with indices specified in cell_index_defined
-                        are considered here.
-    :type gauss_values: numpy vector
-    :param alpha_values: Transformed gaussian fields. The length is the same as
-                        the gauss_values. The input values in the
-                        alpha vectors are updated for those cells that belongs
-                        to specified cell_index_defined list.
-    :type alpha_values: numpy vector
-    :return: The updated alpha vector is returned. Only cells with indices defined by
-             the list cell_index_defined are modified compared with the values
-             the vector had as input.
-    """
-    if gauss_values is None:
-        return None
-    num_defined_cells = len(cell_index_defined)
-    increment = 1.0 / num_defined_cells
-    # Numpy vector operation to select subset of values corresponding to the defined grid cells
-    gauss_values_selected = gauss_values[cell_index_defined]
-
-    # The numpy array operations below are equivalent to
-    # the code:
-    #    sort_index = np.argsort(gauss_values_selected)
-    #    for i in range(num_defined_cells):
-    #        index = sort_index[i]
-    #        alpha_values[cell_index_defined[index]] = float(i) / float(num_defined_cells)
-
-    range_array = np.arange(num_defined_cells)
-    sort_index = np.argsort(gauss_values_selected)
-    sorted_cell_index_defined = cell_index_defined[sort_index]
-    alpha_values[sorted_cell_index_defined] = range_array * increment
-    return alpha_values
-
-
-def transform_CDF(cell_index_defined, gauss_values, alpha_values):
-    """
-    Transform Gaussian values (with expectation = 0 and variance = 1) by cumulative normal distribution into values in [0,1].
-    Only selected set of values defined by cell_index_defined is transformed.
-    """
-    if gauss_values is None:
-        return None
-
-    # Numpy vector operation to select subset of values corresponding to the defined grid cells
-    gauss_values_selected = gauss_values[cell_index_defined]
-    alpha_values[cell_index_defined] = norm.cdf(gauss_values_selected, loc=0, scale=1)
-    return alpha_values
-
-
-def check_and_normalise_probability(
-    num_facies,
-    prob_parameter_values_for_facies,
-    use_const_probability,
-    cell_index_defined,
-    eps,
-    tolerance_of_probability_normalisation,
-    max_allowed_fraction_with_mismatch,
-    debug_level,
-):
-    """
-    Check that probability cubes or probabilities in input prob_parameter_values_for_facies is
-    normalised. If not normalised, a normalisation is done. The numpy vector
-    cell_index_defined is an index vector. The length is in general less than
-    the total number of active cells for the grid. Typically the
-    cell_index_defined vector represents active cells belonging to a specified
-    zone, but could in principle be any subset of interest of the total set of
-    all active cells. The content of the cell_index_defined array is indices in
-    vectors containing all active cells and is a way of defining a subset of
-    cells.
-    :param num_facies: the number of facies
-    :type num_facies: int
-    :param prob_parameter_values_for_facies: A list of vectors where each vector
-                                     represents probabilities for active grid
-                                     cells. The first entry corresponds to the
-                                     first facies in the facies list and so on.
-                                     [facies_name,values] = prob_parameter_values_for_facies[f]
-                                     where facies_name is facies name and values is
-                                     the probability values per cell.
-                                     Note: If use_const_probability = 1, the values
-                                     list has one element only. and represent
-                                     a constant facies probability.
-                                     If use_const_probability = 0, the values is a list
-                                     of probabilities, one per grid cell.
-    :type prob_parameter_values_for_facies: list
-    :param use_const_probability: Is True if prob_parameter_values_for_facies contains constant
-                         probabilities and False if prob_parameter_values_for_facies
-                         contains vectors of probabilities, one value per
-                         active grid cell.
-    :type use_const_probability: bool
-    :param cell_index_defined: A vector containing indices. cell_index_defined[i]
-                             is an index in the probability vectors in
-                             prob_parameter_values_for_facies. It is a way to defined
-                             a filter of grid cells, a subset of all active
-                             grid cells in the grid.
-    :type cell_index_defined: numpy vector
-    :param eps: Probability tolerance. If normalisation of probability values deviates more than eps from 1.0,
-                calculations are done to normalise the probabilities.
-    :type eps: float value > 0.0 but usually small
-    :param debug_level: Define output print level from the function.
-    :type debug_level: Debug
-    :return: list of vectors, one per facies. The vectors are normalised
-             probabilities for the subset of grid cells defined by the
-             cell_index_defined index vector.
-    """
-    # The list prob_parameter_values_for_facies has items =[name,values]
-    # Define index names for this item
-
-    if debug_level >= Debug.VERY_VERBOSE:
-        if use_const_probability:
-            print('--- Check normalisation of probabilities.')
-        else:
-            print('--- Check normalisation of probability cubes.')
-
-    probability_defined = []
-    num_cell_with_modified_probability = 0
-    if use_const_probability:
-        for f in range(num_facies):
-            item = prob_parameter_values_for_facies[f]
-            facies_name = item.name
-            values = item.value
-            if debug_level >= Debug.VERY_VERBOSE:
-                print(
-                    f'--- Facies: {facies_name} with constant probability:{values[0]} '
-                )
-            probability_defined.append(values[0])
-
-        # Check that probabilities sum to 1
-        psum = probability_defined[0]
-        for f in range(1, num_facies):
-            psum = psum + probability_defined[f]
-        if abs(psum - 1.0) > eps:
-            raise ValueError(
-                f'Probabilities for facies are not normalized for this zone (Total: {psum})'
-            )
-
-    else:
-        num_defined_cells = len(cell_index_defined)
-
-        # Allocate space for probability per facies per defined cell
-        for f in range(num_facies):
-            probability_defined.append(np.zeros(num_defined_cells, np.float32))
-            item = prob_parameter_values_for_facies[f]
-            facies_name = item.name
-            values = item.value
-            if debug_level >= Debug.VERY_VERBOSE:
-                print(f'--- Facies: {facies_name}')
-
-            defined_values = values[cell_index_defined]
-            # Check that probabilities are in interval [0,1]. If not, set to 0 if negative and 1 if larger than 1.
-            # Error message if too large fraction of input values are outside interval [0,1] also when using tolerance.
-            probability_defined[f] = check_probability_values(
-                defined_values,
-                tolerance_of_probability_normalisation,
-                max_allowed_fraction_with_mismatch,
-                facies_name,
-            )
-
-        # Sum up probability over all facies per defined cell
-        prob_vector = probability_defined[0]
-        psum = np.copy(prob_vector)
-        for f in range(1, num_facies):
-            # sum of np arrays (cell by cell sum)
-            psum += probability_defined[f]
-
-        normalise_is_necessary = check_probability_normalisation(
-            psum,
-            eps,
-            tolerance_of_probability_normalisation,
-            max_allowed_fraction_with_mismatch,
-        )
-        if normalise_is_necessary:
-            if debug_level >= Debug.VERBOSE:
-                print('-- Normalise probability cubes.')
-
-            for f in range(num_facies):
-                prob_vector = probability_defined[f]
-                if f == 0:
-                    # Numpy operation to make an array with 0 or 1 where 1 is set if condition is satisfied
-                    # Number of cells with 1 are number of cells with modified probabilities
-                    check_value = (psum > (1.0 + eps)) | (psum < (1.0 - eps))
-                    num_cell_with_modified_probability = check_value.sum()
-
-                # Normalisation
-                prob_vector = prob_vector / psum
-                probability_defined[f] = prob_vector
-
-            if debug_level >= Debug.VERY_VERBOSE:
-                print(
-                    f'--- Number of grid cells in zone is:                           {num_defined_cells}\n'
-                    f'--- Number of grid cells which is recalculated and normalized: {num_cell_with_modified_probability}'
-                )
-    return probability_defined, num_cell_with_modified_probability
+from aps.utils.transform import transform_CDF, transform_empiric
 
 
 def get_used_gauss_field_names_in_zone(
@@ -283,7 +74,7 @@ def run(
     if debug_level >= Debug.ON:
         print(f'- Read file: {model_file_name}')
 
-    aps_model = APSModel(model_file_name)
+    aps_model = APSModel.from_cache(model_file_name)
     grid_model = project.grid_models[aps_model.grid_model_name]
     if grid_model.is_empty(realization_number):
         raise ValueError(
@@ -295,6 +86,8 @@ def run(
     is_shared = False
     if fmu_mode or fmu_mode_only_param:
         is_shared = True
+    # Store alpha values and probabilities as small integers in the truncation to reduce memory usage
+    compact_data_types = kwargs.get('compact_data_types', False)
 
     all_zone_models = aps_model.sorted_zone_models
     region_param_name = aps_model.getRegionParamName()
@@ -355,7 +148,8 @@ def run(
 
     # Initialize dictionaries with gauss field values (with trend)
     # and transformed gauss field values for all used gauss fields.
-    # The values are read from RMS project if they exists.
+    # The values are read from RMS project if they exists when first used by a zone,
+    # and released when the last selected zone using them is finished.
     # If the 3D parameters does not exist, the values are initialized to 0.
     gf_all_values, gf_all_alpha, _, _ = initialize_rms_parameters(
         project,
@@ -384,10 +178,11 @@ def run(
 
     # Loop over all pairs of (zone_number, region_number) that is specified and selected
     # This loop calculates facies for the given (zone_number, region_number) combination
-    for key, zone_model in all_zone_models.items():
+    for key in all_zone_models:
         zone_number, region_number = key
         if not aps_model.isSelected(zone_number, region_number):
             continue
+        zone_model = all_zone_models[key]
 
         if debug_level >= Debug.ON:
             if use_regions:
@@ -440,6 +235,8 @@ def run(
                 f'Warning: No active grid cells for (zone, region)=({zone_number}, {region_number})\n'
                 '         Skip this zone, region combination'
             )
+            gf_all_values.release_zone(gf_names_for_truncation_rule)
+            gf_all_alpha.release_zone(gf_names_for_truncation_rule)
             continue
 
         # For current zone,transform all gaussian fields used in this zone and update alpha
@@ -625,6 +422,7 @@ def run(
                 gf_alpha_for_current_zone,
                 facies_real,
                 cell_index_defined,
+                compact_data_types=compact_data_types,
             )
         else:
             # Do not use optimization
@@ -758,6 +556,10 @@ def run(
                         f'--- Add facies: {facies_name} to the list of modelled facies'
                     )
 
+        # Release the gauss fields not used by the remaining zones
+        gf_all_values.release_zone(gf_names_for_truncation_rule)
+        gf_all_alpha.release_zone(gf_names_for_truncation_rule)
+
         APSProgressBar.increment()
 
     # End loop over zones
@@ -822,7 +624,7 @@ def run(
 
 
 def print_zones_and_regions(all_zone_models, aps_model, use_regions):
-    for key, zone_model in all_zone_models.items():
+    for key in all_zone_models:
         zone_number, region_number = key
         if not aps_model.isSelected(zone_number, region_number):
             continue
@@ -6,6 +6,7 @@ from pathlib import Path
 from aps.algorithms.APSModel import APSModel
 from aps.utils.methods import get_run_parameters
 from aps.utils.constants.simple import Debug
+from aps.utils.gaussian_simulation import get_seed_file_name
 
 
 def run(roxar=None, project=None, **kwargs):
@@ -18,7 +19,7 @@ def run(roxar=None, project=None, **kwargs):
     writeSeedFile = apsModel.write_seeds
 
     # Set seed file to point to seed file for this realisation
-    seedFileNameNew = 'seed_list_' + str(real_number + 1) + '.dat'
+    seedFileNameNew = get_seed_file_name(real_number)
     command = 'ln -sf ' + seedFileNameNew + ' ' + seedFileName
     os.system(command)
 
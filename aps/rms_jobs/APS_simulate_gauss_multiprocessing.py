@@ -203,7 +203,7 @@ def run_simulations(
 
     # Read APS model
     print(f'- Read file: {model_file}')
-    aps_model = APSModel(model_file)
+    aps_model = APSModel.from_cache(model_file)
     debug_level = aps_model.debug_level
     seed_file_name = aps_model.seed_file_name
     write_seed_file = aps_model.write_seeds
@@ -239,10 +239,11 @@ def run_simulations(
 
     # Loop over all zones and simulate gauss fields
     all_zone_models = aps_model.sorted_zone_models
-    for key, zone_model in all_zone_models.items():
+    for key in all_zone_models:
         zone_number, region_number = key
         if not aps_model.isSelected(zone_number, region_number):
             continue
+        zone_model = all_zone_models[key]
         gauss_field_names = zone_model.getGaussFieldsInTruncationRule()
         [start, end] = rms_data.getStartAndEndLayerInZone(zone_number)
         num_layers = rms_data.getNumberOfLayersInZone(zone_number)
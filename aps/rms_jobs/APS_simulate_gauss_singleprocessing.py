@@ -7,7 +7,9 @@ import gaussianfft
 import numpy as np
 
 from aps.algorithms.APSModel import APSModel
+from aps.algorithms.trend.kernel import with_trend_kernel_cache
 from aps.utils.constants.simple import Debug
+from aps.utils.gaussian_simulation import define_variogram
 from aps.utils.io import ensure_folder_exists
 from aps.utils.methods import get_specification_file, get_debug_level
 from aps.utils.roxar.generalFunctionsUsingRoxAPI import (
@@ -20,26 +22,7 @@ from aps.utils.methods import get_seed_log_file
 from aps.utils.trend import add_trends
 
 
-def define_variogram(variogram, azimuth_value_sim_box):
-    variogram_name = variogram.type.name.lower()
-    # Note: Since RMS is a left-handed coordinate system and gaussianfft treat the coordinate
-    # system as right-handed, we have to transform the azimuth angle to 90-azimuth
-    # to get it correct in RMS.
-    azimuth_in_gaussianfft = 90.0 - azimuth_value_sim_box
-    args = [
-        variogram.ranges.main,
-        variogram.ranges.perpendicular,
-        variogram.ranges.vertical,
-        azimuth_in_gaussianfft,
-        variogram.angles.dip,
-    ]
-    if variogram_name == 'general_exponential':
-        args.append(variogram.power)
-    args = [float(arg) for arg in args]
-
-    return gaussianfft.variogram(variogram_name, *args)
-
-
+@with_trend_kernel_cache
 def run_simulations(
     project,
     model_file='APS.xml',
@@ -55,7 +38,7 @@ def run_simulations(
     """
 
     # Read APS model
-    aps_model = APSModel(model_file)
+    aps_model = APSModel.from_cache(model_file)
     debug_level = aps_model.log_setting
     fmu_with_residual_grf = aps_model.fmu_use_residual_fields
     if debug_level >= Debug.ON:
@@ -103,10 +86,11 @@ def run_simulations(
 
     # Loop over all zones and simulate gauss fields
     all_zone_models = aps_model.sorted_zone_models
-    for key, zone_model in all_zone_models.items():
+    for key in all_zone_models:
         zone_number, region_number = key
         if not aps_model.isSelected(zone_number, region_number):
             continue
+        zone_model = all_zone_models[key]
         gauss_field_names = zone_model.gaussian_fields_in_truncation_rule
         # Add zone names / number, if FMU
         if fmu_mode:
@@ -8,8 +8,17 @@ from aps.rms_jobs.import_fields_from_disk import run as run_import_fields
 def run(roxar=None, project=None, **kwargs):
     with TemporaryDirectory() as location:
         location = Path(location)
-        run_export_fields(roxar, project, save_dir=location, **kwargs)
-        run_import_fields(roxar, project, load_dir=location, **kwargs)
+        # The fields are only read by APS, so the compact binary format is used
+        run_export_fields(
+            project, save_dir=location, exchange_file_format='npy', **kwargs
+        )
+        run_import_fields(
+            project,
+            load_dir=location,
+            geo_grid_name=kwargs['rms_grid_name'],
+            exchange_file_format='npy',
+            **kwargs,
+        )
 
 
 if __name__ == '__main__':
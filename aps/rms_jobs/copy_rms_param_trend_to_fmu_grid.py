@@ -4,10 +4,17 @@ in ERTBOX grid. This functionality is used when the user wants to
 apply customized trends for GRF's in APS and run this in FMU with AHM.
 """
 
+import hashlib
+import math
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
 import numpy as np
 import numpy.ma as ma
 import roxar
-import math
 
 from roxar import Direction
 from aps.algorithms.APSModel import APSModel
@@ -76,10 +83,11 @@ def get_trend_param_names_from_aps_model(
     zone_dict = {}
     use_rms_param_trend = False
     all_zone_models = aps_model.sorted_zone_models
-    for key, zone_model in all_zone_models.items():
+    for key in all_zone_models:
         zone_number, region_number = key
         if not aps_model.isSelected(zone_number, region_number):
             continue
+        zone_model = all_zone_models[key]
         zone_index = zone_number - 1
         zone_name = zone_names[zone_index]
 
@@ -310,6 +318,261 @@ def get_grid_indices(geogrid, nx, ny, start_layer, end_layer):
     return i_indices, j_indices, k_indices, zone_cell_numbers
 
 
+class ErtboxTransferPlan:
+    """
+    Index mapping for one geogrid zone into the ERTBOX grid.
+    The (i, j, k) indices are simbox indices in geogrid for the defined
+    grid cells of the zone, and ertbox_k_indices are the corresponding
+    layer indices in ERTBOX grid for the given conformity.
+    """
+
+    __slots__ = (
+        'zone_number',
+        'conformity',
+        'number_layers',
+        'start_layer',
+        'end_layer',
+        'i_indices',
+        'j_indices',
+        'k_indices',
+        'ertbox_k_indices',
+        'zone_cell_numbers',
+    )
+
+    def __init__(
+        self,
+        zone_number,
+        conformity,
+        number_layers,
+        start_layer,
+        end_layer,
+        i_indices,
+        j_indices,
+        k_indices,
+        zone_cell_numbers,
+        nz_ertbox,
+    ):
+        self.zone_number = zone_number
+        self.conformity = conformity
+        self.number_layers = number_layers
+        self.start_layer = start_layer
+        self.end_layer = end_layer
+        self.i_indices = i_indices
+        self.j_indices = j_indices
+        self.k_indices = k_indices
+        self.zone_cell_numbers = zone_cell_numbers
+        # The RMS simbox layers for the zone are copied into ertbox grid
+        # at top if grid layout is top conform or proportional and
+        # at the bottom if grid layout is base conform.
+        # Must be consistent with export_fields_to_disk.py
+        if conformity in [Conform.BaseConform]:
+            offset = nz_ertbox - number_layers
+        elif conformity in [Conform.TopConform, Conform.Proportional]:
+            offset = 0
+        else:
+            raise NotImplementedError(
+                f'Grid conformity: {conformity} is not supported.'
+            )
+        self.ertbox_k_indices = k_indices - start_layer + offset
+
+    @property
+    def number_of_cells(self):
+        return len(self.zone_cell_numbers)
+
+
+class ErtboxTransferPlanner:
+    """
+    Compute the mapping from geogrid to ERTBOX grid once per zone and reuse it
+    for all parameters to transfer. The grid indices for a zone are kept in memory
+    and optionally cached on disk in cache_dir keyed by a fingerprint
+    of the geogrid such that later jobs using the same grid geometry can skip
+    the lookup of cell indices from RMS.
+    """
+
+    def __init__(
+        self,
+        geogrid,
+        nx,
+        ny,
+        nz_ertbox,
+        cache_dir=None,
+        debug_level=Debug.OFF,
+    ):
+        self.geogrid = geogrid
+        self.nx = nx
+        self.ny = ny
+        self.nz_ertbox = nz_ertbox
+        self.nz = geogrid.simbox_indexer.dimensions[2]
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.debug_level = debug_level
+        (
+            self.number_layers_per_zone,
+            self.start_layers_per_zone,
+            self.end_layers_per_zone,
+        ) = get_zone_layer_numbering(geogrid)
+        self._fingerprint = None
+        self._indices_per_zone = {}
+        self._plans = {}
+
+    @property
+    def fingerprint(self):
+        """
+        Hash of grid dimensions, index handedness, zonation and
+        the defined grid cells of the geogrid.
+        """
+        if self._fingerprint is None:
+            indexer = self.geogrid.simbox_indexer
+            try:
+                ijk_handedness = indexer.ijk_handedness
+            except AttributeError:
+                ijk_handedness = indexer.handedness
+            cell_numbers = indexer.get_cell_numbers_in_range(
+                (0, 0, 0), (self.nx, self.ny, self.nz)
+            )
+            h = hashlib.sha1()
+            h.update(
+                repr(
+                    (
+                        self.nx,
+                        self.ny,
+                        self.nz,
+                        str(ijk_handedness),
+                        self.start_layers_per_zone,
+                        self.end_layers_per_zone,
+                    )
+                ).encode('utf-8')
+            )
+            h.update(np.ascontiguousarray(cell_numbers, dtype=np.int64).tobytes())
+            self._fingerprint = h.hexdigest()
+        return self._fingerprint
+
+    def _cache_file(self, zone_number):
+        return self.cache_dir / f'ertbox_transfer_{self.fingerprint}_{zone_number}.npz'
+
+    def _grid_indices(self, zone_number):
+        if zone_number in self._indices_per_zone:
+            return self._indices_per_zone[zone_number]
+        zone_index = zone_number - 1
+        start_layer = self.start_layers_per_zone[zone_index]
+        end_layer = self.end_layers_per_zone[zone_index]
+        indices = None
+        if self.cache_dir is not None:
+            cache_file = self._cache_file(zone_number)
+            if cache_file.exists():
+                try:
+                    with np.load(cache_file) as data:
+                        indices = (
+                            data['i_indices'],
+                            data['j_indices'],
+                            data['k_indices'],
+                            data['zone_cell_numbers'],
+                        )
+                    if self.debug_level >= Debug.VERY_VERBOSE:
+                        print(f'--- Read grid indices from cache: {cache_file}')
+                except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+                    indices = None
+        if indices is None:
+            indices = get_grid_indices(
+                self.geogrid, self.nx, self.ny, start_layer, end_layer
+            )
+            if self.cache_dir is not None:
+                self._save_grid_indices(zone_number, indices)
+        self._indices_per_zone[zone_number] = indices
+        return indices
+
+    def _save_grid_indices(self, zone_number, indices):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        cache_file = self._cache_file(zone_number)
+        i_indices, j_indices, k_indices, zone_cell_numbers = indices
+        # Write to a unique file and rename, such that an interrupted run
+        # or a concurrent job never leaves a partially written cache file
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=cache_file.stem, suffix='.tmp', dir=self.cache_dir
+        )
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                np.savez(
+                    file,
+                    i_indices=i_indices,
+                    j_indices=j_indices,
+                    k_indices=k_indices,
+                    zone_cell_numbers=zone_cell_numbers,
+                )
+            os.replace(tmp_path, cache_file)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        if self.debug_level >= Debug.VERY_VERBOSE:
+            print(f'--- Write grid indices to cache: {cache_file}')
+
+    def plan(self, zone_number, conformity):
+        key = (zone_number, conformity)
+        if key not in self._plans:
+            zone_index = zone_number - 1
+            number_layers = self.number_layers_per_zone[zone_index]
+            if number_layers > self.nz_ertbox:
+                raise ValueError(
+                    f'Number of layers of ERTBOX grid ({self.nz_ertbox}) '
+                    f'is less than number of layers in geogrid ({number_layers}) '
+                    f'for zone number {zone_number}.'
+                )
+            i_indices, j_indices, k_indices, zone_cell_numbers = self._grid_indices(
+                zone_number
+            )
+            self._plans[key] = ErtboxTransferPlan(
+                zone_number,
+                conformity,
+                number_layers,
+                self.start_layers_per_zone[zone_index],
+                self.end_layers_per_zone[zone_index],
+                i_indices,
+                j_indices,
+                k_indices,
+                zone_cell_numbers,
+                self.nz_ertbox,
+            )
+        return self._plans[key]
+
+    def active_in_ertbox(self, plan):
+        ertbox_active_3d = np.zeros((self.nx, self.ny, self.nz_ertbox), dtype=np.uint8)
+        ertbox_active_3d[plan.i_indices, plan.j_indices, plan.ertbox_k_indices] = 1
+        return np.reshape(ertbox_active_3d, self.nx * self.ny * self.nz_ertbox)
+
+    def transfer(self, plan, stacked_values, dtype=np.float32):
+        """
+        Copy the zone values of N parameters at once.
+        Input stacked_values has shape (N, number of cells in the geogrid)
+        and the result is a masked array with shape (N, nx, ny, nz_ertbox)
+        where only ERTBOX grid cells corresponding to defined
+        geogrid cells in the zone are unmasked.
+        """
+        number_of_params = stacked_values.shape[0]
+        ertbox_values_masked = ma.masked_all(
+            (number_of_params, self.nx, self.ny, self.nz_ertbox), dtype=dtype
+        )
+        ertbox_values_masked[
+            :, plan.i_indices, plan.j_indices, plan.ertbox_k_indices
+        ] = stacked_values[:, plan.zone_cell_numbers]
+        return ertbox_values_masked
+
+
+def get_stacked_param_values(geogrid_model, param_names, real_number, dtype):
+    """
+    Return the values of all specified parameters as one array with shape
+    (number of parameters, number of cells in the geogrid).
+    """
+    stacked_values = None
+    for index, param_name in enumerate(param_names):
+        values = get_param_values(geogrid_model, param_name, real_number)
+        if stacked_values is None:
+            stacked_values = np.empty((len(param_names), len(values)), dtype=dtype)
+        stacked_values[index] = values
+    return stacked_values
+
+
 def get_region_param(region_param_name: str, geogrid_model, real_number):
     # Check region parameter if used
     region_param = None
@@ -340,6 +603,8 @@ def copy_from_geo_to_ertbox_grid(
     normalize_trend: bool = False,
     not_aps_workflow: bool = False,
     seed: int = 12345,
+    planner=None,
+    max_workers: int = 1,
 ):
     """
     zone_dict[zone_name] = (zone_number, region_number, conformity, param_name_list)
@@ -362,6 +627,9 @@ def copy_from_geo_to_ertbox_grid(
                            cells above the uppermost active cell, they will be assigned a constant
                            value in the same way as option EXTEND_LAYER_MEAN. The same procedure
                            is used to fill in inactive cell values below lowermost active cell.
+    planner - Optional ErtboxTransferPlanner to reuse the geogrid to ERTBOX index mapping
+              from previous calls. A new one is created if not specified.
+    max_workers - Number of threads used to extrapolate parameters for a zone.
     """
     real_number = project.current_realisation
     geogrid_model, geogrid = get_grid_model(project, geo_grid_model_name)
@@ -370,54 +638,29 @@ def copy_from_geo_to_ertbox_grid(
     # Both ERTBOX grid and geogrid should have same nx, ny dimensions
     # nz is here the geogrid number of layers for all zones
     # nz_ertbox is number of layers in total in ERTBOX grid
-    nx, ny, nz, nz_ertbox = check_and_get_grid_dimensions(
+    nx, ny, _, nz_ertbox = check_and_get_grid_dimensions(
         geogrid, ertboxgrid, geo_grid_model_name, ertbox_grid_model_name
     )
+    if planner is None:
+        planner = ErtboxTransferPlanner(
+            geogrid, nx, ny, nz_ertbox, debug_level=debug_level
+        )
 
-    number_layers_per_zone, start_layers_per_zone, end_layers_per_zone = (
-        get_zone_layer_numbering(geogrid)
-    )
+    prefix = 'aps_'
+    if not_aps_workflow:
+        prefix = ''
 
     # Get parameter names from model specification
     for zone_name, zone_item in zone_dict.items():
         zone_number, _, conformity, param_name_list = zone_item
-        zone_index = zone_number - 1
-        number_layers = number_layers_per_zone[zone_index]
-        start_layer = start_layers_per_zone[zone_index]
-        end_layer = end_layers_per_zone[zone_index]
-        if number_layers > nz_ertbox:
-            raise ValueError(
-                f'Number of layers of {ertbox_grid_model_name} ({nz_ertbox}) '
-                f'is less than number of layers in {geo_grid_model_name} ({number_layers})'
-                f'for zone {zone_name}.'
-            )
+        plan = planner.plan(zone_number, conformity)
         if debug_level >= Debug.VERY_VERBOSE:
             print(f'--- zone name: {zone_name}')
-            print(f'--- number_layers: {number_layers}')
-            print(f'--- start_layer: {start_layer}  end_layer: {end_layer}')
-
-        i_indices, j_indices, k_indices, zone_cell_numbers = get_grid_indices(
-            geogrid, nx, ny, start_layer, end_layer
-        )
-
-        prefix = 'aps_'
-        if not_aps_workflow:
-            prefix = ''
+            print(f'--- number_layers: {plan.number_layers}')
+            print(f'--- start_layer: {plan.start_layer}  end_layer: {plan.end_layer}')
 
         # The active cells as array
-        ertbox_active = active_params_in_zone(
-            i_indices,
-            j_indices,
-            k_indices,
-            nx,
-            ny,
-            nz,
-            nz_ertbox,
-            conformity,
-            number_layers,
-            start_layer,
-            end_layer,
-        )
+        ertbox_active = planner.active_in_ertbox(plan)
         # Active stored in RMS parameter
         if save_active_param:
             ertbox_active_param_to_rms(
@@ -429,68 +672,48 @@ def copy_from_geo_to_ertbox_grid(
                 debug_level,
             )
 
-        for param_name in discrete_param_names:
-            ertbox_values_3d_masked = copy_parameters_for_zone(
-                zone_name,
-                geogrid_model,
-                ertbox_grid_model_name,
-                param_name,
-                i_indices,
-                j_indices,
-                k_indices,
-                zone_cell_numbers,
-                conformity,
-                nx,
-                ny,
-                nz,
-                nz_ertbox,
-                number_layers,
-                start_layer,
-                end_layer,
-                real_number,
-                param_type='int',
-                debug_level=debug_level,
+        if len(discrete_param_names) > 0:
+            if debug_level >= Debug.VERBOSE:
+                for param_name in discrete_param_names:
+                    print(f'-- Zone: {zone_name} Parameter:{param_name} ')
+            stacked_values = get_stacked_param_values(
+                geogrid_model, discrete_param_names, real_number, np.uint16
             )
-            # Inactive cells filled with -1
-            ertbox_values_3d = ertbox_values_3d_masked.filled(0)
-            ertbox_values = np.reshape(ertbox_values_3d, nx * ny * nz_ertbox)
-            update_ertbox_properties_int(
-                prefix,
-                zone_name,
-                param_name,
-                ertbox_grid_model,
-                ertbox_values,
-                real_number,
-                debug_level=debug_level,
+            ertbox_values_masked = planner.transfer(
+                plan, stacked_values, dtype=np.uint16
             )
+            del stacked_values
+            for index, param_name in enumerate(discrete_param_names):
+                # Inactive cells filled with 0
+                ertbox_values_3d = ertbox_values_masked[index].filled(0)
+                ertbox_values = np.reshape(ertbox_values_3d, nx * ny * nz_ertbox)
+                update_ertbox_properties_int(
+                    prefix,
+                    zone_name,
+                    param_name,
+                    ertbox_grid_model,
+                    ertbox_values,
+                    real_number,
+                    debug_level=debug_level,
+                )
 
-        for param_name in param_name_list:
-            # Copy parameter for give zone from geogrid to ertbox grid
-            ertbox_values_3d_masked = copy_parameters_for_zone(
-                zone_name,
-                geogrid_model,
-                ertbox_grid_model_name,
-                param_name,
-                i_indices,
-                j_indices,
-                k_indices,
-                zone_cell_numbers,
-                conformity,
-                nx,
-                ny,
-                nz,
-                nz_ertbox,
-                number_layers,
-                start_layer,
-                end_layer,
-                real_number,
-                param_type='float',
-                debug_level=debug_level,
-            )
+        if len(param_name_list) == 0:
+            continue
+
+        # Copy all parameters for the zone from geogrid to ertbox grid in one operation
+        if debug_level >= Debug.VERBOSE:
+            for param_name in param_name_list:
+                print(f'-- Zone: {zone_name} Parameter:{param_name} ')
+        stacked_values = get_stacked_param_values(
+            geogrid_model, param_name_list, real_number, np.float32
+        )
+        ertbox_values_masked = planner.transfer(plan, stacked_values, dtype=np.float32)
+        del stacked_values
 
+        def fill_inactive(index):
             # Fill values for all inactive cells in ertbox
             ertbox_values = extrapolate_values_for_zone(
-                ertbox_values_3d_masked,
+                ertbox_values_masked[index],
                 extrapolation_method,
                 nx,
                 ny,
@@ -502,8 +725,6 @@ def copy_from_geo_to_ertbox_grid(
 
             # Normalize values to be between 0 and 1 within this zone
             if normalize_trend:
-                if debug_level >= Debug.VERBOSE:
-                    print(f'-- Normalize parameter: {param_name} ')
                 selected_values = ertbox_values[ertbox_active == 1]
                 minval = selected_values.min()
                 maxval = selected_values.max()
@@ -518,7 +739,19 @@ def copy_from_geo_to_ertbox_grid(
                 else:
                     # Constant trend equal to 0 is set if trend is constant
                     ertbox_values[:] = 0.0
+            return ertbox_values
+
+        indices = range(len(param_name_list))
+        if max_workers > 1 and len(param_name_list) > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                all_ertbox_values = executor.map(fill_inactive, indices)
+        else:
+            all_ertbox_values = map(fill_inactive, indices)
 
+        # RMS parameters are updated from the main thread only
+        for param_name, ertbox_values in zip(param_name_list, all_ertbox_values):
+            if normalize_trend and debug_level >= Debug.VERBOSE:
+                print(f'-- Normalize parameter: {param_name} ')
             # Create /Update ertbox properties in RMS
             update_ertbox_properties_float(
                 prefix,
@@ -682,86 +915,6 @@ def add_noise_to_undefined_grid_cell_values(
     return ertbox_values_3d_masked
 
 
-def copy_parameters_for_zone(
-    zone_name,
-    geogrid_model,
-    ertbox_model_name,
-    param_name,
-    i_indices,
-    j_indices,
-    k_indices,
-    zone_cell_numbers,
-    conformity,
-    nx,
-    ny,
-    nz,
-    nz_ertbox,
-    number_layers,
-    start_layer,
-    end_layer,
-    real_number,
-    param_type='float',
-    debug_level=Debug.OFF,
-):
-    """
-    Description:
-    For specified zone name a parameter from the geomodel is copied
-    to the ertbox grid. The i,j,k indices coming from the geogrid
-    defines the (i,j,k) indices with actively used values.
-    The zone_cell_numbers define active cell numbers in geomodel.
-    The mapping from geogrid to ertbox grid is defined by the
-    specified geogrid conformity and the layer interval.
-    """
-    param_values_active = get_param_values(geogrid_model, param_name, real_number)
-
-    if debug_level >= Debug.VERBOSE:
-        print(f'-- Zone: {zone_name} Parameter:{param_name} ')
-
-    # Mask all values for geogrid parameter except the active values within the zone
-    if param_type == 'float':
-        param_values_3d_all = ma.masked_all((nx, ny, nz), dtype=np.float32)
-    elif param_type == 'int':
-        param_values_3d_all = ma.masked_all((nx, ny, nz), dtype=np.uint16)
-    else:
-        raise ValueError(f"Parameter type must be 'float' or 'int' ")
-    param_values_3d_all[i_indices, j_indices, k_indices] = param_values_active[
-        zone_cell_numbers
-    ]
-
-    # Initially mask all values for ertbox parameter
-    if param_type == 'float':
-        ertbox_values_3d_masked = ma.masked_all((nx, ny, nz_ertbox), dtype=np.float32)
-    else:
-        ertbox_values_3d_masked = ma.masked_all((nx, ny, nz_ertbox), dtype=np.uint16)
-
-    if debug_level >= Debug.VERY_VERBOSE:
-        print(
-            f'--- Parameter {param_name}  for zone: {zone_name} '
-            f'is copied to {ertbox_model_name}.'
-        )
-
-    # The RMS simbox layers (num_layers) are copied into ertbox grid
-    # at top if grid layout is top conform or proportional and
-    # at the bottom if grid layout is base conform.
-    # Must be consistent with export_fields_to_disk.py
-    if conformity in [Conform.BaseConform]:
-        # Only copy the geogrid layers for the zone into the lowermost ertbox layers
-        ertbox_values_3d_masked[:, :, -number_layers:] = param_values_3d_all[
-            :, :, start_layer : (end_layer + 1)
-        ]
-
-    elif conformity in [Conform.TopConform, Conform.Proportional]:
-        # Only copy the geogrid layers for the zone into the uppermost ertbox layers
-        ertbox_values_3d_masked[:, :, 0:number_layers] = param_values_3d_all[
-            :, :, start_layer : (end_layer + 1)
-        ]
-
-    else:
-        raise NotImplementedError(f'Grid conformity: {conformity} is not supported.')
-
-    return ertbox_values_3d_masked
-
-
 def define_active_parameters_in_ertbox(
     project,
     geo_grid_model_name: str,
@@ -769,6 +922,7 @@ def define_active_parameters_in_ertbox(
     zone_dict: dict,
     debug_level: Debug,
     not_aps_workflow=False,
+    planner=None,
 ):
     """
     zone_dict[zone_name] = (zone_number, region_number, conformity, param_name_list)
@@ -780,54 +934,29 @@ def define_active_parameters_in_ertbox(
     # Both ERTBOX grid and geogrid should have same nx, ny dimensions
     # nz is here the geogrid number of layers for all zones
     # nz_ertbox is number of layers in total in ERTBOX grid
-    nx, ny, nz, nz_ertbox = check_and_get_grid_dimensions(
+    nx, ny, _, nz_ertbox = check_and_get_grid_dimensions(
         geogrid, ertboxgrid, geo_grid_model_name, ertbox_grid_model_name
     )
+    if planner is None:
+        planner = ErtboxTransferPlanner(
+            geogrid, nx, ny, nz_ertbox, debug_level=debug_level
+        )
 
-    number_layers_per_zone, start_layers_per_zone, end_layers_per_zone = (
-        get_zone_layer_numbering(geogrid)
-    )
+    prefix = 'aps_'
+    if not_aps_workflow:
+        prefix = ''
 
     # Get zone_name and parameter names from model specification
     for zone_name, zone_item in zone_dict.items():
         zone_number, _, conformity, _ = zone_item
-        zone_index = zone_number - 1
-        number_layers = number_layers_per_zone[zone_index]
-        start_layer = start_layers_per_zone[zone_index]
-        end_layer = end_layers_per_zone[zone_index]
-        if number_layers > nz_ertbox:
-            raise ValueError(
-                f'Number of layers of {ertbox_grid_model_name} ({nz_ertbox}) '
-                f'is less than number of layers in {geo_grid_model_name} ({number_layers})'
-                f'for zone {zone_name}.'
-            )
+        plan = planner.plan(zone_number, conformity)
         if debug_level >= Debug.VERY_VERBOSE:
             print(f'--- zone name: {zone_name}')
-            print(f'--- number_layers: {number_layers}')
-            print(f'--- start_layer: {start_layer}  end_layer: {end_layer}')
-
-        i_indices, j_indices, k_indices, _ = get_grid_indices(
-            geogrid, nx, ny, start_layer, end_layer
-        )
-
-        prefix = 'aps_'
-        if not_aps_workflow:
-            prefix = ''
+            print(f'--- number_layers: {plan.number_layers}')
+            print(f'--- start_layer: {plan.start_layer}  end_layer: {plan.end_layer}')
 
         # The active cells as array
-        ertbox_active = active_params_in_zone(
-            i_indices,
-            j_indices,
-            k_indices,
-            nx,
-            ny,
-            nz,
-            nz_ertbox,
-            conformity,
-            number_layers,
-            start_layer,
-            end_layer,
-        )
+        ertbox_active = planner.active_in_ertbox(plan)
         # Active stored in RMS parameter
         ertbox_active_param_to_rms(
             prefix,
@@ -839,43 +968,6 @@ def define_active_parameters_in_ertbox(
         )
 
 
-def active_params_in_zone(
-    geo_i_indices,
-    geo_j_indices,
-    geo_k_indices,
-    geo_nx,
-    geo_ny,
-    geo_nz,
-    nz_ertbox,
-    conformity,
-    number_layers,
-    start_layer,
-    end_layer,
-):
-    # Define active parameter for geogrid
-    active_3d = np.zeros((geo_nx, geo_ny, geo_nz), dtype=np.int32)
-    active_3d[geo_i_indices, geo_j_indices, geo_k_indices] = 1
-
-    # Initially mask all values for ertbox parameter
-    ertbox_active_3d = np.zeros((geo_nx, geo_ny, nz_ertbox), dtype=np.uint8)
-
-    if conformity in [Conform.BaseConform]:
-        # Only copy the geogrid layers for the zone into the lowermost ertbox layers
-        ertbox_active_3d[:, :, -number_layers:] = active_3d[
-            :, :, start_layer : (end_layer + 1)
-        ]
-
-    elif conformity in [Conform.TopConform, Conform.Proportional]:
-        # Only copy the geogrid layers for the zone into the uppermost ertbox layers
-        ertbox_active_3d[:, :, 0:number_layers] = active_3d[
-            :, :, start_layer : (end_layer + 1)
-        ]
-    else:
-        raise NotImplementedError(f'Grid conformity: {conformity} is not supported.')
-    ertbox_active = np.reshape(ertbox_active_3d, geo_nx * geo_ny * nz_ertbox)
-    return ertbox_active
-
-
 def ertbox_active_param_to_rms(
     prefix, real_number, zone_name, ertbox_grid_model, ertbox_active, debug_level
 ):
@@ -936,6 +1028,21 @@ def run(
         project, aps_model, ertbox_grid_model_name, debug_level=Debug.OFF
     )
 
+    # The mapping from geogrid to ertbox grid is calculated once per zone
+    # and shared by all the copy operations below.
+    _, geogrid = get_grid_model(project, geo_grid_model_name)
+    _, ertboxgrid = get_grid_model(project, ertbox_grid_model_name)
+    nx, ny, _, nz_ertbox = check_and_get_grid_dimensions(
+        geogrid, ertboxgrid, geo_grid_model_name, ertbox_grid_model_name
+    )
+    planner = ErtboxTransferPlanner(
+        geogrid,
+        nx,
+        ny,
+        nz_ertbox,
+        debug_level=debug_level,
+    )
+
     # Independent of using custom trends or not we can save active parameter in ertbox
     # corresponding to the geomodel zone.
     if save_active_param_to_ertbox:
@@ -945,6 +1052,7 @@ def run(
             ertbox_grid_model_name,
             zone_dict,
             debug_level=debug_level,
+            planner=planner,
         )
 
     if save_region_param_to_ertbox:
@@ -956,6 +1064,7 @@ def run(
             trend_extrapolation_method,
             discrete_param_names=discrete_param_names,
             debug_level=debug_level,
+            planner=planner,
         )
 
     if not use_rms_param_trend:
@@ -976,6 +1085,7 @@ def run(
         trend_extrapolation_method,
         debug_level=debug_level,
         normalize_trend=normalize_trend,
+        planner=planner,
     )
 
     if debug_level >= Debug.ON:
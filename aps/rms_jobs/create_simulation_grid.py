@@ -8,8 +8,6 @@ z increment can be arbitary. The purpose of the grid is to be a 3D array
 to save the GRF values to be exchanged between ERT and APS.
 """
 
-import xtgeo
-
 from numpy import pi
 from roxar import Direction
 
@@ -104,6 +102,9 @@ def create_ertbox_grid_model(
 
     increment = (xinc, yinc, zinc)
 
+    # xtgeo is slow to import and only needed here
+    import xtgeo
+
     # xtgeo create_box assume counter clockwise rotation in contrast to RMS
     try:
         simulation_grid = xtgeo.create_box_grid(
@@ -17,12 +17,15 @@
 #          aps_<zone_name>_<region_name>_active
 
 import copy
-import xtgeo
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import roxar
 import numpy as np
 from roxar import Direction
 
 from aps.algorithms.APSModel import APSModel
+from aps.utils.field_files import write_npy_field
 from aps.utils.fmu import get_export_location
 from aps.utils.roxar.grid_model import flip_grid_index_origo
 from aps.utils.roxar.progress_bar import APSProgressBar
@@ -30,7 +33,14 @@ from aps.utils.constants.simple import Debug
 
 
 def run(project, **kwargs):
-    """Export simulated GRF fields from ERTBOX grid to file readable by ERT"""
+    """Export simulated GRF fields from ERTBOX grid to file readable by ERT.
+    Optional keyword arguments:
+        exchange_file_format - Use this file format instead of the one specified
+                               in the model file. The format 'npy' is a compact
+                               binary format that can only be used when the files
+                               are read by import_fields_from_disk and not by ERT.
+        max_export_threads   - Number of threads used to write the files.
+    """
     if project.current_realisation > 0:
         raise ValueError(
             f'In RMS models to be used with a FMU loop in ERT,'
@@ -40,13 +50,16 @@ def run(project, **kwargs):
     if model_file_name is None:
         raise ValueError('Model file name is required in export_fields_to_dist')
     fmu_mode = kwargs.get('fmu_mode', False)
-    aps_model = APSModel(model_file_name)
+    aps_model = APSModel.from_cache(model_file_name)
 
     if not fmu_mode:
         raise ValueError(f'The export of GRF is only available in FMU mode with AHM')
     debug_level = aps_model.log_setting
     fmu_grid_name = aps_model.grid_model_name
-    file_format = aps_model.fmu_field_file_format
+    file_format = kwargs.get('exchange_file_format', None)
+    if file_format is None:
+        file_format = aps_model.fmu_field_file_format
+    max_workers = kwargs.get('max_export_threads', 4)
     fmu_use_residual_fields = aps_model.fmu_use_residual_fields
 
     print(' ')
@@ -82,72 +95,96 @@ def run(project, **kwargs):
     # grid which is re-used for all geomodel grid zones
 
     # Loop over all zones defined in aps model
+    # The values are fetched from RMS in this thread while the
+    # files are formatted and written in a thread pool.
+    start = time.perf_counter()
     active_params_save_to_file = []
-    for zone in aps_model.zone_models:
-        if aps_model.isSelected(zone.zone_number, zone.region_number):
-            if debug_level >= Debug.VERBOSE:
-                print(' ')
-                print(
-                    f'-- Export GRF fields for (zone,region) = ({zone.zone_number},{zone.region_number})'
-                )
-
-            for field_name in zone.gaussian_fields_in_truncation_rule:
-                if fmu_use_residual_fields and zone.hasTrendModel(field_name):
-                    field_name = field_name + '_residual'
-                field_properties = fmu_grid_model.properties
-                field_property = None
-                if field_name in field_properties:
-                    field_property = field_properties[field_name]
-                    if field_property.is_empty(project.current_realisation):
-                        raise ValueError(
-                            f'The parameter {field_name} is empty in grid model {fmu_grid_name}'
-                        )
-                else:
-                    raise ValueError(
-                        f'The parameter  {field_name} does not exist in grid model {fmu_grid_name}'
+    pending_writes = []
+    executor = None
+    if max_workers > 1:
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        for zone in aps_model.zone_models:
+            if aps_model.isSelected(zone.zone_number, zone.region_number):
+                if debug_level >= Debug.VERBOSE:
+                    print(' ')
+                    print(
+                        f'-- Export GRF fields for (zone,region) = ({zone.zone_number},{zone.region_number})'
                     )
 
-                file_name_active = None
-                for property in field_properties:
-                    # sub_string is None if the property_name does not end with '_active'
-                    # and contain the property_name except the '_active' else
-                    sub_string = is_active_param_name(property.name)
-
-                    # Check if the sub_string match the first part of field_name
-                    if sub_string and is_active_param_defined_for_zone(
-                        sub_string, field_name
-                    ):
-                        file_name_active = str(
-                            field_location / f'{property.name}.{file_format}'
+                for field_name in zone.gaussian_fields_in_truncation_rule:
+                    if fmu_use_residual_fields and zone.hasTrendModel(field_name):
+                        field_name = field_name + '_residual'
+                    field_properties = fmu_grid_model.properties
+                    field_property = None
+                    if field_name in field_properties:
+                        field_property = field_properties[field_name]
+                        if field_property.is_empty(project.current_realisation):
+                            raise ValueError(
+                                f'The parameter {field_name} is empty in grid model {fmu_grid_name}'
+                            )
+                    else:
+                        raise ValueError(
+                            f'The parameter  {field_name} does not exist in grid model {fmu_grid_name}'
                         )
-                        if file_name_active not in active_params_save_to_file:
-                            active_params_save_to_file.append(file_name_active)
-                            write_field_name_to_file(
-                                file_name_active,
-                                field_name,
-                                file_format,
-                                field_properties,
-                                field_property,
-                                handedness,
-                                nx,
-                                ny,
-                                nz,
-                                debug_level,
+
+                    file_name_active = None
+                    for property in field_properties:
+                        # sub_string is None if the property_name does not end with '_active'
+                        # and contain the property_name except the '_active' else
+                        sub_string = is_active_param_name(property.name)
+
+                        # Check if the sub_string match the first part of field_name
+                        if sub_string and is_active_param_defined_for_zone(
+                            sub_string, field_name
+                        ):
+                            file_name_active = str(
+                                field_location / f'{property.name}.{file_format}'
                             )
+                            if file_name_active not in active_params_save_to_file:
+                                active_params_save_to_file.append(file_name_active)
+                                pending_writes.append(
+                                    write_field_name_to_file(
+                                        file_name_active,
+                                        field_name,
+                                        file_format,
+                                        field_properties,
+                                        field_property,
+                                        handedness,
+                                        nx,
+                                        ny,
+                                        nz,
+                                        debug_level,
+                                        executor=executor,
+                                    )
+                                )
 
-                file_name = str(field_location / f'{field_name}.{file_format}')
-                write_field_name_to_file(
-                    file_name,
-                    field_name,
-                    file_format,
-                    field_properties,
-                    field_property,
-                    handedness,
-                    nx,
-                    ny,
-                    nz,
-                    debug_level,
-                )
+                    file_name = str(field_location / f'{field_name}.{file_format}')
+                    pending_writes.append(
+                        write_field_name_to_file(
+                            file_name,
+                            field_name,
+                            file_format,
+                            field_properties,
+                            field_property,
+                            handedness,
+                            nx,
+                            ny,
+                            nz,
+                            debug_level,
+                            executor=executor,
+                        )
+                    )
+    finally:
+        if executor is not None:
+            # Wait for all files to be written
+            executor.shutdown(wait=True)
+    for pending_write in pending_writes:
+        if pending_write is not None:
+            # Raise any error from writing the file
+            pending_write.result()
+    if debug_level >= Debug.VERBOSE:
+        print(f'-- Time used to export fields: {time.perf_counter() - start:.3f} s')
 
     APSProgressBar.increment()
 
@@ -163,7 +200,11 @@ def write_field_name_to_file(
     ny,
     nz,
     debug_level,
+    executor=None,
 ):
+    """Write the field to file. The values are fetched from RMS in the calling thread.
+    If an executor is specified, the file is written by the executor and
+    the corresponding future is returned, else None is returned."""
     if debug_level >= Debug.VERY_VERBOSE:
         print(f'--- Write parameter: {field_name} to file {file_name}')
 
@@ -172,38 +213,46 @@ def write_field_name_to_file(
         field_properties.save(
             file_name, field_name, format=roxar.FileFormat.ROFF_BINARY
         )
+        return None
+
+    # Use xtgeo or numpy for other formats not available from roxar.grids
+    values = field_property.get_values()
+    values3d = np.reshape(values, (nx, ny, nz))
+
+    if handedness == Direction.right:
+        # Current grid model is right-handed
+        # Need to flip order of the values to get correct export
+        # when using GRDECL format with xtgeo.GridProperty instance
+        values3d = flip_grid_index_origo(values3d, ny)
+
+    if executor is not None:
+        return executor.submit(
+            write_values_to_file, file_name, field_name, file_format, values3d
+        )
+    write_values_to_file(file_name, field_name, file_format, values3d)
+    return None
+
+
+def write_values_to_file(file_name, field_name, file_format, values3d):
+    if file_format.upper() == 'NPY':
+        # Compact binary format only used when exchanging fields between APS jobs
+        write_npy_field(file_name, values3d)
     else:
-        # Use xtgeo for other formats not available from roxar.grids
-        values = field_property.get_values()
-        values3d = np.reshape(values, (nx, ny, nz))
-
-        if handedness == Direction.right:
-            # Current grid model is right-handed
-            # Need to flip order of the values to get correct export
-            # when using GRDECL format with xtgeo.GridProperty instance
-            values3d_flipped = flip_grid_index_origo(values3d, ny)
-
-            xtgeo_object = xtgeo.GridProperty(
-                ncol=nx,
-                nrow=ny,
-                nlay=nz,
-                values=values3d_flipped,
-                name=field_name,
-            )
-        else:
-            xtgeo_object = xtgeo.GridProperty(
-                ncol=nx,
-                nrow=ny,
-                nlay=nz,
-                values=values3d,
-                name=field_name,
-            )
+        import xtgeo
 
-            xtgeo_object.to_file(
-                file_name,
-                fformat=file_format,
-                name=field_name,
-            )
+        nx, ny, nz = values3d.shape
+        xtgeo_object = xtgeo.GridProperty(
+            ncol=nx,
+            nrow=ny,
+            nlay=nz,
+            values=values3d,
+            name=field_name,
+        )
+        xtgeo_object.to_file(
+            file_name,
+            fformat=file_format,
+            name=field_name,
+        )
 
 
 def is_active_param_name(property_name: str):
@@ -138,10 +138,12 @@ def run(project, **kwargs):
 
             content = '-- ERT keywords related to fields used by APS.\n'
             content += f'GRID {ertbox_grid_file_path}\n'
-            for key, zone_model in aps_model.sorted_zone_models.items():
+            all_zone_models = aps_model.sorted_zone_models
+            for key in all_zone_models:
                 zone_number, region_number = key
                 if not aps_model.isSelected(zone_number, region_number):
                     continue
+                zone_model = all_zone_models[key]
                 zone_name = zone_names[zone_number]
                 if aps_model.use_regions:
                     region_name = region_names[region_number]
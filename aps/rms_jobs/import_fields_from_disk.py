@@ -28,16 +28,27 @@
 # if they are specified to be updated by ERT). And finally all the imported GRF fields
 # (including the added trends for those that should have trends) is then copied back to the geomodel grid.
 
+import time
+from collections import deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import TYPE_CHECKING
 from roxar import Direction
 
 import numpy as np
-import xtgeo
 
 from aps.algorithms.APSModel import APSModel
 from aps.algorithms.APSZoneModel import Conform
+from aps.algorithms.trend.kernel import with_trend_kernel_cache
 from aps.utils.exceptions.zone import MissingConformityException
 from aps.utils.constants.simple import Debug
+from aps.utils.field_files import (
+    read_grdecl_field,
+    read_npy_field,
+    read_roff_field,
+    UnsupportedFieldFileError,
+)
 from aps.utils.roxar.grid_model import (
     create_zone_parameter,
     get_zone_layer_numbering,
@@ -52,6 +63,9 @@ from aps.utils.roxar.progress_bar import APSProgressBar
 from aps.utils.trend import add_trends
 from aps.utils.aps_config import APSConfig
 
+if TYPE_CHECKING:
+    import xtgeo
+
 
 def extract_values_from_fmu_grid_to_geogrid_simbox(
     field_values, zone, number_of_layers_in_geo_grid_zone
@@ -86,6 +100,13 @@ def _load_field_values_grdecl(field_name, path, grid=None, debug_level=Debug.OFF
         print(f'--- File name: {path}')
         print(f'--- Field name: {field_name}')
         print('--- Format: GRDECL')
+    if grid is not None:
+        try:
+            return read_grdecl_field(path, field_name, grid.dimensions)
+        except UnsupportedFieldFileError:
+            pass
+    import xtgeo
+
     property = xtgeo.gridproperty_from_file(
         path, fformat='grdecl', name=field_name, grid=grid
     )
@@ -97,6 +118,13 @@ def _load_field_values_roff(field_name, path, grid=None, debug_level=Debug.OFF):
         print(f'--- File name: {path}')
         print(f'--- Field name: {field_name}')
         print('--- Format: ROFF')
+    try:
+        return read_roff_field(path, name=field_name)
+    except UnsupportedFieldFileError:
+        # Not binary ROFF or not a continuous parameter
+        pass
+    import xtgeo
+
     property = xtgeo.gridproperty_from_file(path, fformat='roff', name=field_name)
     return property.values
 
@@ -135,10 +163,104 @@ def load_field_values(field_name: str, path: Path, grid=None, debug_level=Debug.
         return _load_field_values_roff(
             field_name, path, grid=grid, debug_level=debug_level
         )
+    elif path.suffix.upper() == '.NPY':
+        if debug_level >= Debug.VERY_VERBOSE:
+            print(f'--- File name: {path}')
+            print(f'--- Field name: {field_name}')
+            print('--- Format: NPY')
+        return read_npy_field(path)
     else:
         raise ValueError(f'Invalid file format, {path.suffix}')
 
 
+class FieldPrefetcher:
+    """Read field files in a thread pool ahead of the zone currently being written.
+    The fields are returned in the same order as the specified tasks.
+    At most max_prefetch fields are read ahead such that memory usage stays
+    bounded independent of the number of fields to import.
+    Each task is a tuple (field name in file, file path).
+    """
+
+    def __init__(
+        self,
+        tasks,
+        grid=None,
+        max_workers=2,
+        max_prefetch=4,
+        debug_level=Debug.OFF,
+    ):
+        self.tasks = list(tasks)
+        self.grid = grid
+        self.max_workers = max(1, max_workers)
+        self.max_prefetch = max(1, max_prefetch)
+        self.debug_level = debug_level
+        self.read_times = {}
+
+    def _read(self, task):
+        field_name_in_file, path = task
+        start = time.perf_counter()
+        values = load_field_values(
+            field_name_in_file, path, grid=self.grid, debug_level=self.debug_level
+        )
+        self.read_times[field_name_in_file] = time.perf_counter() - start
+        return values
+
+    def __iter__(self):
+        tasks = iter(self.tasks)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = deque(
+                executor.submit(self._read, task)
+                for task in islice(tasks, self.max_prefetch)
+            )
+            try:
+                while pending:
+                    values = pending.popleft().result()
+                    task = next(tasks, None)
+                    if task is not None:
+                        pending.append(executor.submit(self._read, task))
+                    yield values
+            finally:
+                # If a read fails, or the fields are not used, the fields read ahead
+                # that are not started yet are not read
+                for future in pending:
+                    future.cancel()
+
+
+def get_field_locations(load_dir, field_names_in_file, file_format):
+    """Return the file path for each field and check that all files exist
+    before any of them are read."""
+    field_locations = []
+    for field_name_in_file, full_field_name in field_names_in_file:
+        field_location = load_dir / f'{field_name_in_file}.{file_format}'
+        if not field_location.exists():
+            raise FileNotFoundError(
+                f'\nThe file {field_location} for the parameter {full_field_name} is not found.'
+                f'\nCheck that ERT has created the file if ERT iteration > 0'
+            )
+        field_locations.append(field_location)
+    return field_locations
+
+
+def print_import_timing(prefetcher, write_times, debug_level=Debug.OFF):
+    if debug_level < Debug.VERBOSE:
+        return
+    print('-- Time used to read fields from file:')
+    for name, read_time in prefetcher.read_times.items():
+        print(f'--   {name:<40} {read_time:8.3f} s')
+    print('-- Time used to write fields to RMS per zone:')
+    for zone_key, (number_of_fields, write_time) in write_times.items():
+        print(
+            f'--   (zone, region) = {zone_key}  Number of fields: {number_of_fields:3d}  '
+            f'{write_time:8.3f} s'
+        )
+    total_read_time = sum(prefetcher.read_times.values())
+    total_write_time = sum(t for _, t in write_times.values())
+    print(
+        f'-- Total read time: {total_read_time:.3f} s  '
+        f'Total write time: {total_write_time:.3f} s'
+    )
+
+
 def run(project, model_file, geo_grid_name, load_dir=None, **kwargs):
     """Read properties from file into the ERTBOX grid.
     Update the modelling grid property using the mapping from ERTBOX grid to geogrid
@@ -148,9 +270,13 @@ def run(project, model_file, geo_grid_name, load_dir=None, **kwargs):
             f'In RMS models to be used with a FMU loop in ERT,'
             'the grid and parameters should be shared and realisation = 1'
         )
-    aps_model = APSModel(model_file)
+    aps_model = APSModel.from_cache(model_file)
     debug_level = aps_model.log_setting
-    file_format = aps_model.fmu_field_file_format
+    # The compact format 'npy' can be used when the files are written by
+    # export_fields_to_disk with the same exchange_file_format
+    file_format = kwargs.get('exchange_file_format', None)
+    if file_format is None:
+        file_format = aps_model.fmu_field_file_format
     use_residuals = aps_model.fmu_use_residual_fields
 
     if geo_grid_name is None:
@@ -159,6 +285,9 @@ def run(project, model_file, geo_grid_name, load_dir=None, **kwargs):
     if not fmu_mode:
         raise ValueError(f'The import of GRF is only available in FMU mode with AHM')
     fmu_grid_name = kwargs.get('fmu_simulation_grid_name')
+    # Number of threads reading field files and number of fields read ahead
+    max_import_threads = kwargs.get('max_import_threads', 2)
+    max_prefetch_fields = kwargs.get('max_prefetch_fields', 4)
     import_from_ert = False
     if load_dir is None:
         load_dir = Path(APSConfig.top_dir())
@@ -199,6 +328,8 @@ def run(project, model_file, geo_grid_name, load_dir=None, **kwargs):
 
     xtgeo_fmu_grid = None
     if file_format.upper() == 'GRDECL':
+        import xtgeo
+
         xtgeo_fmu_grid = xtgeo.grid_from_roxar(project, fmu_grid_name)
 
     # Get zone parameter for geomodel grid if it exist.
@@ -232,6 +363,8 @@ def run(project, model_file, geo_grid_name, load_dir=None, **kwargs):
             region_names=region_names,
             region_param_name=region_param_name,
             debug_level=debug_level,
+            max_workers=max_import_threads,
+            max_prefetch=max_prefetch_fields,
         )
     else:
         import_and_update_ertbox_and_geogrid_with_residuals(
@@ -248,6 +381,8 @@ def run(project, model_file, geo_grid_name, load_dir=None, **kwargs):
             region_names=region_names,
             region_param_name=region_param_name,
             debug_level=debug_level,
+            max_workers=max_import_threads,
+            max_prefetch=max_prefetch_fields,
         )
 
     APSProgressBar.increment()
@@ -261,102 +396,118 @@ def import_and_update_ertbox_and_geogrid(
     zone_names: dict,
     load_dir: Path,
     file_format: str,
-    xtgeo_fmu_grid: xtgeo.Grid,
+    xtgeo_fmu_grid: 'xtgeo.Grid',
     number_of_layers_per_zone_in_geo_grid: list,
     region_names: dict = None,
     region_param_name: str = None,
     debug_level: Debug = Debug.OFF,
+    max_workers: int = 2,
+    max_prefetch: int = 4,
 ):
-    # Loop over all zones defined in aps model
+    # Find all fields to import for the selected zones defined in aps model
+    selected_zones = []
+    read_tasks = []
     for zone in aps_model.zone_models:
         if aps_model.isSelected(zone.zone_number, zone.region_number):
-            zone_name = zone_names[zone.zone_number]
-            region_name = ''
-            if region_names:
-                region_name = region_names[zone.region_number]
+            full_field_names = zone.gaussian_fields_in_truncation_rule
+            field_locations = get_field_locations(
+                load_dir,
+                [(name, name) for name in full_field_names],
+                file_format,
+            )
+            selected_zones.append(zone)
+            read_tasks.extend(zip(full_field_names, field_locations))
+
+    # The fields are read in background threads while the previous zone is written
+    prefetcher = FieldPrefetcher(
+        read_tasks,
+        grid=xtgeo_fmu_grid,
+        max_workers=max_workers,
+        max_prefetch=max_prefetch,
+        debug_level=debug_level,
+    )
+    fields = iter(prefetcher)
+    write_times = {}
+    for zone in selected_zones:
+        zone_name = zone_names[zone.zone_number]
+        region_name = ''
+        if region_names:
+            region_name = region_names[zone.region_number]
+
+        parameter_names_fmu_grid = []
+        parameter_names_geo_grid = []
+
+        parameter_values_fmu_grid = []
+        parameter_values_geo_grid = []
+
+        # Get the sub set of values from fmu grid that should be mapped into geogrid for the current zone
+        nz_layers = number_of_layers_per_zone_in_geo_grid[zone.zone_number - 1]
+        for full_field_name in zone.gaussian_fields_in_truncation_rule:
+            field_name = field_name_from_full_name(
+                full_field_name, zone_name, region_name=region_name
+            )
+            # Values for fmu grid (ERTBOX) read from file
+            # field is a 3D numpy array
+            field = next(fields)
 
-            parameter_names_fmu_grid = []
-            parameter_names_geo_grid = []
+            # Field names and corresponding values to update the fmu grid with
+            parameter_names_fmu_grid.append(full_field_name)
+            parameter_values_fmu_grid.append(field)
 
-            parameter_values_fmu_grid = []
-            parameter_values_geo_grid = []
+            field_extracted = extract_values_from_fmu_grid_to_geogrid_simbox(
+                field, zone, nz_layers
+            )
 
-            # Get the sub set of values from fmu grid that should be mapped into geogrid for the current zone
-            nz_layers = number_of_layers_per_zone_in_geo_grid[zone.zone_number - 1]
-            for full_field_name in zone.gaussian_fields_in_truncation_rule:
-                field_name = field_name_from_full_name(
-                    full_field_name, zone_name, region_name=region_name
-                )
-                field_location = load_dir / f'{full_field_name}.{file_format}'
-
-                if field_location.exists():
-                    # Read values into fmu grid (ERTBOX)
-                    # field is a 3D numpy array
-                    field = load_field_values(
-                        full_field_name,
-                        field_location,
-                        grid=xtgeo_fmu_grid,
-                        debug_level=debug_level,
-                    )
+            # Field names and corresponding values to update the geo grid with
+            parameter_names_geo_grid.append(field_name)
+            parameter_values_geo_grid.append(field_extracted)
+
+        start_write = time.perf_counter()
+        # Update fmu grid. Has only one zone but parameter name contains zone name
+        if debug_level >= Debug.VERY_VERBOSE:
+            for name in parameter_names_fmu_grid:
+                print(f'--- Load parameter {name} from file into {fmu_grid_model.name}')
+        zone_number_fmu_grid = 1
+        set_continuous_3d_parameter_values_in_zone_region(
+            fmu_grid_model,
+            parameter_names_fmu_grid,
+            parameter_values_fmu_grid,
+            zone_number_fmu_grid,
+            realisation_number=project.current_realisation,
+            is_shared=fmu_grid_model.shared,
+        )
 
-                else:
-                    raise FileNotFoundError(
-                        f'\nThe file {field_location} for the parameter {full_field_name} is not found.'
-                        f'\nCheck that ERT has created the file if ERT iteration > 0'
+        # Update geogrid. Has often multiple zones
+        if debug_level >= Debug.VERY_VERBOSE:
+            for name in parameter_names_geo_grid:
+                if aps_model.use_regions:
+                    print(
+                        f'--- Update parameter {name} for (zone number, region number) = ({zone.zone_number},{zone.region_number})  in {geo_grid_model.name}'
                     )
-
-                # Field names and corresponding values to update the fmu grid with
-                parameter_names_fmu_grid.append(full_field_name)
-                parameter_values_fmu_grid.append(field)
-
-                field_extracted = extract_values_from_fmu_grid_to_geogrid_simbox(
-                    field, zone, nz_layers
-                )
-
-                # Field names and corresponding values to update the geo grid with
-                parameter_names_geo_grid.append(field_name)
-                parameter_values_geo_grid.append(field_extracted)
-
-            # Update fmu grid. Has only one zone but parameter name contains zone name
-            if debug_level >= Debug.VERY_VERBOSE:
-                for name in parameter_names_fmu_grid:
+                else:
                     print(
-                        f'--- Load parameter {name} from file into {fmu_grid_model.name}'
+                        f'--- Update parameter {name} for zone number {zone.zone_number} in {geo_grid_model.name}'
                     )
-            zone_number_fmu_grid = 1
-            set_continuous_3d_parameter_values_in_zone_region(
-                fmu_grid_model,
-                parameter_names_fmu_grid,
-                parameter_values_fmu_grid,
-                zone_number_fmu_grid,
-                realisation_number=project.current_realisation,
-                is_shared=fmu_grid_model.shared,
-            )
 
-            # Update geogrid. Has often multiple zones
-            if debug_level >= Debug.VERY_VERBOSE:
-                for name in parameter_names_geo_grid:
-                    if aps_model.use_regions:
-                        print(
-                            f'--- Update parameter {name} for (zone number, region number) = ({zone.zone_number},{zone.region_number})  in {geo_grid_model.name}'
-                        )
-                    else:
-                        print(
-                            f'--- Update parameter {name} for zone number {zone.zone_number} in {geo_grid_model.name}'
-                        )
-
-            set_continuous_3d_parameter_values_in_zone_region(
-                geo_grid_model,
-                parameter_names_geo_grid,
-                parameter_values_geo_grid,
-                zone.zone_number,
-                zone.region_number,
-                region_parameter_name=region_param_name,
-                realisation_number=project.current_realisation,
-                is_shared=geo_grid_model.shared,
-            )
+        set_continuous_3d_parameter_values_in_zone_region(
+            geo_grid_model,
+            parameter_names_geo_grid,
+            parameter_values_geo_grid,
+            zone.zone_number,
+            zone.region_number,
+            region_parameter_name=region_param_name,
+            realisation_number=project.current_realisation,
+            is_shared=geo_grid_model.shared,
+        )
+        write_times[(zone.zone_number, zone.region_number)] = (
+            len(parameter_names_fmu_grid),
+            time.perf_counter() - start_write,
+        )
+
+    print_import_timing(prefetcher, write_times, debug_level=debug_level)
 
 
+@with_trend_kernel_cache
 def import_and_update_ertbox_and_geogrid_with_residuals(
     project,
     aps_model: APSModel,
@@ -365,141 +516,154 @@ def import_and_update_ertbox_and_geogrid_with_residuals(
     zone_names: dict,
     load_dir: Path,
     file_format: str,
-    xtgeo_fmu_grid: xtgeo.Grid,
+    xtgeo_fmu_grid: 'xtgeo.Grid',
     number_of_layers_per_zone_in_geo_grid: list,
     handedness=Direction.right,
     region_names: dict = None,
     region_param_name: str = None,
     debug_level: Debug = Debug.OFF,
+    max_workers: int = 2,
+    max_prefetch: int = 4,
 ):
     use_residuals = True
     (nx_ertbox, ny_ertbox, nz_ertbox) = fmu_grid_model.get_grid(
         project.current_realisation
     ).simbox_indexer.dimensions
-    # Loop over all zones defined in aps model
 
+    # Find all fields to import for the selected zones defined in aps model
+    selected_zones = []
+    read_tasks = []
     for zone in aps_model.zone_models:
         if aps_model.isSelected(zone.zone_number, 0):
-            zone_name = zone_names[zone.zone_number]
-            region_name = ''
-            if aps_model.use_regions:
-                region_name = region_names[zone.region_number]
-            parameter_names_fmu_grid = []
-            parameter_names_geo_grid = []
-
-            parameter_values_fmu_grid = []
-            parameter_values_geo_grid = []
-
-            # Get the sub set of values from fmu grid that should be mapped into geogrid for the current zone
-            nz_layers = number_of_layers_per_zone_in_geo_grid[zone.zone_number - 1]
-
+            field_names_in_file = []
             for full_field_name in zone.gaussian_fields_in_truncation_rule:
-                field_name = field_name_from_full_name(
-                    full_field_name, zone_name, region_name=region_name
-                )
                 if zone.hasTrendModel(full_field_name):
-                    full_field_name_residual = full_field_name + '_residual'
-                    field_location = (
-                        load_dir / f'{full_field_name_residual}.{file_format}'
-                    )
-                    field_name_in_file = full_field_name_residual
+                    field_name_in_file = full_field_name + '_residual'
                 else:
-                    field_location = load_dir / f'{full_field_name}.{file_format}'
                     field_name_in_file = full_field_name
+                field_names_in_file.append((field_name_in_file, full_field_name))
+            field_locations = get_field_locations(
+                load_dir, field_names_in_file, file_format
+            )
+            selected_zones.append(zone)
+            read_tasks.extend(
+                zip([name for name, _ in field_names_in_file], field_locations)
+            )
 
-                if field_location.exists():
-                    # Read values into fmu grid (ERTBOX)
-                    # field is a 3D numpy array
-                    field = load_field_values(
-                        field_name_in_file,
-                        field_location,
-                        grid=xtgeo_fmu_grid,
-                        debug_level=debug_level,
-                    )
-
-                else:
-                    raise FileNotFoundError(
-                        f'\nThe file {field_location} for the parameter {full_field_name} is not found.'
-                        f'\nCheck that ERT has created the file if ERT iteration > 0'
-                    )
+    # The fields are read in background threads while the previous zone is written
+    prefetcher = FieldPrefetcher(
+        read_tasks,
+        grid=xtgeo_fmu_grid,
+        max_workers=max_workers,
+        max_prefetch=max_prefetch,
+        debug_level=debug_level,
+    )
+    fields = iter(prefetcher)
+    write_times = {}
+    for zone in selected_zones:
+        zone_name = zone_names[zone.zone_number]
+        region_name = ''
+        if aps_model.use_regions:
+            region_name = region_names[zone.region_number]
+        parameter_names_fmu_grid = []
+        parameter_names_geo_grid = []
+
+        parameter_values_fmu_grid = []
+        parameter_values_geo_grid = []
+
+        # Get the sub set of values from fmu grid that should be mapped into geogrid for the current zone
+        nz_layers = number_of_layers_per_zone_in_geo_grid[zone.zone_number - 1]
+
+        for full_field_name in zone.gaussian_fields_in_truncation_rule:
+            field_name = field_name_from_full_name(
+                full_field_name, zone_name, region_name=region_name
+            )
+            # Values for fmu grid (ERTBOX) read from file
+            # field is a 3D numpy array
+            field = next(fields)
+
+            # Field names and corresponding values to update the fmu grid with
+            # Separate parameters are created for residual fields for QC purpose
+            # Before the trend is added, they are equal.
+            parameter_names_fmu_grid.append(full_field_name)
+            parameter_names_geo_grid.append(field_name)
+            parameter_values_fmu_grid.append(field)
+
+        start_write = time.perf_counter()
+        # Update fmu grid. Has only one zone but parameter name contains zone name.
+        if debug_level >= Debug.VERY_VERBOSE:
+            for name in parameter_names_fmu_grid:
+                print(f'--- Load parameter {name} from file into {fmu_grid_model.name}')
+        zone_number_fmu_grid = 1
+        set_continuous_3d_parameter_values_in_zone_region(
+            fmu_grid_model,
+            parameter_names_fmu_grid,
+            parameter_values_fmu_grid,
+            zone_number_fmu_grid,
+            realisation_number=project.current_realisation,
+            is_shared=fmu_grid_model.shared,
+        )
+        # The values are stored in the fmu grid and are not needed any more
+        del parameter_values_fmu_grid
 
-                # Field names and corresponding values to update the fmu grid with
-                # Separate parameters are created for residual fields for QC purpose
-                # Before the trend is added, they are equal.
-                parameter_names_fmu_grid.append(full_field_name)
-                parameter_names_geo_grid.append(field_name)
-                parameter_values_fmu_grid.append(field)
+        add_trends(
+            project,
+            aps_model,
+            zone.zone_number,
+            zone.region_number,
+            write_rms_parameters_for_qc_purpose=False,
+            debug_level=debug_level,
+            fmu_mode=True,
+            is_shared=fmu_grid_model.shared,
+            fmu_with_residual_grf=use_residuals,
+            fmu_add_trend_if_use_residual=True,
+        )
 
-            # Update fmu grid. Has only one zone but parameter name contains zone name.
-            if debug_level >= Debug.VERY_VERBOSE:
-                for name in parameter_names_fmu_grid:
-                    print(
-                        f'--- Load parameter {name} from file into {fmu_grid_model.name}'
-                    )
-            zone_number_fmu_grid = 1
-            set_continuous_3d_parameter_values_in_zone_region(
+        for full_field_name in zone.gaussian_fields_in_truncation_rule:
+            field_ertbox_1D = getContinuous3DParameterValues(
                 fmu_grid_model,
-                parameter_names_fmu_grid,
-                parameter_values_fmu_grid,
-                zone_number_fmu_grid,
-                realisation_number=project.current_realisation,
-                is_shared=fmu_grid_model.shared,
+                full_field_name,
+                realization_number=project.current_realisation,
             )
 
-            add_trends(
-                project,
-                aps_model,
-                zone.zone_number,
-                zone.region_number,
-                write_rms_parameters_for_qc_purpose=False,
-                debug_level=debug_level,
-                fmu_mode=True,
-                is_shared=fmu_grid_model.shared,
-                fmu_with_residual_grf=use_residuals,
-                fmu_add_trend_if_use_residual=True,
+            # This works because the ERTBOX field values are all defined to the length
+            # of the 1D array returned from the RMS 3D parameter match the ertbox size
+            field_ertbox_3D = np.reshape(
+                field_ertbox_1D, (nx_ertbox, ny_ertbox, nz_ertbox)
             )
+            if handedness == Direction.right:
+                field_ertbox_3D_flip = flip_grid_index_origo(field_ertbox_3D, ny_ertbox)
+                field_ertbox_3D = field_ertbox_3D_flip
+            field_extracted = extract_values_from_fmu_grid_to_geogrid_simbox(
+                field_ertbox_3D, zone, nz_layers
+            )
+            parameter_values_geo_grid.append(field_extracted)
 
-            for full_field_name in zone.gaussian_fields_in_truncation_rule:
-                field_ertbox_1D = getContinuous3DParameterValues(
-                    fmu_grid_model,
-                    full_field_name,
-                    realization_number=project.current_realisation,
-                )
-
-                # This works because the ERTBOX field values are all defined to the length
-                # of the 1D array returned from the RMS 3D parameter match the ertbox size
-                field_ertbox_3D = np.reshape(
-                    field_ertbox_1D, (nx_ertbox, ny_ertbox, nz_ertbox)
-                )
-                if handedness == Direction.right:
-                    field_ertbox_3D_flip = flip_grid_index_origo(
-                        field_ertbox_3D, ny_ertbox
+        # Update geogrid. Has often multiple zones
+        if debug_level >= Debug.VERBOSE:
+            for name in parameter_names_geo_grid:
+                if aps_model.use_regions:
+                    print(
+                        f'-- Update parameter {name} for (zone number, region number) = ({zone.zone_number},{zone.region_number}) in {geo_grid_model.name}'
                     )
-                    field_ertbox_3D = field_ertbox_3D_flip
-                field_extracted = extract_values_from_fmu_grid_to_geogrid_simbox(
-                    field_ertbox_3D, zone, nz_layers
-                )
-                parameter_values_geo_grid.append(field_extracted)
-
-            # Update geogrid. Has often multiple zones
-            if debug_level >= Debug.VERBOSE:
-                for name in parameter_names_geo_grid:
-                    if aps_model.use_regions:
-                        print(
-                            f'-- Update parameter {name} for (zone number, region number) = ({zone.zone_number},{zone.region_number}) in {geo_grid_model.name}'
-                        )
-                    else:
-                        print(
-                            f'-- Update parameter {name} for zone number {zone.zone_number} in {geo_grid_model.name}'
-                        )
-
-            set_continuous_3d_parameter_values_in_zone_region(
-                geo_grid_model,
-                parameter_names_geo_grid,
-                parameter_values_geo_grid,
-                zone.zone_number,
-                zone.region_number,
-                region_parameter_name=region_param_name,
-                realisation_number=project.current_realisation,
-                is_shared=geo_grid_model.shared,
-            )
+                else:
+                    print(
+                        f'-- Update parameter {name} for zone number {zone.zone_number} in {geo_grid_model.name}'
+                    )
+
+        set_continuous_3d_parameter_values_in_zone_region(
+            geo_grid_model,
+            parameter_names_geo_grid,
+            parameter_values_geo_grid,
+            zone.zone_number,
+            zone.region_number,
+            region_parameter_name=region_param_name,
+            realisation_number=project.current_realisation,
+            is_shared=geo_grid_model.shared,
+        )
+        write_times[(zone.zone_number, zone.region_number)] = (
+            len(parameter_names_fmu_grid),
+            time.perf_counter() - start_write,
+        )
+
+    print_import_timing(prefetcher, write_times, debug_level=debug_level)
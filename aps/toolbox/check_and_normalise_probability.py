@@ -35,6 +35,12 @@ Description:
       to calculate the normalization without tolerance restrictions, it can be done by specifying that
       it is allowed to have a 100% fraction of grid cells violating normalization tolerance.
 
+    The cells of each zone or (zone, region) combination are processed in blocks of
+    'block_size' cells (default 1000000) to limit the size of temporary arrays.
+    If 'scratch_dir' is specified, the probability cubes are kept in a memory mapped file
+    in this directory while they are checked, such that only one probability cube at a time
+    is kept in memory when reading from and writing to RMS.
+
     Output:
     - The user can specify either to overwrite or create new 3D parameters with normalized probabilities.
 
@@ -154,6 +160,8 @@ Description:
 
 """
 
+import tempfile
+
 import numpy as np
 import roxar
 from roxar.grids import GridModel
@@ -169,10 +177,19 @@ from aps.utils.roxar.grid_model import (
     find_defined_cells,
     create_zone_parameter,
 )
-from aps.utils.checks import check_probability_values, check_probability_normalisation
+from aps.utils.checks import (
+    combine_probability_statistics,
+    report_facies_probability_statistics,
+    report_normalisation_statistics,
+    validate_probabilities,
+)
 from aps.utils.methods import check_missing_keywords_list, check_missing_keywords_dict
 
 
+# Number of cells in each block of cells that is checked and normalised at a time
+DEFAULT_BLOCK_SIZE = 1000000
+
+
 class NormalisationError(ValueError):
     pass
 
@@ -204,6 +221,8 @@ def run(params):
         'max_allowed_fraction_of_values_outside_tolerance',
         'stop_on_error',
         'report_zone_regions',
+        'block_size',
+        'scratch_dir',
     ]
 
     if 'aps_model_file' not in params:
@@ -297,13 +316,16 @@ def check_and_normalize_probabilities_for_APS(
     overwrite = params.get('overwrite', False)
     stop_on_error = params.get('stop_on_error', True)
 
+    block_size = params.get('block_size', DEFAULT_BLOCK_SIZE)
+    scratch_dir = params.get('scratch_dir', None)
+
     # Probability values for each RMS parameter
-    probability_values_per_rms_param = {
-        parameter_name: getContinuous3DParameterValues(
-            grid_model, parameter_name, realization_number
-        )
-        for parameter_name in probability_parameter_names
-    }
+    probability_values_per_rms_param = get_probability_values(
+        grid_model,
+        probability_parameter_names,
+        realization_number,
+        scratch_dir=scratch_dir,
+    )
 
     if use_regions:
         facies_dict = facies_per_zone_region_dict
@@ -326,11 +348,13 @@ def check_and_normalize_probabilities_for_APS(
         max_allowed_fraction,
         debug_level,
         stop_on_error=stop_on_error,
+        block_size=block_size,
     )
 
     # Write back to RMS project updated probabilities if necessary
     for parameter_name in probability_parameter_names:
-        parameter_values = probability_values_per_rms_param[parameter_name]
+        # Copy the values of one parameter at a time from the memory mapped file
+        parameter_values = np.array(probability_values_per_rms_param[parameter_name])
 
         if not overwrite:
             parameter_name = parameter_name + '_norm'
@@ -353,6 +377,36 @@ def check_and_normalize_probabilities_for_APS(
     return
 
 
+def get_probability_values(
+    grid_model, probability_parameter_names, realization_number, scratch_dir=None
+):
+    """
+    Returns a dictionary with the probability values for each RMS parameter.
+    The values of all parameters are stored in one float32 array with one row per parameter,
+    and the values in the dictionary are views of the rows. If scratch_dir is specified,
+    the array is memory mapped to a temporary file in this directory.
+    """
+    probability_values_per_rms_param = {}
+    stacked_values = None
+    for index, parameter_name in enumerate(probability_parameter_names):
+        values = getContinuous3DParameterValues(
+            grid_model, parameter_name, realization_number
+        )
+        if stacked_values is None:
+            shape = (len(probability_parameter_names), len(values))
+            if scratch_dir is None:
+                stacked_values = np.empty(shape, dtype=np.float32)
+            else:
+                # The file is removed when closed, but the memory map is kept until it is deleted
+                with tempfile.TemporaryFile(dir=scratch_dir) as file:
+                    stacked_values = np.memmap(
+                        file, dtype=np.float32, mode='w+', shape=shape
+                    )
+        stacked_values[index, :] = values
+        probability_values_per_rms_param[parameter_name] = stacked_values[index]
+    return probability_values_per_rms_param
+
+
 def get_params_from_aps_model(
     project,
     aps_model_file_name: str,
@@ -394,7 +448,7 @@ def get_params_from_aps_model(
     # Loop over all pairs of (zone_number, region_number) that is specified and selected
     # Check and normalize the probabilities for each (zone, region) model
     prob_params_per_facies = {}
-    for key, zone_model in all_zone_models.items():
+    for key in all_zone_models:
         (zone_number, region_number) = key
         if debug_level >= Debug.VERBOSE:
             if use_regions:
@@ -403,6 +457,7 @@ def get_params_from_aps_model(
                 print(f'-- Zone: {zone_number} ')
         if not aps_model.isSelected(zone_number, region_number):
             continue
+        zone_model = all_zone_models[key]
 
         if zone_model.use_constant_probabilities:
             # No probability cubes for this (zone, region)
@@ -554,6 +609,7 @@ def check_and_normalize_all_zones(
     max_allowed_fraction,
     debug_level,
     stop_on_error,
+    block_size=DEFAULT_BLOCK_SIZE,
 ):
     # if stop_on_error is False then accumulate all error messages and some info message in error_dict
     # and print out at the end to get all error messages for all zones and all regions.
@@ -603,6 +659,7 @@ def check_and_normalize_all_zones(
                     eps=min_prob_norm_tolerance,
                     max_allowed_fraction_with_mismatch=max_allowed_fraction,
                     debug_level=debug_level,
+                    block_size=block_size,
                 )
             )
         else:
@@ -625,6 +682,7 @@ def check_and_normalize_all_zones(
                 debug_level=debug_level,
                 stop_on_error=stop_on_error,
                 error_dict=error_dict,
+                block_size=block_size,
             )
 
         if debug_level >= Debug.ON:
@@ -668,6 +726,7 @@ def check_and_normalise_probability(
     debug_level=Debug.OFF,
     stop_on_error=True,
     error_dict=None,
+    block_size=DEFAULT_BLOCK_SIZE,
 ):
     """
     Check that probability values are valid probabilities.
@@ -716,6 +775,9 @@ def check_and_normalise_probability(
     :type stop_on_error: bool
     :param error_dict: contains list of error messages if any from check of probabilities.
     :type error_dict: dict
+    :param block_size: Number of cells that are checked and normalised at a time. The statistics
+                       used in the error reports are accumulated over the blocks.
+    :type block_size: int
     :return: integer with number of grid cells for which the probabilities are re-calculated to be normalised.
     """
     if not stop_on_error:
@@ -734,55 +796,52 @@ def check_and_normalise_probability(
     # Dictionary where the key is facies_name, and the value is
     # rms parameter name for the probabilities for this facies
     prob_param_names = probability_values_per_rms_param.keys()
+    parameter_names_for_zone = [
+        prob_param_per_facies[facies_name] for facies_name in facies_names_for_zone
+    ]
+    num_defined_cells = len(cell_index_defined)
+    block_size = max(1, int(block_size))
+    blocks = [
+        cell_index_defined[start : start + block_size]
+        for start in range(0, num_defined_cells, block_size)
+    ]
 
-    sum_probabilities_selected_cells = np.zeros(len(cell_index_defined), np.float32)
-    num_cell_with_modified_probability = 0
-
-    # Check that probability values are in interval [0,1]
-    err_found_in_zone = False
-    for facies_name in facies_names_for_zone:
-        parameter_name = prob_param_per_facies[facies_name]
-
-        # All grid cells (active cells in the grid)
-        all_values = probability_values_per_rms_param[parameter_name]
-
-        # The cells belonging to the zone,region as defined by the input cell_index_defined array
-        probabilities_selected_cells = all_values[cell_index_defined]
-
-        # Check probability values, ensure that they are in the interval [0,1]. If outside this interval,
-        # probabilities < 0 is set to 0 and probabilities > 1 is set to 1.
-        # If the fraction of grid cells with probabilities outside the tolerance interval
-        # [1-tolerance_of_probability_normalisation, 1+tolerance_of_probability_normalisation] is
-        # larger than max_allowed_fraction_with_mismatch, errors are reported.
-        if stop_on_error:
-            probabilities_selected_cells = check_probability_values(
-                probabilities_selected_cells,
-                tolerance_of_probability_normalisation,
-                max_allowed_fraction_with_mismatch,
-                facies_name,
-                parameter_name,
-            )
-        else:
-            probabilities_selected_cells, error_dict, err_found = (
-                check_probability_values(
-                    probabilities_selected_cells,
-                    tolerance_of_probability_normalisation,
-                    max_allowed_fraction_with_mismatch,
-                    facies_name,
-                    parameter_name,
-                    stop_on_error=stop_on_error,
-                    error_dict=error_dict,
-                )
-            )
-            if err_found:
-                err_found_in_zone = True
-
-        # Sum up probability over all facies per selected cell
-        all_values[cell_index_defined] = probabilities_selected_cells
-        sum_probabilities_selected_cells += probabilities_selected_cells
-        probability_values_per_rms_param[parameter_name] = all_values
+    # Check that probability values are in interval [0,1] and sum up probability over all facies per cell.
+    # Probabilities < 0 is set to 0 and probabilities > 1 is set to 1.
+    # The statistics used to report errors are accumulated over all blocks of cells.
+    statistics = None
+    zero_sum_cells = []
+    for cell_indices in blocks:
+        probabilities = np.stack(
+            [
+                probability_values_per_rms_param[parameter_name][cell_indices]
+                for parameter_name in parameter_names_for_zone
+            ]
+        )
+        sum_probabilities, block_statistics = validate_probabilities(
+            probabilities, eps, tolerance_of_probability_normalisation
+        )
+        for parameter_name, values in zip(parameter_names_for_zone, probabilities):
+            probability_values_per_rms_param[parameter_name][cell_indices] = values
+        statistics = combine_probability_statistics(statistics, block_statistics)
+        if block_statistics.NumZeroSum > 0:
+            zero_sum_cells.append(cell_indices[sum_probabilities == 0])
+
+    # If the fraction of grid cells with probabilities outside the tolerance interval
+    # [-tolerance_of_probability_normalisation, 1+tolerance_of_probability_normalisation] is
+    # larger than max_allowed_fraction_with_mismatch, errors are reported.
+    err_found_in_zone = report_facies_probability_statistics(
+        statistics,
+        tolerance_of_probability_normalisation,
+        max_allowed_fraction_with_mismatch,
+        facies_names_for_zone,
+        parameter_names_for_zone,
+        stop_on_error=stop_on_error,
+        error_dict=error_dict,
+    )
 
-    if (sum_probabilities_selected_cells == 0).any():
+    if len(zero_sum_cells) > 0:
+        zero_sum_cells = np.concatenate(zero_sum_cells)
         name = 'APS_problematic_cells_in_probability_cubes'
         # The property MAY have been created with a previous version as a continuous property.
         # In that case, writing code names to that property will cause a runtime error in RMS.
@@ -791,8 +850,9 @@ def check_and_normalise_probability(
         )
         grid = grid_model.get_grid(realization_number)
         values = grid.generate_values(np.uint8)
-        values[cell_index_defined] = sum_probabilities_selected_cells == 0
-        number_of_problematic_cells = np.sum(values[cell_index_defined])
+        values[cell_index_defined] = 0
+        values[zero_sum_cells] = 1
+        number_of_problematic_cells = len(zero_sum_cells)
 
         set_discrete_3d_parameter_values(
             grid_model,
@@ -816,48 +876,34 @@ def check_and_normalise_probability(
         raise NormalisationError(err_msg)
 
     # Check normalisation and report error if input probabilities are too far from 1.0
-    if stop_on_error:
-        normalise_is_necessary = check_probability_normalisation(
-            sum_probabilities_selected_cells,
-            eps,
-            tolerance_of_probability_normalisation,
-            max_allowed_fraction_with_mismatch,
-        )
-    else:
-        normalise_is_necessary, error_dict, err_found = check_probability_normalisation(
-            sum_probabilities_selected_cells,
-            eps,
-            tolerance_of_probability_normalisation,
-            max_allowed_fraction_with_mismatch,
-            stop_on_error=stop_on_error,
-            error_dict=error_dict,
-        )
-
-        if err_found:
-            err_found_in_zone = True
+    normalise_is_necessary, err_found = report_normalisation_statistics(
+        statistics,
+        tolerance_of_probability_normalisation,
+        max_allowed_fraction_with_mismatch,
+        stop_on_error=stop_on_error,
+        error_dict=error_dict,
+        debug_level=debug_level,
+    )
+    if err_found:
+        err_found_in_zone = True
+    num_cell_with_modified_probability = 0
+    if normalise_is_necessary:
+        num_cell_with_modified_probability = statistics.NumOutsideEps
 
     if not stop_on_error and not err_found_in_zone:
         error_dict['Message'].append('Ok')
 
     if normalise_is_necessary:
-        # Normalize
-        psum = sum_probabilities_selected_cells
-
-        for i, facies_name in enumerate(facies_names_for_zone):
-            parameter_name = prob_param_per_facies[facies_name]
-            all_values = probability_values_per_rms_param[parameter_name]
-            p = all_values[cell_index_defined]
-            if i == 0:
-                check_value = (psum > (1.0 + eps)) | (psum < (1.0 - eps))
-                num_cell_with_modified_probability = check_value.sum()
-
-            # Normalize
-            p_norm = p / psum
-
-            # The cells belonging to the zone,region as defined by the input cell_index_defined array
-            # is updated by normalised values
-            all_values[cell_index_defined] = p_norm
-            probability_values_per_rms_param[parameter_name] = all_values
+        # Normalize block by block. The sum is calculated in the same order as above.
+        for cell_indices in blocks:
+            psum = np.zeros(len(cell_indices), np.float32)
+            for parameter_name in parameter_names_for_zone:
+                psum += probability_values_per_rms_param[parameter_name][cell_indices]
+            for parameter_name in parameter_names_for_zone:
+                all_values = probability_values_per_rms_param[parameter_name]
+                # The cells belonging to the zone,region as defined by the input cell_index_defined array
+                # is updated by normalised values
+                all_values[cell_indices] = all_values[cell_indices] / psum
 
     if stop_on_error:
         return num_cell_with_modified_probability, probability_values_per_rms_param
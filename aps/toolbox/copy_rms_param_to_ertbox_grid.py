@@ -6,6 +6,7 @@ in ERTBOX grid. This functionality is used when the user wants to
 use FIELD keywords for petrophysical properties in ERT in Assisted History Matching.
 """
 
+import numpy as np
 import roxar
 import xml.etree.ElementTree as ET
 
@@ -17,7 +18,9 @@ from aps.utils.constants.simple import (
 )
 from aps.rms_jobs.copy_rms_param_trend_to_fmu_grid import (
     get_grid_model,
+    check_and_get_grid_dimensions,
     copy_from_geo_to_ertbox_grid,
+    ErtboxTransferPlanner,
 )
 
 from aps.utils.ymlUtils import get_text_value, get_dict, get_bool_value, readYml
@@ -105,9 +108,15 @@ def run(params, seed=12345):
         "ExtrapolationMethod": "repeat",
         "SaveActiveParam": True,
         "AddNoiseToInactive": True,
+        "IndexCacheDir": "ertbox_index_cache",
+        "MaxWorkers": 4,
     }
     copy_rms_param_to_ertbox_grid.run(params)
 
+    The optional keyword 'IndexCacheDir' specifies a directory where the mapping
+    from geogrid cells to ERTBOX cells is saved per zone, such that later runs with the
+    same grid geometry can reuse it. The optional keyword 'MaxWorkers' specifies
+    number of threads used when extrapolating the parameters of a zone.
     """
     project = params['project']
     model_file_name = params.get('model_file_name', None)
@@ -162,6 +171,9 @@ def from_geogrid_to_ertbox(project, params, seed=12345):
     save_active_param = params.get('SaveActiveParam', False)
     # Optional parameter, Default is to add noise to inactive grid cell values
     add_noise_to_inactive = params.get('AddNoiseToInactive', True)
+    # Optional parameters for reuse of grid index mapping and threading
+    index_cache_dir = params.get('IndexCacheDir', None)
+    max_workers = params.get('MaxWorkers', 1)
 
     # Check type and existence of geogrid parameters
     (continuous_type_param_dict, discrete_type_param_list) = check_geogrid_parameters(
@@ -183,6 +195,9 @@ def from_geogrid_to_ertbox(project, params, seed=12345):
     zone_code_names = zone_param.code_names
 
     _, ertboxgrid3D = get_grid_model(project, ertbox_grid_model_name)
+    nx, ny, _, nz_ertbox = check_and_get_grid_dimensions(
+        geogrid3D, ertboxgrid3D, grid_model_name, ertbox_grid_model_name
+    )
 
     # Check grid index origin
     geogrid_handedness = geogrid3D.grid_indexer.ijk_handedness
@@ -200,6 +215,15 @@ def from_geogrid_to_ertbox(project, params, seed=12345):
         print("WARNING: ERTBOX grid should have 'Eclipse grid index origin'.")
         print('         Use the grid index origin job in RMS to set this.')
 
+    planner = ErtboxTransferPlanner(
+        geogrid3D,
+        nx,
+        ny,
+        nz_ertbox,
+        cache_dir=index_cache_dir,
+        debug_level=debug_level,
+    )
+
     zone_dict = {}
     zone_names_used = []
     if debug_level >= Debug.ON:
@@ -239,6 +263,8 @@ def from_geogrid_to_ertbox(project, params, seed=12345):
         normalize_trend=False,
         not_aps_workflow=True,
         seed=seed,
+        planner=planner,
+        max_workers=max_workers,
     )
 
     if debug_level >= Debug.ON:
@@ -334,9 +360,20 @@ def from_ertbox_to_geogrid(project, params):
             print(f'-- Copy from:  {param_names_ertbox_list}')
             print(f'-- Copy to:    {param_names_geogrid_list}')
         nz_for_zone = number_of_layers_per_zone_in_geo_grid[zone_index]
-        parameter_names_geo_grid = []
-        parameter_values_geo_grid = []
-
+        if conformity in [Conform.Proportional, Conform.TopConform]:
+            # Only get the top n cells of field_values
+            layer_slice = slice(0, nz_for_zone)
+        elif conformity in [Conform.BaseConform]:
+            # Get the bottom n cells of field_values
+            layer_slice = slice(nz_ertbox - nz_for_zone, nz_ertbox)
+        else:
+            raise NotImplementedError(f'{conformity.value} is not supported')
+
+        # Read all parameters for the zone into one array
+        # with shape (number of parameters, nx, ny, nz_ertbox)
+        stacked_values = np.empty(
+            (len(param_names_ertbox_list), nx, ny, nz_ertbox), dtype=np.float32
+        )
         for index, param_name in enumerate(param_names_ertbox_list):
             try:
                 rms_property = ertbox_grid_model.properties[param_name]
@@ -345,20 +382,13 @@ def from_ertbox_to_geogrid(project, params):
                     f'The parameter: {param_name} does not exist or is empty for grid model: {ertbox_grid_model_name}'
                 )
             values = rms_property.get_values(realisation=real_number)
-            field_values = values.reshape(nx, ny, nz_ertbox)
-            if conformity in [Conform.Proportional, Conform.TopConform]:
-                # Only get the top n cells of field_values
-                field_values = field_values[:, :, :nz_for_zone]
-            elif conformity in [Conform.BaseConform]:
-                # Get the bottom n cells of field_values
-                field_values = field_values[:, :, -nz_for_zone:]
-            else:
-                raise NotImplementedError(f'{conformity.value} is not supported')
+            stacked_values[index] = values.reshape(nx, ny, nz_ertbox)
 
-            # Field names and corresponding values to update the geo grid with
-            param_name_geo = param_names_geogrid_list[index]
-            parameter_names_geo_grid.append(param_name_geo)
-            parameter_values_geo_grid.append(field_values)
+        # Field names and corresponding values to update the geo grid with
+        parameter_names_geo_grid = param_names_geogrid_list[
+            : len(param_names_ertbox_list)
+        ]
+        parameter_values_geo_grid = list(stacked_values[:, :, :, layer_slice])
 
         # Update geogrid. Has often multiple zones
         if debug_level >= Debug.VERY_VERBOSE:
@@ -415,6 +445,8 @@ def _read_model_file_yml(model_file_name, debug_level=Debug.OFF):
         'SaveActiveParam',
         'ExtrapolationMethod',
         'AddNoiseToInactive',
+        'IndexCacheDir',
+        'MaxWorkers',
     ]
     unknown_keys = []
     for key in list(spec.keys()):
@@ -485,6 +517,8 @@ def _read_model_file_yml(model_file_name, debug_level=Debug.OFF):
 
     save_active_param = get_bool_value(spec, 'SaveActiveParam', True)
     add_noise_to_inactive = get_bool_value(spec, 'AddNoiseToInactive', True)
+    index_cache_dir = spec.get('IndexCacheDir', None)
+    max_workers = int(spec.get('MaxWorkers', 1))
 
     param_dict = {
         'Mode': mode,
@@ -497,6 +531,8 @@ def _read_model_file_yml(model_file_name, debug_level=Debug.OFF):
         'Conformity': conformity_per_zone,
         'SaveActiveParam': save_active_param,
         'AddNoiseToInactive': add_noise_to_inactive,
+        'IndexCacheDir': index_cache_dir,
+        'MaxWorkers': max_workers,
         'debug_level': debug_level,
     }
     return param_dict
@@ -299,7 +299,6 @@ def calculate_new_probability_cubes(param_dict):
     weights_per_zone_dict = param_dict['weights']
     prefix = param_dict['prefix']
     eps = param_dict['tolerance']
-    should_normalize = param_dict['normalize']
 
     if debug_level >= Debug.ON:
         print(' ')
@@ -315,7 +314,6 @@ def calculate_new_probability_cubes(param_dict):
         for fname in facies_names:
             if fname not in facies_names_all_zones:
                 facies_names_all_zones.append(fname)
-    number_of_facies_all_zones = len(facies_names_all_zones)
 
     # Normalize weights
     for zone_number, weight_dict in weights_per_zone_dict.items():
@@ -325,83 +323,57 @@ def calculate_new_probability_cubes(param_dict):
         weights_per_zone_dict[zone_number] = weight_dict
 
     # Get the prob values from rms input probabilities
-    prob_values_dict = {}
-    for set_name, prob_param_per_facies_dict in prob_set_dict.items():
-        prob_values_dict[set_name] = {}
-        for fname, prob_param_name in prob_param_per_facies_dict.items():
-            prob_values_dict[set_name][fname] = None
-            if prob_param_name not in grid_model.properties:
-                raise KeyError(
-                    f'The probability parameter: {prob_param_name} does not exist.'
-                )
-            rms_prob_param = grid_model.properties[prob_param_name]
-            if rms_prob_param.is_empty(project.current_realisation):
-                raise ValueError(
-                    f'The probability parameter: {prob_param_name} is empty. '
-                )
-            if debug_level >= Debug.VERBOSE:
-                print(
-                    f'-- Get prob values for prob cube set: {set_name} for facies: {fname} from {prob_param_name}'
-                )
-            prob_values_dict[set_name][fname] = rms_prob_param.get_values(
-                project.current_realisation
-            )
+    stacked_prob_values, is_defined = get_stacked_prob_values(
+        project,
+        grid_model,
+        prob_set_dict,
+        facies_names_all_zones,
+        len(zone_values),
+        debug_level=debug_level,
+    )
 
     # Calculate updated result probabilities
-    sum_values = np.zeros(len(zone_values), dtype=np.float32)
+    cell_indices_per_zone = get_cell_indices_per_zone(zone_values, zone_number_list)
     prob_values_per_facies = np.zeros(
-        (number_of_facies_all_zones, len(zone_values)), dtype=np.float32
+        (len(facies_names_all_zones), len(zone_values)), dtype=np.float32
     )
     for zone_number in zone_number_list:
         if debug_level >= Debug.VERBOSE:
             print(f'-- Zone number:  {zone_number} ')
-        selected_active_cells = zone_number == zone_values
+        cell_indices = cell_indices_per_zone[zone_number]
+        facies_indices = [
+            facies_names_all_zones.index(fname)
+            for fname in facies_names_per_zone[zone_number]
+        ]
+        for set_index, set_name in enumerate(set_names_list):
+            for facies_index in facies_indices:
+                if not is_defined[set_index, facies_index]:
+                    raise KeyError(
+                        f'Missing probability parameter for facies {facies_names_all_zones[facies_index]} '
+                        f'in probability cube set {set_name} which is used in zone {zone_number}.'
+                    )
         weight_per_set = weights_per_zone_dict[zone_number]
-        nactive_in_zone = None
-
-        facies_index = 0
-        for facies_name in facies_names_per_zone[zone_number]:
-            values_new = prob_values_per_facies[facies_index, :]
-            values_new_selected = values_new[selected_active_cells]
-            for set_name in set_names_list:
-                prob_param_name_dict = prob_set_dict[set_name]
-                prob_param_name = prob_param_name_dict[facies_name]
-                weight = weight_per_set[set_name]
-                values = prob_values_dict[set_name][facies_name]
-                nactive_current = len(values[selected_active_cells])
-
-                if nactive_in_zone is None:
-                    nactive_in_zone = nactive_current
-                else:
-                    if nactive_in_zone != nactive_current:
-                        raise ValueError(
-                            'Expecting the same number of active grid cell values in all probability cubes.\n'
-                            f'RMS parameter {prob_param_name} has {nactive_current} active cells in '
-                            f'zone {zone_number} while previous probability cube has {nactive_in_zone}.'
-                        )
-                # Calculate linear combination of the probability cubes per zone and per facies
-                values_new_selected = (
-                    values_new_selected + weight * values[selected_active_cells]
-                )
-
-            # Updated values for current facies and current zone
-            prob_values_per_facies[facies_index, selected_active_cells] = (
-                values_new_selected
-            )
-            sum_values[selected_active_cells] = (
-                sum_values[selected_active_cells] + values_new_selected
-            )
-            facies_index += 1
+        weights = np.array(
+            [weight_per_set[set_name] for set_name in set_names_list], dtype=np.float32
+        )
 
-        checked_values = (sum_values[selected_active_cells] > 1 - eps) & (
-            sum_values[selected_active_cells] < 1 + eps
+        # Linear combination of the probability cubes for all facies in the zone
+        new_values = blend_probability_cubes(
+            stacked_prob_values, weights, facies_indices, cell_indices
         )
+        sum_values = new_values.sum(axis=0)
+
         if debug_level >= Debug.VERBOSE:
             print(f'-- Check normalization of new set of probability cubes.')
+        checked_values = (sum_values > 1 - eps) & (sum_values < 1 + eps)
         if not np.all(checked_values):
             raise ValueError(
                 f'The updated facies probabilities is not normalized within the tolerance {eps} around 1.0'
             )
+        new_values /= sum_values
+
+        # Updated values for the facies in current zone
+        prob_values_per_facies[np.ix_(facies_indices, cell_indices)] = new_values
 
     # Update RMS project with the new probabilities
     facies_index = 0
@@ -427,6 +399,81 @@ def calculate_new_probability_cubes(param_dict):
         facies_index += 1
 
 
+def get_stacked_prob_values(
+    project,
+    grid_model,
+    prob_set_dict,
+    facies_names,
+    number_of_cells,
+    debug_level=Debug.OFF,
+):
+    """
+    Returns the probability cubes as one float32 array with shape (sets, facies, cells)
+    where the sets are in the same order as in prob_set_dict and the facies in the
+    same order as in facies_names, and a boolean array with shape (sets, facies)
+    which is True for the probability cubes that are specified.
+    """
+    stacked_prob_values = np.zeros(
+        (len(prob_set_dict), len(facies_names), number_of_cells), dtype=np.float32
+    )
+    is_defined = np.zeros((len(prob_set_dict), len(facies_names)), dtype=bool)
+    for set_index, (set_name, prob_param_per_facies_dict) in enumerate(
+        prob_set_dict.items()
+    ):
+        for fname, prob_param_name in prob_param_per_facies_dict.items():
+            if prob_param_name not in grid_model.properties:
+                raise KeyError(
+                    f'The probability parameter: {prob_param_name} does not exist.'
+                )
+            rms_prob_param = grid_model.properties[prob_param_name]
+            if rms_prob_param.is_empty(project.current_realisation):
+                raise ValueError(
+                    f'The probability parameter: {prob_param_name} is empty. '
+                )
+            if debug_level >= Debug.VERBOSE:
+                print(
+                    f'-- Get prob values for prob cube set: {set_name} for facies: {fname} from {prob_param_name}'
+                )
+            values = rms_prob_param.get_values(project.current_realisation)
+            if len(values) != number_of_cells:
+                raise ValueError(
+                    'Expecting the same number of active grid cell values in all probability cubes.\n'
+                    f'RMS parameter {prob_param_name} has {len(values)} active cells '
+                    f'while the zone parameter has {number_of_cells}.'
+                )
+            facies_index = facies_names.index(fname)
+            stacked_prob_values[set_index, facies_index, :] = values
+            is_defined[set_index, facies_index] = True
+    return stacked_prob_values, is_defined
+
+
+def get_cell_indices_per_zone(zone_values, zone_numbers):
+    """
+    Returns a dictionary with the cell indices for each zone number.
+    The zone parameter is sorted once instead of comparing all cells with each zone number.
+    """
+    order = np.argsort(zone_values, kind='stable')
+    sorted_zone_values = zone_values[order]
+    start = np.searchsorted(sorted_zone_values, zone_numbers, side='left')
+    end = np.searchsorted(sorted_zone_values, zone_numbers, side='right')
+    return {
+        zone_number: order[start[i] : end[i]]
+        for i, zone_number in enumerate(zone_numbers)
+    }
+
+
+def blend_probability_cubes(stacked_prob_values, weights, facies_indices, cell_indices):
+    """
+    Returns the weighted sum over the sets of probability cubes with shape (facies, cells)
+    for the selected facies and cells. Only the selected part of the stacked
+    probability cubes is copied before the weights are applied.
+    """
+    selected = stacked_prob_values[
+        np.ix_(np.arange(stacked_prob_values.shape[0]), facies_indices, cell_indices)
+    ]
+    return np.tensordot(weights, selected, axes=1)
+
+
 def normalize_weights(
     weight_dict, eps, zone_number, keyword=None, debug_level=Debug.OFF
 ):
@@ -0,0 +1,863 @@
+#!/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Run the APS workflow (simulation of gaussian fields, transformation and truncation)
+for a set of realizations outside RMS. The realizations are run in parallel in a pool of processes,
+and the facies realizations are written as ROFF files.
+
+Input:
+    - The APS model file.
+    - The RMS data file (exported from RMS for the APS GUI) defining the simulation box
+      size and the grid layers for each zone.
+    - A grid file (ROFF) that can be read by xtgeo.
+    - ROFF files with the zone parameter, the region parameter (if regions are used)
+      and the probability cubes (if the probabilities are not constant).
+    - Seeds. Either a directory with the seed files seed_list_<realization>.dat as used by
+      APS_simulate_gauss_multiprocessing, or the RMS project seed. With the project seed
+      the start seed for a realization is the same as used by APS_simulate_gauss_singleprocessing
+      (project seed + realization number) and the fields are simulated in the same order.
+
+Output:
+    - <output directory>/<result facies parameter>_<realization>.roff
+    - With a checkpoint directory: <checkpoint directory>/realization_<realization>/ with the simulated
+      gaussian fields (<gauss field>_<zone>_<region>.npy), the truncated facies of each (zone, region)
+      (<result facies parameter>_<zone>_<region>.npy) and the manifest of completed tasks (manifest.json).
+      Running again with the same checkpoint directory skips the completed tasks, and reruns tasks with
+      changed input or missing or modified output. Each task is keyed on the input it reads, such that
+      e.g. changing the probabilities of one zone only reruns the truncation of that zone.
+
+Realizations are numbered from 1 as in the seed files and in RMS.
+Gaussian fields with trends and truncation rules with trend parameters need RMS
+and are not supported.
+
+Example of use from command line:
+    python -m aps.toolbox.simulate_ensemble APS.xml rms_project_data_for_APS_gui.xml
+        grid.roff zone.roff probabilities.roff --project-seed 1234 --realizations 1 100 --processes 8
+        --checkpoint-dir checkpoints
+"""
+
+import multiprocessing as mp
+import os
+from argparse import ArgumentParser
+from collections import OrderedDict, namedtuple
+from pathlib import Path
+from xml.etree.ElementTree import Element, tostring
+
+import numpy as np
+
+from aps.algorithms.APSModel import APSModel
+from aps.utils.checks import check_and_normalise_probability
+from aps.utils.constants.simple import (
+    Debug,
+    GridModelConstants,
+    ProbabilityTolerances,
+    TransformType,
+)
+from aps.utils.gaussian_simulation import (
+    define_variogram,
+    get_seed_file_name,
+    read_seed_file,
+)
+from aps.utils.io import ensure_folder_exists
+from aps.utils.records import Probability
+from aps.utils.roxar.APSDataFromRMS import APSDataFromRMS
+from aps.utils.specification_cache import array_key
+from aps.utils.task_manifest import TaskManifest, input_hash
+from aps.utils.transform import transform_CDF, transform_empiric
+
+GridData = namedtuple(
+    'GridData',
+    [
+        'grid',
+        'indices',
+        'zone_values',
+        'region_values',
+        'probabilities',
+        'flip_j',
+    ],
+)
+
+# Data shared by all realizations in a process. Set by _initialize_process.
+_process_data = {}
+
+
+def read_grid_data(
+    aps_model,
+    grid_file_name,
+    parameter_file_names,
+    zone_parameter_name=GridModelConstants.ZONE_NAME,
+):
+    """
+    Read the grid, and the zone and region parameters and the probability cubes used by the model
+    from the first of the parameter files containing them.
+    The parameter values are returned for the active cells, in the same order as the indices
+    (i, j, k) of the active cells.
+    """
+    import xtgeo
+
+    grid = xtgeo.grid_from_file(grid_file_name)
+    active = grid.actnum_array.astype(bool)
+
+    def read_parameter(name):
+        for parameter_file_name in parameter_file_names:
+            try:
+                values = xtgeo.gridproperty_from_file(
+                    parameter_file_name, fformat='roff', name=name, grid=grid
+                ).values
+            except ValueError:
+                continue
+            return np.ma.filled(values, 0)[active]
+        raise ValueError(
+            f'Can not find parameter {name} in the files: {", ".join(map(str, parameter_file_names))}'
+        )
+
+    zone_values = read_parameter(zone_parameter_name).astype(np.int32)
+    region_values = None
+    region_parameter_name = aps_model.getRegionParamName()
+    if region_parameter_name:
+        region_values = read_parameter(region_parameter_name).astype(np.int32)
+
+    probabilities = {}
+    for key, zone_model in aps_model.sorted_zone_models.items():
+        if not aps_model.isSelected(*key) or zone_model.use_constant_probabilities:
+            continue
+        for facies_name in zone_model.facies_in_zone_model:
+            name = zone_model.getProbParamName(facies_name)
+            if name not in probabilities:
+                probabilities[name] = read_parameter(name).astype(np.float32)
+
+    return GridData(
+        grid=grid,
+        indices=np.argwhere(active),
+        zone_values=zone_values,
+        region_values=region_values,
+        probabilities=probabilities,
+        # The gaussian fields are simulated in a left-handed simulation box
+        flip_j=grid.ijk_handedness == 'right',
+    )
+
+
+def check_model_is_supported(aps_model):
+    for key, zone_model in aps_model.sorted_zone_models.items():
+        zone_number, region_number = key
+        if not aps_model.isSelected(zone_number, region_number):
+            continue
+        for gauss_field_name in zone_model.gaussian_fields_in_truncation_rule:
+            if zone_model.hasTrendModel(gauss_field_name):
+                raise ValueError(
+                    f'The gaussian field {gauss_field_name} in (zone, region)=({zone_number}, {region_number}) '
+                    'has a trend. Trends are only supported when running in RMS.'
+                )
+        if not zone_model.truncation_rule.useConstTruncModelParam():
+            raise ValueError(
+                f'The truncation rule in (zone, region)=({zone_number}, {region_number}) '
+                'has trend parameters. Trend parameters are only supported when running in RMS.'
+            )
+
+
+def gauss_field_tasks(aps_model):
+    """The (zone number, region number, gauss field name) to simulate, in the order they are simulated."""
+    tasks = []
+    for key, zone_model in aps_model.sorted_zone_models.items():
+        zone_number, region_number = key
+        if not aps_model.isSelected(zone_number, region_number):
+            continue
+        for gauss_field_name in zone_model.gaussian_fields_in_truncation_rule:
+            tasks.append((zone_number, region_number, gauss_field_name))
+    return tasks
+
+
+def simulate_gauss_field(
+    aps_model, rms_data, grid_data, zone_number, region_number, gauss_field_name
+):
+    """
+    Simulate one gaussian field in the simulation box of the zone, using the current seed in gaussianfft.
+    Returns the values for the active cells in the (zone, region).
+    """
+    import gaussianfft
+
+    nx, ny, _, _, x_length, y_length, _, _, azimuth_angle_grid = rms_data.getGridSize()
+    if (nx, ny) != tuple(grid_data.grid.dimensions[:2]):
+        raise ValueError(
+            f'The grid dimensions {grid_data.grid.dimensions} does not match '
+            f'the simulation box dimensions ({nx}, {ny}) in the RMS data file.'
+        )
+    zone_model = aps_model.getZoneModel(zone_number, region_number)
+    start_layer, _ = rms_data.getStartAndEndLayerInZone(zone_number)
+    nz = rms_data.getNumberOfLayersInZone(zone_number)
+    cell_index_defined = _find_defined_cells(grid_data, zone_number, region_number)
+    i, j, k = grid_data.indices[cell_index_defined].T
+    if grid_data.flip_j:
+        j = ny - 1 - j
+    k = k - start_layer
+
+    variogram = zone_model.get_gaussian_field(gauss_field_name).variogram
+    sim_variogram = define_variogram(
+        variogram, variogram.angles.azimuth - azimuth_angle_grid
+    )
+    gauss_vector = gaussianfft.simulate(
+        sim_variogram,
+        nx,
+        x_length / nx,
+        ny,
+        y_length / ny,
+        nz,
+        zone_model.sim_box_thickness / nz,
+    )
+    gauss_result = np.reshape(gauss_vector, (nx, ny, nz), order='F')
+    return gauss_result[i, j, k].astype(np.float32)
+
+
+def simulate_gauss_fields(
+    aps_model,
+    rms_data,
+    grid_data,
+    realization_number,
+    seeds=None,
+    project_seed=None,
+):
+    """
+    Simulate the gaussian fields for all selected (zone, region) combinations and
+    return the values for the active cells. The key is the gauss field name.
+    If seeds (from read_seed_file) are given, each field is simulated from its own start seed.
+    Otherwise, the start seed is project_seed + realization_number + 1, and the fields are
+    simulated in sequence as in APS_simulate_gauss_singleprocessing.
+    """
+    import gaussianfft
+
+    if seeds is None:
+        gaussianfft.seed(project_seed + realization_number + 1)
+    gauss_values = {}
+    for zone_number, region_number, gauss_field_name in gauss_field_tasks(aps_model):
+        if seeds is not None:
+            gaussianfft.seed(
+                _get_seed(seeds, gauss_field_name, zone_number, region_number)
+            )
+        _print_simulate(
+            aps_model, gauss_field_name, zone_number, region_number, realization_number
+        )
+        values = simulate_gauss_field(
+            aps_model, rms_data, grid_data, zone_number, region_number, gauss_field_name
+        )
+        _set_gauss_values(
+            gauss_values,
+            grid_data,
+            gauss_field_name,
+            zone_number,
+            region_number,
+            values,
+        )
+    return gauss_values
+
+
+def truncate(
+    aps_model,
+    grid_data,
+    gauss_values,
+    eps=ProbabilityTolerances.MAX_DEVIATION_BEFORE_ACTION,
+    tolerance_of_probability_normalisation=ProbabilityTolerances.MAX_ALLOWED_DEVIATION_BEFORE_ERROR,
+    max_allowed_fraction_with_mismatch=ProbabilityTolerances.MAX_ALLOWED_FRACTION_OF_VALUES_OUTSIDE_TOLERANCE,
+):
+    """
+    Transform the gaussian fields and apply the truncation rules as in APS_main.
+    Returns the facies codes for the active cells and a mask of the cells that are modelled.
+    """
+    num_cells = len(grid_data.zone_values)
+    facies_real = np.zeros(num_cells, np.uint8)
+    modelled = np.zeros(num_cells, bool)
+    for key in aps_model.sorted_zone_models.keys():
+        zone_number, region_number = key
+        if not aps_model.isSelected(zone_number, region_number):
+            continue
+        cell_index_defined, facies_codes = truncate_zone(
+            aps_model,
+            grid_data,
+            zone_number,
+            region_number,
+            gauss_values,
+            eps,
+            tolerance_of_probability_normalisation,
+            max_allowed_fraction_with_mismatch,
+        )
+        facies_real[cell_index_defined] = facies_codes
+        modelled[cell_index_defined] = True
+    return facies_real, modelled
+
+
+def truncate_zone(
+    aps_model,
+    grid_data,
+    zone_number,
+    region_number,
+    gauss_values,
+    eps=ProbabilityTolerances.MAX_DEVIATION_BEFORE_ACTION,
+    tolerance_of_probability_normalisation=ProbabilityTolerances.MAX_ALLOWED_DEVIATION_BEFORE_ERROR,
+    max_allowed_fraction_with_mismatch=ProbabilityTolerances.MAX_ALLOWED_FRACTION_OF_VALUES_OUTSIDE_TOLERANCE,
+):
+    """
+    Transform the gaussian fields and apply the truncation rule of one (zone, region).
+    Only the values of the gaussian fields in the cells of the (zone, region) are used.
+    Returns the indices of the active cells in the (zone, region) and their facies codes.
+    """
+    debug_level = aps_model.debug_level
+    use_CDF_transform = aps_model.transform_type == TransformType.CUMNORM
+    zone_model = aps_model.getZoneModel(zone_number, region_number)
+    cell_index_defined = _find_defined_cells(grid_data, zone_number, region_number)
+    if len(cell_index_defined) == 0:
+        print(
+            f'Warning: No active grid cells for (zone, region)=({zone_number}, {region_number})\n'
+            '         Skip this zone, region combination'
+        )
+        return cell_index_defined, np.zeros(0, np.uint8)
+
+    num_cells = len(grid_data.zone_values)
+    facies_real = np.zeros(num_cells, np.uint8)
+    gf_names_for_truncation_rule = zone_model.getGaussFieldsInTruncationRule()
+    gf_alpha_for_current_zone = OrderedDict()
+    for gf_name in zone_model.used_gaussian_field_names:
+        if gf_name in gf_names_for_truncation_rule:
+            alpha_values = np.zeros(num_cells, np.float32)
+            if use_CDF_transform:
+                transform_CDF(cell_index_defined, gauss_values[gf_name], alpha_values)
+            else:
+                transform_empiric(
+                    cell_index_defined, gauss_values[gf_name], alpha_values
+                )
+            gf_alpha_for_current_zone[gf_name] = alpha_values
+        else:
+            gf_alpha_for_current_zone[gf_name] = None
+
+    probability_parameter_values_for_facies = []
+    for facies_name in zone_model.facies_in_zone_model:
+        probability_parameter = zone_model.getProbParamName(facies_name)
+        if zone_model.use_constant_probabilities:
+            values = [float(probability_parameter)]
+        else:
+            values = grid_data.probabilities[probability_parameter]
+        probability_parameter_values_for_facies.append(Probability(facies_name, values))
+    probability_defined, _ = check_and_normalise_probability(
+        len(zone_model.facies_in_zone_model),
+        probability_parameter_values_for_facies,
+        zone_model.use_constant_probabilities,
+        cell_index_defined,
+        eps,
+        tolerance_of_probability_normalisation,
+        max_allowed_fraction_with_mismatch,
+        debug_level,
+    )
+
+    if zone_model.key_resolution > 0:
+        facies_real, _ = zone_model.applyTruncations_vectorized(
+            probability_defined,
+            gf_alpha_for_current_zone,
+            facies_real,
+            cell_index_defined,
+        )
+    else:
+        facies_real, _ = zone_model.applyTruncations(
+            probability_defined,
+            gf_alpha_for_current_zone,
+            facies_real,
+            cell_index_defined,
+        )
+    return cell_index_defined, facies_real[cell_index_defined]
+
+
+def write_facies_realization(aps_model, grid_data, facies_real, modelled, file_name):
+    """Write the facies realization as a discrete ROFF parameter. Cells that are not modelled are undefined."""
+    import xtgeo
+
+    grid = grid_data.grid
+    values = np.ma.masked_all(grid.dimensions, np.int32)
+    i, j, k = grid_data.indices[modelled].T
+    values[i, j, k] = facies_real[modelled]
+    facies_parameter = xtgeo.GridProperty(
+        grid,
+        name=aps_model.getResultFaciesParamName(),
+        discrete=True,
+        codes=_code_names(aps_model),
+        values=values,
+    )
+    file_name = Path(file_name)
+    ensure_folder_exists(file_name)
+    # Write to a temporary file first, such that an interrupted run does not leave a partial file
+    temporary_file_name = file_name.with_name(file_name.name + '.tmp')
+    facies_parameter.to_file(temporary_file_name, fformat='roff')
+    os.replace(temporary_file_name, file_name)
+
+
+def run_realization(realization_number):
+    """Simulate, transform and truncate one realization (counted from 0) and write the facies realization."""
+    aps_model = _process_data['aps_model']
+    grid_data = _process_data['grid_data']
+    seed_dir = _process_data['seed_dir']
+    seeds = None
+    if seed_dir is not None:
+        seeds = read_seed_file(Path(seed_dir) / get_seed_file_name(realization_number))
+    file_name = (
+        Path(_process_data['output_dir'])
+        / f'{aps_model.getResultFaciesParamName()}_{realization_number + 1}.roff'
+    )
+    if _process_data['checkpoint_dir'] is not None:
+        return _run_realization_with_checkpoints(realization_number, seeds, file_name)
+
+    gauss_values = simulate_gauss_fields(
+        aps_model,
+        _process_data['rms_data'],
+        grid_data,
+        realization_number,
+        seeds=seeds,
+        project_seed=_process_data['project_seed'],
+    )
+    facies_real, modelled = truncate(aps_model, grid_data, gauss_values)
+    write_facies_realization(aps_model, grid_data, facies_real, modelled, file_name)
+    return file_name
+
+
+def _run_realization_with_checkpoints(realization_number, seeds, file_name):
+    """
+    Run the tasks of the realization that are not completed in an earlier run.
+    Each simulated gaussian field (realization, zone, region, field) and the truncation of each
+    (zone, region), (realization, zone, region, <facies parameter>), is a task with a checkpoint file.
+    Writing the facies realization is the final task (realization, None, None, <facies parameter>).
+    The input of a task is the part of the model and the grid data it reads, and the output of the tasks it uses.
+    With the project seed the fields are drawn from one random sequence, so a field also depends on the
+    fields before it, and if one field must be simulated, the fields before it are simulated again
+    (but not written) to get the same random numbers.
+    """
+    import gaussianfft
+
+    aps_model = _process_data['aps_model']
+    rms_data = _process_data['rms_data']
+    grid_data = _process_data['grid_data']
+    project_seed = _process_data['project_seed']
+    debug_level = aps_model.debug_level
+    result_name = aps_model.getResultFaciesParamName()
+    realization_dir = (
+        Path(_process_data['checkpoint_dir']) / f'realization_{realization_number + 1}'
+    )
+    manifest = TaskManifest(realization_dir / 'manifest.json')
+
+    zone_specifications = {}
+    field_tasks = []
+    previous_input_hash = None
+    for zone_number, region_number, gauss_field_name in gauss_field_tasks(aps_model):
+        if (zone_number, region_number) not in zone_specifications:
+            zone_specifications[zone_number, region_number] = _zone_specification(
+                aps_model.getZoneModel(zone_number, region_number)
+            )
+        _, field_specifications = zone_specifications[zone_number, region_number]
+        key = (realization_number + 1, zone_number, region_number, gauss_field_name)
+        if seeds is None:
+            seed = ('project', project_seed, previous_input_hash)
+        else:
+            seed = _get_seed(seeds, gauss_field_name, zone_number, region_number)
+        task_input_hash = input_hash(
+            key,
+            field_specifications[gauss_field_name],
+            _simulation_box_input(
+                aps_model, rms_data, grid_data, zone_number, region_number
+            ),
+            seed,
+        )
+        previous_input_hash = task_input_hash
+        field_tasks.append(
+            (key, task_input_hash, manifest.is_complete(key, task_input_hash))
+        )
+
+    if seeds is None and not all(complete for _, _, complete in field_tasks):
+        gaussianfft.seed(project_seed + realization_number + 1)
+        simulate = range(len(field_tasks))
+    else:
+        simulate = [index for index, task in enumerate(field_tasks) if not task[2]]
+    for index in simulate:
+        key, task_input_hash, complete = field_tasks[index]
+        _, zone_number, region_number, gauss_field_name = key
+        if seeds is not None:
+            gaussianfft.seed(
+                _get_seed(seeds, gauss_field_name, zone_number, region_number)
+            )
+        _print_simulate(
+            aps_model, gauss_field_name, zone_number, region_number, realization_number
+        )
+        values = simulate_gauss_field(
+            aps_model, rms_data, grid_data, zone_number, region_number, gauss_field_name
+        )
+        if complete:
+            continue
+        field_file_name = _checkpoint_file_name(realization_dir, key)
+        _save_checkpoint(field_file_name, values)
+        manifest.complete(key, task_input_hash, field_file_name)
+    if debug_level >= Debug.VERBOSE and len(simulate) < len(field_tasks):
+        print(
+            f'--- Use {len(field_tasks) - len(simulate)} of {len(field_tasks)} gaussian fields '
+            f'from earlier run for realization {realization_number + 1}'
+        )
+
+    zone_tasks = []
+    number_of_truncated_zones = 0
+    for (zone_number, region_number), (
+        zone_specification,
+        _,
+    ) in zone_specifications.items():
+        zone_model = aps_model.getZoneModel(zone_number, region_number)
+        field_keys = [
+            (realization_number + 1, zone_number, region_number, gauss_field_name)
+            for gauss_field_name in zone_model.gaussian_fields_in_truncation_rule
+        ]
+        key = (realization_number + 1, zone_number, region_number, result_name)
+        task_input_hash = input_hash(
+            key,
+            zone_specification,
+            _truncation_input(aps_model, grid_data, zone_number, region_number),
+            [manifest.output_hash(field_key) for field_key in field_keys],
+        )
+        zone_tasks.append(key)
+        if manifest.is_complete(key, task_input_hash):
+            continue
+        gauss_values = {}
+        for field_key in field_keys:
+            _, _, _, gauss_field_name = field_key
+            _set_gauss_values(
+                gauss_values,
+                grid_data,
+                gauss_field_name,
+                zone_number,
+                region_number,
+                np.load(_checkpoint_file_name(realization_dir, field_key)),
+            )
+        _, facies_codes = truncate_zone(
+            aps_model, grid_data, zone_number, region_number, gauss_values
+        )
+        zone_file_name = _checkpoint_file_name(realization_dir, key)
+        _save_checkpoint(zone_file_name, facies_codes)
+        manifest.complete(key, task_input_hash, zone_file_name)
+        number_of_truncated_zones += 1
+    if debug_level >= Debug.VERBOSE and number_of_truncated_zones < len(zone_tasks):
+        print(
+            f'--- Use {len(zone_tasks) - number_of_truncated_zones} of {len(zone_tasks)} truncated '
+            f'(zone, region) combinations from earlier run for realization {realization_number + 1}'
+        )
+
+    key = (realization_number + 1, None, None, result_name)
+    task_input_hash = input_hash(
+        key,
+        _code_names(aps_model),
+        grid_data.grid.dimensions,
+        array_key(grid_data.indices),
+        [manifest.output_hash(zone_key) for zone_key in zone_tasks],
+    )
+    if manifest.is_complete(key, task_input_hash):
+        if debug_level >= Debug.VERBOSE:
+            print(f'--- Realization {realization_number + 1} is complete')
+        return file_name
+
+    num_cells = len(grid_data.zone_values)
+    facies_real = np.zeros(num_cells, np.uint8)
+    modelled = np.zeros(num_cells, bool)
+    for zone_key in zone_tasks:
+        _, zone_number, region_number, _ = zone_key
+        cell_index_defined = _find_defined_cells(grid_data, zone_number, region_number)
+        facies_real[cell_index_defined] = np.load(
+            _checkpoint_file_name(realization_dir, zone_key)
+        )
+        modelled[cell_index_defined] = True
+    write_facies_realization(aps_model, grid_data, facies_real, modelled, file_name)
+    manifest.complete(key, task_input_hash, file_name)
+    return file_name
+
+
+def _zone_specification(zone_model):
+    """
+    The specification of the zone model as XML, without the gaussian fields,
+    and the specification of each gaussian field in the zone model.
+    """
+    parent = Element('ZoneModels')
+    zone_model.XMLAddElement(parent, [])
+    zone_element = parent.find('Zone')
+    field_specifications = {}
+    for field_element in zone_element.findall('GaussField'):
+        field_specifications[field_element.get('name')] = tostring(
+            field_element, encoding='unicode'
+        )
+        zone_element.remove(field_element)
+    return tostring(zone_element, encoding='unicode'), field_specifications
+
+
+def _simulation_box_input(aps_model, rms_data, grid_data, zone_number, region_number):
+    """The simulation box of the zone and the cells in the (zone, region) that a gaussian field is simulated for."""
+    cell_index_defined = _find_defined_cells(grid_data, zone_number, region_number)
+    return [
+        rms_data.getGridSize(),
+        rms_data.getStartAndEndLayerInZone(zone_number),
+        rms_data.getNumberOfLayersInZone(zone_number),
+        aps_model.getZoneModel(zone_number, region_number).sim_box_thickness,
+        grid_data.grid.dimensions,
+        grid_data.flip_j,
+        array_key(grid_data.indices[cell_index_defined]),
+    ]
+
+
+def _truncation_input(aps_model, grid_data, zone_number, region_number):
+    """The model and grid data, except the gaussian fields, that the truncation of a (zone, region) reads."""
+    zone_model = aps_model.getZoneModel(zone_number, region_number)
+    main_facies_table = aps_model.getMainFaciesTable()
+    cell_index_defined = _find_defined_cells(grid_data, zone_number, region_number)
+    probabilities = []
+    if not zone_model.use_constant_probabilities:
+        for facies_name in zone_model.facies_in_zone_model:
+            values = grid_data.probabilities[zone_model.getProbParamName(facies_name)]
+            probabilities.append(array_key(values[cell_index_defined]))
+    return [
+        aps_model.transform_type,
+        zone_model.used_gaussian_field_names,
+        [
+            (facies_name, main_facies_table.getFaciesCodeForFaciesName(facies_name))
+            for facies_name in zone_model.facies_in_zone_model
+        ],
+        array_key(cell_index_defined),
+        probabilities,
+    ]
+
+
+def _code_names(aps_model):
+    main_facies_table = aps_model.getMainFaciesTable()
+    code_names = {}
+    for key, zone_model in aps_model.sorted_zone_models.items():
+        if aps_model.isSelected(*key):
+            for facies_name in zone_model.facies_in_zone_model:
+                facies_code = main_facies_table.getFaciesCodeForFaciesName(facies_name)
+                code_names[facies_code] = facies_name
+    return code_names
+
+
+def _checkpoint_file_name(realization_dir, key):
+    _, zone_number, region_number, name = key
+    return realization_dir / f'{name}_{zone_number}_{region_number}.npy'
+
+
+def _save_checkpoint(file_name, values):
+    ensure_folder_exists(file_name)
+    temporary_file_name = file_name.with_name(file_name.name + '.tmp')
+    with open(temporary_file_name, 'wb') as file:
+        np.save(file, values)
+    os.replace(temporary_file_name, file_name)
+
+
+def run(params):
+    """
+    Run the realizations in params['realizations'] (counted from 1) in a pool of processes.
+    The keys in params are: model_file, rms_data_file, grid_file, parameter_files, output_dir,
+    realizations, and either seed_dir or project_seed. Optional keys are: zone_parameter,
+    number_of_processes, debug_level and checkpoint_dir.
+    With checkpoint_dir, the simulated gaussian fields and a manifest of the completed tasks are
+    kept in the directory, and running again with the same input only runs the tasks that are not completed.
+    """
+    seed_dir = params.get('seed_dir')
+    project_seed = params.get('project_seed')
+    if (seed_dir is None) == (project_seed is None):
+        raise ValueError(
+            'Specify either a directory with seed files or the project seed'
+        )
+    realizations = list(params['realizations'])
+    if not realizations:
+        raise ValueError('Specify at least one realization to run')
+    number_of_processes = params.get('number_of_processes') or mp.cpu_count()
+    number_of_processes = min(number_of_processes, len(realizations))
+    checkpoint_dir = params.get('checkpoint_dir')
+    zone_parameter = params.get('zone_parameter', GridModelConstants.ZONE_NAME)
+    initargs = (
+        params['model_file'],
+        params['rms_data_file'],
+        params['grid_file'],
+        params['parameter_files'],
+        zone_parameter,
+        seed_dir,
+        project_seed,
+        params['output_dir'],
+        params.get('debug_level'),
+        checkpoint_dir,
+    )
+    # Check the input before starting the processes
+    _initialize_process(*initargs)
+    debug_level = _process_data['aps_model'].debug_level
+    if debug_level >= Debug.ON:
+        print(
+            f'- Run {len(realizations)} realizations using {number_of_processes} processes'
+        )
+    with mp.Pool(
+        number_of_processes, initializer=_initialize_process, initargs=initargs
+    ) as pool:
+        for file_name in pool.imap_unordered(
+            run_realization, [number - 1 for number in realizations]
+        ):
+            if debug_level >= Debug.ON:
+                print(f'- Write file: {file_name}')
+    if debug_level >= Debug.ON:
+        print('- Finished running all realizations')
+
+
+def _initialize_process(
+    model_file,
+    rms_data_file,
+    grid_file,
+    parameter_files,
+    zone_parameter,
+    seed_dir,
+    project_seed,
+    output_dir,
+    debug_level,
+    checkpoint_dir=None,
+):
+    aps_model = APSModel.from_cache(model_file)
+    if debug_level is not None:
+        aps_model.debug_level = debug_level
+    check_model_is_supported(aps_model)
+    rms_data = APSDataFromRMS(debug_level=aps_model.debug_level)
+    rms_data.readRMSDataFromXMLFile(rms_data_file)
+    _process_data.update(
+        aps_model=aps_model,
+        rms_data=rms_data,
+        grid_data=read_grid_data(aps_model, grid_file, parameter_files, zone_parameter),
+        seed_dir=seed_dir,
+        project_seed=project_seed,
+        output_dir=output_dir,
+        checkpoint_dir=checkpoint_dir,
+    )
+
+
+def _find_defined_cells(grid_data, zone_number, region_number):
+    selected = grid_data.zone_values == zone_number
+    if grid_data.region_values is not None and region_number > 0:
+        selected &= grid_data.region_values == region_number
+    return np.flatnonzero(selected)
+
+
+def _get_seed(seeds, gauss_field_name, zone_number, region_number):
+    key = (gauss_field_name, zone_number, region_number)
+    if key not in seeds:
+        raise IOError(
+            f'The seed file does not contain seed value for gauss field name: {gauss_field_name}'
+            f'   zone number: {zone_number}    and region number: {region_number}'
+        )
+    return seeds[key]
+
+
+def _set_gauss_values(
+    gauss_values, grid_data, gauss_field_name, zone_number, region_number, values
+):
+    if gauss_field_name not in gauss_values:
+        gauss_values[gauss_field_name] = np.zeros(
+            len(grid_data.zone_values), np.float32
+        )
+    cell_index_defined = _find_defined_cells(grid_data, zone_number, region_number)
+    gauss_values[gauss_field_name][cell_index_defined] = values
+
+
+def _print_simulate(
+    aps_model, gauss_field_name, zone_number, region_number, realization_number
+):
+    if aps_model.debug_level >= Debug.VERY_VERBOSE:
+        print(
+            f'--- Simulate: {gauss_field_name} for (zone, region)=({zone_number}, {region_number}) '
+            f'in realization {realization_number + 1}'
+        )
+
+
+def get_arguments():
+    parser = ArgumentParser(
+        description='Run APS (simulation and truncation) for a set of realizations outside RMS'
+    )
+    parser.add_argument('model_file', type=str, help='The APS model file')
+    parser.add_argument(
+        'rms_data_file', type=str, help='The RMS data file for the APS GUI'
+    )
+    parser.add_argument('grid_file', type=str, help='The grid (ROFF)')
+    parser.add_argument(
+        'parameter_files',
+        type=str,
+        nargs='+',
+        help='The zone and region parameter and probability cubes (ROFF)',
+    )
+    parser.add_argument(
+        '-r',
+        '--realizations',
+        type=int,
+        nargs=2,
+        metavar=('FIRST', 'LAST'),
+        default=(1, 1),
+        help='The first and last realization, counted from 1 (default: 1 1)',
+    )
+    parser.add_argument(
+        '-s',
+        '--seed-dir',
+        type=str,
+        default=None,
+        help='Directory with the seed files seed_list_<realization>.dat',
+    )
+    parser.add_argument(
+        '--project-seed', type=int, default=None, help='The RMS project seed'
+    )
+    parser.add_argument(
+        '-o',
+        '--output-dir',
+        type=str,
+        default='.',
+        help='Directory for the facies realizations (default: .)',
+    )
+    parser.add_argument(
+        '-c',
+        '--checkpoint-dir',
+        type=str,
+        default=None,
+        help='Directory for checkpoints. Running again with the same directory resumes an interrupted run',
+    )
+    parser.add_argument(
+        '-z',
+        '--zone-parameter',
+        type=str,
+        default=GridModelConstants.ZONE_NAME,
+        help=f'Name of the zone parameter (default: {GridModelConstants.ZONE_NAME})',
+    )
+    parser.add_argument(
+        '-p',
+        '--processes',
+        type=int,
+        default=None,
+        help='The number of processes (default: the number of CPUs)',
+    )
+    parser.add_argument(
+        '-d',
+        '--debug-level',
+        type=int,
+        default=None,
+        help='Sets the verbosity. 0-4, where 0 is least verbose (default: from the model file)',
+    )
+    return parser.parse_args()
+
+
+def run_cli():
+    args = get_arguments()
+    first, last = args.realizations
+    run(
+        {
+            'model_file': args.model_file,
+            'rms_data_file': args.rms_data_file,
+            'grid_file': args.grid_file,
+            'parameter_files': args.parameter_files,
+            'zone_parameter': args.zone_parameter,
+            'realizations': range(first, last + 1),
+            'seed_dir': args.seed_dir,
+            'project_seed': args.project_seed,
+            'output_dir': args.output_dir,
+            'number_of_processes': args.processes,
+            'checkpoint_dir': args.checkpoint_dir,
+            'debug_level': None
+            if args.debug_level is None
+            else Debug(args.debug_level),
+        }
+    )
+
+
+if __name__ == '__main__':
+    run_cli()
@@ -0,0 +1,27 @@
+#!/bin/env python
+# -*- coding: utf-8 -*-
+import pytest
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        '--run-benchmarks',
+        action='store_true',
+        default=False,
+        help='Run the tests marked as benchmark',
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers', 'benchmark: timing comparisons, only run with --run-benchmarks'
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption('--run-benchmarks'):
+        return
+    skip_benchmark = pytest.mark.skip(reason='Use --run-benchmarks to run')
+    for item in items:
+        if 'benchmark' in item.keywords:
+            item.add_marker(skip_benchmark)
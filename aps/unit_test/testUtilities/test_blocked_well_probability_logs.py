@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+
+import aps.utils.roxar.modifyBlockedWellData as modifyBlockedWellData
+from aps.utils.roxar.modifyBlockedWellData import createProbabilityLogs
+
+CODE_NAMES = {1: 'A', 2: 'B', 3: 'C'}
+
+
+class _Log:
+    def __init__(self):
+        self.values = None
+
+    def set_values(self, values, realisation):
+        self.values = values
+
+
+class _Properties(dict):
+    def create(self, name, property_type, data_type):
+        self[name] = _Log()
+        return self[name]
+
+
+class _BlockedWells:
+    def __init__(self):
+        self.properties = _Properties()
+
+
+class _Project:
+    current_realisation = 0
+
+
+def _create_logs(monkeypatch, zone, facies, modelling_facies, conditional=None):
+    facies_per_zone = {}
+    for zone_number, code in zip(zone, facies):
+        names = facies_per_zone.setdefault((int(zone_number), 0), [])
+        if CODE_NAMES[code] not in names:
+            names.append(CODE_NAMES[code])
+    blocked_wells = _BlockedWells()
+    monkeypatch.setattr(
+        modifyBlockedWellData,
+        'get_facies_zone_table_and_log_from_bw',
+        lambda *args: (
+            None,
+            zone,
+            None,
+            None,
+            CODE_NAMES,
+            facies,
+            facies_per_zone,
+        ),
+    )
+    monkeypatch.setattr(
+        modifyBlockedWellData, 'getBlockedWells', lambda *args: blocked_wells
+    )
+    createProbabilityLogs(
+        {
+            'project': _Project(),
+            'grid_model_name': 'Grid',
+            'bw_name': 'BW',
+            'facies_log_name': 'Facies',
+            'zone_log_name': 'Zone',
+            'modelling_facies_per_zone_region': modelling_facies,
+            'conditional_prob_facies': conditional,
+            'prefix_prob_logs': 'Prob',
+        }
+    )
+    return {name: log.values for name, log in blocked_wells.properties.items()}
+
+
+def test_probability_logs_are_looked_up_per_zone_and_facies(monkeypatch):
+    zone = np.array([1, 1, 1, 2, 2])
+    facies = np.array([1, 2, 3, 1, 3])
+    logs = _create_logs(
+        monkeypatch, zone, facies, {(1, 0): ['A', 'B'], (2, 0): ['A', 'C']}
+    )
+    assert list(logs) == ['Prob_A', 'Prob_B', 'Prob_C']
+    # Facies C is not modelled in zone 1, and the cell is undefined in all logs
+    np.testing.assert_array_equal(logs['Prob_A'].mask, [0, 0, 1, 0, 0])
+    np.testing.assert_array_equal(logs['Prob_A'].compressed(), [1, 0, 1, 0])
+    np.testing.assert_array_equal(logs['Prob_B'].compressed(), [0, 1, 0, 0])
+    np.testing.assert_array_equal(logs['Prob_C'].compressed(), [0, 0, 0, 1])
+    for values in logs.values():
+        assert values.dtype == np.float32
+
+
+def test_first_cell_without_conditional_probability_is_undefined(monkeypatch):
+    zone = np.array([3, 1, 1, 2])
+    facies = np.array([3, 1, 3, 2])
+    conditional = {
+        (1, 'A', 'A'): 0.9,
+        (1, 'B', 'A'): 0.1,
+        (1, 'A', 'C'): 0.3,
+        (1, 'B', 'C'): 0.7,
+        (2, 'B', 'B'): 1.0,
+        (2, 'C', 'B'): 0.0,
+    }
+    logs = _create_logs(
+        monkeypatch,
+        zone,
+        facies,
+        {(1, 0): ['A', 'B'], (2, 0): ['B', 'C']},
+        conditional,
+    )
+    # Zone 3 is not modelled, so no probabilities are specified for the first cell.
+    # It is undefined, and does not keep the value -1 which was used as a workaround before.
+    for values in logs.values():
+        assert values.mask[0]
+    np.testing.assert_allclose(
+        logs['Prob_A'], np.ma.masked_invalid([np.nan, 0.9, 0.3, np.nan])
+    )
+    np.testing.assert_allclose(logs['Prob_B'][1:], [0.1, 0.7, 1.0])
+    np.testing.assert_array_equal(logs['Prob_C'].mask, [1, 1, 1, 0])
+    assert logs['Prob_C'][3] == 0.0
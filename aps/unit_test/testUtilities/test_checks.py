@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from aps.utils.constants.simple import Debug
+from aps.utils.checks import (
+    NormalisationError,
+    check_probability_normalisation,
+    SUM_DEVIATION_BIN_EDGES,
+    check_probability_values,
+    combine_probability_statistics,
+    report_facies_probability_statistics,
+    report_normalisation_statistics,
+    validate_probabilities,
+)
+
+EPS = 0.001
+TOLERANCE = 0.1
+
+
+def _probabilities(num_cells=1000, deviation=0.02, seed=1):
+    rng = np.random.default_rng(seed)
+    values = rng.random((3, num_cells)).astype(np.float32)
+    values /= values.sum(axis=0)
+    values *= (1 + rng.normal(0, deviation, num_cells)).astype(np.float32)
+    values[0, :5] = -0.2
+    values[1, 5:12] = 1.3
+    return values
+
+
+def test_validate_probabilities_as_separate_checks():
+    values = _probabilities()
+    probabilities = values.copy()
+    sum_probabilities, statistics = validate_probabilities(
+        probabilities, EPS, TOLERANCE
+    )
+
+    expected_sum = np.zeros(values.shape[1], np.float32)
+    for i, facies_values in enumerate(values.copy()):
+        clipped = check_probability_values(facies_values, TOLERANCE, 1.0)
+        np.testing.assert_array_equal(probabilities[i], clipped)
+        expected_sum += clipped
+    np.testing.assert_array_equal(sum_probabilities, expected_sum)
+
+    assert list(statistics.NumNegative) == [5, 0, 0]
+    assert list(statistics.NumAboveOne) == [0, 7, 0]
+    np.testing.assert_array_equal(statistics.MinValues, values.min(axis=1))
+    np.testing.assert_array_equal(statistics.MaxValues, values.max(axis=1))
+    assert statistics.MinSum == expected_sum.min()
+    assert statistics.MaxSum == expected_sum.max()
+    normalise_is_necessary = check_probability_normalisation(
+        expected_sum, EPS, TOLERANCE, 1.0
+    )
+    assert normalise_is_necessary == (statistics.NumNotCloseToOne > 0)
+
+
+def test_combine_probability_statistics_for_blocks():
+    values = _probabilities(num_cells=997)
+    _, expected = validate_probabilities(values.copy(), EPS, TOLERANCE)
+
+    statistics = None
+    for start in range(0, values.shape[1], 100):
+        _, block_statistics = validate_probabilities(
+            values[:, start : start + 100].copy(), EPS, TOLERANCE
+        )
+        statistics = combine_probability_statistics(statistics, block_statistics)
+
+    for name in expected._fields:
+        np.testing.assert_array_equal(
+            getattr(statistics, name), getattr(expected, name), err_msg=name
+        )
+
+
+def test_report_probability_statistics():
+    values = _probabilities(deviation=0.3)
+    _, statistics = validate_probabilities(values, EPS, TOLERANCE)
+
+    error_dict = {'Error': False, 'Message': []}
+    err_found = report_facies_probability_statistics(
+        statistics,
+        TOLERANCE,
+        0.001,
+        ['F1', 'F2', 'F3'],
+        stop_on_error=False,
+        error_dict=error_dict,
+    )
+    assert err_found
+    assert error_dict['Error']
+    assert 'Facies: F1  Parameter name:  ' in error_dict['Message']
+
+    with pytest.raises(NormalisationError):
+        report_normalisation_statistics(statistics, TOLERANCE, 0.05)
+
+
+def test_sum_deviation_counts():
+    assert len(SUM_DEVIATION_BIN_EDGES) == 7
+    # The sums of probabilities are 1, 1.00005, 0.9995, 1.005, 1.05, 0.8 and 0
+    values = np.array(
+        [
+            [0.5, 0.5, 0.4995, 0.505, 0.55, 0.4, 0.0],
+            [0.5, 0.50005, 0.5, 0.5, 0.5, 0.4, 0.0],
+        ],
+        dtype=np.float32,
+    )
+    _, statistics = validate_probabilities(values, EPS, TOLERANCE)
+    assert list(statistics.SumDeviationCounts) == [1, 1, 1, 1, 1, 2]
+    assert statistics.SumDeviationCounts.sum() == statistics.NumCells
+
+    _, empty = validate_probabilities(np.zeros((2, 0), np.float32), EPS, TOLERANCE)
+    combined = combine_probability_statistics(empty, statistics)
+    assert list(combined.SumDeviationCounts) == [1, 1, 1, 1, 1, 2]
+
+
+def test_report_sum_deviation_counts(capsys):
+    values = _probabilities(deviation=0.01)
+    _, statistics = validate_probabilities(values, EPS, TOLERANCE)
+    report_normalisation_statistics(
+        statistics, TOLERANCE, 1.0, debug_level=Debug.VERBOSE
+    )
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == len(SUM_DEVIATION_BIN_EDGES)
+    counts = [int(line.rsplit(':', 1)[1]) for line in lines[1:]]
+    assert counts == list(statistics.SumDeviationCounts)
+    assert lines[-1].endswith(f'>= 0.1: {statistics.SumDeviationCounts[-1]}')
+
+    report_normalisation_statistics(statistics, TOLERANCE, 1.0)
+    assert capsys.readouterr().out == ''
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+import time
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from aps.utils.ConvertBitMapToRMS import ConvertBitMapToRMS, writeIrapMap
+
+NX, NY = 37, 23
+MISSING_CODE = -1
+# Facies code: color code
+COLOR_CODE_MAPPING = {1: 17, 2: 100, 3: 255}
+
+
+def _baseline_write_irap_map(
+    fmap, xOrigo, yOrigo, xinc, yinc, angleInDegrees, outputFileName
+):
+    # The writer formatting one value at a time, used as reference
+    ny, nx = fmap.shape
+    with open(outputFileName, 'w', encoding='utf-8') as file:
+        file.write(' -996 ' + str(ny) + '  ' + str(xinc) + '  ' + str(yinc) + '\n')
+        xm = xOrigo + (nx - 1) * xinc
+        ym = yOrigo + (ny - 1) * yinc
+        file.write(f'  {xOrigo}  {xm}  {yOrigo}  {ym}\n')
+        file.write(f'  {nx}  {angleInDegrees}  {xOrigo}  {yOrigo}\n')
+        file.write(' 0   0   0   0   0   0   0 \n')
+        n = 0
+        line = ' '
+        for j in range(ny):
+            jj = ny - 1 - j
+            for i in range(nx):
+                line = line + str(fmap[jj, i]) + '  '
+                n = n + 1
+                if n == 6:
+                    file.write(line + '\n')
+                    n = 0
+                    line = ' '
+        if n > 0:
+            file.write(line)
+
+
+def _baseline_facies_map(fmapColors):
+    # The pixel by pixel conversion, used as reference
+    codeMapping = np.full(256, MISSING_CODE, np.int32)
+    for f, c in COLOR_CODE_MAPPING.items():
+        codeMapping[c] = f
+    nrows, ncols = fmapColors.shape
+    fmapFacies = np.zeros((nrows, ncols))
+    for j in range(ncols):
+        for i in range(nrows):
+            fmapFacies[i, j] = codeMapping[fmapColors[i, j]]
+    return fmapFacies
+
+
+def _read_irap_values(path):
+    lines = path.read_text().splitlines()
+    return np.array(' '.join(lines[4:]).split(), dtype=np.float64)
+
+
+def _colors(seed):
+    rng = np.random.default_rng(seed)
+    colors = rng.choice([0, 17, 18, 100, 255], size=(NY, NX)).astype(np.uint8)
+    return colors
+
+
+def _converter(tmp_path, number_of_files, crop=False, use_facies=True):
+    input_files = []
+    for n in range(number_of_files):
+        path = tmp_path / f'bitmap_{n}.png'
+        Image.fromarray(_colors(n)).save(path)
+        input_files.append(str(path))
+    params = {
+        'Coordinates': {'xmin': 1000.0, 'xmax': 1370.0, 'ymin': 2000.0, 'ymax': 2230.0},
+        'PixelInterval': {
+            'nx': NX,
+            'ny': NY,
+            'Istart': 3 if crop else 1,
+            'Iend': 30 if crop else NX,
+            'Jstart': 2 if crop else 1,
+            'Jend': 20 if crop else NY,
+        },
+        'ColorCodeMapping': COLOR_CODE_MAPPING if use_facies else {},
+        'CropToPixelInterval': crop,
+        'MissingCode': MISSING_CODE,
+        'UseFaciesCode': use_facies,
+        'InputFileList': input_files,
+        'OutputFileList': [
+            str(tmp_path / f'map_{n}.irap') for n in range(number_of_files)
+        ],
+        'max_workers': 3,
+    }
+    return ConvertBitMapToRMS(params)
+
+
+@pytest.mark.parametrize('crop', [False, True])
+@pytest.mark.parametrize('use_facies', [False, True])
+def test_converted_files_match_baseline_writer(tmp_path, crop, use_facies):
+    converter = _converter(tmp_path, 4, crop=crop, use_facies=use_facies)
+    converter.convert()
+    converter.writeFile()
+    for n in range(4):
+        fmap = _colors(n)
+        if use_facies:
+            fmap = _baseline_facies_map(fmap)
+        if crop:
+            # Pixel rows 2-20 counted from the bottom and pixel columns 3-30
+            fmap = np.asarray(fmap[NY - 20 : NY - 1, 2:30], dtype=np.float64)
+        expected_path = tmp_path / f'expected_{n}.irap'
+        _baseline_write_irap_map(
+            fmap,
+            1000.0 if crop else converter.xminUnCropped,
+            2000.0 if crop else converter.yminUnCropped,
+            converter._ConvertBitMapToRMS__xinc,
+            converter._ConvertBitMapToRMS__yinc,
+            0.0,
+            expected_path,
+        )
+        path = tmp_path / f'map_{n}.irap'
+        assert path.read_text() == expected_path.read_text()
+        np.testing.assert_array_equal(
+            _read_irap_values(path), fmap[::-1, :].ravel().astype(np.float64)
+        )
+
+
+def test_lookup_table_uses_small_integer_type(tmp_path):
+    converter = _converter(tmp_path, 1)
+    converter.convert()
+    (fmapFacies,) = converter._ConvertBitMapToRMS__fmapFaciesList
+    assert fmapFacies.dtype == np.int16
+    np.testing.assert_array_equal(fmapFacies, _baseline_facies_map(_colors(0)))
+
+
+def test_messages_are_printed_in_file_order(tmp_path, capsys):
+    converter = _converter(tmp_path, 5)
+    converter.convert()
+    lines = capsys.readouterr().out.splitlines()
+    expected = []
+    for n in range(5):
+        expected += [
+            f'Read file: {tmp_path / f"bitmap_{n}.png"}',
+            'Color is specified by 1 byte',
+        ]
+    assert lines == expected
+
+
+@pytest.mark.parametrize('valuesPerBlock', [1, 6, 7, 60, 6 * 8192])
+@pytest.mark.parametrize('asFloat', [False, True])
+def test_write_irap_map_in_blocks(tmp_path, valuesPerBlock, asFloat):
+    fmap = _colors(1).astype(np.int16) - 1
+    path = tmp_path / 'map.irap'
+    writeIrapMap(
+        fmap,
+        10.0,
+        20.0,
+        25.0,
+        12.5,
+        0.0,
+        path,
+        valuesPerBlock=valuesPerBlock,
+        asFloat=asFloat,
+    )
+    expected_path = tmp_path / 'expected.irap'
+    _baseline_write_irap_map(
+        fmap.astype(np.float64) if asFloat else fmap,
+        10.0,
+        20.0,
+        25.0,
+        12.5,
+        0.0,
+        expected_path,
+    )
+    assert path.read_text() == expected_path.read_text()
+
+
+@pytest.mark.benchmark
+def test_benchmark_conversion_and_writing(tmp_path):
+    rng = np.random.default_rng(0)
+    fmapColors = rng.choice([0, 17, 100, 255], size=(500, 400)).astype(np.uint8)
+
+    start = time.perf_counter()
+    expected = _baseline_facies_map(fmapColors)
+    _baseline_write_irap_map(expected, 0.0, 0.0, 1.0, 1.0, 0.0, tmp_path / 'a.irap')
+    baseline_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    codeMapping = np.full(256, MISSING_CODE, np.int16)
+    for f, c in COLOR_CODE_MAPPING.items():
+        codeMapping[c] = f
+    fmapFacies = codeMapping[fmapColors]
+    writeIrapMap(fmapFacies, 0.0, 0.0, 1.0, 1.0, 0.0, tmp_path / 'b.irap', asFloat=True)
+    vectorized_time = time.perf_counter() - start
+
+    print(
+        f'\nPixel by pixel: {baseline_time:.3f} s  Lookup table: {vectorized_time:.3f} s'
+    )
+    assert (tmp_path / 'a.irap').read_text() == (tmp_path / 'b.irap').read_text()
+    assert vectorized_time < baseline_time
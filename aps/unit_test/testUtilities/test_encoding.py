@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+import json
+from base64 import b64decode
+
+import numpy as np
+import pytest
+
+from aps.api.encoding import decode_binary, encode
+
+
+def _result():
+    rng = np.random.default_rng(1)
+    return {
+        'faciesMap': rng.integers(1, 5, size=(30, 20)),
+        'fields': [
+            {'name': 'GRF1', 'data': rng.normal(size=(30, 20))},
+            {'name': 'GRF2', 'data': rng.normal(size=(30, 20)).astype(np.float32)},
+        ],
+    }
+
+
+def test_encode_json():
+    result = _result()
+    content = encode(result)
+    assert content['faciesMap'] == result['faciesMap'].tolist()
+    assert content['fields'][0]['data'] == result['fields'][0]['data'].tolist()
+    json.dumps(content)
+
+
+def test_encode_base64():
+    result = _result()
+    content = encode(result, 'base64')
+    facies_map = content['faciesMap']
+    assert facies_map['dtype'] == 'u1'
+    assert facies_map['shape'] == [30, 20]
+    values = np.frombuffer(b64decode(facies_map['data']), dtype='<u1')
+    np.testing.assert_array_equal(values.reshape(30, 20), result['faciesMap'])
+    json.dumps(content)
+
+
+def test_encode_binary_round_trip():
+    result = _result()
+    content = encode(result, 'binary')
+    assert isinstance(content, bytes)
+    decoded = decode_binary(content)
+    np.testing.assert_array_equal(decoded['faciesMap'], result['faciesMap'])
+    assert decoded['faciesMap'].dtype == np.uint8
+    for field, expected in zip(decoded['fields'], result['fields']):
+        assert field['name'] == expected['name']
+        assert field['data'].dtype == np.float32
+        np.testing.assert_array_equal(
+            field['data'], expected['data'].astype(np.float32)
+        )
+    # The binary content is much smaller than JSON
+    assert len(content) * 4 < len(json.dumps(encode(result)))
+
+
+def test_encode_unknown():
+    with pytest.raises(ValueError):
+        encode(_result(), 'xml')
+
+
+@pytest.mark.parametrize(
+    'values, dtype',
+    [
+        ([0, 255], np.uint8),
+        ([-1, 255], np.int16),
+        ([0, 2**31 - 1], np.int32),
+        ([-(2**31) - 1, 0], np.int64),
+        ([0, 2**40], np.int64),
+    ],
+)
+def test_smallest_integer_type(values, dtype):
+    decoded = decode_binary(encode({'values': np.array(values, np.int64)}, 'binary'))
+    assert decoded['values'].dtype == dtype
+    np.testing.assert_array_equal(decoded['values'], values)
+
+
+def test_integers_outside_int64():
+    with pytest.raises(ValueError):
+        encode({'values': np.array([0, 2**63], np.uint64)}, 'base64')
+
+
+def test_unknown_encoding_is_bad_request():
+    app = pytest.importorskip('aps.api.app').app
+    response = app.test_client().post(
+        '/api/ui.call?encoding=xml', data=b'"simulate_gaussian_field", {}'
+    )
+    assert response.status_code == 400
+    assert b'Unknown encoding' in response.data
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+import xtgeo
+
+from aps.utils.field_files import (
+    read_grdecl_field,
+    read_npy_field,
+    read_roff_field,
+    write_npy_field,
+    UnsupportedFieldFileError,
+)
+
+DIMENSIONS = (4, 5, 3)
+
+
+def _create_property(name, values=None):
+    grid = xtgeo.create_box_grid(DIMENSIONS)
+    if values is None:
+        rng = np.random.default_rng(123)
+        values = rng.normal(size=DIMENSIONS)
+    prop = xtgeo.GridProperty(grid, values=values, name=name)
+    return grid, prop
+
+
+@pytest.mark.parametrize('use_memmap', [True, False])
+def test_read_roff_field_as_xtgeo(tmp_path, use_memmap):
+    name = 'aps_Zone1_GRF1'
+    _, prop = _create_property(name)
+    path = tmp_path / f'{name}.roff'
+    prop.to_file(path, fformat='roff', name=name)
+
+    expected = xtgeo.gridproperty_from_file(path, fformat='roff', name=name).values
+    actual = read_roff_field(path, name=name, use_memmap=use_memmap)
+    assert actual.dtype == np.float32
+    assert actual.shape == DIMENSIONS
+    assert not np.ma.isMaskedArray(actual)
+    np.testing.assert_allclose(actual, expected, rtol=1e-6)
+
+    # The first parameter is used if no name is specified
+    np.testing.assert_allclose(read_roff_field(path), expected, rtol=1e-6)
+
+
+def test_read_roff_field_with_undefined_values(tmp_path):
+    name = 'aps_Zone1_GRF2'
+    values = np.ma.masked_array(
+        np.arange(np.prod(DIMENSIONS), dtype=np.float64).reshape(DIMENSIONS)
+    )
+    values[1, 2, 0] = np.ma.masked
+    _, prop = _create_property(name, values=values)
+    path = tmp_path / f'{name}.roff'
+    prop.to_file(path, fformat='roff', name=name)
+
+    expected = xtgeo.gridproperty_from_file(path, fformat='roff', name=name).values
+    actual = read_roff_field(path, name=name)
+    np.testing.assert_array_equal(np.ma.getmaskarray(actual), expected.mask)
+    np.testing.assert_allclose(actual.compressed(), expected.compressed())
+
+
+def test_read_roff_field_not_binary(tmp_path):
+    name = 'aps_Zone1_GRF1'
+    _, prop = _create_property(name)
+    path = tmp_path / f'{name}.roff'
+    prop.to_file(path, fformat='roffasc', name=name)
+    with pytest.raises(UnsupportedFieldFileError):
+        read_roff_field(path, name=name)
+
+
+def test_read_roff_field_missing_parameter(tmp_path):
+    name = 'aps_Zone1_GRF1'
+    _, prop = _create_property(name)
+    path = tmp_path / f'{name}.roff'
+    prop.to_file(path, fformat='roff', name=name)
+    with pytest.raises(KeyError):
+        read_roff_field(path, name='aps_Zone1_GRF3')
+
+
+def test_read_grdecl_field_as_xtgeo(tmp_path):
+    name = 'APS_ZONE1_GRF1'
+    grid, prop = _create_property(name)
+    path = tmp_path / f'{name}.grdecl'
+    prop.to_file(path, fformat='grdecl', name=name)
+
+    expected = xtgeo.gridproperty_from_file(
+        path, fformat='grdecl', name=name, grid=grid
+    ).values
+    actual = read_grdecl_field(path, name, grid.dimensions)
+    assert actual.dtype == np.float32
+    assert actual.shape == DIMENSIONS
+    np.testing.assert_allclose(actual, expected, rtol=1e-6)
+
+
+def test_read_grdecl_field_with_repeat_counts(tmp_path):
+    path = tmp_path / 'field.grdecl'
+    path.write_text('-- Comment\nFIELD\n 2*1.5 0.0 -- values\n 3*2.0 /\n')
+    actual = read_grdecl_field(path, 'FIELD', (2, 3, 1))
+    expected = np.array([1.5, 1.5, 0.0, 2.0, 2.0, 2.0], dtype=np.float32)
+    np.testing.assert_array_equal(actual, expected.reshape((2, 3, 1), order='F'))
+
+
+def test_read_grdecl_field_with_default_values(tmp_path):
+    path = tmp_path / 'field.grdecl'
+    path.write_text('FIELD\n 1.5 1* 0.0\n 3*2.0 /\n')
+    with pytest.raises(UnsupportedFieldFileError):
+        read_grdecl_field(path, 'FIELD', (2, 3, 1))
+
+
+def test_npy_field_round_trip(tmp_path):
+    path = tmp_path / 'aps_Zone1_GRF1.npy'
+    values = np.random.default_rng(1).normal(size=DIMENSIONS)
+    write_npy_field(path, values)
+    assert path.exists()
+    actual = read_npy_field(path)
+    assert actual.dtype == np.float32
+    np.testing.assert_allclose(actual, values, rtol=1e-6)
+    # Much smaller than the ASCII GRDECL format
+    assert path.stat().st_size < 4 * values.size + 256
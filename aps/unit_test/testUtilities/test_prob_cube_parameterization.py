@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from aps.toolbox.prob_cube_parameterization import (
+    blend_probability_cubes,
+    calculate_new_probability_cubes,
+    get_cell_indices_per_zone,
+)
+from aps.utils.constants.simple import Debug
+
+ZONE_VALUES = np.array([2, 1, 2, 3, 1, 2])
+PROBABILITIES = {
+    'S1_A': [0.6, 0.2, 0.5, 0.9, 0.2, 0.1],
+    'S1_B': [0.4, 0.8, 0.5, 0.1, 0.8, 0.9],
+    'S2_A': [0.2, 0.6, 0.302, 0.0, 0.4, 0.1],
+    'S2_B': [0.8, 0.4, 0.702, 1.0, 0.6, 0.9],
+}
+
+
+class _Property:
+    def __init__(self, values=None):
+        self.values = None if values is None else np.array(values, dtype=np.float32)
+
+    def is_empty(self, realisation):
+        return self.values is None
+
+    def get_values(self, realisation):
+        return self.values
+
+    def set_values(self, values):
+        self.values = values
+
+
+class _Properties(dict):
+    def create(self, name, property_type=None, data_type=None):
+        self[name] = _Property()
+        return self[name]
+
+
+class _GridModel:
+    def __init__(self, properties):
+        self.properties = _Properties(properties)
+
+
+class _Project:
+    current_realisation = 0
+
+    def __init__(self, probabilities):
+        properties = {name: _Property(values) for name, values in probabilities.items()}
+        properties['Zone'] = _Property(ZONE_VALUES)
+        self.grid_models = {'Grid': _GridModel(properties)}
+
+
+def _param_dict(project, weights_zone_2):
+    return {
+        'project': project,
+        'debug_level': Debug.OFF,
+        'grid_model_name': 'Grid',
+        'zone_param_name': 'Zone',
+        # Zone 4 has no cells, and the cells in zone 3 are not updated
+        'facies': {1: ['A', 'B'], 2: ['A', 'B'], 4: ['A']},
+        'prob_cube_set': {
+            'S1': {'A': 'S1_A', 'B': 'S1_B'},
+            'S2': {'A': 'S2_A', 'B': 'S2_B'},
+        },
+        'weights': {
+            1: {'S1': 0.5, 'S2': 0.5},
+            2: weights_zone_2,
+            4: {'S1': 1.0, 'S2': 0.0},
+        },
+        'prefix': 'New',
+        'tolerance': 0.01,
+    }
+
+
+def test_cell_indices_per_zone():
+    cell_indices = get_cell_indices_per_zone(ZONE_VALUES, [1, 2, 4])
+    assert list(cell_indices) == [1, 2, 4]
+    np.testing.assert_array_equal(cell_indices[1], [1, 4])
+    np.testing.assert_array_equal(cell_indices[2], [0, 2, 5])
+    assert cell_indices[4].size == 0
+
+
+def test_blend_probability_cubes():
+    # Sets, facies, cells
+    stacked = np.array(
+        [
+            [[0.1, 0.2, 0.3], [0.9, 0.8, 0.7], [0.0, 0.0, 0.0]],
+            [[0.5, 0.6, 0.7], [0.5, 0.4, 0.3], [1.0, 1.0, 1.0]],
+        ],
+        dtype=np.float32,
+    )
+    weights = np.array([0.25, 0.75], dtype=np.float32)
+    blended = blend_probability_cubes(stacked, weights, [0, 1], np.array([0, 2]))
+    expected = [[0.025 + 0.375, 0.075 + 0.525], [0.225 + 0.375, 0.175 + 0.225]]
+    np.testing.assert_allclose(blended, expected, rtol=1e-6)
+
+    empty = blend_probability_cubes(stacked, weights, [0, 1], np.array([], int))
+    assert empty.shape == (2, 0)
+
+
+def test_calculate_new_probability_cubes():
+    project = _Project(PROBABILITIES)
+    # The weights of zone 2 are normalised to 0.75 and 0.25
+    calculate_new_probability_cubes(_param_dict(project, {'S1': 0.3, 'S2': 0.1}))
+    properties = project.grid_models['Grid'].properties
+
+    # In cell 2 the sum of the blended probabilities is 1.001 and they are normalised
+    sum_cell_2 = 0.4505 + 0.5505
+    expected_a = [0.5, 0.4, 0.4505 / sum_cell_2, 0.0, 0.3, 0.1]
+    expected_b = [0.5, 0.6, 0.5505 / sum_cell_2, 0.0, 0.7, 0.9]
+    np.testing.assert_allclose(properties['New_A'].values, expected_a, rtol=1e-5)
+    np.testing.assert_allclose(properties['New_B'].values, expected_b, rtol=1e-5)
+    total = properties['New_A'].values + properties['New_B'].values
+    np.testing.assert_allclose(total[ZONE_VALUES != 3], 1.0, rtol=1e-6)
+
+
+def test_probabilities_outside_tolerance():
+    probabilities = dict(PROBABILITIES, S2_B=[0.8, 0.4, 0.8, 1.0, 0.6, 0.9])
+    project = _Project(probabilities)
+    with pytest.raises(ValueError, match='not normalized'):
+        calculate_new_probability_cubes(_param_dict(project, {'S1': 0.3, 'S2': 0.1}))
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from aps.utils.probability_logs import (
+    check_conditional_probabilities,
+    create_probability_logs,
+)
+
+CODE_NAMES = {1: 'A', 2: 'B', 3: 'C'}
+
+
+def test_binary_probability_logs():
+    zone = np.ma.array([1, 1, 1, 2, 2, 2, 0, 1], mask=[0, 0, 0, 0, 0, 0, 0, 1])
+    facies = np.ma.array([1, 2, 3, 1, 3, 3, 1, 1], mask=[0, 0, 0, 0, 0, 1, 0, 0])
+    facies_names, probabilities = create_probability_logs(
+        zone, facies, CODE_NAMES, {(1, 0): ['A', 'B', 'X'], (2, 0): ['A', 'C']}
+    )
+    assert facies_names == ['A', 'B', 'X', 'C']
+    assert probabilities.shape == (4, 8)
+    nan = np.nan
+    expected = np.array(
+        [
+            [1, 0, nan, 1, 0, nan, nan, nan],
+            [0, 1, nan, 0, 0, nan, nan, nan],
+            [0, 0, nan, 0, 0, nan, nan, nan],
+            [0, 0, nan, 0, 1, nan, nan, nan],
+        ]
+    )
+    np.testing.assert_array_equal(probabilities, expected)
+
+
+def test_binary_probability_logs_with_regions():
+    zone = np.array([1, 1, 1, 1])
+    region = np.array([1, 1, 2, 2])
+    facies = np.array([1, 2, 1, 2])
+    modelling_facies = {(1, 1): ['A', 'B'], (1, 2): ['A']}
+    _, probabilities = create_probability_logs(
+        zone, facies, CODE_NAMES, modelling_facies, region_values=region
+    )
+    np.testing.assert_array_equal(probabilities, [[1, 0, 1, np.nan], [0, 1, 0, np.nan]])
+    with pytest.raises(ValueError):
+        create_probability_logs(
+            zone,
+            facies,
+            CODE_NAMES,
+            modelling_facies,
+            region_values=region,
+            conditional_prob_facies={},
+        )
+
+
+def test_conditional_probability_logs():
+    zone = np.array([1, 1, 2, 2])
+    facies = np.array([1, 3, 2, 3])
+    modelling_facies = {(1, 0): ['A', 'B'], (2, 0): ['B', 'C']}
+    conditional_probabilities = {
+        (1, 'A', 'A'): 0.9,
+        (1, 'B', 'A'): 0.1,
+        (1, 'A', 'C'): 0.3,
+        (1, 'B', 'C'): 0.7,
+        (2, 'B', 'B'): 1.0,
+        (2, 'C', 'B'): 0.0,
+    }
+    facies_per_zone = {(1, 0): ['A', 'C'], (2, 0): ['B', 'C']}
+    with pytest.raises(ValueError):
+        check_conditional_probabilities(
+            conditional_probabilities, modelling_facies, facies_per_zone
+        )
+    check_conditional_probabilities(
+        conditional_probabilities, modelling_facies, {(1, 0): ['A', 'C'], (2, 0): ['B']}
+    )
+
+    facies_names, probabilities = create_probability_logs(
+        zone,
+        facies,
+        CODE_NAMES,
+        modelling_facies,
+        conditional_prob_facies=conditional_probabilities,
+    )
+    assert facies_names == ['A', 'B', 'C']
+    np.testing.assert_allclose(
+        probabilities,
+        [
+            [0.9, 0.3, np.nan, np.nan],
+            [0.1, 0.7, 1.0, np.nan],
+            [np.nan, np.nan, 0.0, np.nan],
+        ],
+    )
+
+
+def test_probability_logs_for_many_realizations():
+    rng = np.random.default_rng(1)
+    num_realizations, num_cells = 4, 250_000
+    zone = rng.integers(0, 4, size=(num_realizations, num_cells))
+    facies = rng.integers(0, 4, size=(num_realizations, num_cells))
+    modelling_facies = {(1, 0): ['A', 'B'], (2, 0): ['A', 'B', 'C'], (3, 0): ['C']}
+    facies_names, probabilities = create_probability_logs(
+        zone, facies, CODE_NAMES, modelling_facies
+    )
+    assert probabilities.shape == (3, num_realizations, num_cells)
+    for realization in range(num_realizations):
+        _, expected = create_probability_logs(
+            zone[realization], facies[realization], CODE_NAMES, modelling_facies
+        )
+        np.testing.assert_array_equal(probabilities[:, realization], expected)
+
+    # The probabilities sum to 1 where the observed facies is modelled in the zone
+    defined = ~np.isnan(probabilities).any(axis=0)
+    np.testing.assert_array_equal(probabilities.sum(axis=0)[defined], 1)
+    observed_and_modelled = np.zeros_like(defined)
+    for (zone_number, _), names in modelling_facies.items():
+        codes = [code for code, name in CODE_NAMES.items() if name in names]
+        observed_and_modelled |= (zone == zone_number) & np.isin(facies, codes)
+    np.testing.assert_array_equal(defined, observed_and_modelled)
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+from pathlib import Path
+
+import numpy as np
+import pytest
+import xtgeo
+
+from aps.toolbox.simulate_ensemble import run
+from aps.utils.gaussian_simulation import get_seed_file_name, read_seed_file
+
+MODEL_FILE = (
+    Path(__file__).parents[3] / 'examples' / 'APS_GridModelCoarse_uncond_regions.xml'
+)
+RESULT_PARAMETER = 'FaciesReal_unconditioned_merged'
+DIMENSIONS = (20, 24, 20)
+
+RMS_DATA = """<?xml version="1.0" ?>
+<RMS_grid_model_data>
+  <GridModel name="GridModelCoarse">
+    <ZoneName end="4" nLayers="5" number="1" start="0"> Z1 </ZoneName>
+    <ZoneName end="9" nLayers="5" number="2" start="5"> Z2 </ZoneName>
+    <ZoneName end="14" nLayers="5" number="3" start="10"> Z3 </ZoneName>
+    <ZoneName end="19" nLayers="5" number="4" start="15"> Z4 </ZoneName>
+    <XSize> 1000.0 </XSize>
+    <YSize> 1200.0 </YSize>
+    <AzimuthAngle> 0.0 </AzimuthAngle>
+    <OrigoX> 0.0 </OrigoX>
+    <OrigoY> 0.0 </OrigoY>
+    <NX> 20 </NX>
+    <NY> 24 </NY>
+    <Xinc> 50.0 </Xinc>
+    <Yinc> 50.0 </Yinc>
+  </GridModel>
+</RMS_grid_model_data>
+"""
+
+
+def test_read_seed_file(tmp_path):
+    seed_file = tmp_path / get_seed_file_name(0)
+    assert seed_file.name == 'seed_list_1.dat'
+    seed_file.write_text(' GF1  1  0  123\n GF2  1  0  124\n GF1  2  3  125\n')
+    assert read_seed_file(seed_file) == {
+        ('GF1', 1, 0): 123,
+        ('GF2', 1, 0): 124,
+        ('GF1', 2, 3): 125,
+    }
+    with pytest.raises(IOError):
+        read_seed_file(tmp_path / get_seed_file_name(1))
+
+
+@pytest.fixture
+def grid_files(tmp_path):
+    nx, ny, nz = DIMENSIONS
+    grid = xtgeo.create_box_grid(DIMENSIONS, increment=(50.0, 50.0, 1.0))
+    actnum = np.ones(DIMENSIONS, np.int32)
+    actnum[:3, :3, :] = 0
+    grid.set_actnum(
+        xtgeo.GridProperty(grid, values=actnum, discrete=True, name='ACTNUM')
+    )
+    grid.to_file(tmp_path / 'grid.roff', fformat='roff')
+    zone = np.broadcast_to(np.repeat(np.arange(1, 5), 5), DIMENSIONS)
+    region = np.broadcast_to(
+        np.where(np.arange(nx) < 10, 1, 2)[:, None, None], DIMENSIONS
+    )
+    for name, values in [('Zone', zone), ('Region', region)]:
+        xtgeo.GridProperty(
+            grid, values=values.astype(np.int32), discrete=True, name=name
+        ).to_file(tmp_path / f'{name}.roff', fformat='roff')
+    (tmp_path / 'rms_data.xml').write_text(RMS_DATA)
+    return tmp_path
+
+
+def _run(
+    path,
+    realizations,
+    output_dir,
+    number_of_processes,
+    checkpoint_dir=None,
+    model_file=MODEL_FILE,
+):
+    run(
+        {
+            'model_file': model_file,
+            'rms_data_file': path / 'rms_data.xml',
+            'grid_file': path / 'grid.roff',
+            'parameter_files': [path / 'Zone.roff', path / 'Region.roff'],
+            'realizations': realizations,
+            'project_seed': 1234,
+            'output_dir': path / output_dir,
+            'number_of_processes': number_of_processes,
+            'checkpoint_dir': checkpoint_dir,
+        }
+    )
+    grid = xtgeo.grid_from_file(path / 'grid.roff')
+    return {
+        number: xtgeo.gridproperty_from_file(
+            path / output_dir / f'{RESULT_PARAMETER}_{number}.roff', grid=grid
+        ).values
+        for number in realizations
+    }
+
+
+def test_run_realizations_in_parallel(grid_files):
+    facies = _run(grid_files, [1, 2], 'parallel', 2)
+    assert not np.ma.allequal(facies[1], facies[2])
+
+    # The realizations do not depend on the process running them
+    assert np.ma.allequal(_run(grid_files, [2], 'single', 1)[2], facies[2])
+
+    zone = np.repeat(np.arange(1, 5), 5)
+    region = np.where(np.arange(DIMENSIONS[0]) < 10, 1, 2)
+    for values in facies.values():
+        # Zone 2 and 3, and region 1 in zone 4 are not modelled
+        assert values.mask[:, :, (zone == 2) | (zone == 3)].all()
+        assert values.mask[region == 1][:, :, zone == 4].all()
+        # Facies F2_2 with probability 0.7 in region 2 of zone 1, the fields are correlated
+        selected = values[region == 2][:, :, zone == 1]
+        assert set(np.unique(selected.compressed())) == {14, 15}
+        assert (selected == 15).mean() == pytest.approx(0.7, abs=0.15)
+
+
+def test_no_realizations_is_an_error(grid_files):
+    with pytest.raises(ValueError, match='at least one realization'):
+        _run(grid_files, [], 'output', None)
+    assert not (grid_files / 'output').exists()
+
+
+def test_resume_from_checkpoints(grid_files):
+    expected = _run(grid_files, [1], 'no_checkpoints', 1)[1]
+    checkpoint_dir = grid_files / 'checkpoints'
+    facies = _run(grid_files, [1], 'output', 1, checkpoint_dir)[1]
+    assert np.ma.allequal(facies, expected)
+
+    realization_dir = checkpoint_dir / 'realization_1'
+    field_files = sorted(realization_dir.glob('GF*.npy'))
+    assert len(field_files) == 6
+    assert len(list(realization_dir.glob(f'{RESULT_PARAMETER}_*.npy'))) == 3
+    modified_times = {
+        file_name: file_name.stat().st_mtime_ns for file_name in field_files
+    }
+
+    # A corrupt gaussian field and a missing facies realization are regenerated
+    corrupt_file = field_files[0]
+    corrupt_file.write_bytes(corrupt_file.read_bytes()[:100])
+    (grid_files / 'output' / f'{RESULT_PARAMETER}_1.roff').unlink()
+    facies = _run(grid_files, [1], 'output', 1, checkpoint_dir)[1]
+    assert np.ma.allequal(facies, expected)
+    for file_name in field_files:
+        if file_name == corrupt_file:
+            assert file_name.stat().st_mtime_ns != modified_times[file_name]
+        else:
+            assert file_name.stat().st_mtime_ns == modified_times[file_name]
+
+
+def test_changed_probabilities_only_rerun_truncation_of_zone(grid_files):
+    checkpoint_dir = grid_files / 'checkpoints'
+    _run(grid_files, [1], 'output', 1, checkpoint_dir)
+    realization_dir = checkpoint_dir / 'realization_1'
+    checkpoint_files = sorted(realization_dir.glob('*.npy'))
+    modified_times = {
+        file_name: file_name.stat().st_mtime_ns for file_name in checkpoint_files
+    }
+
+    # Change the probabilities in (zone, region)=(4, 2)
+    model = MODEL_FILE.read_text()
+    zone_start = model.index('<Zone number="4" regionNumber="2">')
+    zone = model[zone_start:].replace(
+        '<ProbCube> 0.5 </ProbCube>', '<ProbCube> 0.2 </ProbCube>', 1
+    )
+    zone = zone.replace('<ProbCube> 0.5 </ProbCube>', '<ProbCube> 0.8 </ProbCube>', 1)
+    model_file = grid_files / 'model.xml'
+    model_file.write_text(model[:zone_start] + zone)
+
+    expected = _run(grid_files, [1], 'no_checkpoints', 1, model_file=model_file)[1]
+    facies = _run(grid_files, [1], 'output', 1, checkpoint_dir, model_file)[1]
+    assert np.ma.allequal(facies, expected)
+    changed = [
+        file_name.name
+        for file_name in checkpoint_files
+        if file_name.stat().st_mtime_ns != modified_times[file_name]
+    ]
+    assert changed == [f'{RESULT_PARAMETER}_4_2.npy']
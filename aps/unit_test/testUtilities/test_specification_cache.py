@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+import copy
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from aps.utils.specification_cache import (
+    SpecificationCache,
+    array_key,
+    specification_key,
+)
+
+
+def _field(name, seed=0):
+    return {
+        'name': name,
+        'variogram': {'type': 'SPHERICAL', 'range': {'main': 1000.0, 'perp': 500.0}},
+        'settings': {'seed': seed},
+    }
+
+
+def test_specification_key_is_independent_of_key_order():
+    field = _field('GRF1')
+    reordered = {key: field[key] for key in reversed(list(field))}
+    assert specification_key(field) == specification_key(reordered)
+    assert specification_key(field) != specification_key(_field('GRF1', seed=1))
+
+
+def test_array_key():
+    values = np.arange(6, dtype=np.int32)
+    assert array_key(values) == array_key(values.copy())
+    assert array_key(values[::2]) == array_key(np.array([0, 2, 4], np.int32))
+    assert array_key(values) != array_key(values.astype(np.int64))
+    assert array_key(values) != array_key(values.reshape(2, 3))
+
+
+def test_create_only_when_specification_changes():
+    created = []
+
+    def create(specification):
+        created.append(specification['name'])
+        return object()
+
+    cache = SpecificationCache(max_size=2)
+    first = cache.get(_field('GRF1'), create)
+    assert cache.get(_field('GRF1'), create) is first
+    cache.get(_field('GRF2'), create)
+    assert created == ['GRF1', 'GRF2']
+
+    # GRF1 is the most recently used, and GRF2 is removed from the cache
+    assert cache.get(_field('GRF1'), create) is first
+    cache.get(_field('GRF3'), create)
+    assert len(cache) == 2
+    cache.get(_field('GRF2'), create)
+    assert created == ['GRF1', 'GRF2', 'GRF3', 'GRF2']
+
+
+def test_failed_creation_is_not_cached():
+    def create(specification):
+        raise ValueError('Invalid specification')
+
+    cache = SpecificationCache(max_size=2)
+    with pytest.raises(ValueError):
+        cache.get(_field('GRF1'), create)
+    assert len(cache) == 0
+
+
+def test_concurrent_requests_create_once():
+    created = []
+
+    def create(specification):
+        created.append(specification['name'])
+        time.sleep(0.1)
+        return object()
+
+    cache = SpecificationCache(max_size=2)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        items = list(
+            executor.map(lambda _: cache.get(_field('GRF1'), create), range(4))
+        )
+    assert created == ['GRF1']
+    assert all(item is items[0] for item in items)
+    assert len(cache) == 1
+
+
+def test_callers_get_copies():
+    cache = SpecificationCache(max_size=2, copy=copy.deepcopy)
+    first = cache.get(_field('GRF1'), lambda specification: {'values': [1, 2]})
+    first['values'].append(3)
+    second = cache.get(_field('GRF1'), lambda specification: {'values': []})
+    assert second == {'values': [1, 2]}
+    assert second is not first
+
+
+def test_preview_objects_are_not_shared(monkeypatch):
+    from aps.algorithms.APSGaussModel import GaussianFieldSimulation
+    from aps.utils.roxar import rms_project_data
+
+    def simulate(field):
+        return GaussianFieldSimulation(field['name'], np.zeros(10), settings=None)
+
+    monkeypatch.setattr(rms_project_data.RMSData, '_simulate_gaussian_field', simulate)
+    fields = rms_project_data._simulated_fields
+    create_field = rms_project_data._simulate_read_only_gaussian_field
+    simulation = fields.get(_field('GRF1'), create_field)
+    assert fields.get(_field('GRF1'), create_field) is simulation
+    with pytest.raises(ValueError):
+        simulation.field[0] = 1.0
+
+    # Truncation rules and models are modified by the callers
+    for cache in [rms_project_data._truncation_rules, rms_project_data._decoded_models]:
+        first = cache.get('specification', lambda specification: {'values': [1]})
+        first['values'].append(2)
+        assert cache.get('specification', lambda specification: None) == {'values': [1]}
+        cache.clear()
+    fields.clear()
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+from aps.utils.task_manifest import TaskManifest, input_hash
+
+
+def test_task_manifest(tmp_path):
+    manifest_file = tmp_path / 'manifest.json'
+    output_file = tmp_path / 'GF1_1_0.npy'
+    key = (1, 1, 0, 'GF1')
+    task_input_hash = input_hash('run', key, 123)
+
+    manifest = TaskManifest(manifest_file)
+    assert not manifest.is_complete(key, task_input_hash)
+    output_file.write_bytes(b'values')
+    manifest.complete(key, task_input_hash, output_file)
+
+    manifest = TaskManifest(manifest_file)
+    assert len(manifest) == 1
+    assert manifest.is_complete(key, task_input_hash)
+    assert not manifest.is_complete(key, input_hash('run', key, 124))
+
+    # Modified, partially written and missing outputs are not complete
+    output_file.write_bytes(b'value')
+    assert not manifest.is_complete(key, task_input_hash)
+    output_file.unlink()
+    assert not manifest.is_complete(key, task_input_hash)
+
+    # A corrupt manifest is empty
+    manifest_file.write_text('{"version": 1, "tasks": [')
+    assert len(TaskManifest(manifest_file)) == 0
@@ -0,0 +1,116 @@
+#!/bin/env python
+# -*- coding: utf-8 -*-
+import pickle
+import shutil
+import stat
+import warnings
+from pathlib import Path
+
+import pytest
+
+from aps.algorithms.APSModel import APSModel, _model_cache_path
+from aps.unit_test.helpers import get_model_file_path
+from aps.utils.constants.simple import Debug
+
+
+def _write_model(aps_model, output_dir, name):
+    model_file = output_dir / f'{name}.xml'
+    aps_model.write_model(str(model_file), str(output_dir / f'{name}.yaml'))
+    return model_file.read_text()
+
+
+def test_APSModel_from_cache(tmp_path):
+    model_file = tmp_path / 'APS.xml'
+    shutil.copy(get_model_file_path('testData_models/APS.xml'), model_file)
+    cache_dir = tmp_path / 'cache'
+
+    expected = _write_model(APSModel(str(model_file)), tmp_path, 'expected')
+
+    # The first time the model file is parsed and saved in the cache
+    aps_model = APSModel.from_cache(model_file, cache_dir=cache_dir)
+    cache_files = list(cache_dir.glob('*.pkl'))
+    assert len(cache_files) == 1
+    assert _write_model(aps_model, tmp_path, 'first') == expected
+
+    # The second time the model is read from the cache
+    aps_model = APSModel.from_cache(model_file, cache_dir=cache_dir)
+    assert list(cache_dir.glob('*.pkl')) == cache_files
+    assert _write_model(aps_model, tmp_path, 'second') == expected
+
+    # A changed model file replaces the snapshot
+    aps_model.grid_model_name = 'ChangedGridModel'
+    aps_model.write_model(str(model_file), str(tmp_path / 'changed.yaml'))
+    aps_model = APSModel.from_cache(model_file, cache_dir=cache_dir)
+    assert aps_model.grid_model_name == 'ChangedGridModel'
+    new_cache_files = list(cache_dir.glob('*.pkl'))
+    assert len(new_cache_files) == 1
+    assert new_cache_files != cache_files
+
+
+def _copy_model_file(tmp_path):
+    model_file = tmp_path / 'APS.xml'
+    shutil.copy(get_model_file_path('testData_models/APS.xml'), model_file)
+    return model_file
+
+
+def test_APSModel_cache_in_private_user_directory(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'user_cache'))
+    model_file = _copy_model_file(tmp_path)
+    APSModel.from_cache(model_file)
+    cache_dir = tmp_path / 'user_cache' / 'aps' / 'model_cache'
+    assert len(list(cache_dir.glob('*.pkl'))) == 1
+    assert stat.S_IMODE(cache_dir.stat().st_mode) == 0o700
+
+
+def test_APSModel_cache_not_used_in_shared_directory(tmp_path):
+    model_file = _copy_model_file(tmp_path)
+    cache_dir = tmp_path / 'shared'
+    cache_dir.mkdir()
+    cache_dir.chmod(0o777)
+    # A snapshot written by someone else is not read
+    cache_path = _model_cache_path(model_file, cache_dir, Debug.OFF)
+    cache_path.write_bytes(pickle.dumps('Not an APS model'))
+    with pytest.warns(UserWarning, match='must be private'):
+        aps_model = APSModel.from_cache(model_file, cache_dir=cache_dir)
+    assert isinstance(aps_model, APSModel)
+    assert list(cache_dir.iterdir()) == [cache_path]
+
+
+def test_APSModel_cache_with_corrupt_snapshot(tmp_path):
+    model_file = _copy_model_file(tmp_path)
+    cache_dir = tmp_path / 'cache'
+    APSModel.from_cache(model_file, cache_dir=cache_dir)
+    (cache_path,) = cache_dir.glob('*.pkl')
+    cache_path.write_bytes(b'not a pickle')
+
+    with pytest.warns(UserWarning, match='Can not read the APS model cache'):
+        aps_model = APSModel.from_cache(model_file, cache_dir=cache_dir)
+    assert isinstance(aps_model, APSModel)
+    # The snapshot is replaced, and there are no temporary files left
+    assert list(cache_dir.iterdir()) == [cache_path]
+    assert isinstance(pickle.loads(cache_path.read_bytes()), APSModel)
+
+
+def test_APSModel_cache_old_snapshot_removed_by_other_job(tmp_path, monkeypatch):
+    model_file = _copy_model_file(tmp_path)
+    cache_dir = tmp_path / 'cache'
+    cache_path = _model_cache_path(model_file, cache_dir, Debug.OFF)
+    removed = cache_path.with_name(cache_path.name.rsplit('_', 1)[0] + '_old.pkl')
+    # The old snapshot is found, but is removed by another job before it is deleted here
+    monkeypatch.setattr(Path, 'glob', lambda self, pattern: iter([removed]))
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        APSModel.from_cache(model_file, cache_dir=cache_dir)
+    monkeypatch.undo()
+    assert list(cache_dir.iterdir()) == [cache_path]
+
+
+def test_APSModel_snapshot_contains_zone_models(tmp_path):
+    model_file = _copy_model_file(tmp_path)
+    cache_dir = tmp_path / 'cache'
+    APSModel.from_cache(model_file, cache_dir=cache_dir)
+    (cache_path,) = cache_dir.glob('*.pkl')
+    aps_model = pickle.loads(cache_path.read_bytes())
+    holders = aps_model._APSModel__zoneModelTable._holders
+    assert len(holders) > 0
+    assert all(holder._model is not None for holder in holders.values())
@@ -0,0 +1,63 @@
+#!/bin/env python
+# -*- coding: utf-8 -*-
+import xml.etree.ElementTree as ET
+from base64 import b64encode
+
+import pytest
+
+from aps.algorithms.APSModel import APSModel
+from aps.unit_test.helpers import get_model_file_path
+from aps.utils.exceptions.xml import ReadingXmlError
+from aps.utils.roxar.rms_project_data import RMSData
+
+
+def _model_xml():
+    with open(get_model_file_path('testData_models/APS.xml'), encoding='utf-8') as file:
+        return file.read()
+
+
+def _invalid_models():
+    xml = _model_xml()
+    return {
+        'undefined_field': xml.replace(
+            '<AlphaFields> GRF6 GRF7 </AlphaFields>',
+            '<AlphaFields> GRF6 GRF99 </AlphaFields>',
+            1,
+        ),
+        'invalid_angle': xml.replace(
+            '<Angle> -90.0 </Angle>', '<Angle> abc </Angle>', 1
+        ),
+    }
+
+
+def test_all_zone_models_are_created():
+    aps_model = APSModel.from_string(_model_xml())
+    holders = aps_model._APSModel__zoneModelTable._holders
+    assert len(holders) > 0
+    assert all(holder._model is not None for holder in holders.values())
+
+
+@pytest.mark.parametrize('name', ['undefined_field', 'invalid_angle'])
+def test_invalid_model_is_rejected(name):
+    xml = _invalid_models()[name]
+    with pytest.raises(ValueError):
+        APSModel.from_string(xml)
+
+    encoded = b64encode(xml.encode()).decode()
+    result = RMSData.is_aps_model_valid(encoded)
+    assert not result['valid']
+    assert result['error']
+
+
+@pytest.mark.parametrize('keyword', ['TruncationRule', 'FaciesProbForModel'])
+def test_missing_keyword_in_unused_zone_is_rejected_at_load(tmp_path, keyword):
+    tree = ET.ElementTree(ET.fromstring(_model_xml()))
+    zone = tree.find("ZoneModels/Zone[@number='2'][@regionNumber='3']")
+    zone.remove(zone.find(keyword))
+    model_file = tmp_path / 'APS.xml'
+    tree.write(model_file)
+
+    # Zone 2 region 3 is not selected, and its zone model is not created,
+    # but the keywords of all zones are checked when the model file is read
+    with pytest.raises(ReadingXmlError, match=keyword):
+        APSModel(str(model_file))
@@ -0,0 +1,160 @@
+#!/bin/env python
+# -*- coding: utf-8 -*-
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+
+from aps.algorithms.APSMainFaciesTable import APSMainFaciesTable
+from aps.algorithms.APSModel import APSModel
+from aps.algorithms.APSZoneModel import APSZoneModel
+from aps.algorithms.Memoization import (
+    alpha_from_fixed_point,
+    alpha_to_fixed_point,
+    quantize,
+    quantize_probabilities,
+)
+from aps.algorithms.truncation_rules import Trunc3D_bayfill
+from aps.unit_test.constants import NO_VERBOSE_DEBUG
+
+
+def _bayfill_rule():
+    truncRule = Trunc3D_bayfill()
+    truncRule.initialize(
+        APSMainFaciesTable(facies_table={1: 'F1', 2: 'F2', 3: 'F3', 4: 'F4', 5: 'F5'}),
+        faciesInZone=['F1', 'F2', 'F3', 'F4', 'F5'],
+        faciesInTruncRule=['F1', 'F2', 'F3', 'F4', 'F5'],
+        gaussFieldsInZone=['GRF1', 'GRF2', 'GRF3'],
+        alphaFieldNameForBackGroundFacies=['GRF1', 'GRF2', 'GRF3'],
+        sf_value=0.5,
+        sf_name='',
+        sf_fmu_updatable=False,
+        ysf=0.4,
+        ysf_fmu_updatable=False,
+        sbhd=0.6,
+        sbhd_fmu_updatable=False,
+        useConstTruncParam=True,
+        debug_level=NO_VERBOSE_DEBUG,
+    )
+    return truncRule
+
+
+def test_quantize():
+    values = np.array([0.014, 0.026, 0.5, -0.74])
+    np.testing.assert_allclose(quantize(values, 0.05), [0.0, 0.05, 0.5, -0.75])
+    assert quantize(values, 0.0) is values
+
+
+@pytest.mark.parametrize('sf_resolution', [0.0, 0.01, 0.1])
+def test_truncation_parameters_in_memoization_key(sf_resolution):
+    zone_model = APSZoneModel(
+        truncRuleObject=_bayfill_rule(),
+        debug_level=NO_VERBOSE_DEBUG,
+        keyResolution=100,
+        sfResolution=sf_resolution,
+    )
+    assert zone_model.truncation_param_resolution == sf_resolution
+
+    rng = np.random.default_rng(42)
+    num_cells = 5000
+    probabilities = np.tile([0.1, 0.2, 0.3, 0.15, 0.25], (num_cells, 1))
+    sf = rng.random((num_cells, 1))
+
+    memo, num_maps = zone_model.findDistinctTruncationCubes(
+        probabilities, num_cells, 5, sf
+    )
+    statistics = zone_model.memoization_statistics
+    assert statistics.NumCells == num_cells
+    assert statistics.NumKeys == num_maps == len(memo)
+    assert statistics.CompressionRatio == pytest.approx(num_cells / num_maps)
+    assert statistics.MaxProbabilityError == pytest.approx(0.0)
+    assert statistics.MaxTruncationParamError <= sf_resolution / 2 + 1e-12
+    if sf_resolution > 0:
+        assert num_maps <= round(1 / sf_resolution) + 1
+    else:
+        assert num_maps == len(np.unique(sf))
+
+    # All cells sharing a key have the same round-off probabilities and SF
+    cell_count = 0
+    for key, item in memo.items():
+        cells = item.get_cell_indices()
+        cell_count += len(cells)
+        np.testing.assert_allclose(key[:5], probabilities[0])
+        np.testing.assert_allclose(key[5], sf[cells, 0], atol=sf_resolution / 2 + 1e-12)
+    assert cell_count == num_cells
+
+
+def test_compact_data_types():
+    alpha = np.array([0.0, 0.5, 1.0, -0.1, 1.1, 0.25])
+    fixed_point = alpha_to_fixed_point(alpha)
+    assert fixed_point.dtype == np.uint16
+    assert fixed_point[[0, 2, 3, 4]].tolist() == [0, 65535, 0, 65535]
+    np.testing.assert_allclose(
+        alpha_from_fixed_point(fixed_point), np.clip(alpha, 0, 1), atol=0.5 / 65535
+    )
+
+    rng = np.random.default_rng(1)
+    probabilities = rng.dirichlet(np.ones(5), size=10000)
+    for resolution, dtype in [(100, np.uint8), (1000, np.uint16)]:
+        quantized = quantize_probabilities(list(probabilities.T), resolution)
+        assert quantized.dtype == dtype
+        np.testing.assert_array_equal(quantized.sum(axis=1), resolution)
+        # Only the largest probability is changed by normalisation
+        error = np.abs(quantized / resolution - probabilities)
+        assert np.sort(error, axis=1)[:, :-1].max() <= 0.5 / resolution + 1e-12
+
+
+@pytest.mark.parametrize(
+    'model_file, zone',
+    [
+        ('testData_models/APS.xml', (1, 0)),
+        ('testData_models/APS.xml', (2, 3)),
+        ('../../examples/APS_GridModelCoarse_uncond_regions.xml', (1, 2)),
+    ],
+)
+def test_compact_truncation_matches_float_truncation(model_file, zone):
+    aps_model = APSModel(model_file, debug_level=NO_VERBOSE_DEBUG)
+    zone_model = aps_model.getZoneModel(*zone)
+    num_facies = len(zone_model.facies_in_zone_model)
+
+    rng = np.random.default_rng(7)
+    num_cells = 200_000
+    cell_index_defined = np.arange(0, 2 * num_cells, 2)
+    alpha_fields = OrderedDict(
+        (name, rng.random(2 * num_cells, dtype=np.float32))
+        for name in zone_model.used_gaussian_field_names
+    )
+    if zone_model.use_constant_probabilities:
+        probabilities = [
+            float(zone_model.getProbParamName(name))
+            for name in zone_model.facies_in_zone_model
+        ]
+    else:
+        # Smoothly varying probabilities with a few hundred distinct round-off values
+        trend = np.linspace(0.0, 1.0, num_cells, dtype=np.float32)
+        weights = np.array(
+            [1.0 + 0.8 * np.sin(3.0 * trend + facies) for facies in range(num_facies)]
+        )
+        probabilities = list(weights / weights.sum(axis=0))
+
+    facies_float, volume_fraction_float = zone_model.applyTruncations_vectorized(
+        probabilities,
+        alpha_fields,
+        np.zeros(2 * num_cells, np.uint8),
+        cell_index_defined,
+    )
+    facies_compact, volume_fraction_compact = zone_model.applyTruncations_vectorized(
+        probabilities,
+        alpha_fields,
+        np.zeros(2 * num_cells, np.uint8),
+        cell_index_defined,
+        compact_data_types=True,
+    )
+    mismatch = np.mean(
+        facies_float[cell_index_defined] != facies_compact[cell_index_defined]
+    )
+    assert mismatch < 1e-3
+    np.testing.assert_allclose(
+        volume_fraction_compact, volume_fraction_float, atol=1e-3
+    )
+    assert not facies_compact[1::2].any()
@@ -1,14 +1,17 @@
 #!/bin/env python
 # -*- coding: utf-8 -*-
 import filecmp
+import time
 import xml.etree.ElementTree as ET
 from typing import List, Dict, Union, Tuple
 from xml.etree.ElementTree import Element
 
+import numpy as np
 import pytest
 
 from aps.algorithms.APSMainFaciesTable import APSMainFaciesTable
 from aps.algorithms.truncation_rules import Trunc2D_Cubic
+from aps.algorithms.truncation_rules.Trunc2D_Base_xml import Trunc2D_Base
 from aps.unit_test.constants import (
     CUBIC_GAUSS_FIELD_FILES,
     FACIES_OUTPUT_FILE,
@@ -797,6 +800,183 @@ def test_Trunc2DCubic(
     run(faciesReferenceFile=get_cubic_facies_reference_file_path(case_number), **data)
 
 
+def test_overlay_facies_vectorized():
+    truncRule = Trunc2D_Cubic()
+    truncRule.initialize(
+        APSMainFaciesTable(
+            facies_table={1: 'F1', 2: 'F2', 3: 'F3', 4: 'F4', 5: 'F5', 6: 'F6'}
+        ),
+        ['F1', 'F2', 'F3', 'F4', 'F5', 'F6'],
+        ['GF1', 'GF2', 'GF3', 'GF4', 'GF5'],
+        ['GF1', 'GF2'],
+        [
+            'H',
+            ['F1', 1.0, 1, 0, 0],
+            ['F2', 1.0, 2, 0, 0],
+            ['F3', 1.0, 3, 0, 0],
+        ],
+        [
+            [  # Group 1
+                [
+                    ['GF3', 'F4', 1.0, 0.5],
+                    ['GF4', 'F5', 1.0, 0.0],
+                    ['GF5', 'F6', 0.6, 1.0],
+                ],  # alpha list
+                ['F1', 'F2'],  # background list
+            ],
+            [  # Group 2
+                [['GF5', 'F6', 0.4, 0.2]],  # alpha list
+                ['F3'],  # background list
+            ],
+        ],
+        Debug.OFF,
+    )
+    truncRule.setTruncRule(np.array([0.2, 0.15, 0.15, 0.15, 0.15, 0.2]))
+
+    rng = np.random.default_rng(43)
+    alpha_coord_vectors = rng.random((2000, 5))
+    codes, fIndx_vector = truncRule.defineFaciesByTruncRule_vectorized(
+        alpha_coord_vectors
+    )
+    for i in range(len(alpha_coord_vectors)):
+        assert truncRule.defineFaciesByTruncRule(alpha_coord_vectors[i]) == (
+            codes[i],
+            fIndx_vector[i],
+        )
+    # All overlay facies are present
+    assert set(codes) == {1, 2, 3, 4, 5, 6}
+
+
+@pytest.mark.parametrize(
+    'truncStructure, faciesProb, overlayGroups',
+    [
+        (
+            [
+                'H',
+                ['F1', 1.0, 1, 0, 0],
+                ['F2', 1.0, 2, 1, 1],
+                ['F3', 1.0, 2, 1, 2],
+                ['F4', 1.0, 2, 2, 1],
+                ['F5', 1.0, 2, 2, 2],
+            ],
+            [0.3, 0.1, 0.2, 0.2, 0.2],
+            [],
+        ),
+        (
+            [
+                'V',
+                ['F1', 1.0, 1, 0, 0],
+                ['F2', 0.5, 2, 1, 0],
+                ['F3', 1.0, 2, 2, 0],
+                ['F2', 0.5, 3, 0, 0],
+            ],
+            [0.4, 0.0, 0.6],
+            [],
+        ),
+        (
+            [
+                'V',
+                ['F1', 1.0, 1, 0, 0],
+                ['F2', 1.0, 2, 1, 1],
+                ['F3', 1.0, 2, 1, 2],
+                ['F4', 1.0, 2, 2, 0],
+                ['F5', 1.0, 3, 0, 0],
+            ],
+            [0.3, 0.1, 0.2, 0.1, 0.1, 0.2],
+            [[[['GF3', 'F6', 1.0, 0.5]], ['F1', 'F2', 'F3']]],
+        ),
+        (['H', ['F1', 1.0, 1, 0, 0], ['F2', 1.0, 2, 0, 0]], [1.0, 0.0], []),
+    ],
+)
+def test_threshold_classification_matches_polygons(
+    truncStructure, faciesProb, overlayGroups
+):
+    truncRule = _threshold_classification_rule(
+        truncStructure, faciesProb, overlayGroups
+    )
+    alpha_coord_vectors = _threshold_classification_alpha()
+
+    codes, fIndx_vector = truncRule.defineFaciesByTruncRule_vectorized(
+        alpha_coord_vectors
+    )
+    codes_polygons, fIndx_vector_polygons = (
+        Trunc2D_Base.defineFaciesByTruncRule_vectorized(truncRule, alpha_coord_vectors)
+    )
+
+    np.testing.assert_array_equal(codes, codes_polygons)
+    np.testing.assert_array_equal(fIndx_vector, fIndx_vector_polygons)
+    np.testing.assert_allclose(
+        np.bincount(fIndx_vector, minlength=len(faciesProb)) / len(codes),
+        faciesProb,
+        atol=0.01,
+    )
+    for i in range(0, len(alpha_coord_vectors), 1000):
+        assert truncRule.defineFaciesByTruncRule(alpha_coord_vectors[i]) == (
+            codes[i],
+            fIndx_vector[i],
+        )
+
+
+@pytest.mark.benchmark
+def test_benchmark_threshold_classification():
+    truncRule = _threshold_classification_rule(
+        [
+            'V',
+            ['F1', 1.0, 1, 0, 0],
+            ['F2', 1.0, 2, 1, 1],
+            ['F3', 1.0, 2, 1, 2],
+            ['F4', 1.0, 2, 2, 0],
+            ['F5', 1.0, 3, 0, 0],
+        ],
+        [0.3, 0.1, 0.2, 0.1, 0.1, 0.2],
+        [[[['GF3', 'F6', 1.0, 0.5]], ['F1', 'F2', 'F3']]],
+    )
+    alpha_coord_vectors = _threshold_classification_alpha()
+
+    start = time.perf_counter()
+    codes, _ = truncRule.defineFaciesByTruncRule_vectorized(alpha_coord_vectors)
+    time_thresholds = time.perf_counter() - start
+    start = time.perf_counter()
+    codes_polygons, _ = Trunc2D_Base.defineFaciesByTruncRule_vectorized(
+        truncRule, alpha_coord_vectors
+    )
+    time_polygons = time.perf_counter() - start
+    print(
+        f'\nFacies by threshold values: {time_thresholds:.3f}s  by polygons: {time_polygons:.3f}s'
+    )
+    np.testing.assert_array_equal(codes, codes_polygons)
+    assert time_thresholds < time_polygons
+
+
+def _threshold_classification_rule(truncStructure, faciesProb, overlayGroups):
+    facies_names = sorted(
+        {item[0] for item in truncStructure[1:]}
+        | {group[0][0][1] for group in overlayGroups}
+    )
+    truncRule = Trunc2D_Cubic()
+    truncRule.initialize(
+        APSMainFaciesTable(
+            facies_table={code: name for code, name in enumerate(facies_names, 1)}
+        ),
+        facies_names,
+        ['GF1', 'GF2', 'GF3'],
+        ['GF1', 'GF2'],
+        truncStructure,
+        overlayGroups,
+        Debug.OFF,
+    )
+    truncRule.setTruncRule(np.array(faciesProb))
+    return truncRule
+
+
+def _threshold_classification_alpha():
+    rng = np.random.default_rng(5)
+    alpha_coord_vectors = rng.random((200_000, 3))
+    # Points on the threshold values of the first level
+    alpha_coord_vectors[:2, :2] = [[0.0, 0.0], [0.3, 0.3]]
+    return alpha_coord_vectors
+
+
 def run(
     fTable: Dict[int, str],
     faciesInTruncRule: List[str],
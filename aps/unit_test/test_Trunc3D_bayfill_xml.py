@@ -3,6 +3,9 @@
 import filecmp
 import xml.etree.ElementTree as ET
 
+import numpy as np
+import pytest
+
 from aps.algorithms.APSMainFaciesTable import APSMainFaciesTable
 from aps.algorithms.truncation_rules import Trunc3D_bayfill
 from aps.unit_test.constants import (
@@ -340,6 +343,95 @@ def test_case_5():
     )
 
 
+def _bayfill_rule_for_batches(sf_value, use_const_trunc_param=True):
+    truncRule = Trunc3D_bayfill()
+    truncRule.initialize(
+        APSMainFaciesTable(facies_table={1: 'F1', 2: 'F2', 3: 'F3', 4: 'F4', 5: 'F5'}),
+        faciesInZone=['F3', 'F2', 'F1', 'F4', 'F5'],
+        faciesInTruncRule=['F1', 'F2', 'F3', 'F4', 'F5'],
+        gaussFieldsInZone=['GRF1', 'GRF2', 'GRF3'],
+        alphaFieldNameForBackGroundFacies=['GRF1', 'GRF2', 'GRF3'],
+        sf_value=sf_value,
+        sf_name='' if use_const_trunc_param else 'SF',
+        sf_fmu_updatable=False,
+        ysf=0.4,
+        ysf_fmu_updatable=False,
+        sbhd=0.6,
+        sbhd_fmu_updatable=False,
+        useConstTruncParam=use_const_trunc_param,
+        debug_level=NO_VERBOSE_DEBUG,
+    )
+    return truncRule
+
+
+def _facies_probabilities_for_batches(rng, num_cells):
+    faciesProb = rng.dirichlet(np.full(5, 2.0), size=num_cells)
+    # Include cells with one or more facies with probability 0 or 1
+    faciesProb[:100] = [0.0, 0.0, 1.0, 0.0, 0.0]
+    faciesProb[100:200, 0] = 0.0
+    faciesProb[200:300, 3] = 0.0
+    faciesProb /= faciesProb.sum(axis=1, keepdims=True)
+    return faciesProb
+
+
+@pytest.mark.parametrize('sf_value', [0.0, 0.3, 0.8])
+def test_truncation_cubes_calculated_in_batches(sf_value):
+    truncRule = _bayfill_rule_for_batches(sf_value)
+    rng = np.random.default_rng(123)
+    num_cells = 2000
+    faciesProb = _facies_probabilities_for_batches(rng, num_cells)
+    alpha_coord_vectors = rng.random((num_cells, 3))
+
+    codes, fIndx_vector = truncRule.defineFaciesByTruncRule_batched(
+        faciesProb, alpha_coord_vectors
+    )
+    for i in range(num_cells):
+        truncRule.setTruncRule(faciesProb[i].copy(), i)
+        assert truncRule.defineFaciesByTruncRule(alpha_coord_vectors[i]) == (
+            codes[i],
+            fIndx_vector[i],
+        )
+
+
+@pytest.mark.parametrize('use_trunc_param', [False, True])
+def test_truncation_cubes_calculated_in_batches_with_sf_per_cell(use_trunc_param):
+    truncRule = _bayfill_rule_for_batches(0.0, use_const_trunc_param=False)
+    rng = np.random.default_rng(321)
+    num_grid_cells = 5000
+    # SF in every grid cell, including the end points 0 and 1
+    sf_values = rng.random(num_grid_cells)
+    sf_values[::7] = 0.0
+    sf_values[3::7] = 1.0
+    # As read by getTruncationParam
+    truncRule._Trunc3D_bayfill__param_sf = sf_values
+
+    # The cells are a subset of the grid cells in a different order
+    cellIndx = rng.permutation(num_grid_cells)[:3000]
+    num_cells = len(cellIndx)
+    faciesProb = _facies_probabilities_for_batches(rng, num_cells)
+    alpha_coord_vectors = rng.random((num_cells, 3))
+    truncParam = truncRule.getTruncationParamValues(cellIndx)
+    assert (truncParam == 0.0).any() and (truncParam == 1.0).any()
+
+    if use_trunc_param:
+        codes, fIndx_vector = truncRule.defineFaciesByTruncRule_batched(
+            faciesProb, alpha_coord_vectors, truncParam=truncParam
+        )
+    else:
+        codes, fIndx_vector = truncRule.defineFaciesByTruncRule_batched(
+            faciesProb, alpha_coord_vectors, cellIndx=cellIndx
+        )
+    for i in range(num_cells):
+        if use_trunc_param:
+            truncRule.setTruncRule(faciesProb[i].copy(), truncParam=truncParam[i])
+        else:
+            truncRule.setTruncRule(faciesProb[i].copy(), cellIndx[i])
+        assert truncRule.defineFaciesByTruncRule(alpha_coord_vectors[i]) == (
+            codes[i],
+            fIndx_vector[i],
+        )
+
+
 def get_facies_reference_file_path(testCase):
     return f'testData_Bayfill/test_case_{testCase}.dat'
 
@@ -0,0 +1,178 @@
+#!/bin/env python
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+from roxar import Direction
+
+from aps.rms_jobs.copy_rms_param_trend_to_fmu_grid import ErtboxTransferPlanner
+from aps.utils.constants.simple import Conform
+
+DIMENSIONS = (4, 3, 5)
+# Zone 1 has the layers 0-2 and zone 2 the layers 3-4
+ZONATION = {0: [range(0, 3)], 1: [range(3, 5)]}
+NZ_ERTBOX = 4
+
+
+class _SimboxIndexer:
+    """The parts of the simbox indexer of an RMS grid used by the transfer planner.
+    The active cells are numbered in the order of the flattened (i, j, k) array."""
+
+    def __init__(self, active, handedness):
+        self.dimensions = active.shape
+        self.zonation = ZONATION
+        self.handedness = handedness
+        self._active = active
+        self._indices = np.argwhere(active)
+        self.number_of_get_indices_calls = 0
+
+    def get_cell_numbers_in_range(self, start, end):
+        i, j, k = self._indices.T
+        selected = (
+            (i >= start[0])
+            & (i < end[0])
+            & (j >= start[1])
+            & (j < end[1])
+            & (k >= start[2])
+            & (k < end[2])
+        )
+        return np.flatnonzero(selected)
+
+    def get_indices(self, cell_numbers):
+        self.number_of_get_indices_calls += 1
+        return self._indices[cell_numbers]
+
+
+class _Grid:
+    def __init__(self, active, handedness=Direction.left):
+        self.simbox_indexer = _SimboxIndexer(active, handedness)
+
+
+def _active_cells():
+    active = np.ones(DIMENSIONS, bool)
+    active[0, 0, :] = False
+    active[3, 2, 4] = False
+    return active
+
+
+def _planner(grid, cache_dir=None):
+    nx, ny, _ = DIMENSIONS
+    return ErtboxTransferPlanner(grid, nx, ny, NZ_ERTBOX, cache_dir=cache_dir)
+
+
+@pytest.mark.parametrize(
+    'conformity, offset',
+    [(Conform.TopConform, 0), (Conform.Proportional, 0), (Conform.BaseConform, 2)],
+)
+def test_transfer_of_stacked_parameters(conformity, offset):
+    active = _active_cells()
+    grid = _Grid(active)
+    planner = _planner(grid)
+    plan = planner.plan(2, conformity)
+    assert planner.plan(2, conformity) is plan
+    assert (plan.number_layers, plan.start_layer, plan.end_layer) == (2, 3, 4)
+    assert plan.number_of_cells == active[:, :, 3:].sum()
+
+    # Two parameters with values identifying the (i, j, k) of the cells
+    i, j, k = np.argwhere(active).T
+    stacked_values = np.stack([100 * i + 10 * j + k, -(100 * i + 10 * j + k)])
+    values = planner.transfer(plan, stacked_values)
+    assert values.shape == (2, *DIMENSIONS[:2], NZ_ERTBOX)
+    for layer in range(2):
+        ertbox_layer = layer + offset
+        expected = np.ma.masked_where(
+            ~active[:, :, 3 + layer],
+            100 * np.arange(4)[:, None] + 10 * np.arange(3)[None, :] + 3 + layer,
+        )
+        assert np.ma.allequal(values[0, :, :, ertbox_layer], expected)
+        assert np.ma.allequal(values[1, :, :, ertbox_layer], -expected)
+        assert (values[0, :, :, ertbox_layer].mask == ~active[:, :, 3 + layer]).all()
+    # Layers not belonging to the zone are undefined
+    other_layers = [layer for layer in range(NZ_ERTBOX) if not 0 <= layer - offset < 2]
+    assert values.mask[:, :, :, other_layers].all()
+
+    ertbox_active = planner.active_in_ertbox(plan).reshape(*DIMENSIONS[:2], NZ_ERTBOX)
+    np.testing.assert_array_equal(ertbox_active == 1, ~values.mask[0])
+
+
+def test_right_handed_grid_indices_are_flipped():
+    active = _active_cells()
+    plan = _planner(_Grid(active, Direction.right)).plan(1, Conform.TopConform)
+    i, j, k = np.argwhere(active[:, :, :3]).T
+    np.testing.assert_array_equal(plan.i_indices, i)
+    np.testing.assert_array_equal(plan.j_indices, DIMENSIONS[1] - 1 - j)
+    np.testing.assert_array_equal(plan.ertbox_k_indices, k)
+
+
+def test_too_many_layers_in_zone():
+    nx, ny, _ = DIMENSIONS
+    planner = ErtboxTransferPlanner(_Grid(_active_cells()), nx, ny, 2)
+    with pytest.raises(ValueError):
+        planner.plan(1, Conform.TopConform)
+
+
+def test_grid_indices_cached_on_disk(tmp_path):
+    active = _active_cells()
+    grid = _Grid(active)
+    plan = _planner(grid, tmp_path).plan(1, Conform.TopConform)
+    assert grid.simbox_indexer.number_of_get_indices_calls == 1
+    assert len(list(tmp_path.glob('*.npz'))) == 1
+
+    # A new job with the same grid reads the indices from the cache
+    same_grid = _Grid(active)
+    cached_plan = _planner(same_grid, tmp_path).plan(1, Conform.TopConform)
+    assert same_grid.simbox_indexer.number_of_get_indices_calls == 0
+    for name in ['i_indices', 'j_indices', 'k_indices', 'zone_cell_numbers']:
+        np.testing.assert_array_equal(getattr(cached_plan, name), getattr(plan, name))
+
+
+def test_changed_grid_invalidates_cached_indices(tmp_path):
+    active = _active_cells()
+    planner = _planner(_Grid(active), tmp_path)
+    planner.plan(1, Conform.TopConform)
+
+    # Deactivating a cell changes the fingerprint, and the indices are looked up again
+    active[1, 1, 1] = False
+    changed_grid = _Grid(active)
+    changed_planner = _planner(changed_grid, tmp_path)
+    assert changed_planner.fingerprint != planner.fingerprint
+    plan = changed_planner.plan(1, Conform.TopConform)
+    assert changed_grid.simbox_indexer.number_of_get_indices_calls == 1
+    assert plan.number_of_cells == active[:, :, :3].sum()
+    assert len(list(tmp_path.glob('*.npz'))) == 2
+
+    # As do changes of the zonation
+    changed_grid.simbox_indexer.zonation = {0: [range(0, 2)], 1: [range(2, 5)]}
+    assert _planner(changed_grid, tmp_path).fingerprint != changed_planner.fingerprint
+
+
+def test_unreadable_cache_file_is_ignored(tmp_path):
+    active = _active_cells()
+    planner = _planner(_Grid(active), tmp_path)
+    plan = planner.plan(1, Conform.TopConform)
+    (cache_file,) = tmp_path.glob('*.npz')
+    cache_file.write_bytes(b'not a numpy file')
+
+    grid = _Grid(active)
+    recovered_plan = _planner(grid, tmp_path).plan(1, Conform.TopConform)
+    assert grid.simbox_indexer.number_of_get_indices_calls == 1
+    np.testing.assert_array_equal(
+        recovered_plan.zone_cell_numbers, plan.zone_cell_numbers
+    )
+
+
+def test_truncated_cache_file_is_rebuilt(tmp_path):
+    active = _active_cells()
+    plan = _planner(_Grid(active), tmp_path).plan(1, Conform.TopConform)
+    (cache_file,) = tmp_path.glob('*.npz')
+    cache_file.write_bytes(cache_file.read_bytes()[:100])
+
+    grid = _Grid(active)
+    recovered_plan = _planner(grid, tmp_path).plan(1, Conform.TopConform)
+    assert grid.simbox_indexer.number_of_get_indices_calls == 1
+    np.testing.assert_array_equal(
+        recovered_plan.zone_cell_numbers, plan.zone_cell_numbers
+    )
+    # The cache is written to a temporary file which is renamed when complete
+    assert [path.name for path in tmp_path.iterdir()] == [cache_file.name]
+    with np.load(cache_file) as data:
+        np.testing.assert_array_equal(data['zone_cell_numbers'], plan.zone_cell_numbers)
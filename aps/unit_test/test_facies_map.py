@@ -0,0 +1,59 @@
+#!/bin/env python
+# -*- coding: utf-8 -*-
+from collections import namedtuple
+
+import numpy as np
+import pytest
+
+from aps.algorithms.APSModel import APSModel
+from aps.unit_test.constants import NO_VERBOSE_DEBUG
+from aps.unit_test.helpers import get_model_file_path
+from aps.utils.facies_map import create_facies_map_vectorized
+
+Field = namedtuple('Field', ['name', 'field'])
+
+
+def _zone_models():
+    aps_model = APSModel(
+        get_model_file_path('testData_models/APS.xml'), debug_level=NO_VERBOSE_DEBUG
+    )
+    return aps_model.sorted_zone_models
+
+
+def _facies_map_cell_by_cell(gauss_fields, truncation_rule, use_code):
+    # The facies are defined one cell at the time, as in the preview before vectorization
+    num_grid_cells = gauss_fields[0].field.size
+    facies = np.zeros(num_grid_cells, int)
+    facies_fraction = {}
+    for i in range(num_grid_cells):
+        alpha_coord = np.array(
+            [item.field[i] for item in gauss_fields], dtype=np.float32
+        )
+        facies_code, facies_index = truncation_rule.defineFaciesByTruncRule(alpha_coord)
+        facies[i] = facies_code if use_code else facies_index + 1
+        facies_fraction[facies_index] = facies_fraction.get(facies_index, 0) + 1
+    return facies, facies_fraction
+
+
+@pytest.mark.parametrize('use_code', [False, True])
+@pytest.mark.parametrize('zone', list(_zone_models()))
+def test_vectorized_facies_map_matches_cell_by_cell(zone, use_code):
+    zone_model = _zone_models()[zone]
+    truncation_rule = zone_model.truncation_rule
+    num_facies = len(zone_model.facies_in_zone_model)
+    rng = np.random.default_rng(5)
+    probabilities = rng.dirichlet(np.ones(num_facies))
+    truncation_rule.setTruncRule(probabilities)
+
+    gauss_fields = [
+        Field(name, rng.random(5000, dtype=np.float32))
+        for name in zone_model.used_gaussian_field_names
+    ]
+    expected_facies, expected_fraction = _facies_map_cell_by_cell(
+        gauss_fields, truncation_rule, use_code
+    )
+    facies, facies_fraction = create_facies_map_vectorized(
+        gauss_fields, truncation_rule, use_code=use_code
+    )
+    np.testing.assert_array_equal(facies, expected_facies)
+    assert facies_fraction == expected_fraction
@@ -0,0 +1,107 @@
+#!/bin/env python
+# -*- coding: utf-8 -*-
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import aps.rms_jobs.import_fields_from_disk as import_fields
+from aps.rms_jobs.import_fields_from_disk import FieldPrefetcher
+
+
+class _Reader:
+    """Replaces load_field_values, and keeps track of how many fields are read ahead
+    of the field being returned to the caller."""
+
+    def __init__(self, delays=None, failing=None):
+        self.delays = delays or {}
+        self.failing = failing
+        self.started = []
+        self.consumed = 0
+        self.max_read_ahead = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, field_name, path, grid=None, debug_level=None):
+        index = int(field_name)
+        with self._lock:
+            self.started.append(index)
+            self.max_read_ahead = max(
+                self.max_read_ahead, len(self.started) - self.consumed - 1
+            )
+        time.sleep(self.delays.get(index, 0.0))
+        if index == self.failing:
+            raise IOError(f'Can not read field {field_name}')
+        return np.full(3, index)
+
+    def consume(self, prefetcher):
+        for values in prefetcher:
+            with self._lock:
+                self.consumed += 1
+            yield values
+
+
+def _tasks(number_of_fields):
+    return [
+        (str(index), Path(f'field_{index}.roff')) for index in range(number_of_fields)
+    ]
+
+
+@pytest.fixture
+def reader(monkeypatch):
+    def install(**kwargs):
+        reader = _Reader(**kwargs)
+        monkeypatch.setattr(import_fields, 'load_field_values', reader)
+        return reader
+
+    return install
+
+
+def test_fields_are_returned_in_task_order(reader):
+    # The first fields are the slowest to read, such that later fields are ready first
+    field_reader = reader(delays={0: 0.2, 1: 0.1, 2: 0.05})
+    prefetcher = FieldPrefetcher(_tasks(8), max_workers=4, max_prefetch=4)
+    values = list(prefetcher)
+    assert [field[0] for field in values] == list(range(8))
+    assert sorted(field_reader.started) == list(range(8))
+    assert sorted(prefetcher.read_times) == sorted(str(index) for index in range(8))
+
+
+def test_read_ahead_is_limited_by_prefetch_depth(reader):
+    field_reader = reader()
+    prefetcher = FieldPrefetcher(_tasks(20), max_workers=4, max_prefetch=3)
+    for index, values in enumerate(field_reader.consume(prefetcher)):
+        # A slow consumer gives the workers time to read as far ahead as allowed
+        time.sleep(0.02)
+        assert values[0] == index
+    assert field_reader.max_read_ahead == 3
+
+
+def test_read_error_is_raised_in_caller(reader):
+    reader(failing=2)
+    values = []
+    with pytest.raises(IOError, match='Can not read field 2'):
+        for field in FieldPrefetcher(_tasks(6), max_workers=2, max_prefetch=2):
+            values.append(field[0])
+    assert values == [0, 1]
+
+
+def test_pending_reads_are_cancelled_when_a_read_fails(reader):
+    threads_before = threading.active_count()
+    field_reader = reader(delays={0: 0.1}, failing=0)
+    with pytest.raises(IOError):
+        list(FieldPrefetcher(_tasks(10), max_workers=1, max_prefetch=4))
+    # The failing field, and at most the one the worker started after it, are read
+    assert field_reader.started[0] == 0
+    assert len(field_reader.started) <= 2
+    # The worker threads are shut down
+    assert threading.active_count() == threads_before
+
+
+def test_pending_reads_are_cancelled_when_iteration_stops(reader):
+    field_reader = reader(delays={0: 0.1})
+    fields = iter(FieldPrefetcher(_tasks(10), max_workers=1, max_prefetch=4))
+    assert next(fields)[0] == 0
+    fields.close()
+    assert len(field_reader.started) <= 3
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+import json
+import subprocess
+import sys
+
+import pytest
+
+# Total time (seconds) allowed for a cold import of a module, including all the modules it imports.
+# Most of it is spent importing numpy, and the budget leaves room for slow machines.
+IMPORT_TIME_BUDGET = 1.0
+
+# Heavy dependencies which must only be imported by the functions using them
+HEAVY_MODULES = ['matplotlib', 'PIL', 'scipy', 'scipy.stats', 'xtgeo', 'pandas']
+
+
+def _imported_modules(module_name):
+    """Import the module in a new interpreter and return the names of all imported modules."""
+    result = subprocess.run(
+        [
+            sys.executable,
+            '-c',
+            f'import json, sys, {module_name}; print(json.dumps(sorted(sys.modules)))',
+        ],
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    return set(json.loads(result.stdout.splitlines()[-1]))
+
+
+def _import_time(module_name):
+    """Import the module in a new interpreter (python -X importtime) and return
+    the total import time in seconds, including the modules imported by it."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module_name}'],
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        # Modules imported by other modules are indented, and are included in their cumulative time
+        if not name[1:].startswith(' '):
+            total += int(cumulative)
+    return total * 1e-6
+
+
+MODULE_NAMES = [
+    'aps.algorithms.APSModel',
+    'aps.utils.truncation_rules',
+    'aps.utils.roxar.job',
+    'aps.rms_jobs.import_fields_from_disk',
+    'aps.rms_jobs.export_fields_to_disk',
+]
+
+
+@pytest.mark.parametrize('module_name', MODULE_NAMES)
+def test_import_time_is_within_budget(module_name):
+    assert _import_time(module_name) < IMPORT_TIME_BUDGET
+
+
+@pytest.mark.parametrize('module_name', MODULE_NAMES)
+def test_heavy_modules_are_not_imported(module_name):
+    imported_modules = _imported_modules(module_name)
+    assert module_name in imported_modules
+    imported_heavy_modules = [
+        name for name in HEAVY_MODULES if name in imported_modules
+    ]
+    assert imported_heavy_modules == []
@@ -0,0 +1,116 @@
+#!/bin/env python
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+import aps.utils.simulation as simulation
+from aps.utils.simulation import RMSParameterStore, count_zones_using_gauss_fields
+
+NUMBER_OF_ACTIVE_CELLS = 5
+
+
+class _ZoneModel:
+    def __init__(self, used, in_truncation_rule):
+        self.used_gaussian_field_names = used
+        self._in_truncation_rule = in_truncation_rule
+
+    def getGaussFieldsInTruncationRule(self):
+        return self._in_truncation_rule
+
+
+class _APSModel:
+    def __init__(self, zone_models, selected):
+        self.sorted_zone_models = zone_models
+        self._selected = selected
+
+    def isSelected(self, zone_number, region_number):
+        return (zone_number, region_number) in self._selected
+
+    def getZoneModel(self, zone_number, region_number):
+        return self.sorted_zone_models[zone_number, region_number]
+
+
+@pytest.fixture
+def reads(monkeypatch):
+    """Replaces init_rms_param, and records the parameters read from RMS."""
+    read_parameters = []
+
+    def init_rms_param(
+        grid_model,
+        name,
+        param_type_name,
+        number_of_active_cells,
+        realization_number,
+        set_rms_param=False,
+        is_shared=False,
+        debug_level=None,
+    ):
+        read_parameters.append(name + param_type_name)
+        return np.full(number_of_active_cells, len(read_parameters), np.float32)
+
+    monkeypatch.setattr(simulation, 'init_rms_param', init_rms_param)
+    return read_parameters
+
+
+def _store(zone_count=None):
+    return RMSParameterStore(
+        None,
+        ['GF1', 'GF2', 'GF3'],
+        '_trend',
+        NUMBER_OF_ACTIVE_CELLS,
+        0,
+        zone_count=zone_count,
+    )
+
+
+def test_parameter_is_read_on_first_access(reads):
+    store = _store()
+    assert reads == []
+    assert store.loaded == []
+    assert list(store) == ['GF1', 'GF2', 'GF3']
+
+    values = store['GF2']
+    assert reads == ['GF2_trend']
+    assert len(values) == NUMBER_OF_ACTIVE_CELLS
+    assert store['GF2'] is values
+    assert reads == ['GF2_trend']
+    assert store.loaded == ['GF2']
+    with pytest.raises(KeyError):
+        store['GF4']
+
+
+def test_parameter_is_released_after_last_zone_using_it(reads):
+    store = _store(zone_count={'GF1': 2, 'GF2': 1})
+    store['GF1']
+    store['GF2']
+    store['GF3']
+
+    store.release_zone(['GF1', 'GF2'])
+    assert store.loaded == ['GF1', 'GF3']
+    store.release_zone(['GF1'])
+    # Gauss fields without zone count are not released
+    assert store.loaded == ['GF3']
+
+
+def test_released_parameter_is_read_again(reads):
+    store = _store(zone_count={'GF1': 1})
+    first = store['GF1']
+    store.release_zone(['GF1'])
+    assert store.loaded == []
+    second = store['GF1']
+    assert reads == ['GF1_trend', 'GF1_trend']
+    assert second is not first
+    assert store.loaded == ['GF1']
+
+
+def test_count_zones_using_gauss_fields():
+    aps_model = _APSModel(
+        {
+            (1, 0): _ZoneModel(['GF1', 'GF2', 'GF3'], ['GF1', 'GF2']),
+            (2, 0): _ZoneModel(['GF1', 'GF2'], ['GF1', 'GF2']),
+            (3, 0): _ZoneModel(['GF1', 'GF3'], ['GF1', 'GF3']),
+        },
+        selected=[(1, 0), (2, 0)],
+    )
+    # GF3 is not in the truncation rule of zone 1, and zone 3 is not selected
+    assert count_zones_using_gauss_fields(aps_model) == {'GF1': 2, 'GF2': 2}
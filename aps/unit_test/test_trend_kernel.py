@@ -0,0 +1,155 @@
+#!/bin/env python
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+
+from aps.algorithms.trend import (
+    Trend3D_conic,
+    Trend3D_elliptic,
+    Trend3D_elliptic_cone,
+    Trend3D_hyperbolic,
+    Trend3D_linear,
+)
+from aps.algorithms.trend.kernel import (
+    GEOMETRY_SAMPLE_SIZE,
+    ConicTrendKernel,
+    clear_trend_kernel_cache,
+    create_trend_cells,
+    geometry_sample_cells,
+    get_trend_cells,
+    with_trend_kernel_cache,
+)
+from aps.utils.constants.simple import Direction, OriginType
+from aps.utils.specification_cache import array_key
+
+# UTM like coordinates of the simulation box origin
+X0, Y0 = 456000.0, 6780000.0
+SIM_BOX_SIZE = (4000.0, 6000.0, 50.0)
+START_LAYER, END_LAYER = 10, 29
+
+
+def _trends():
+    return [
+        Trend3D_linear(azimuth_angle=30.0, stacking_angle=5.0),
+        Trend3D_elliptic(
+            azimuth_angle=30.0,
+            stacking_angle=20.0,
+            curvature=2.0,
+            origin=(0.4, 0.3, 0.5),
+        ),
+        Trend3D_elliptic(
+            azimuth_angle=130.0,
+            stacking_angle=70.0,
+            curvature=0.5,
+            origin=(X0 + 1500.0, Y0 + 2000.0, 0.2),
+            origin_type=OriginType.ABSOLUTE,
+            direction=Direction.RETROGRADING,
+        ),
+        Trend3D_hyperbolic(
+            azimuth_angle=300.0,
+            stacking_angle=45.0,
+            curvature=1.5,
+            migration_angle=25.0,
+            origin=(0.5, 0.2, 0.0),
+        ),
+        Trend3D_elliptic_cone(
+            azimuth_angle=30.0,
+            stacking_angle=80.0,
+            curvature=2.0,
+            migration_angle=-30.0,
+            relative_size=0.3,
+            origin=(0.5, 0.5, 1.0),
+        ),
+    ]
+
+
+@pytest.mark.parametrize('trend', _trends(), ids=lambda trend: trend.type.name)
+def test_vectorized_trend_matches_trend_function(trend):
+    clear_trend_kernel_cache()
+    rng = np.random.default_rng(3)
+    num_cells = 2000
+    x_length, y_length, thickness = SIM_BOX_SIZE
+    points = np.column_stack(
+        [X0 + x_length * rng.random(num_cells), Y0 + y_length * rng.random(num_cells)]
+    )
+    layers = rng.integers(START_LAYER, END_LAYER + 1, num_cells)
+    zinc = thickness / (END_LAYER - START_LAYER + 1)
+
+    trend._setTrendCenter(X0, Y0, 10.0, x_length, y_length, thickness)
+    trend._start_layer = START_LAYER
+    trend._end_layer = END_LAYER
+    parameters = trend._calculateTrendModelParam()
+    cells = create_trend_cells(points, layers, X0, Y0, array_key(layers))
+    values = trend._trendValueCalculation_vectorized(parameters, cells, zinc)
+    expected = [
+        trend._trendValueCalculation(parameters, x, y, k, zinc)
+        for (x, y), k in zip(points, layers)
+    ]
+    np.testing.assert_allclose(values, expected, rtol=1e-4, atol=1e-4)
+    if not isinstance(trend, Trend3D_conic):
+        return
+    assert values.dtype == np.float32
+
+    # The kernel is shared by trends with the same center and azimuth
+    sin_theta, cos_theta = parameters[:2]
+    kernel = ConicTrendKernel.get(
+        cells, trend._x_center, trend._y_center, sin_theta, cos_theta
+    )
+    assert (
+        ConicTrendKernel.get(
+            cells, trend._x_center, trend._y_center, sin_theta, cos_theta
+        )
+        is kernel
+    )
+    assert len(kernel) == num_cells
+
+
+def test_trend_cells_are_fetched_again_for_changed_geometry():
+    clear_trend_kernel_cache()
+    cell_index_defined = np.arange(0, 1000, 3)
+    created = []
+
+    def create(key):
+        created.append(key)
+        points = np.zeros((len(cell_index_defined), 2))
+        return create_trend_cells(points, cell_index_defined % 5, X0, Y0, key)
+
+    geometry = {'sim_box': [X0, Y0, 0.0], 'cell_centers': 'a'}
+    cells = get_trend_cells('Grid', 1, cell_index_defined, geometry, create)
+    assert get_trend_cells('Grid', 1, cell_index_defined, geometry, create) is cells
+    assert len(created) == 1
+
+    moved = dict(geometry, cell_centers='b')
+    assert get_trend_cells('Grid', 1, cell_index_defined, moved, create) is not cells
+    assert len(created) == 2
+    assert created[0] != created[1]
+    clear_trend_kernel_cache()
+
+
+def test_geometry_sample_cells():
+    cell_index_defined = np.arange(10, 1010)
+    sample = geometry_sample_cells(cell_index_defined)
+    assert len(sample) == GEOMETRY_SAMPLE_SIZE
+    assert sample[0] == 10 and sample[-1] == 1009
+    np.testing.assert_array_equal(geometry_sample_cells(sample[:5]), sample[:5])
+
+
+def test_trend_kernel_cache_is_cleared_when_job_fails():
+    created = []
+
+    def create(key):
+        created.append(key)
+        return create_trend_cells(np.zeros((1, 2)), np.zeros(1, int), X0, Y0, key)
+
+    @with_trend_kernel_cache
+    def job():
+        get_trend_cells('Grid', 1, np.arange(1), None, create)
+        get_trend_cells('Grid', 1, np.arange(1), None, create)
+        raise ValueError('Job failed')
+
+    with pytest.raises(ValueError, match='Job failed'):
+        job()
+    assert len(created) == 1
+    get_trend_cells('Grid', 1, np.arange(1), None, create)
+    assert len(created) == 2
+    clear_trend_kernel_cache()
@@ -71,6 +71,7 @@ Usage:
 import copy
 import xml.etree.ElementTree as ET
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import numpy as np
@@ -111,7 +112,18 @@ def isThreeByteColor(c):
         return True
 
 
-def writeIrapMap(fmap, xOrigo, yOrigo, xinc, yinc, angleInDegrees, outputFileName):
+def writeIrapMap(
+    fmap,
+    xOrigo,
+    yOrigo,
+    xinc,
+    yinc,
+    angleInDegrees,
+    outputFileName,
+    valuesPerBlock=6 * 8192,
+    asFloat=False,
+):
+    # The values are written as float (e.g. 1.0) if asFloat is True and as given by the type of fmap otherwise
     rows = fmap.shape[0]
     cols = fmap.shape[1]
     nx = cols
@@ -152,33 +164,49 @@ def writeIrapMap(fmap, xOrigo, yOrigo, xinc, yinc, angleInDegrees, outputFileNam
         line = ' 0   0   0   0   0   0   0 \n'
         file.write(line)
 
-        n = 0
-        line = ' '
-        for j in range(ny):
-            jj = ny - 1 - j
-            for i in range(nx):
-                line = line + str(fmap[jj, i]) + '  '
-                n = n + 1
-                if n == 6:
-                    line = line + str('\n')
-                    file.write(line)
-                    n = 0
-                    line = ' '
-        if n > 0:
-            file.write(line)
-        print('\n')
+        # The values are written with 6 values per line starting with the last row of the map.
+        # The text is written in blocks of lines to avoid formatting one value at a time.
+        values = fmap[::-1, :].ravel()
+        valuesPerLine = 6
+        valuesPerBlock = max(
+            valuesPerLine, valuesPerBlock - valuesPerBlock % valuesPerLine
+        )
+        lineFormat = ' ' + '{}  ' * valuesPerLine + '\n'
+        for start in range(0, values.size, valuesPerBlock):
+            block = values[start : start + valuesPerBlock]
+            if asFloat:
+                block = block.astype(np.float64)
+            block = block.tolist()
+            nLines, nRemaining = divmod(len(block), valuesPerLine)
+            text = (lineFormat * nLines).format(*block)
+            if nRemaining > 0:
+                text += (' ' + '{}  ' * nRemaining).format(*block[-nRemaining:])
+            file.write(text)
+
+
+def _smallestIntegerType(codes):
+    minCode = min(codes)
+    maxCode = max(codes)
+    for dtype in [np.uint8, np.int16]:
+        info = np.iinfo(dtype)
+        if info.min <= minCode and maxCode <= info.max:
+            return dtype
+    return np.int32
 
 
 class ConvertBitMapToRMS:
     def __init__(self, params):
         self.__model_file_name = params.get('model_file_name', None)
         debug_level = params.get('debug_level', Debug.OFF)
+        # Number of bitmap files converted and written in parallel
+        self.__maxWorkers = params.get('max_workers', 4)
 
         # Internal variables,  not to be set here, but used in algorithm
         self.__faciesCode = []
         self.__colorCode = []
         self.__fmapFaciesList = []
         self.__fmapColorsList = []
+        self.__codeMapping = None
 
         # Read model file if it is defined or assign values from input dict
         if self.__model_file_name is not None:
@@ -583,82 +611,80 @@ class ConvertBitMapToRMS:
                 )
 
     def convert(self):
-        self.__fmapFacies = []
-        for fileName in self.__inputFileList:
-            print(f'Read file: {fileName}')
-            ncolSpecified = self.__nx
-            nrowSpecified = self.__ny
-            path = Path(fileName)
-            if not path.exists():
-                if self.__model_file_name is not None:
-                    path = Path(self.__model_file_name).parent / fileName
-                else:
-                    path = './' + fileName
-            im = Image.open(path)
+        self.__fmapColorsList = []
+        self.__fmapFaciesList = []
+        if self.nFacies > 0:
+            self.__codeMapping = self.__createCodeMapping()
+        maxWorkers = max(1, min(self.__maxWorkers, len(self.__inputFileList)))
+        with ThreadPoolExecutor(max_workers=maxWorkers) as executor:
+            # Messages from the conversion of each file are printed here, in the order of the files
+            for fileName, (fmapColors, fmapFacies, messages) in zip(
+                self.__inputFileList,
+                executor.map(self.__convertFile, self.__inputFileList),
+            ):
+                print(f'Read file: {fileName}')
+                for message in messages:
+                    print(message)
+                self.__fmapColorsList.append(fmapColors)
+                if fmapFacies is not None:
+                    self.__fmapFaciesList.append(fmapFacies)
 
+    def __createCodeMapping(self):
+        # Mapping function between color code and facies code. Colors without facies get the missing code.
+        codes = [int(self.__missingCode)] + [int(f) for f in self.__faciesCode]
+        codeMapping = np.full(256, int(self.__missingCode), _smallestIntegerType(codes))
+        for c, f in zip(self.__colorCode, self.__faciesCode):
+            codeMapping[int(c)] = int(f)
+        return codeMapping
+
+    def __convertFile(self, fileName):
+        ncolSpecified = self.__nx
+        nrowSpecified = self.__ny
+        path = Path(fileName)
+        if not path.exists():
+            if self.__model_file_name is not None:
+                path = Path(self.__model_file_name).parent / fileName
+            else:
+                path = './' + fileName
+        with Image.open(path) as im:
             fmapColors = np.array(im)
 
-            c = fmapColors[0, 0]
-            if isOneByteColor(c):
-                print('Color is specified by 1 byte')
+        messages = []
+        c = fmapColors[0, 0]
+        if isOneByteColor(c):
+            messages.append('Color is specified by 1 byte')
+        else:
+            if isThreeByteColor(c):
+                raise ValueError(
+                    'Error: Number of bytes per pixel is not 1 but 3\n'
+                    '       This conversion script requires that color depth is 8 bit not 24 bit'
+                )
             else:
-                if isThreeByteColor(c):
-                    raise ValueError(
-                        'Error: Number of bytes per pixel is not 1 but 3\n'
-                        '       This conversion script requires that color depth is 8 bit not 24 bit'
-                    )
-                else:
-                    raise ValueError('Error: Unknown input format')
+                raise ValueError('Error: Unknown input format')
 
-            nrows = fmapColors.shape[0]
-            ncols = fmapColors.shape[1]
-            if nrows != nrowSpecified or ncols != ncolSpecified:
-                raise ValueError(
-                    'Error: Number of pixel specified in grid definition is different from the number of pixels in the map\n'
-                    '       Number of pixels in bitmap file: (nx,ny) = ({ncols}, {nrows})\n'
-                    '       Number of pixels specified:      (nx,ny) = ({ncolSpecified}, {nrowSpecified})'
-                    ''.format(
-                        ncols=ncols,
-                        nrows=nrows,
-                        ncolSpecified=ncolSpecified,
-                        nrowSpecified=nrowSpecified,
-                    )
+        nrows = fmapColors.shape[0]
+        ncols = fmapColors.shape[1]
+        if nrows != nrowSpecified or ncols != ncolSpecified:
+            raise ValueError(
+                'Error: Number of pixel specified in grid definition is different from the number of pixels in the map\n'
+                '       Number of pixels in bitmap file: (nx,ny) = ({ncols}, {nrows})\n'
+                '       Number of pixels specified:      (nx,ny) = ({ncolSpecified}, {nrowSpecified})'
+                ''.format(
+                    ncols=ncols,
+                    nrows=nrows,
+                    ncolSpecified=ncolSpecified,
+                    nrowSpecified=nrowSpecified,
                 )
+            )
 
-            if self.__crop:
-                fmapColorsCropped = self.__cropMap(fmapColors)
-                self.__fmapColorsList.append(fmapColorsCropped)
-            else:
-                self.__fmapColorsList.append(fmapColors)
+        if self.__crop:
+            fmapColors = self.__cropMap(fmapColors)
 
-            if self.nFacies > 0:
-                # Initialize mapping function between color code and facies to missing code for all colors.
-                self.__codeMapping = np.zeros(256, np.int32)
-                for n in range(256):
-                    self.__codeMapping[n] = self.__missingCode
-
-                maxFaciesCode = 0
-                for i in range(self.nFacies):
-                    c = self.__colorCode[i]
-                    f = self.__faciesCode[i]
-                    self.__codeMapping[c] = f
-                    if maxFaciesCode < f:
-                        maxFaciesCode = f
-
-                fmapFacies = np.zeros((nrows, ncols))
-
-                # Renumber the color  code to facies code
-                for j in range(ncols):
-                    for i in range(nrows):
-                        c = fmapColors[i, j]
-                        f = self.__codeMapping[c]
-                        fmapFacies[i, j] = f
-
-                if self.__crop:
-                    fmapFaciesCropped = self.__cropMap(fmapFacies)
-                    self.__fmapFaciesList.append(fmapFaciesCropped)
-                else:
-                    self.__fmapFaciesList.append(fmapFacies)
+        fmapFacies = None
+        if self.__codeMapping is not None:
+            # Renumber the color code to facies code
+            fmapFacies = self.__codeMapping[fmapColors]
+        return fmapColors, fmapFacies, messages
 
     @property
     def xminUnCropped(self):
@@ -679,17 +705,10 @@ class ConvertBitMapToRMS:
     def __cropMap(self, fmap):
         nrowsNew = self.__iEnd - self.__iStart + 1
         ncolsNew = self.__jEnd - self.__jStart + 1
+        # The grid counts the pixel in y direction from top to bottom
         iiStart = self.__ny - self.__iEnd
         jjStart = self.__jStart - 1
-        fmapNew = np.zeros((nrowsNew, ncolsNew))
-        for j in range(ncolsNew):
-            for i in range(nrowsNew):
-                ii = (
-                    iiStart + i
-                )  # The grid counts the pixel in y direction from top to bottom
-                jj = jjStart + j
-                fmapNew[i, j] = fmap[ii, jj]
-        return fmapNew
+        return fmap[iiStart : iiStart + nrowsNew, jjStart : jjStart + ncolsNew].copy()
 
     def writeFile(self):
         if self.__crop:
@@ -699,36 +718,39 @@ class ConvertBitMapToRMS:
             xmin = self.xminUnCropped
             ymin = self.yminUnCropped
 
-        n = 0
-        for fileName in self.__outputFileList:
-            print(f'Write file: {fileName}')
-            angleInDegrees = 0.0
-            if self.nFacies == 0:
-                angleInDegrees = 0.0
-                print('Write file with color code as grid values.')
-                writeIrapMap(
-                    self.__fmapColorsList[n],
-                    xmin,
-                    ymin,
-                    self.__xinc,
-                    self.__yinc,
-                    angleInDegrees,
-                    fileName,
-                )
-            else:
-                print(
-                    'Write file with facies code as grid values for specified colors and missing code elsewhere.'
-                )
-                writeIrapMap(
-                    self.__fmapFaciesList[n],
-                    xmin,
-                    ymin,
-                    self.__xinc,
-                    self.__yinc,
-                    angleInDegrees,
-                    fileName,
+        angleInDegrees = 0.0
+        if self.nFacies == 0:
+            print('Write file with color code as grid values.')
+            fmapList = self.__fmapColorsList
+        else:
+            print(
+                'Write file with facies code as grid values for specified colors and missing code elsewhere.'
+            )
+            fmapList = self.__fmapFaciesList
+        # Facies maps and cropped maps have always been written with float values
+        asFloat = self.nFacies > 0 or self.__crop
+
+        maxWorkers = max(1, min(self.__maxWorkers, len(self.__outputFileList)))
+        with ThreadPoolExecutor(max_workers=maxWorkers) as executor:
+            futures = []
+            for fileName, fmap in zip(self.__outputFileList, fmapList):
+                print(f'Write file: {fileName}')
+                futures.append(
+                    executor.submit(
+                        writeIrapMap,
+                        fmap,
+                        xmin,
+                        ymin,
+                        self.__xinc,
+                        self.__yinc,
+                        angleInDegrees,
+                        fileName,
+                        asFloat=asFloat,
+                    )
                 )
-            n += 1
+            for future in futures:
+                future.result()
+                print('\n')
 
     def testPlot(self):
         import matplotlib.colors
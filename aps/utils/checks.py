@@ -6,12 +6,17 @@ from typing import Union
 
 import numpy as np
 from aps.utils.constants.simple import VariogramType, Debug
+from aps.utils.records import ProbabilityStatistics
 
 
 class NormalisationError(ValueError):
     pass
 
 
+# Bin edges for the number of cells per deviation |sum of probabilities - 1|
+SUM_DEVIATION_BIN_EDGES = (0.0, 1e-6, 1e-4, 1e-3, 1e-2, 1e-1, np.inf)
+
+
 def isVariogramTypeOK(
     _type: Union[VariogramType, str], debug_level: Debug = Debug.OFF
 ) -> bool:
@@ -54,7 +59,6 @@ def check_probability_values(
     """The input numpy array prob_values is checked that the values are legal probabilities. A tolerance is accepted.
     Returns prob_values in [0,1] and raise error if illegal probability values (outside tolerance)
     """
-    err_found = False
     num_defined_cells = len(prob_values)
     if num_defined_cells == 0:
         return prob_values, error_dict
@@ -67,6 +71,357 @@ def check_probability_values(
     check_value = prob_values > 1.0 + tolerance_of_probability_normalisation
     num_above_one = check_value.sum()
 
+    err_found = report_probability_values(
+        num_negative,
+        num_above_one,
+        num_defined_cells,
+        tolerance_of_probability_normalisation,
+        max_allowed_fraction_with_mismatch,
+        facies_name,
+        parameter_name,
+        stop_on_error=stop_on_error,
+        error_dict=error_dict,
+    )
+
+    prob_values[prob_values < 0.0] = 0.0
+    prob_values[prob_values > 1.0] = 1.0
+    if stop_on_error:
+        return prob_values
+    else:
+        return prob_values, error_dict, err_found
+
+
+def validate_probabilities(
+    probabilities: np.ndarray,
+    eps: float,
+    tolerance_of_probability_normalisation: float,
+):
+    """Check the probabilities with shape (facies, cells) for a block of cells in one pass.
+    The probabilities are truncated to [0,1] in place, and the sum over the facies is calculated
+    for each cell from the truncated values.
+    Returns the sum of probabilities per cell and a ProbabilityStatistics record with
+    - minimum and maximum value per facies (before truncation)
+    - number of cells per facies with values below -tolerance or above 1 + tolerance
+    - minimum and maximum sum of probabilities
+    - number of cells where the sum is not close to 1 (np.allclose with relative tolerance eps),
+      deviates more than eps from 1 and is outside [1 - tolerance, 1 + tolerance]
+    - number of cells where the sum is 0
+    - number of cells per bin of |sum - 1| with bin edges SUM_DEVIATION_BIN_EDGES
+    The records for several blocks of cells can be combined by combine_probability_statistics.
+    """
+    num_facies, num_cells = probabilities.shape
+    if num_cells == 0:
+        empty = np.zeros(num_facies, np.int64)
+        return np.zeros(0, np.float32), ProbabilityStatistics(
+            0,
+            np.full(num_facies, np.inf),
+            np.full(num_facies, -np.inf),
+            empty,
+            empty,
+            np.inf,
+            -np.inf,
+            0,
+            0,
+            0,
+            0,
+            np.zeros(len(SUM_DEVIATION_BIN_EDGES) - 1, np.int64),
+        )
+    min_values = probabilities.min(axis=1)
+    max_values = probabilities.max(axis=1)
+    num_negative = (probabilities < -tolerance_of_probability_normalisation).sum(axis=1)
+    num_above_one = (probabilities > 1.0 + tolerance_of_probability_normalisation).sum(
+        axis=1
+    )
+    np.clip(probabilities, 0.0, 1.0, out=probabilities)
+
+    # Sum facies by facies in float32
+    sum_probabilities = np.zeros(num_cells, np.float32)
+    for values in probabilities:
+        sum_probabilities += values
+
+    ones = np.ones(num_cells, np.float32)
+    statistics = ProbabilityStatistics(
+        NumCells=num_cells,
+        MinValues=min_values,
+        MaxValues=max_values,
+        NumNegative=num_negative,
+        NumAboveOne=num_above_one,
+        MinSum=sum_probabilities.min(),
+        MaxSum=sum_probabilities.max(),
+        NumNotCloseToOne=(~np.isclose(sum_probabilities, ones, rtol=eps)).sum(),
+        NumOutsideEps=(
+            (sum_probabilities > (1.0 + eps)) | (sum_probabilities < (1.0 - eps))
+        ).sum(),
+        NumOutsideTolerance=(
+            (sum_probabilities < 1.0 - tolerance_of_probability_normalisation)
+            | (sum_probabilities > 1.0 + tolerance_of_probability_normalisation)
+        ).sum(),
+        NumZeroSum=(sum_probabilities == 0).sum(),
+        SumDeviationCounts=_sum_deviation_counts(sum_probabilities),
+    )
+    return sum_probabilities, statistics
+
+
+def _sum_deviation_counts(sum_probabilities: np.ndarray) -> np.ndarray:
+    deviation = np.abs(sum_probabilities - np.float32(1.0))
+    bins = np.searchsorted(SUM_DEVIATION_BIN_EDGES[1:-1], deviation, side='right')
+    return np.bincount(bins, minlength=len(SUM_DEVIATION_BIN_EDGES) - 1)
+
+
+def combine_probability_statistics(
+    statistics: ProbabilityStatistics, other: ProbabilityStatistics
+) -> ProbabilityStatistics:
+    """Combine the statistics for two disjoint blocks of cells."""
+    if statistics is None:
+        return other
+    return ProbabilityStatistics(
+        NumCells=statistics.NumCells + other.NumCells,
+        MinValues=np.minimum(statistics.MinValues, other.MinValues),
+        MaxValues=np.maximum(statistics.MaxValues, other.MaxValues),
+        NumNegative=statistics.NumNegative + other.NumNegative,
+        NumAboveOne=statistics.NumAboveOne + other.NumAboveOne,
+        MinSum=min(statistics.MinSum, other.MinSum),
+        MaxSum=max(statistics.MaxSum, other.MaxSum),
+        NumNotCloseToOne=statistics.NumNotCloseToOne + other.NumNotCloseToOne,
+        NumOutsideEps=statistics.NumOutsideEps + other.NumOutsideEps,
+        NumOutsideTolerance=statistics.NumOutsideTolerance + other.NumOutsideTolerance,
+        NumZeroSum=statistics.NumZeroSum + other.NumZeroSum,
+        SumDeviationCounts=statistics.SumDeviationCounts + other.SumDeviationCounts,
+    )
+
+
+def report_facies_probability_statistics(
+    statistics: ProbabilityStatistics,
+    tolerance_of_probability_normalisation: float,
+    max_allowed_fraction_with_mismatch: float,
+    facies_names: list,
+    parameter_names: list = None,
+    stop_on_error: bool = True,
+    error_dict: dict = None,
+) -> bool:
+    """Report errors for the probability values of each facies in the same way
+    as check_probability_values. Returns True if errors are found.
+    """
+    err_found = False
+    for i, facies_name in enumerate(facies_names):
+        parameter_name = parameter_names[i] if parameter_names else ' '
+        if report_probability_values(
+            statistics.NumNegative[i],
+            statistics.NumAboveOne[i],
+            statistics.NumCells,
+            tolerance_of_probability_normalisation,
+            max_allowed_fraction_with_mismatch,
+            facies_name,
+            parameter_name,
+            stop_on_error=stop_on_error,
+            error_dict=error_dict,
+        ):
+            err_found = True
+    return err_found
+
+
+def report_normalisation_statistics(
+    statistics: ProbabilityStatistics,
+    tolerance_of_probability_normalisation: float,
+    max_allowed_fraction_with_mismatch: float,
+    stop_on_error: bool = True,
+    error_dict: dict = None,
+    debug_level: Debug = Debug.OFF,
+):
+    """Report errors for the sum of probabilities in the same way
+    as check_probability_normalisation. Returns (normalise_is_necessary, err_found).
+    """
+    normalise_is_necessary = statistics.NumNotCloseToOne > 0
+    err_found = False
+    if debug_level >= Debug.VERBOSE:
+        for line in format_sum_deviation_counts(statistics):
+            print(line)
+    if normalise_is_necessary:
+        err_found = report_probability_normalisation(
+            statistics.NumOutsideTolerance,
+            statistics.NumCells,
+            statistics.MinSum,
+            statistics.MaxSum,
+            tolerance_of_probability_normalisation,
+            max_allowed_fraction_with_mismatch,
+            stop_on_error=stop_on_error,
+            error_dict=error_dict,
+        )
+    return normalise_is_necessary, err_found
+
+
+def format_sum_deviation_counts(statistics: ProbabilityStatistics) -> list:
+    """Returns lines with the number of cells per bin of |sum of probabilities - 1|."""
+    lines = ['--- Number of cells per deviation of sum of probabilities from 1.0:']
+    edges = SUM_DEVIATION_BIN_EDGES
+    for low, high, count in zip(edges[:-1], edges[1:], statistics.SumDeviationCounts):
+        interval = f'[{low:g}, {high:g})' if np.isfinite(high) else f'>= {low:g}'
+        lines.append(f'---   {interval:>16}: {count}')
+    return lines
+
+
+def check_and_normalise_probability(
+    num_facies,
+    prob_parameter_values_for_facies,
+    use_const_probability,
+    cell_index_defined,
+    eps,
+    tolerance_of_probability_normalisation,
+    max_allowed_fraction_with_mismatch,
+    debug_level,
+):
+    """
+    Check that probability cubes or probabilities in input prob_parameter_values_for_facies is
+    normalised. If not normalised, a normalisation is done. The numpy vector
+    cell_index_defined is an index vector. The length is in general less than
+    the total number of active cells for the grid. Typically the
+    cell_index_defined vector represents active cells belonging to a specified
+    zone, but could in principle be any subset of interest of the total set of
+    all active cells. The content of the cell_index_defined array is indices in
+    vectors containing all active cells and is a way of defining a subset of
+    cells.
+    :param num_facies: the number of facies
+    :type num_facies: int
+    :param prob_parameter_values_for_facies: A list of vectors where each vector
+                                     represents probabilities for active grid
+                                     cells. The first entry corresponds to the
+                                     first facies in the facies list and so on.
+                                     [facies_name,values] = prob_parameter_values_for_facies[f]
+                                     where facies_name is facies name and values is
+                                     the probability values per cell.
+                                     Note: If use_const_probability = 1, the values
+                                     list has one element only. and represent
+                                     a constant facies probability.
+                                     If use_const_probability = 0, the values is a list
+                                     of probabilities, one per grid cell.
+    :type prob_parameter_values_for_facies: list
+    :param use_const_probability: Is True if prob_parameter_values_for_facies contains constant
+                         probabilities and False if prob_parameter_values_for_facies
+                         contains vectors of probabilities, one value per
+                         active grid cell.
+    :type use_const_probability: bool
+    :param cell_index_defined: A vector containing indices. cell_index_defined[i]
+                             is an index in the probability vectors in
+                             prob_parameter_values_for_facies. It is a way to defined
+                             a filter of grid cells, a subset of all active
+                             grid cells in the grid.
+    :type cell_index_defined: numpy vector
+    :param eps: Probability tolerance. If normalisation of probability values deviates more than eps from 1.0,
+                calculations are done to normalise the probabilities.
+    :type eps: float value > 0.0 but usually small
+    :param debug_level: Define output print level from the function.
+    :type debug_level: Debug
+    :return: list of vectors, one per facies. The vectors are normalised
+             probabilities for the subset of grid cells defined by the
+             cell_index_defined index vector.
+    """
+    # The list prob_parameter_values_for_facies has items =[name,values]
+    # Define index names for this item
+
+    if debug_level >= Debug.VERY_VERBOSE:
+        if use_const_probability:
+            print('--- Check normalisation of probabilities.')
+        else:
+            print('--- Check normalisation of probability cubes.')
+
+    probability_defined = []
+    num_cell_with_modified_probability = 0
+    if use_const_probability:
+        for f in range(num_facies):
+            item = prob_parameter_values_for_facies[f]
+            facies_name = item.name
+            values = item.value
+            if debug_level >= Debug.VERY_VERBOSE:
+                print(
+                    f'--- Facies: {facies_name} with constant probability:{values[0]} '
+                )
+            probability_defined.append(values[0])
+
+        # Check that probabilities sum to 1
+        psum = probability_defined[0]
+        for f in range(1, num_facies):
+            psum = psum + probability_defined[f]
+        if abs(psum - 1.0) > eps:
+            raise ValueError(
+                f'Probabilities for facies are not normalized for this zone (Total: {psum})'
+            )
+
+    else:
+        num_defined_cells = len(cell_index_defined)
+        facies_names = [
+            prob_parameter_values_for_facies[f].name for f in range(num_facies)
+        ]
+
+        # Probability per facies per defined cell
+        probabilities = np.stack(
+            [
+                prob_parameter_values_for_facies[f].value[cell_index_defined]
+                for f in range(num_facies)
+            ]
+        )
+
+        # Check that probabilities are in interval [0,1]. If not, set to 0 if negative and 1 if larger than 1.
+        # The sum of probabilities per defined cell and the statistics used to check them are
+        # calculated in the same pass.
+        psum, statistics = validate_probabilities(
+            probabilities, eps, tolerance_of_probability_normalisation
+        )
+        if debug_level >= Debug.VERY_VERBOSE:
+            for f, facies_name in enumerate(facies_names):
+                print(
+                    f'--- Facies: {facies_name}  '
+                    f'Min probability: {statistics.MinValues[f]}  '
+                    f'Max probability: {statistics.MaxValues[f]}'
+                )
+
+        # Error message if too large fraction of input values are outside interval [0,1] also when using tolerance.
+        report_facies_probability_statistics(
+            statistics,
+            tolerance_of_probability_normalisation,
+            max_allowed_fraction_with_mismatch,
+            facies_names,
+        )
+
+        normalise_is_necessary, _ = report_normalisation_statistics(
+            statistics,
+            tolerance_of_probability_normalisation,
+            max_allowed_fraction_with_mismatch,
+        )
+        if normalise_is_necessary:
+            if debug_level >= Debug.VERBOSE:
+                print('-- Normalise probability cubes.')
+
+            # Number of cells with modified probabilities
+            num_cell_with_modified_probability = statistics.NumOutsideEps
+
+            # Normalisation
+            probabilities /= psum
+
+            if debug_level >= Debug.VERY_VERBOSE:
+                print(
+                    f'--- Number of grid cells in zone is:                           {num_defined_cells}\n'
+                    f'--- Number of grid cells which is recalculated and normalized: {num_cell_with_modified_probability}'
+                )
+        probability_defined = list(probabilities)
+    return probability_defined, num_cell_with_modified_probability
+
+
+def report_probability_values(
+    num_negative: int,
+    num_above_one: int,
+    num_defined_cells: int,
+    tolerance_of_probability_normalisation: float,
+    max_allowed_fraction_with_mismatch: float,
+    facies_name: str = ' ',
+    parameter_name: str = ' ',
+    stop_on_error: bool = True,
+    error_dict: dict = None,
+) -> bool:
+    """Report errors if the fraction of cells with probability values below 0 or above 1
+    (outside the tolerance) is too large. The number of cells may be counted in blocks
+    of cells before they are reported. Returns True if errors are found.
+    """
+    err_found = False
     negative_fraction = num_negative / num_defined_cells
     if negative_fraction > max_allowed_fraction_with_mismatch:
         err_list = []
@@ -102,13 +457,7 @@ def check_probability_values(
         error_dict['Message'] += err_list
         error_dict['Error'] = True
         err_found = True
-
-    prob_values[prob_values < 0.0] = 0.0
-    prob_values[prob_values > 1.0] = 1.0
-    if stop_on_error:
-        return prob_values
-    else:
-        return prob_values, error_dict, err_found
+    return err_found
 
 
 def check_probability_normalisation(
@@ -134,52 +483,71 @@ def check_probability_normalisation(
             sum_probability_values > max_acceptable_prob_sum
         )
         unacceptable_prob_normalisation = check_sum_prob.sum()
-        unacceptable_prob_normalisation_fraction = (
-            unacceptable_prob_normalisation / num_defined_cells
+        err_found = report_probability_normalisation(
+            unacceptable_prob_normalisation,
+            num_defined_cells,
+            sum_probability_values.min(),
+            sum_probability_values.max(),
+            tolerance_of_probability_normalisation,
+            max_allowed_fraction_with_mismatch,
+            stop_on_error=stop_on_error,
+            error_dict=error_dict,
         )
 
-        if (
-            unacceptable_prob_normalisation_fraction
-            > max_allowed_fraction_with_mismatch
-        ):
-            largest_prob_sum = sum_probability_values.max()
-            smallest_prob_sum = sum_probability_values.min()
-            err_list = []
-            err_list.append('Check normalization of facies probabilities.')
-            err_list.append(
-                f'Tolerance interval is: [{low_tolerance}, {high_tolerance}]'
-            )
-            err_list.append(
-                f'Number of grid cells with probabilities summing up to value outside tolerance interval: {unacceptable_prob_normalisation}'
-            )
-            err_list.append(
-                f'Fraction of grid cells outside tolerance: {unacceptable_prob_normalisation_fraction * 100:.2f}%'
-            )
-            err_list.append(
-                f'Max limit of mismatch fraction specified: {max_allowed_fraction_with_mismatch * 100:.2f}%'
-            )
-            err_list.append(f'Minimum sum of probabilities found: {smallest_prob_sum}')
-            err_list.append(f'Maximum sum of probability found: {largest_prob_sum}')
-            err_list.append(
-                'If you think the probability cubes are OK anyway, you may increase the maximum fraction in project settings to '
-            )
-            err_list.append(
-                f'at least {unacceptable_prob_normalisation_fraction * 100:.2f}%.'
-            )
-            if stop_on_error:
-                for item in err_list:
-                    print(item)
-                raise NormalisationError('Normalisation errors found')
-            error_dict['Message'] += err_list
-            error_dict['Error'] = True
-            err_found = True
-
     if stop_on_error:
         return normalise_is_necessary
     else:
         return normalise_is_necessary, error_dict, err_found
 
 
+def report_probability_normalisation(
+    unacceptable_prob_normalisation: int,
+    num_defined_cells: int,
+    smallest_prob_sum: float,
+    largest_prob_sum: float,
+    tolerance_of_probability_normalisation: float,
+    max_allowed_fraction_with_mismatch: float,
+    stop_on_error: bool = True,
+    error_dict: dict = None,
+) -> bool:
+    """Report errors if the fraction of cells where the sum of the probabilities is outside
+    the tolerance interval is too large. Returns True if errors are found.
+    """
+    low_tolerance = 1.0 - tolerance_of_probability_normalisation
+    high_tolerance = 1.0 + tolerance_of_probability_normalisation
+    unacceptable_prob_normalisation_fraction = (
+        unacceptable_prob_normalisation / num_defined_cells
+    )
+    if unacceptable_prob_normalisation_fraction <= max_allowed_fraction_with_mismatch:
+        return False
+
+    err_list = []
+    err_list.append('Check normalization of facies probabilities.')
+    err_list.append(f'Tolerance interval is: [{low_tolerance}, {high_tolerance}]')
+    err_list.append(
+        f'Number of grid cells with probabilities summing up to value outside tolerance interval: {unacceptable_prob_normalisation}'
+    )
+    err_list.append(
+        f'Fraction of grid cells outside tolerance: {unacceptable_prob_normalisation_fraction * 100:.2f}%'
+    )
+    err_list.append(
+        f'Max limit of mismatch fraction specified: {max_allowed_fraction_with_mismatch * 100:.2f}%'
+    )
+    err_list.append(f'Minimum sum of probabilities found: {smallest_prob_sum}')
+    err_list.append(f'Maximum sum of probability found: {largest_prob_sum}')
+    err_list.append(
+        'If you think the probability cubes are OK anyway, you may increase the maximum fraction in project settings to '
+    )
+    err_list.append(f'at least {unacceptable_prob_normalisation_fraction * 100:.2f}%.')
+    if stop_on_error:
+        for item in err_list:
+            print(item)
+        raise NormalisationError('Normalisation errors found')
+    error_dict['Message'] += err_list
+    error_dict['Error'] = True
+    return True
+
+
 def compare(
     source: str,
     reference: str,
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""Lightweight readers for the field files exchanged with ERT.
+Only the subset of ROFF binary and GRDECL keyword formats written for APS
+fields is supported. The values are returned as float32 arrays with shape
+(nx, ny, nz) in the same index order as xtgeo.GridProperty.values.
+
+Fields that are only exchanged between APS jobs can use the compact NPY format
+(numpy binary file with float32 values in the same index order) which is
+read back memory mapped.
+"""
+
+import re
+import struct
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+ROFF_UNDEFINED_FLOAT = -999.0
+
+_ROFF_SCALAR_SIZES = {
+    'bool': 1,
+    'byte': 1,
+    'int': 4,
+    'float': 4,
+    'double': 8,
+}
+_ROFF_FLOAT_TYPES = {
+    'float': 'f4',
+    'double': 'f8',
+}
+
+
+class UnsupportedFieldFileError(ValueError):
+    """The file is valid, but uses parts of the format not supported by the fast readers."""
+
+
+def _read_cstring(file) -> str:
+    chars = bytearray()
+    while True:
+        char = file.read(1)
+        if not char:
+            raise EOFError(f'Unexpected end of file in {file.name}')
+        if char == b'\x00':
+            return chars.decode('ascii')
+        chars += char
+
+
+def _find_roff_parameter(file, name: Optional[str]):
+    """Scan the tags of a binary ROFF file until the data of the
+    parameter is found and return (dimensions, dtype, offset, count)
+    where offset is the position of the first value in the file."""
+    if file.read(9) != b'roff-bin\x00':
+        raise UnsupportedFieldFileError(
+            f'The file {file.name} is not a binary ROFF file'
+        )
+    endian = '<'
+    dimensions = {}
+    tag = None
+    parameter_name = None
+    while True:
+        token = _read_cstring(file)
+        if token.startswith('#'):
+            # Comment
+            continue
+        if token == 'tag':
+            tag = _read_cstring(file)
+            parameter_name = None
+            if tag == 'eof':
+                break
+        elif token == 'endtag':
+            tag = None
+        elif token == 'array':
+            data_type = _read_cstring(file)
+            key = _read_cstring(file)
+            (count,) = struct.unpack(endian + 'i', file.read(4))
+            if (
+                tag == 'parameter'
+                and key == 'data'
+                and (name is None or parameter_name == name)
+            ):
+                if data_type not in _ROFF_FLOAT_TYPES:
+                    raise UnsupportedFieldFileError(
+                        f'Parameter {parameter_name} in {file.name} has data type {data_type}. '
+                        'Only continuous parameters are supported.'
+                    )
+                dtype = np.dtype(endian + _ROFF_FLOAT_TYPES[data_type])
+                return dimensions, dtype, file.tell(), count
+            # Skip the array
+            if data_type == 'char':
+                for _ in range(count):
+                    _read_cstring(file)
+            else:
+                file.seek(count * _ROFF_SCALAR_SIZES[data_type], 1)
+        else:
+            # Scalar value: <type> <key> <value>
+            data_type = token
+            key = _read_cstring(file)
+            if data_type == 'char':
+                value = _read_cstring(file)
+            else:
+                value = file.read(_ROFF_SCALAR_SIZES[data_type])
+            if tag == 'filedata' and key == 'byteswaptest':
+                if struct.unpack('<i', value)[0] != 1:
+                    endian = '>'
+            elif tag == 'dimensions' and data_type == 'int':
+                (dimensions[key],) = struct.unpack(endian + 'i', value)
+            elif tag == 'parameter' and key == 'name':
+                parameter_name = value
+    raise KeyError(f'Can not find parameter {name} in file {file.name}')
+
+
+def read_roff_field(
+    path: Union[str, Path],
+    name: Optional[str] = None,
+    use_memmap: bool = True,
+) -> np.ndarray:
+    """Read a continuous parameter from a binary ROFF file.
+    If name is None, the first parameter in the file is returned.
+    The parameter values are memory mapped from file if use_memmap is True,
+    else they are read into one array. Undefined values (-999.0) are masked.
+    """
+    path = Path(path)
+    with open(path, 'rb') as file:
+        dimensions, dtype, offset, count = _find_roff_parameter(file, name)
+    try:
+        nx, ny, nz = dimensions['nX'], dimensions['nY'], dimensions['nZ']
+    except KeyError:
+        raise UnsupportedFieldFileError(
+            f'Missing dimensions before parameter data in {path}'
+        )
+    if count != nx * ny * nz:
+        raise ValueError(
+            f'Number of values ({count}) in {path} does not match '
+            f'the dimensions ({nx}, {ny}, {nz})'
+        )
+    if use_memmap:
+        values = np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(count,))
+    else:
+        with open(path, 'rb') as file:
+            file.seek(offset)
+            values = np.fromfile(file, dtype=dtype, count=count)
+    if dtype != np.float32:
+        values = values.astype(np.float32)
+    # ROFF store the layers from bottom to top with the layer index running fastest
+    values = np.flip(values.reshape((nx, ny, nz)), -1)
+    undefined = values == ROFF_UNDEFINED_FLOAT
+    if undefined.any():
+        return np.ma.masked_array(values, mask=undefined)
+    return values
+
+
+def read_grdecl_field(
+    path: Union[str, Path],
+    name: str,
+    dimensions: Tuple[int, int, int],
+) -> np.ndarray:
+    """Read a keyword with continuous values from an ASCII GRDECL file.
+    The values in the file are in Fortran order and are returned
+    as a float32 array with shape dimensions = (nx, ny, nz).
+    Repeat counts of the form N*value are supported,
+    while default values of the form N* raise UnsupportedFieldFileError.
+    """
+    path = Path(path)
+    with open(path, 'r', encoding='utf-8') as file:
+        text = file.read()
+    if '--' in text:
+        # Remove comments
+        text = '\n'.join(line.split('--', 1)[0] for line in text.splitlines())
+    match = re.search(rf'^\s*{re.escape(name)}\s*$', text, flags=re.MULTILINE)
+    if match is None:
+        raise KeyError(f'Can not find keyword {name} in file {path}')
+    end = text.find('/', match.end())
+    if end < 0:
+        end = len(text)
+    tokens = text[match.end() : end].split()
+
+    if any('*' in token for token in tokens):
+        counts = []
+        values = []
+        for token in tokens:
+            if '*' in token:
+                count, value = token.split('*')
+                if not value:
+                    # N* means N default values, which are defined by the simulator
+                    raise UnsupportedFieldFileError(
+                        f'Repeat count without value ({token}) for {name} in {path} '
+                        'is not supported'
+                    )
+                counts.append(int(count))
+                values.append(value)
+            else:
+                counts.append(1)
+                values.append(token)
+        values = np.repeat(np.array(values, dtype=np.float32), counts)
+    else:
+        values = np.array(tokens, dtype=np.float32)
+
+    nx, ny, nz = dimensions
+    if values.size != nx * ny * nz:
+        raise ValueError(
+            f'Number of values ({values.size}) for {name} in {path} does not match '
+            f'the dimensions ({nx}, {ny}, {nz})'
+        )
+    return values.reshape((nx, ny, nz), order='F')
+
+
+def write_npy_field(path: Union[str, Path], values: np.ndarray) -> None:
+    """Write field values with shape (nx, ny, nz) as float32 to a numpy binary file."""
+    values = np.ma.filled(values, ROFF_UNDEFINED_FLOAT)
+    # Write to the exact file name, np.save will otherwise append .npy
+    with open(path, 'wb') as file:
+        np.save(file, np.asarray(values, dtype=np.float32))
+
+
+def read_npy_field(path: Union[str, Path], use_memmap: bool = True) -> np.ndarray:
+    """Read field values written by write_npy_field.
+    Undefined values (-999.0) are masked."""
+    values = np.load(path, mmap_mode='r' if use_memmap else None)
+    if values.ndim != 3:
+        raise ValueError(
+            f'Expected a 3D array in {path}, but the array has shape {values.shape}'
+        )
+    undefined = values == ROFF_UNDEFINED_FLOAT
+    if undefined.any():
+        return np.ma.masked_array(values, mask=undefined)
+    return values
@@ -18,8 +18,6 @@ from typing import (
 from pathlib import Path
 
 import numpy as np
-import xtgeo
-from xtgeo.grid3d import GridProperty
 
 from roxar import Project
 from roxar.grids import Grid3D, GridModel
@@ -36,6 +34,8 @@ from aps.utils.aps_config import APSConfig
 if TYPE_CHECKING:
     from typing import Literal
 
+    from xtgeo.grid3d import GridProperty
+
     # Literal was introduced in Python 3.8
     Handedness = Literal['left', 'right']
 
@@ -43,7 +43,10 @@ if TYPE_CHECKING:
 def create_get_property(
     project: Project,
     aps_model: Optional[Union[APSModel, str]],
-) -> Callable[[str, Optional[str]], GridProperty]:
+) -> Callable[[str, Optional[str]], 'GridProperty']:
+    # xtgeo is slow to import, and only needed when the properties are read
+    import xtgeo
+
     def get_property(name, grid_name=None):
         if grid_name is None:
             if aps_model is None:
@@ -570,7 +573,7 @@ def fmu_aware_model_file(*, fmu_mode: bool, **kwargs) -> ContextManager[str]:
     ertbox_grid_model_name = kwargs['fmu_simulation_grid_name']
     debug_level = kwargs['debug_level']
     # Instantiate the APS model anew, as it may have been modified by `global_variables`
-    aps_model = kwargs['aps_model'] = APSModel(model_file)
+    aps_model = kwargs['aps_model'] = APSModel.from_cache(model_file)
 
     changes = FmuModelChanges(
         [
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""Helper functions for simulation of gaussian fields with gaussianfft.
+The functions do not depend on RMS, and gaussianfft is only imported when it is used.
+
+Seed files have one line per simulated gaussian field of the form::
+
+    <gauss field name> <zone number> <region number> <start seed>
+
+and are named seed_list_<realization number + 1>.dat where the realization number is counted from 0.
+"""
+
+from pathlib import Path
+from typing import Dict, Tuple, Union
+
+
+def define_variogram(variogram, azimuth_value_sim_box):
+    import gaussianfft
+
+    variogram_name = variogram.type.name.lower()
+    # Note: Since RMS is a left-handed coordinate system and gaussianfft treat the coordinate
+    # system as right-handed, we have to transform the azimuth angle to 90-azimuth
+    # to get it correct in RMS.
+    azimuth_in_gaussianfft = 90.0 - azimuth_value_sim_box
+    args = [
+        variogram.ranges.main,
+        variogram.ranges.perpendicular,
+        variogram.ranges.vertical,
+        azimuth_in_gaussianfft,
+        variogram.angles.dip,
+    ]
+    if variogram_name == 'general_exponential':
+        args.append(variogram.power)
+    args = [float(arg) for arg in args]
+
+    return gaussianfft.variogram(variogram_name, *args)
+
+
+def get_seed_file_name(realization_number: int) -> str:
+    """Name of the seed file for the realization (counted from 0)."""
+    return f'seed_list_{realization_number + 1}.dat'
+
+
+def read_seed_file(
+    seed_file_name: Union[str, Path],
+) -> Dict[Tuple[str, int, int], int]:
+    """Read the start seed for each (gauss field name, zone number, region number) from a seed file."""
+    try:
+        with open(seed_file_name, 'r', encoding='utf-8') as file:
+            words = file.read().split()
+    except OSError:
+        raise IOError(f'Can not open and read seed file: {seed_file_name}')
+    if len(words) % 4 != 0:
+        raise IOError(
+            f'The seed file: {seed_file_name} must have lines with: '
+            'gauss field name, zone number, region number and seed'
+        )
+    seeds = {}
+    for i in range(0, len(words), 4):
+        gauss_field_name, zone_number, region_number, seed = words[i : i + 4]
+        seeds[(gauss_field_name, int(zone_number), int(region_number))] = int(seed)
+    return seeds
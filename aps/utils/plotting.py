@@ -1,6 +1,5 @@
 # -*- coding: utf-8 -*-
 import numpy as np
-import scipy
 from matplotlib import pyplot as plt
 
 from aps.utils.constants.simple import CrossSectionType
@@ -46,9 +45,9 @@ def plot_gaussian_field(
 
     if rotate_plot:
         assert azimuth_grid_orientation is not None
-        alpha_map = scipy.ndimage.interpolation.rotate(
-            alpha_map, azimuth_grid_orientation
-        )
+        from scipy.ndimage import rotate
+
+        alpha_map = rotate(alpha_map, azimuth_grid_orientation)
 
     extent, size = get_plot_sizing(cross_section_type, lengths, vertical_scale)
     im = ax.imshow(alpha_map, extent=extent, **kwargs)
@@ -122,7 +121,9 @@ def plot_facies(
     facies_map = fmap
     if rotate_plot:
         assert azimuth_grid_orientation is not None
-        facies_map = scipy.ndimage.interpolation.rotate(fmap, azimuth_grid_orientation)
+        from scipy.ndimage import rotate
+
+        facies_map = rotate(fmap, azimuth_grid_orientation)
 
     kwargs = {
         'interpolation': 'none',
@@ -0,0 +1,423 @@
+#!/bin/env python
+# -*- coding: utf-8 -*-
+"""Probability logs for facies calculated from facies logs in blocked wells.
+The functions use numpy arrays for the zone, region and facies logs, and do not depend on RMS.
+Masked values and negative values in the logs are undefined, and give undefined probabilities.
+
+The probabilities are either binary (1 for the observed facies and 0 for the other modelled facies),
+or given by conditional probabilities P(modelled facies | observed facies) specified per zone
+as a dictionary with keys (zone_number, modelled_facies_name, observed_facies_name).
+For each (zone, region, observed facies code) there is one row of probabilities for the
+probability logs, and the probabilities for all cells are looked up in a table of these rows.
+
+Example of use for a set of blocked wells (the logs for several wells may be concatenated)::
+
+    facies_names, probabilities = create_probability_logs(
+        zone_values, facies_values, code_names, {(1, 0): ['F1', 'F2'], (2, 0): ['F1', 'F3']}
+    )
+
+where probabilities[i] is the probability log for facies_names[i] which is NaN where undefined.
+"""
+
+import collections
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from aps.utils.constants.simple import Debug, ProbabilityTolerances
+
+ZoneRegion = Tuple[int, int]
+ConditionalProbabilities = Dict[Tuple[int, str, str], float]
+
+
+def get_facies_code(code_names, facies_name):
+    for code, name in code_names.items():
+        if name == facies_name:
+            return code
+    return None
+
+
+def undefined_as_negative(log_values):
+    """Log values as an integer numpy array where masked (undefined) values are -1."""
+    if log_values is None:
+        return None
+    return np.ma.filled(np.ma.asarray(log_values), -1).astype(np.int64)
+
+
+def probability_log_facies(
+    modelling_facies_per_zone_region: Dict[ZoneRegion, List[str]],
+) -> List[str]:
+    """The modelled facies for all zones and regions, one probability log per facies."""
+    facies_names = []
+    for key in sorted(modelling_facies_per_zone_region):
+        for facies_name in modelling_facies_per_zone_region[key]:
+            if facies_name not in facies_names:
+                facies_names.append(facies_name)
+    return facies_names
+
+
+def binary_probability_rows(
+    modelling_facies_per_zone_region: Dict[ZoneRegion, List[str]],
+    code_names: Dict[int, str],
+    zone_values: np.ndarray,
+    region_values: Optional[np.ndarray],
+    facies_values: np.ndarray,
+) -> Dict[Tuple[int, int, int], List[float]]:
+    """Rows of binary probabilities for the probability logs given by probability_log_facies.
+    The probability is 1 for the observed facies and 0 for the other facies, and is defined for the
+    observed modelled facies in the (zone, region) having some observed modelled facies."""
+    log_facies_codes = [
+        get_facies_code(code_names, facies_name)
+        for facies_name in probability_log_facies(modelling_facies_per_zone_region)
+    ]
+    modelled_facies_codes_observed = check_observed_facies_per_zone(
+        collections.OrderedDict(sorted(modelling_facies_per_zone_region.items())),
+        code_names,
+        facies_values,
+        region_values,
+        zone_values,
+    )
+    probability_rows = {}
+    for key, observed in modelled_facies_codes_observed.items():
+        facies_code_in_log = key[2]
+        if observed != 0 and facies_code_in_log >= 0:
+            probability_rows[key] = [
+                1.0 if facies_code == facies_code_in_log else 0.0
+                for facies_code in log_facies_codes
+            ]
+    return probability_rows
+
+
+def conditional_probability_rows(
+    conditional_prob_facies: ConditionalProbabilities,
+    code_names: Dict[int, str],
+    log_facies: List[str],
+) -> Dict[Tuple[int, int, int], np.ndarray]:
+    """Rows of the specified conditional probabilities for the probability logs for the facies log_facies.
+    Probabilities that are not specified are undefined (NaN). Regions are not used (region number 0)."""
+    probability_rows = {}
+    for (
+        zone_number,
+        facies_name,
+        facies_name_in_log,
+    ), prob in conditional_prob_facies.items():
+        facies_code_in_log = get_facies_code(code_names, facies_name_in_log)
+        if facies_code_in_log is None or facies_name not in log_facies:
+            continue
+        key = (zone_number, 0, facies_code_in_log)
+        if key not in probability_rows:
+            probability_rows[key] = np.full(len(log_facies), np.nan)
+        probability_rows[key][log_facies.index(facies_name)] = prob
+    return probability_rows
+
+
+def _probability_table(probability_rows, num_logs):
+    """Lookup table with the row of probabilities for each key (zone, region, observed facies code).
+    Returns the sorted zone numbers, region numbers and facies codes used in the keys,
+    and a dense table (zone, region, facies code, log) where undefined probabilities are NaN.
+    Keys with negative values are not used."""
+    keys = [key for key in probability_rows if min(key) >= 0]
+    axes = [
+        np.unique(np.array([key[i] for key in keys], dtype=np.int64)) for i in range(3)
+    ]
+    table = np.full(
+        tuple(len(values) for values in axes) + (num_logs,), np.nan, np.float32
+    )
+    for key in keys:
+        index = tuple(np.searchsorted(values, key[i]) for i, values in enumerate(axes))
+        table[index] = probability_rows[key]
+    return axes, table
+
+
+def _probabilities_from_table(
+    probability_table, zone_values, region_values, facies_values
+):
+    """Look up the probabilities for all blocked well cells in the table from _probability_table.
+    Returns an array (num_logs, num_cells) which is NaN for cells with undefined probability."""
+    axes, table = probability_table
+    num_logs = table.shape[-1]
+    if region_values is None:
+        region_values = np.zeros_like(zone_values)
+    defined = (zone_values > 0) & (region_values >= 0) & (facies_values >= 0)
+    indices = []
+    for values, axis_values in zip([zone_values, region_values, facies_values], axes):
+        index = np.searchsorted(axis_values, values)
+        found = index < len(axis_values)
+        found[found] = axis_values[index[found]] == values[found]
+        defined &= found
+        indices.append(index)
+    probabilities = np.full((num_logs, len(zone_values)), np.nan, np.float32)
+    probabilities[:, defined] = table[
+        indices[0][defined], indices[1][defined], indices[2][defined]
+    ].T
+    return probabilities
+
+
+def create_probability_logs(
+    zone_values: np.ndarray,
+    facies_values: np.ndarray,
+    code_names: Dict[int, str],
+    modelling_facies_per_zone_region: Dict[ZoneRegion, List[str]],
+    region_values: Optional[np.ndarray] = None,
+    conditional_prob_facies: Optional[ConditionalProbabilities] = None,
+) -> Tuple[List[str], np.ndarray]:
+    """Calculate probability logs from the zone, (region) and facies logs.
+    The logs are (masked) arrays with one value per blocked well cell, or 2D arrays with one row per realization.
+    Returns the modelled facies names and the probabilities as an array with shape (num_facies, ) + shape of the logs,
+    where undefined values are NaN. The conditional probabilities should be checked by check_conditional_probabilities,
+    and can not be used together with regions."""
+    if conditional_prob_facies is not None and region_values is not None:
+        raise ValueError('Conditional probabilities can not be used with regions')
+    zone_values = undefined_as_negative(zone_values)
+    facies_values = undefined_as_negative(facies_values)
+    region_values = undefined_as_negative(region_values)
+    if zone_values.shape != facies_values.shape or (
+        region_values is not None and zone_values.shape != region_values.shape
+    ):
+        raise ValueError('The zone, region and facies logs must have the same shape')
+
+    log_facies = probability_log_facies(modelling_facies_per_zone_region)
+    if zone_values.ndim == 2:
+        # One set of logs per realization
+        probabilities = np.stack(
+            [
+                create_probability_logs(
+                    zone_values[i],
+                    facies_values[i],
+                    code_names,
+                    modelling_facies_per_zone_region,
+                    None if region_values is None else region_values[i],
+                    conditional_prob_facies,
+                )[1]
+                for i in range(len(zone_values))
+            ],
+            axis=1,
+        )
+        return log_facies, probabilities
+
+    if conditional_prob_facies is None:
+        probability_rows = binary_probability_rows(
+            modelling_facies_per_zone_region,
+            code_names,
+            zone_values,
+            region_values,
+            facies_values,
+        )
+    else:
+        probability_rows = conditional_probability_rows(
+            conditional_prob_facies, code_names, log_facies
+        )
+    probabilities = _probabilities_from_table(
+        _probability_table(probability_rows, len(log_facies)),
+        zone_values,
+        region_values,
+        facies_values,
+    )
+    return log_facies, probabilities
+
+
+def check_conditional_probabilities(
+    conditional_prob_facies: ConditionalProbabilities,
+    modelling_facies_per_zone_region: Dict[ZoneRegion, List[str]],
+    facies_per_zone_region: Dict[ZoneRegion, List[str]],
+) -> None:
+    """Check that conditional probabilities are specified for all modelled facies given the observed facies
+    (facies_per_zone_region) in each zone, and that they sum to 1. Unused conditional probabilities are reported."""
+    warning_msg = []
+    for key, facies_for_modelling in sorted(modelling_facies_per_zone_region.items()):
+        (zone_number, region_number) = key
+        for name in facies_per_zone_region[key]:
+            sum_prob = 0.0
+            err_list = []
+            for facies_name in facies_for_modelling:
+                key_for_cond_prob = (zone_number, facies_name, name)
+                if key_for_cond_prob not in conditional_prob_facies:
+                    # Check if the specified facies and facies to condition to belongs to the zone
+                    err_list.append(
+                        f'  P({facies_name} | {name} ) in zone {zone_number}'
+                    )
+                else:
+                    prob = conditional_prob_facies[key_for_cond_prob]
+                    sum_prob = sum_prob + prob
+            if err_list:
+                print(
+                    f'Missing specification of conditional probabilities of modelled facies conditioned to {name} :'
+                )
+                for s in err_list:
+                    print(f' {s}')
+                raise ValueError('Need specification of conditional probabilities')
+
+            if abs(sum_prob - 1.0) > ProbabilityTolerances.MAX_DEVIATION_BEFORE_ACTION:
+                raise ValueError(
+                    f'Sum of the conditional probabilities in zone: {zone_number} '
+                    f'conditioned to: {name} is {sum_prob} and not 1. Check specification.'
+                )
+        # Check if there are specified conditional probabilities given
+        # interpreted facies that does not exist and give a warning that this will be igored.
+        for cond_key in conditional_prob_facies:
+            (znr, fmodelled, finterpreted) = cond_key
+            if znr == zone_number:
+                if finterpreted not in facies_per_zone_region[key]:
+                    warning_msg.append(
+                        f'   P( {fmodelled} |{finterpreted}) '
+                        f'specified but {finterpreted} is not observed in zone {zone_number}  '
+                    )
+    if warning_msg:
+        print('Warnings: Unused conditional probabilities:')
+        for msg in warning_msg:
+            print(msg)
+        print('\n')
+
+
+def check_observed_facies_per_zone(
+    specified_modelled_facies_per_zone_region_dict,
+    code_names,
+    facies_log_values,
+    region_log_values,
+    zone_log_values,
+):
+    # Find which modelled facies is observed or not for each zone, region
+    zones_regions_specified = list(
+        specified_modelled_facies_per_zone_region_dict.keys()
+    )
+    number_of_values_in_facies_log = len(facies_log_values)
+    number_of_values_in_zone_log = len(zone_log_values)
+    assert number_of_values_in_facies_log == number_of_values_in_zone_log
+    if region_log_values is not None:
+        number_of_values_in_region_log = len(region_log_values)
+        assert number_of_values_in_facies_log == number_of_values_in_region_log
+
+    modelled_facies_codes_observed_in_zone_region = {}
+    index_all_values = np.arange(number_of_values_in_zone_log)
+    for key in zones_regions_specified:
+        (zone_number, region_number) = key
+        modelled_facies = specified_modelled_facies_per_zone_region_dict[key]
+        number_of_modelled_facies_observed_in_zone_region = 0
+        for facies_name in modelled_facies:
+            facies_code = get_facies_code(code_names, facies_name)
+            if facies_code is not None:
+                # This modelled facies is observed in facies log in some zone
+                if region_log_values is None:
+                    index_selected_values = index_all_values[
+                        (zone_log_values == zone_number)
+                        & (facies_log_values == facies_code)
+                    ]
+                else:
+                    index_selected_values = index_all_values[
+                        (zone_log_values == zone_number)
+                        & (region_log_values == region_number)
+                        & (facies_log_values == facies_code)
+                    ]
+                if len(index_selected_values) > 0:
+                    # This facies is both defined as a modelled facies and also observed for current zone
+                    key_obs = (zone_number, region_number, facies_code)
+                    modelled_facies_codes_observed_in_zone_region[key_obs] = 1
+                    number_of_modelled_facies_observed_in_zone_region = (
+                        number_of_modelled_facies_observed_in_zone_region + 1
+                    )
+                else:
+                    # This facies is defined as a modelled facies but not observed for current zone.
+                    key_obs = (zone_number, region_number, facies_code)
+                    modelled_facies_codes_observed_in_zone_region[key_obs] = 0
+            else:
+                # This facies is defined as a modelled facies but does not exist in the facies log at all
+                facies_code = -1
+                key_obs = (zone_number, region_number, facies_code)
+                modelled_facies_codes_observed_in_zone_region[key_obs] = 0
+
+        codes = list(code_names.keys())
+        keys = modelled_facies_codes_observed_in_zone_region.keys()
+        # Include also facies code -1 which is defined as the code for all modelled facies not found in the facies log
+        codes.append(-1)
+        if number_of_modelled_facies_observed_in_zone_region > 0:
+            for facies_code in codes:
+                key_obs = (zone_number, region_number, facies_code)
+                if key_obs in keys:
+                    if modelled_facies_codes_observed_in_zone_region[key_obs] == 0:
+                        # This facies is defined as modelled but not observed and there exist
+                        # modelled facies that is observed for the same zone
+                        # Need to distinguish this facies from unobserved facies in zones that
+                        # does not have any observed facies at all.
+                        modelled_facies_codes_observed_in_zone_region[key_obs] = -1
+
+    return modelled_facies_codes_observed_in_zone_region
+
+
+def check_probability_logs(
+    probability_log_names,
+    probability_values,
+    code_names,
+    zone_log_values,
+    region_log_values,
+    modelling_facies_per_zone_region,
+    debug_level=Debug.VERBOSE,
+):
+    """Check that the probability values (masked arrays for each modelled facies) sum to 1 in each zone (region)."""
+    print('\nCheck created probability logs:\n')
+    use_regions = region_log_values is not None
+    normalization_error = {}
+    count_zones = 0
+    for key, modelling_facies in modelling_facies_per_zone_region.items():
+        (zone_number, region_number) = key
+        if use_regions and region_number <= 0:
+            raise ValueError(f'Region log should only have integer region values > 0')
+        sum_values = None
+        number_of_active_values = 0
+        for index, facies_name in enumerate(modelling_facies):
+            prob_values = probability_values[facies_name]
+            if use_regions:
+                selected_prob_values = prob_values[
+                    (zone_log_values == zone_number)
+                    & (region_log_values == region_number)
+                ]
+            else:
+                selected_prob_values = prob_values[zone_log_values == zone_number]
+            if index == 0:
+                sum_values = selected_prob_values
+                number_of_active_values = len(sum_values)
+            else:
+                if number_of_active_values > 0:
+                    sum_values = sum_values + selected_prob_values
+
+        if number_of_active_values == 0:
+            if use_regions:
+                print(
+                    f'Zone, Region: ({zone_number},{region_number}) has no blocked well cells with probability logs.'
+                )
+            else:
+                print(
+                    f'Zone: {zone_number} has no blocked well cells with probability logs.'
+                )
+        else:
+            # Check if the sum is 1 for all entries in the numpy array
+            eps = 0.001
+            check_value = (sum_values > (1.0 + eps)) | (sum_values < (1.0 - eps))
+            num_cell_with_not_normalized_prob = check_value.sum()
+            normalization_error[key] = num_cell_with_not_normalized_prob
+            if num_cell_with_not_normalized_prob > 0:
+                count_zones = count_zones + 1
+    if count_zones == 0:
+        print('Normalization of probability logs is OK')
+    else:
+        for key, modelling_facies in modelling_facies_per_zone_region.items():
+            (zone_number, region_number) = key
+            if normalization_error[key] > 0:
+                if use_regions:
+                    print(
+                        f'Zone, Region: ({zone_number}, {region_number})  Number of cell values in BW where sum of probability logs '
+                        f'has values outside interval [{1 - eps}, {1 + eps}]: {normalization_error[key]}'
+                    )
+                else:
+                    print(
+                        f'Zone: {zone_number} Number of cell values in BW where sum of probability logs '
+                        f'has values outside interval [{1 - eps}, {1 + eps}]: {normalization_error[key]}'
+                    )
+            if debug_level >= Debug.VERBOSE:
+                for i in range(len(sum_values)):
+                    text = str(i)
+                    if sum_values[i] > (1 + eps) or sum_values[i] < (1 - eps):
+                        for facies in modelling_facies:
+                            p = probability_values[facies][i]
+                            text = text + ' ' + '(' + facies + ' ' + str(p) + ')' + '  '
+                        text = text + '  sum= ' + str(sum_values[i])
+                    print(text)
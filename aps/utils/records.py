@@ -31,6 +31,24 @@ FaciesRecord = namedtuple('FaciesRecord', ['Name', 'Code'])
 
 FaciesProbabilityRecord = namedtuple('FaciesProbabilityRecord', ['Name', 'Probability'])
 
+ProbabilityStatistics = namedtuple(
+    'ProbabilityStatistics',
+    [
+        'NumCells',
+        'MinValues',
+        'MaxValues',
+        'NumNegative',
+        'NumAboveOne',
+        'MinSum',
+        'MaxSum',
+        'NumNotCloseToOne',
+        'NumOutsideEps',
+        'NumOutsideTolerance',
+        'NumZeroSum',
+        'SumDeviationCounts',
+    ],
+)
+
 
 class Probability:
     __slots__ = 'name', 'value'
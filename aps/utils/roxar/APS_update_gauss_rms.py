@@ -54,11 +54,12 @@ def run_main(
     # Loop over all zones and simulate gauss fields
     gridModel = project.grid_models[gridModelName]
     allZoneModels = apsModel.sorted_zone_models
-    for key, zoneModel in allZoneModels.items():
+    for key in allZoneModels:
         zoneNumber = key[0]
         regionNumber = key[1]
         if not apsModel.isSelected(zoneNumber, regionNumber):
             continue
+        zoneModel = allZoneModels[key]
         gaussFieldNames = zoneModel.getGaussFieldsInTruncationRule()
         nLayers = rmsData.getNumberOfLayersInZone(zoneNumber)
         gaussResultListForZone = []
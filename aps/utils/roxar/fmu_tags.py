@@ -75,9 +75,10 @@ def set_all_as_fmu_updatable(
     aps_model = APSModel(input_model_file)
     value = True
     all_zone_models = aps_model.sorted_zone_models
-    for key, zone_model in all_zone_models.items():
+    for key in all_zone_models:
         zone_number, region_number = key
         if aps_model.isSelected(zone_number, region_number):
+            zone_model = all_zone_models[key]
             gauss_names_for_zone = zone_model.used_gaussian_field_names
             for gauss_name in gauss_names_for_zone:
                 # - Set FMU tag
@@ -62,8 +62,8 @@ class JobConfig:
         )
 
     def get_parameters(self, model_file):
-        # Represents the ORIGINAL APS model
-        aps_model = APSModel(model_file, debug_level=self.debug_level)
+        # Represents the ORIGINAL APS model. The model file is only parsed if it is not in the model cache.
+        aps_model = APSModel.from_cache(model_file, debug_level=self.debug_level)
 
         # Check that zone parameter exists and if not, then create it
         aps_model.check_or_create_zone_parameter(
@@ -108,6 +108,7 @@ class JobConfig:
             'export_fmu_config_files': self.export_fmu_config_files,
             'extrapolation_method': self.rms_param_trend_extrapolation_method,
             'fmu_use_residual_fields': self.fmu_use_residual_fields,
+            'compact_data_types': self.compact_data_types,
         }
 
     @property
@@ -256,6 +257,14 @@ class JobConfig:
             'selected'
         ]
 
+    @property
+    def compact_data_types(self):
+        try:
+            return self._config['parameters']['compactDataTypes']['selected']
+        except KeyError:
+            # Compact data types in the truncation are opt-in, and not set by older jobs
+            return False
+
     @property
     def _tolerance_of_probability_normalisation(self):
         try:
@@ -5,20 +5,21 @@ import numpy as np
 import collections
 
 from typing import Dict, List
-from aps.utils.constants.simple import ProbabilityTolerances, Debug
+from aps.utils.constants.simple import Debug
+from aps.utils.probability_logs import (
+    check_conditional_probabilities,
+    check_observed_facies_per_zone,
+    check_probability_logs,
+    create_probability_logs,
+    get_facies_code,
+    undefined_as_negative,
+)
 from aps.utils.roxar.grid_model import (
     create_zone_parameter,
     getDiscrete3DParameterValues,
 )
 
 
-def get_facies_code(code_names, facies_name):
-    for code, name in code_names.items():
-        if name == facies_name:
-            return code
-    return None
-
-
 def getBlockedWells(project, grid_model_name, bw_name):
     """Get blocked wells"""
     grid_model = project.grid_models[grid_model_name]
@@ -167,14 +168,12 @@ def get_facies_zone_table_and_log_from_bw(
                 )
             else:
                 selection = zone_log_values == zone_number
-            selected_facies_values = facies_log_values[selection]
-            facies_codes_found_in_zone_region = []
-            for i in range(len(selected_facies_values)):
-                facies_code = selected_facies_values[i]
-                if facies_code >= 0:
-                    # Negative or masked values are not used
-                    if facies_code not in facies_codes_found_in_zone_region:
-                        facies_codes_found_in_zone_region.append(facies_code)
+            selected_facies_values = undefined_as_negative(facies_log_values[selection])
+            # Negative or masked values are not used
+            selected_facies_values = selected_facies_values[selected_facies_values >= 0]
+            # Facies codes in the order they are found in the log
+            codes, first_index = np.unique(selected_facies_values, return_index=True)
+            facies_codes_found_in_zone_region = codes[np.argsort(first_index)].tolist()
 
             facies_names_found = [
                 facies_code_names[code] for code in facies_codes_found_in_zone_region
@@ -219,12 +218,28 @@ def get_facies_zone_table_and_log_from_bw(
     )
 
 
+def _print_summary(title, items_per_zone_region, use_regions):
+    if not items_per_zone_region:
+        return
+    print(title)
+    for (zone_number, region_number), items in items_per_zone_region.items():
+        if use_regions:
+            print(
+                f'    (zone, region) = ({zone_number}, {region_number}): {", ".join(items)}'
+            )
+        else:
+            print(f'    zone {zone_number}: {", ".join(items)}')
+    print(' ')
+
+
 def createProbabilityLogs(params):
     """Get Facies log from blocked wells and create probability logs that have values 0.0 or 1.0 for each facies.
     It is possible to specify a list of additional facies names for facies that should be modelled,
     but is not observed. Probability logs for these unobserved facies will only contain 0 as value
     since the facies is not observed. It is possible to specify conditional probability for facies
     given the input facies.
+    The probability logs are calculated by create_probability_logs in aps.utils.probability_logs,
+    and each probability log is written once.
     """
 
     project = params['project']
@@ -238,7 +253,6 @@ def createProbabilityLogs(params):
     conditional_prob_facies = params.get('conditional_prob_facies', None)
     prefix_prob_logs = params['prefix_prob_logs']
     realization_number = project.current_realisation
-    accept_unobserved_facies_names = True
 
     (
         _,
@@ -266,493 +280,98 @@ def createProbabilityLogs(params):
     blocked_wells = getBlockedWells(project, grid_model_name, bw_name)
     if blocked_wells is None:
         return
-    facies_names_in_log = code_names.values()
-
-    # Make list of all facies logs to be created by reading through specified facies list for each specified zone
-    # Make a dictionary of all probability logs
-    probability_log_names = []
-    probability_logs = {}
 
     sorted_zone_region_facies_dictionary = collections.OrderedDict(
         sorted(modelling_facies_per_zone_region.items())
     )
-    modelled_facies_codes_observed_per_zone_region = check_observed_facies_per_zone(
-        sorted_zone_region_facies_dictionary,
-        code_names,
-        facies_log_values,
-        region_log_values,
-        zone_log_values,
-    )
-
-    keys_for_modelled_facies_per_zone_region = (
-        modelled_facies_codes_observed_per_zone_region.keys()
-    )
-
-    # This list is used to inform the user about facies specified to be modelled but is not observed
-    modelled_facies_not_observed = []
-
-    # This list is used to inform the user about facies specified to be modelled and also is observed
-    modelled_facies_observed = []
-
-    for key, facies_for_modelling in sorted_zone_region_facies_dictionary.items():
-        (zone_number, region_number) = key
-        for facies_name in facies_for_modelling:
-            if facies_name not in facies_names_in_log:
-                if not accept_unobserved_facies_names:
-                    raise ValueError(
-                        f'Specified facies name for modelling: {facies_name} '
-                        f'does not exist in facies log: {facies_log_name}'
-                    )
-                else:
-                    # Append facies that is specified to be modelled, but not observed in wells to the list
-                    # of modelling facies that is not observed.
-                    if facies_name not in modelled_facies_not_observed:
-                        modelled_facies_not_observed.append(facies_name)
-            else:
-                # Facies specified to be modelled and also found in blocked well facies log
-                if facies_name not in modelled_facies_observed:
-                    modelled_facies_observed.append(facies_name)
-
-            prob_log_name = prefix_prob_logs + '_' + str(facies_name)
-            if prob_log_name not in probability_log_names:
-                probability_log_names.append(prob_log_name)
-                prob_log = blocked_wells.properties.create(
-                    prob_log_name, roxar.GridPropertyType.continuous, np.float32
-                )
-
-                # Initialize to impossible value and define all values as undefined by mask = 1
-                prob_values = blocked_wells.generate_values(
-                    discrete=False, fill_value=-1.0, realisation=realization_number
-                )
-                mask_values = blocked_wells.generate_values(
-                    discrete=True, fill_value=1, realisation=realization_number
-                )
-                # Set first entry to defined initially as a workaround to make masked logs in prob_log
-                # It is necessary to have at least one point in the log that is not undefined to get log as a masked array.
-                # This value is reset to undefined before any updating of the initial empty logs with data
-                mask_values[0] = 0
-                prob_values_with_mask = np.ma.array(prob_values, mask=mask_values)
-                prob_log.set_values(prob_values_with_mask, realization_number)
-                probability_logs[facies_name] = prob_log
-
-    use_mask_facies = False
-    use_mask_zone = False
-    use_mask_region = False
-    if type(facies_log_values) == np.ma.core.MaskedArray:
-        use_mask_facies = True
-    if type(zone_log_values) == np.ma.core.MaskedArray:
-        use_mask_zone = True
-    if use_regions and type(region_log_values) == np.ma.core.MaskedArray:
-        use_mask_region = True
-    use_mask_prob = use_mask_zone or use_mask_facies or use_mask_region
 
     if debug_level >= Debug.VERBOSE:
-        if use_mask_prob:
+        if any(
+            isinstance(values, np.ma.MaskedArray)
+            for values in [facies_log_values, zone_log_values, region_log_values]
+        ):
             print('Use mask arrays')
         else:
             print("Don't use mask array")
 
     if conditional_prob_facies is None:
+        specified_not_observed = {}
+        observed_not_specified = {}
         for key, facies_for_modelling in sorted_zone_region_facies_dictionary.items():
-            (zone_number, region_number) = key
-            warn_msg_obs_facies_not_specified = []
-            warn_msg_specified_facies_not_observed = []
-            for name in facies_per_zone_region[key]:
-                if name not in facies_for_modelling:
-                    warn_msg_obs_facies_not_specified.append(f' {name}  ')
-            for fname in facies_for_modelling:
-                if fname not in facies_per_zone_region[key]:
-                    warn_msg_specified_facies_not_observed.append(f'  {fname}  ')
-            if warn_msg_specified_facies_not_observed:
-                if use_regions:
-                    print(
-                        f'Warning: Following facies is specified but not observed for (zone, region): ({zone_number}, {region_number}) '
-                    )
-                    print(
-                        '         Probability log for these facies will be 0 in this (zone, region).'
-                    )
-                else:
-                    print(
-                        f'Warning: Following facies is specified but not observed for zone {zone_number}'
-                    )
-                    print(
-                        '         Probability log for these facies will be 0 in this zone.'
-                    )
-
-                print('         Maybe there are some misspelled facies names here?')
-                for msg in warn_msg_specified_facies_not_observed:
-                    print(msg)
-                print(' ')
-
-            if warn_msg_obs_facies_not_specified:
-                if use_regions:
-                    print(
-                        f'Warning: Following facies is observed but not specified for (zone, region): ({zone_number}, {region_number}).'
-                    )
-                    print('         Forgot to specify them for this (zone, region)?')
-                    print(
-                        '         The probability logs for these facies will be set to either undefined or '
-                    )
-                    print('         to 0 probability for this (zone, region):')
-                else:
-                    print(
-                        f'Warning: Following facies is observed but not specified for zone {zone_number}.'
-                    )
-                    print('         Forgot to specify them for this zone?')
-                    print(
-                        '         The probability logs for these facies will be set to either undefined or '
-                    )
-                    print('         to 0 probability for this zone:')
-                for msg in warn_msg_obs_facies_not_specified:
-                    print(msg)
-                print(' ')
-
-        # Run through all probability logs that were initialized
-        for facies_name, prob_log in probability_logs.items():
-            facies_code = get_facies_code(code_names, facies_name)
-            prob_values = prob_log.get_values(realization_number)
-            mask_values = None
-            if use_mask_prob:
-                mask_values = prob_values.mask
-                # set first entry to undefined initially since it was set to
-                # defined in initialization as a workaround
-                mask_values[0] = 1
-
-            # Run through the values in the facies log
-            for i in range(len(facies_log_values)):
-                update_prob_log = False
-                zone_number = -1
-                if use_mask_zone:
-                    if not zone_log_values.mask[i]:
-                        zone_number = zone_log_values[i]
-                else:
-                    zone_number = zone_log_values[i]
-
-                facies_code_in_log = -1
-                if use_mask_facies:
-                    if not facies_log_values.mask[i]:
-                        facies_code_in_log = facies_log_values[i]
-                else:
-                    facies_code_in_log = facies_log_values[i]
-
-                if region_log_values is not None:
-                    region_number = -1
-                    if use_mask_region:
-                        if not region_log_values.mask[i]:
-                            region_number = region_log_values[i]
-                    else:
-                        region_number = region_log_values[i]
-                else:
-                    region_number = 0
-
-                if zone_number > 0 and facies_code_in_log >= 0 and region_number >= 0:
-                    # The facies code is not missing code
-                    # Check that the grid cell has facies that belongs to the zone
-                    key = (zone_number, region_number, facies_code_in_log)
-                    if key in keys_for_modelled_facies_per_zone_region:
-                        # This facies is a modelled facies for this zone either observed or not observed
-                        if modelled_facies_codes_observed_per_zone_region[key] != 0:
-                            # This modelling facies belongs to a zone with some observed facies
-                            # Set probability log to 1 or 0
-                            update_prob_log = True
-                        else:
-                            # This modelling facies belongs to a zone without any observed facies
-                            # Let probability log be missing code
-                            pass
-                if update_prob_log:
-                    if facies_code_in_log == facies_code:
-                        # Modelled facies matching the observed facies
-                        # Set probability 1
-                        prob_values[i] = 1
-                        if use_mask_prob:
-                            mask_values[i] = 0
-                    else:
-                        # Modelled facies not matching the observed facies
-                        # Set probability 0
-                        prob_values[i] = 0
-                        if use_mask_prob:
-                            mask_values[i] = 0
-            if use_mask_prob:
-                prob_values_with_mask = np.ma.array(prob_values, mask=mask_values)
-                prob_log.set_values(prob_values_with_mask, realization_number)
-            else:
-                prob_log.set_values(prob_values, realization_number)
-            print(f'Probability log defined:  {prob_log.name}')
+            not_specified = [
+                name
+                for name in facies_per_zone_region[key]
+                if name not in facies_for_modelling
+            ]
+            not_observed = [
+                name
+                for name in facies_for_modelling
+                if name not in facies_per_zone_region[key]
+            ]
+            if not_observed:
+                specified_not_observed[key] = not_observed
+            if not_specified:
+                observed_not_specified[key] = not_specified
+        zone_text = '(zone, region)' if use_regions else 'zone'
+        _print_summary(
+            'Warning: Following facies is specified but not observed. '
+            f'Probability log for these facies will be 0 in the {zone_text}.\n'
+            '         Maybe there are some misspelled facies names here?',
+            specified_not_observed,
+            use_regions,
+        )
+        _print_summary(
+            'Warning: Following facies is observed but not specified. Forgot to specify them?\n'
+            '         The probability logs for these facies will be set to either undefined or '
+            f'to 0 probability in the {zone_text}.',
+            observed_not_specified,
+            use_regions,
+        )
     else:
-        region_number = 0
-        # Check input consistency
-        # For each facies in the blocked well, log, check that it is defined in the list of modelled facies
-        for key, facies_for_modelling in sorted_zone_region_facies_dictionary.items():
-            (zone_number, region_number) = key
-            for name in facies_per_zone_region[key]:
-                sum_prob = 0.0
-                err_list = []
-                for facies_name in facies_for_modelling:
-                    key_for_cond_prob = (zone_number, facies_name, name)
-                    if key_for_cond_prob not in conditional_prob_facies:
-                        # Check if the specified facies and facies to condition to belongs to the zone
-                        err_list.append(
-                            f'  P({facies_name} | {name} ) in zone {zone_number}'
-                        )
-                    else:
-                        prob = conditional_prob_facies[key_for_cond_prob]
-                        sum_prob = sum_prob + prob
-                if err_list:
-                    print(
-                        f'Missing specification of conditional probabilities of modelled facies conditioned to {name} :'
-                    )
-                    for s in err_list:
-                        print(f' {s}')
-                    raise ValueError('Need specification of conditional probabilities')
-
-                if (
-                    abs(sum_prob - 1.0)
-                    > ProbabilityTolerances.MAX_DEVIATION_BEFORE_ACTION
-                ):
-                    raise ValueError(
-                        f'Sum of the conditional probabilities in zone: {zone_number} '
-                        f'conditioned to: {name} is {sum_prob} and not 1. Check specification.'
-                    )
-            # Check if there are specified conditional probabilities given
-            # interpreted facies that does not exist and give a warning that this will be igored.
-            warning_msg = []
-            for key in conditional_prob_facies:
-                (znr, fmodelled, finterpreted) = key
-                if znr == zone_number:
-                    if (
-                        finterpreted
-                        not in facies_per_zone_region[(zone_number, region_number)]
-                    ):
-                        warning_msg.append(
-                            f'   P( {fmodelled} |{finterpreted}) '
-                            f'specified but {finterpreted} is not observed in zone {zone_number}  '
-                        )
-            if warning_msg:
-                print('Warnings: Unused conditional probabilities:')
-                for msg in warning_msg:
-                    print(msg)
-                print('\n')
-
-        # Run through all probability logs that were initialized
-        for facies_name, prob_log in probability_logs.items():
-            prob_values = prob_log.get_values(realization_number)
-            mask_values = prob_values.mask
-
-            # Run through the values in the facies log
-            for i in range(len(facies_log_values)):
-                update_prob_log = False
-                zone_number_in_log = -1
-                if use_mask_zone:
-                    if not zone_log_values.mask[i]:
-                        zone_number_in_log = zone_log_values[i]
-                else:
-                    zone_number_in_log = zone_log_values[i]
+        check_conditional_probabilities(
+            conditional_prob_facies,
+            sorted_zone_region_facies_dictionary,
+            facies_per_zone_region,
+        )
 
-                facies_code_in_log = -1
-                if use_mask_facies:
-                    if not facies_log_values.mask[i]:
-                        facies_code_in_log = facies_log_values[i]
-                else:
-                    facies_code_in_log = facies_log_values[i]
-
-                facies_code = get_facies_code(code_names, facies_name)
-                if facies_code is None:
-                    facies_code = -1
-                if zone_number_in_log > 0 and facies_code_in_log >= 0:
-                    # The facies code in well log is not missing code
-                    update_prob_log = True
-
-                if update_prob_log:
-                    # This grid cell has facies that belongs to the set of facies that is to be modelled
-                    facies_code_in_log = facies_log_values[i]
-                    facies_name_in_log = code_names[facies_code_in_log]
-                    # Get the conditioned probability for facies with name 'facies_name'
-                    #  given that the facies log has facies name 'facies_name_in_log'
-                    try:
-                        # Only blocked well grid cells with specified conditional probabilities for modelled facies is updated
-                        key = (zone_number_in_log, facies_name, facies_name_in_log)
-                        prob = conditional_prob_facies[key]
-
-                        prob_values[i] = prob
-                        mask_values[i] = 0
-                    except:
-                        # For this case the probability is undefined
-                        pass
-
-            prob_values_with_mask = np.ma.array(prob_values, mask=mask_values)
-            prob_log.set_values(prob_values_with_mask, realization_number)
-            print(f'Probability log defined:  {prob_log.name}')
+    probability_log_facies, probabilities = create_probability_logs(
+        zone_log_values,
+        facies_log_values,
+        code_names,
+        sorted_zone_region_facies_dictionary,
+        region_values=region_log_values,
+        conditional_prob_facies=conditional_prob_facies,
+    )
+
+    # Write the probability logs. Undefined values are masked.
+    probability_log_names = []
+    probability_values = {}
+    for facies_name, values in zip(probability_log_facies, probabilities):
+        prob_log_name = prefix_prob_logs + '_' + str(facies_name)
+        prob_log = blocked_wells.properties.create(
+            prob_log_name, roxar.GridPropertyType.continuous, np.float32
+        )
+        undefined = np.isnan(values)
+        prob_values_with_mask = np.ma.array(
+            np.where(undefined, -1.0, values).astype(np.float32), mask=undefined
+        )
+        prob_log.set_values(prob_values_with_mask, realization_number)
+        probability_log_names.append(prob_log_name)
+        probability_values[facies_name] = prob_values_with_mask
+    print(f'Probability logs defined:  {", ".join(probability_log_names)}')
 
     # Verify that the created probability logs are consistent (sum up to 1) for each grid cell in blocked wells
     check_probability_logs(
         probability_log_names,
-        probability_logs,
+        probability_values,
         code_names,
         zone_log_values,
         region_log_values,
         sorted_zone_region_facies_dictionary,
-        realization_number,
         debug_level,
     )
 
 
-def check_observed_facies_per_zone(
-    specified_modelled_facies_per_zone_region_dict,
-    code_names,
-    facies_log_values,
-    region_log_values,
-    zone_log_values,
-):
-    # Find which modelled facies is observed or not for each zone, region
-    zones_regions_specified = list(
-        specified_modelled_facies_per_zone_region_dict.keys()
-    )
-    number_of_values_in_facies_log = len(facies_log_values)
-    number_of_values_in_zone_log = len(zone_log_values)
-    assert number_of_values_in_facies_log == number_of_values_in_zone_log
-    if region_log_values is not None:
-        number_of_values_in_region_log = len(region_log_values)
-        assert number_of_values_in_facies_log == number_of_values_in_region_log
-
-    modelled_facies_codes_observed_in_zone_region = {}
-    index_all_values = np.arange(number_of_values_in_zone_log)
-    for key in zones_regions_specified:
-        (zone_number, region_number) = key
-        modelled_facies = specified_modelled_facies_per_zone_region_dict[key]
-        number_of_modelled_facies_observed_in_zone_region = 0
-        for facies_name in modelled_facies:
-            facies_code = get_facies_code(code_names, facies_name)
-            if facies_code is not None:
-                # This modelled facies is observed in facies log in some zone
-                if region_log_values is None:
-                    index_selected_values = index_all_values[
-                        (zone_log_values == zone_number)
-                        & (facies_log_values == facies_code)
-                    ]
-                else:
-                    index_selected_values = index_all_values[
-                        (zone_log_values == zone_number)
-                        & (region_log_values == region_number)
-                        & (facies_log_values == facies_code)
-                    ]
-                if len(index_selected_values) > 0:
-                    # This facies is both defined as a modelled facies and also observed for current zone
-                    key_obs = (zone_number, region_number, facies_code)
-                    modelled_facies_codes_observed_in_zone_region[key_obs] = 1
-                    number_of_modelled_facies_observed_in_zone_region = (
-                        number_of_modelled_facies_observed_in_zone_region + 1
-                    )
-                else:
-                    # This facies is defined as a modelled facies but not observed for current zone.
-                    key_obs = (zone_number, region_number, facies_code)
-                    modelled_facies_codes_observed_in_zone_region[key_obs] = 0
-            else:
-                # This facies is defined as a modelled facies but does not exist in the facies log at all
-                facies_code = -1
-                key_obs = (zone_number, region_number, facies_code)
-                modelled_facies_codes_observed_in_zone_region[key_obs] = 0
-
-        codes = list(code_names.keys())
-        keys = modelled_facies_codes_observed_in_zone_region.keys()
-        # Include also facies code -1 which is defined as the code for all modelled facies not found in the facies log
-        codes.append(-1)
-        if number_of_modelled_facies_observed_in_zone_region > 0:
-            for facies_code in codes:
-                key_obs = (zone_number, region_number, facies_code)
-                if key_obs in keys:
-                    if modelled_facies_codes_observed_in_zone_region[key_obs] == 0:
-                        # This facies is defined as modelled but not observed and there exist
-                        # modelled facies that is observed for the same zone
-                        # Need to distinguish this facies from unobserved facies in zones that
-                        # does not have any observed facies at all.
-                        modelled_facies_codes_observed_in_zone_region[key_obs] = -1
-
-    return modelled_facies_codes_observed_in_zone_region
-
-
-def check_probability_logs(
-    probability_log_names,
-    probability_logs,
-    code_names,
-    zone_log_values,
-    region_log_values,
-    modelling_facies_per_zone_region,
-    realization_number,
-    debug_level=Debug.VERBOSE,
-):
-    print('\nCheck created probability logs:\n')
-    use_regions = region_log_values is not None
-    normalization_error = {}
-    count_zones = 0
-    for key, modelling_facies in modelling_facies_per_zone_region.items():
-        (zone_number, region_number) = key
-        if use_regions and region_number <= 0:
-            raise ValueError(f'Region log should only have integer region values > 0')
-        sum_values = None
-        number_of_active_values = 0
-        for index, facies_name in enumerate(modelling_facies):
-            prob_log = probability_logs[facies_name]
-            prob_values = prob_log.get_values(realization_number)
-            if use_regions:
-                selected_prob_values = prob_values[
-                    (zone_log_values == zone_number)
-                    & (region_log_values == region_number)
-                ]
-            else:
-                selected_prob_values = prob_values[zone_log_values == zone_number]
-            if index == 0:
-                sum_values = selected_prob_values
-                number_of_active_values = len(sum_values)
-            else:
-                if number_of_active_values > 0:
-                    sum_values = sum_values + selected_prob_values
-
-        if number_of_active_values == 0:
-            if use_regions:
-                print(
-                    f'Zone, Region: ({zone_number},{region_number}) has no blocked well cells with probability logs.'
-                )
-            else:
-                print(
-                    f'Zone: {zone_number} has no blocked well cells with probability logs.'
-                )
-        else:
-            # Check if the sum is 1 for all entries in the numpy array
-            eps = 0.001
-            check_value = (sum_values > (1.0 + eps)) | (sum_values < (1.0 - eps))
-            num_cell_with_not_normalized_prob = check_value.sum()
-            normalization_error[key] = num_cell_with_not_normalized_prob
-            if num_cell_with_not_normalized_prob > 0:
-                count_zones = count_zones + 1
-    if count_zones == 0:
-        print('Normalization of probability logs is OK')
-    else:
-        for key, modelling_facies in modelling_facies_per_zone_region.items():
-            (zone_number, region_number) = key
-            if normalization_error[key] > 0:
-                if use_regions:
-                    print(
-                        f'Zone, Region: ({zone_number}, {region_number})  Number of cell values in BW where sum of probability logs '
-                        f'has values outside interval [{1 - eps}, {1 + eps}]: {normalization_error[key]}'
-                    )
-                else:
-                    print(
-                        f'Zone: {zone_number} Number of cell values in BW where sum of probability logs '
-                        f'has values outside interval [{1 - eps}, {1 + eps}]: {normalization_error[key]}'
-                    )
-            if debug_level >= Debug.VERBOSE:
-                for i in range(len(sum_values)):
-                    text = str(i)
-                    if sum_values[i] > (1 + eps) or sum_values[i] < (1 - eps):
-                        for facies in modelling_facies:
-                            prob_log = probability_logs[facies]
-                            prob_values = prob_log.get_values(realization_number)
-                            p = prob_values[i]
-                            text = text + ' ' + '(' + facies + ' ' + str(p) + ')' + '  '
-                        text = text + '  sum= ' + str(sum_values[i])
-                    print(text)
-
-
 def createCombinedFaciesLogForBlockedWells(params):
     project = params['project']
     grid_model_name = params['grid_model_name']
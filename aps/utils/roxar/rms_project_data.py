@@ -1,5 +1,6 @@
 #!/bin/env python
 # -*- coding: utf-8 -*-
+import copy
 import json
 from enum import Enum
 from pathlib import Path
@@ -28,6 +29,7 @@ from aps.algorithms.APSGaussModel import (
 )
 from aps.algorithms.APSModel import APSModel
 from aps.algorithms.properties import CrossSection
+from aps.api.encoding import encode
 from aps.rms_jobs.create_simulation_grid import create_ertbox_grid_model
 from aps.utils.constants.simple import (
     VariogramType,
@@ -52,7 +54,8 @@ from aps.utils.roxar.grid_model import (
     GridSimBoxSize,
     get_zone_names,
 )
-from aps.utils.facies_map import create_facies_map
+from aps.utils.facies_map import create_facies_map_vectorized
+from aps.utils.specification_cache import SpecificationCache
 from aps.utils.roxar.migrations import Migration
 from aps.utils.roxar.progress_bar import APSProgressBar
 from aps.utils.truncation_rules import make_truncation_rule
@@ -96,6 +99,19 @@ def empty_if_none(func: Callable) -> Callable:
     return wrapper
 
 
+# The API is served by one long running process, such that the objects used by the
+# previews in the GUI can be reused between the calls.
+# The GUI sends the complete specification of the preview for every call, while a user
+# typically changes one value at the time. The objects are therefore cached on the part of
+# the specification they are created from, such that e.g. changing the facies probabilities
+# only redefines the truncation rule, while the gaussian fields are reused.
+# Models and truncation rules are modified when used, and each call gets its own copy.
+# The simulated fields are read-only, and are shared.
+_decoded_models = SpecificationCache(max_size=4, copy=copy.deepcopy)
+_truncation_rules = SpecificationCache(max_size=32, copy=copy.deepcopy)
+_simulated_fields = SpecificationCache(max_size=16)
+
+
 def _option_mapping() -> Dict[str, Type[Enum]]:
     return {
         'variogram': VariogramType,
@@ -578,35 +594,47 @@ class RMSData:
         return model.has_fmu_updatable_values
 
     @staticmethod
-    def simulate_gaussian_field(field, grid_index_order: str = 'F'):
-        simulation = RMSData._simulate_gaussian_field(field)
+    def simulate_gaussian_field(
+        field, grid_index_order: str = 'F', encoding: str = 'json'
+    ):
+        simulation = _simulated_fields.get(field, _simulate_read_only_gaussian_field)
         data = simulation.field_as_matrix(grid_index_order)
-        return data.tolist()
+        return encode(data, encoding)
 
     @staticmethod
-    def simulate_realization(fields, specification, grid_index_order='F') -> dict:
-        simulations = [RMSData._simulate_gaussian_field(field) for field in fields]
-        truncation_rule = make_truncation_rule(specification)
-        facies, _ = create_facies_map(simulations, truncation_rule, use_code=True)
+    def simulate_realization(
+        fields, specification, grid_index_order='F', encoding: str = 'json'
+    ) -> dict:
+        """The facies map and the gaussian fields used to create it.
+        The arrays are returned as lists, or as buffers (see aps.api.encoding)."""
+        simulations = [
+            _simulated_fields.get(field, _simulate_read_only_gaussian_field)
+            for field in fields
+        ]
+        truncation_rule = _truncation_rules.get(specification, make_truncation_rule)
+        facies, _ = create_facies_map_vectorized(
+            simulations, truncation_rule, use_code=True
+        )
 
         data = np.reshape(
             facies, simulations[0].settings.dimensions, grid_index_order
         ).transpose()
         data = flip_if_necessary(data, simulations[0].cross_section)
-        return {
-            'faciesMap': data.tolist(),
+        result = {
+            'faciesMap': data,
             'fields': [
                 {
                     'name': simulation.name,
-                    'data': simulation.field_as_matrix(grid_index_order).tolist(),
+                    'data': simulation.field_as_matrix(grid_index_order),
                 }
                 for simulation in simulations
             ],
         }
+        return encode(result, encoding)
 
     @staticmethod
     def get_truncation_map_polygons(specification):
-        truncation_rule = make_truncation_rule(specification)
+        truncation_rule = _truncation_rules.get(specification, make_truncation_rule)
 
         # Calculate polygons for truncation map for current facies probability
         # as specified when calling setTruncRule(faciesProb)
@@ -730,6 +758,12 @@ class RMSData:
             return None
 
 
+def _simulate_read_only_gaussian_field(field: dict) -> GaussianFieldSimulation:
+    simulation = RMSData._simulate_gaussian_field(field)
+    simulation.field.flags.writeable = False
+    return simulation
+
+
 def _decode(base64_encoded: str) -> str:
     return b64decode(base64_encoded).decode()
 
@@ -739,4 +773,6 @@ def _decode_state(encoded: str) -> dict:
 
 
 def decode_model(encoded_xml: str) -> APSModel:
-    return APSModel.from_string(_decode(encoded_xml))
+    return _decoded_models.get(
+        encoded_xml, lambda encoded: APSModel.from_string(_decode(encoded))
+    )
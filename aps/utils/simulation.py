@@ -1,4 +1,5 @@
-from collections import OrderedDict
+from collections.abc import MutableMapping
+
 import numpy as np
 
 from aps.utils.constants.simple import Debug
@@ -17,7 +18,7 @@ def get_all_gauss_field_names_in_model(aps_model):
     all_zone_models = aps_model.sorted_zone_models
     gauss_field_names_used = []
     gauss_field_names_with_trend = []
-    for key, zone_model in all_zone_models.items():
+    for key in all_zone_models:
         zone_number, region_number = key
         if not aps_model.isSelected(zone_number, region_number):
             continue
@@ -43,6 +44,24 @@ def get_all_gauss_field_names_in_model(aps_model):
     return gauss_field_names_used, gauss_field_names_with_trend
 
 
+def count_zones_using_gauss_fields(aps_model):
+    """
+    Returns a dictionary with the number of selected (zone, region) combinations
+    where the gauss field is used in the truncation rule. The key is gauss field name.
+    """
+    zone_count = {}
+    for key in aps_model.sorted_zone_models:
+        zone_number, region_number = key
+        if not aps_model.isSelected(zone_number, region_number):
+            continue
+        zone_model = aps_model.getZoneModel(zone_number, region_number)
+        gf_names_for_truncation_rule = zone_model.getGaussFieldsInTruncationRule()
+        for name in zone_model.used_gaussian_field_names:
+            if name in gf_names_for_truncation_rule:
+                zone_count[name] = zone_count.get(name, 0) + 1
+    return zone_count
+
+
 def init_rms_param(
     grid_model,
     name,
@@ -75,6 +94,106 @@ def init_rms_param(
     return values
 
 
+class RMSParameterStore(MutableMapping):
+    """
+    Dictionary like container of RMS parameter values for a set of gauss field names.
+    The values of a parameter are read from RMS (or initialized by init_rms_param)
+    the first time they are accessed, such that only the gauss fields
+    used by the zones that are processed are kept in memory.
+
+    The number of (zone, region) combinations using each gauss field can be specified.
+    When release_zone is called after a (zone, region) combination is finished,
+    the values of the gauss fields no longer used by any of the remaining
+    zones are released.
+    """
+
+    def __init__(
+        self,
+        grid_model,
+        names,
+        param_type_name,
+        number_of_active_cells,
+        realization_number,
+        set_rms_param=False,
+        is_shared=False,
+        zone_count=None,
+        debug_level=Debug.OFF,
+    ):
+        self._grid_model = grid_model
+        self._names = list(names)
+        self._param_type_name = param_type_name
+        self._number_of_active_cells = number_of_active_cells
+        self._realization_number = realization_number
+        self._set_rms_param = set_rms_param
+        self._is_shared = is_shared
+        self._debug_level = debug_level
+        self._values = {}
+        self._remaining_zones = dict(zone_count) if zone_count else {}
+
+    def __getitem__(self, name):
+        if name not in self._values:
+            if name not in self._names:
+                raise KeyError(name)
+            if self._debug_level >= Debug.VERY_VERBOSE:
+                print(f'--- Load RMS parameter: {self._parameter_name(name)}')
+            self._values[name] = init_rms_param(
+                self._grid_model,
+                name,
+                self._param_type_name,
+                self._number_of_active_cells,
+                self._realization_number,
+                self._set_rms_param,
+                self._is_shared,
+                debug_level=self._debug_level,
+            )
+        return self._values[name]
+
+    def __setitem__(self, name, values):
+        if name not in self._names:
+            self._names.append(name)
+        self._values[name] = values
+
+    def __delitem__(self, name):
+        self._names.remove(name)
+        self._values.pop(name, None)
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        return name in self._names
+
+    @property
+    def loaded(self):
+        """Names of the parameters with values in memory."""
+        return [name for name in self._names if name in self._values]
+
+    def release(self, name):
+        """Release the values of the parameter. They are read again if accessed later."""
+        if self._values.pop(name, None) is not None:
+            if self._debug_level >= Debug.VERY_VERBOSE:
+                print(f'--- Release RMS parameter: {self._parameter_name(name)}')
+
+    def release_zone(self, gf_names):
+        """
+        Register that a (zone, region) combination using the gauss fields gf_names
+        is finished, and release the gauss fields not used by any remaining zones.
+        """
+        for name in gf_names:
+            if name not in self._remaining_zones:
+                continue
+            self._remaining_zones[name] -= 1
+            if self._remaining_zones[name] <= 0:
+                del self._remaining_zones[name]
+                self.release(name)
+
+    def _parameter_name(self, name):
+        return name if self._param_type_name is None else name + self._param_type_name
+
+
 def initialize_rms_parameters(
     project,
     aps_model,
@@ -88,6 +207,8 @@ def initialize_rms_parameters(
     Returns dictionaries with numpy arrays containing the gauss field values, trend values,
     transformed gauss field values for each gauss field name. The key is gauss field name.
     The return parameters are of length equal to number of active cells.
+    The dictionaries are RMSParameterStore objects reading the values from RMS
+    the first time a gauss field is used.
 
     """
     if len(active_output_variable_list) == 0:
@@ -103,71 +224,56 @@ def initialize_rms_parameters(
         get_all_gauss_field_names_in_model(aps_model)
     )
 
+    # Number of selected zones using each gauss field, used to release
+    # the values after the last zone using the gauss field is finished.
+    zone_count = count_zones_using_gauss_fields(aps_model)
+
+    def create_store(names, param_type_name, set_rms_param):
+        return RMSParameterStore(
+            grid_model,
+            names,
+            param_type_name,
+            number_of_active_cells,
+            realization_number,
+            set_rms_param=set_rms_param,
+            is_shared=is_shared,
+            zone_count=zone_count,
+            debug_level=debug_level,
+        )
+
+    # The values are initialized to 0 or read from RMS (simulated gauss fields, trends, transformed values)
+    # when they are first used.
+    set_rms_param = write_rms_parameters_for_qc_purpose
+    empty = []
+
     # Keeps all simulated gauss fields (residual fields)
-    gf_all_values = OrderedDict()
+    gf_all_values = create_store(
+        gauss_field_names_used if active_output_variable_list[0] else empty,
+        None,
+        True,
+    )
 
     # Keeps all transformed gauss fields (gauss field with trends that are transformed to [0,1] distribution)
-    gf_all_alpha = OrderedDict()
+    gf_all_alpha = create_store(
+        gauss_field_names_used if active_output_variable_list[1] else empty,
+        '_transf',
+        set_rms_param,
+    )
 
     # Keeps all trend values  and untransformed gauss fields with trend
-    gf_all_trend_values = OrderedDict()
+    gf_all_trend_values = create_store(
+        gauss_field_names_with_trend if active_output_variable_list[2] else empty,
+        '_trend',
+        set_rms_param,
+    )
 
     # Keeps all GRF without added trend
-    gf_all_residual_values = OrderedDict()
-
-    # Initialize to 0 or read from RMS simulated gauss fields, trends, transformed values
-    # that are used.
-    set_rms_param = write_rms_parameters_for_qc_purpose
-    for name in gauss_field_names_used:
-        if active_output_variable_list[0]:
-            # Simulated GRF
-            gf_all_values[name] = init_rms_param(
-                grid_model,
-                name,
-                None,
-                number_of_active_cells,
-                realization_number,
-                True,
-                is_shared,
-                debug_level=debug_level,
-            )
-        if active_output_variable_list[1]:
-            # Transformed GRF
-            gf_all_alpha[name] = init_rms_param(
-                grid_model,
-                name,
-                '_transf',
-                number_of_active_cells,
-                realization_number,
-                set_rms_param,
-                is_shared,
-                debug_level=debug_level,
-            )
-
-    for name in gauss_field_names_with_trend:
-        if active_output_variable_list[2]:
-            # Trend for GRF
-            gf_all_trend_values[name] = init_rms_param(
-                grid_model,
-                name,
-                '_trend',
-                number_of_active_cells,
-                realization_number,
-                set_rms_param,
-                is_shared,
-                debug_level=debug_level,
-            )
-        if fmu_with_residual_grf and active_output_variable_list[3]:
-            # Residual GRF
-            gf_all_residual_values[name] = init_rms_param(
-                grid_model,
-                name,
-                '_residual',
-                number_of_active_cells,
-                realization_number,
-                set_rms_param,
-                is_shared,
-                debug_level=debug_level,
-            )
+    gf_all_residual_values = create_store(
+        gauss_field_names_with_trend
+        if fmu_with_residual_grf and active_output_variable_list[3]
+        else empty,
+        '_residual',
+        set_rms_param,
+    )
 
     return gf_all_values, gf_all_alpha, gf_all_trend_values, gf_all_residual_values
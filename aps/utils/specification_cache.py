@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""Hashing of specifications, and caches of objects created from a specification.
+A specification is a JSON serializable description of how an object is created, such as
+the part of a model a gaussian field is simulated from. Objects created from the same
+specification are reused, and the hash of the specification is also used to detect
+whether the input of a task has changed.
+"""
+
+import hashlib
+import json
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Generic, Optional, TypeVar
+
+import numpy as np
+
+T = TypeVar('T')
+
+
+def specification_key(specification: Any) -> str:
+    """Hash of a JSON serializable specification, independent of the order of the keys."""
+    if isinstance(specification, str):
+        content = specification
+    else:
+        content = json.dumps(
+            specification, sort_keys=True, separators=(',', ':'), default=str
+        )
+    return hashlib.sha1(content.encode()).hexdigest()
+
+
+def array_key(values: np.ndarray) -> str:
+    """Hash of the content, type and shape of an array, to be used in a specification."""
+    values = np.ascontiguousarray(values)
+    digest = hashlib.sha1(f'{values.dtype.str}{values.shape}'.encode())
+    digest.update(values.data)
+    return digest.hexdigest()
+
+
+class SpecificationCache(Generic[T]):
+    """Least recently used cache of objects created from a specification.
+    The cached objects are shared by all callers, unless copy is given.
+    Then the callers get copy(object), such that they may modify it.
+    """
+
+    def __init__(self, max_size: int, copy: Optional[Callable[[T], T]] = None):
+        if max_size < 1:
+            raise ValueError(f'The size of the cache must be positive, not {max_size}')
+        self._max_size = max_size
+        self._copy = copy
+        self._items = OrderedDict()
+        self._lock = Lock()
+        # One lock per specification being created, such that it is only created once
+        self._creating = {}
+
+    def get(self, specification: Any, create: Callable[[Any], T]) -> T:
+        """Return the object created by create(specification),
+        which is only called if the specification is not in the cache."""
+        key = specification_key(specification)
+        with self._lock:
+            item = self._lookup(key)
+            if item is not None:
+                return self._output(item)
+            create_lock = self._creating.setdefault(key, Lock())
+        with create_lock:
+            with self._lock:
+                item = self._lookup(key)
+            if item is None:
+                try:
+                    item = create(specification)
+                    with self._lock:
+                        self._items[key] = item
+                        while len(self._items) > self._max_size:
+                            self._items.popitem(last=False)
+                finally:
+                    with self._lock:
+                        self._creating.pop(key, None)
+        return self._output(item)
+
+    def _lookup(self, key: str) -> Optional[T]:
+        if key in self._items:
+            self._items.move_to_end(key)
+            return self._items[key]
+        return None
+
+    def _output(self, item: T) -> T:
+        return item if self._copy is None else self._copy(item)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""Manifest of completed tasks, used to resume long runs.
+A task is identified by (realization, zone, region, field) and is complete when
+the manifest has an entry with the same hash of the task input, and the output file
+still has the hash it had when the task finished. Outputs that are missing, partially written
+or modified afterwards are therefore detected, and the task is run again.
+
+The manifest is written to disk after every task, such that at most the running task is lost
+if a run is interrupted.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Optional, Tuple, Union
+
+from aps.utils.io import ensure_folder_exists
+from aps.utils.specification_cache import specification_key
+
+TaskKey = Tuple[int, Optional[int], Optional[int], str]
+
+
+def file_hash(file_name: Union[str, Path]) -> Optional[str]:
+    """SHA-256 of the content of the file, or None if the file does not exist."""
+    digest = hashlib.sha256()
+    try:
+        with open(file_name, 'rb') as file:
+            for block in iter(lambda: file.read(1 << 20), b''):
+                digest.update(block)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+
+def input_hash(*inputs: Any) -> str:
+    """Hash of the (JSON serializable) input of a task."""
+    return specification_key(list(inputs))
+
+
+class TaskManifest:
+    """The completed tasks of a run, stored as JSON in the given file.
+    Output file names are stored relative to the directory of the manifest."""
+
+    __slots__ = ('_file_name', '_tasks')
+
+    VERSION = 1
+
+    def __init__(self, file_name: Union[str, Path]):
+        self._file_name = Path(file_name)
+        self._tasks = {}
+        try:
+            with open(self._file_name, 'r', encoding='utf-8') as file:
+                content = json.load(file)
+        except FileNotFoundError:
+            return
+        except ValueError:
+            # A manifest that can not be read is treated as empty, and all tasks are run again
+            return
+        if content.get('version') == self.VERSION:
+            self._tasks = {
+                self._key_name(tuple(task['task'])): task for task in content['tasks']
+            }
+
+    @property
+    def file_name(self) -> Path:
+        return self._file_name
+
+    def output_hash(self, key: TaskKey) -> Optional[str]:
+        task = self._tasks.get(self._key_name(key))
+        if task is None:
+            return None
+        return task['output_hash']
+
+    def is_complete(self, key: TaskKey, task_input_hash: str) -> bool:
+        """True if the task has been run with the same input, and the output is unchanged."""
+        task = self._tasks.get(self._key_name(key))
+        if task is None or task['input_hash'] != task_input_hash:
+            return False
+        return file_hash(self._file_name.parent / task['output']) == task['output_hash']
+
+    def complete(
+        self, key: TaskKey, task_input_hash: str, output_file_name: Union[str, Path]
+    ) -> None:
+        """Register that the task has written its output file, and save the manifest."""
+        output_file_name = Path(output_file_name)
+        self._tasks[self._key_name(key)] = {
+            'task': list(key),
+            'input_hash': task_input_hash,
+            'output': os.path.relpath(output_file_name, self._file_name.parent),
+            'output_hash': file_hash(output_file_name),
+        }
+        self.save()
+
+    def save(self) -> None:
+        ensure_folder_exists(self._file_name)
+        temporary_file_name = self._file_name.with_name(self._file_name.name + '.tmp')
+        with open(temporary_file_name, 'w', encoding='utf-8') as file:
+            json.dump(
+                {'version': self.VERSION, 'tasks': list(self._tasks.values())},
+                file,
+                indent=1,
+            )
+        os.replace(temporary_file_name, self._file_name)
+
+    @staticmethod
+    def _key_name(key: TaskKey) -> str:
+        return '/'.join(str(item) for item in key)
+
+    def __len__(self) -> int:
+        return len(self._tasks)
@@ -19,7 +19,7 @@ from aps.utils.io import writeFileRTF
 from aps.utils.methods import get_colors, get_run_parameters, get_debug_level
 from aps.utils.roxar.APSDataFromRMS import APSDataFromRMS
 from aps.utils.plotting import plot_gaussian_field, cross_plot, plot_facies
-from aps.utils.facies_map import create_facies_map
+from aps.utils.facies_map import create_facies_map_vectorized
 
 
 def high_resolution_2D_grids(
@@ -342,7 +342,9 @@ def run_previewer(
     grid2D_dimensions, increments = get_dimensions(
         preview_cross_section.type, preview_grid_size, original_simulation_box_size
     )
-    facies, facies_fraction = create_facies_map(gauss_field_items, truncObject)
+    facies, facies_fraction = create_facies_map_vectorized(
+        gauss_field_items, truncObject
+    )
 
     if write_simulated_fields_to_file:
         x0 = 0.0
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""Transformation of gaussian fields to uniformly distributed (alpha) values in [0,1]
+for the cells of a zone (region). The functions do not depend on RMS."""
+
+import numpy as np
+
+
+def transform_empiric(cell_index_defined, gauss_values, alpha_values):
+    """
+    For the defined cells, transform the input Gaussian fields by the
+    cumulative empiric distribution to get uniform distribution of the cells.
+    The result is assigned to the input vectors alpha which also is returned.
+    The input vectors gauss_values and alpha_values are both of length equal to
+    the number of active cells in the grid model. The list cell_index_defined is an
+    index array with indices in the gauss_values and alpha_values arrays. The length of cell_index_defined
+    is num_defined_cells and is usually less than the number of active grid cells in the grid model.
+    Typically the cell indices defined in cell_index_defined are all cells within a zone or a (zone,region) combination.
+
+    :param cell_index_defined: Index array. The length is num_defined_cells.
+                             The content is cell index which is used in the
+                             grid parameter gauss_values or alpha_values.
+    :type cell_index_defined: numpy vector
+    :param gauss_values: Gaussian fields to be transformed. The length is the
+                        same as the list of active cells in the grid model.
+                        Only the subset of cells with indices specified in cell_index_defined
+                        are considered here.
+    :type gauss_values: numpy vector
+    :param alpha_values: Transformed gaussian fields. The length is the same as
+                        the gauss_values. The input values in the
+                        alpha vectors are updated for those cells that belongs
+                        to specified cell_index_defined list.
+    :type alpha_values: numpy vector
+    :return: The updated alpha vector is returned. Only cells with indices defined by
+             the list cell_index_defined are modified compared with the values
+             the vector had as input.
+    """
+    if gauss_values is None:
+        return None
+    num_defined_cells = len(cell_index_defined)
+    increment = 1.0 / num_defined_cells
+    # Numpy vector operation to select subset of values corresponding to the defined grid cells
+    gauss_values_selected = gauss_values[cell_index_defined]
+
+    # The numpy array operations below are equivalent to
+    # the code:
+    #    sort_index = np.argsort(gauss_values_selected)
+    #    for i in range(num_defined_cells):
+    #        index = sort_index[i]
+    #        alpha_values[cell_index_defined[index]] = float(i) / float(num_defined_cells)
+
+    range_array = np.arange(num_defined_cells)
+    sort_index = np.argsort(gauss_values_selected)
+    sorted_cell_index_defined = cell_index_defined[sort_index]
+    alpha_values[sorted_cell_index_defined] = range_array * increment
+    return alpha_values
+
+
+def transform_CDF(cell_index_defined, gauss_values, alpha_values):
+    """
+    Transform Gaussian values (with expectation = 0 and variance = 1) by cumulative normal distribution into values in [0,1].
+    Only selected set of values defined by cell_index_defined is transformed.
+    """
+    # The standard normal CDF from scipy.special, which is much faster to import than scipy.stats
+    from scipy.special import ndtr
+
+    if gauss_values is None:
+        return None
+
+    # Numpy vector operation to select subset of values corresponding to the defined grid cells
+    gauss_values_selected = gauss_values[cell_index_defined]
+    alpha_values[cell_index_defined] = ndtr(gauss_values_selected.astype(np.float64))
+    return alpha_values
@@ -0,0 +1,25 @@
+import { acceptHMRUpdate, defineStore } from 'pinia'
+import { ref } from 'vue'
+
+export const useParameterCompactDataTypesStore = defineStore(
+  'parameters-compact-data-types',
+  () => {
+    const selected = ref<boolean>(false)
+
+    function select(value: boolean) {
+      selected.value = value
+    }
+
+    function $reset() {
+      selected.value = false
+    }
+
+    return { selected, select, $reset }
+  },
+)
+
+if (import.meta.hot) {
+  import.meta.hot.accept(
+    acceptHMRUpdate(useParameterCompactDataTypesStore, import.meta.hot),
+  )
+}
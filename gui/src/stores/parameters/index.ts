@@ -7,6 +7,7 @@ import {
 } from './tolerance'
 import { useParameterBlockedWellStore } from '@/stores/parameters/blocked-well'
 import { useParameterBlockedWellLogStore } from '@/stores/parameters/blocked-well-log'
+import { useParameterCompactDataTypesStore } from '@/stores/parameters/compact-data-types'
 import { useParameterDebugLevelStore } from '@/stores/parameters/debug-level'
 import { useParameterNameModelStore } from '@/stores/parameters/names/model'
 import type { ParameterStoreSerialization } from '@/stores/parameters/serialization'
@@ -37,6 +38,9 @@ export const useParameterStore = defineStore('parameters', () => {
     await blockedWellStore.select(parameters.blockedWell.selected)
     await blockedWellLogStore.select(parameters.blockedWellLog.selected)
 
+    useParameterCompactDataTypesStore().select(
+      parameters.compactDataTypes?.selected ?? false,
+    )
     useParameterDebugLevelStore().select(parameters.debugLevel.selected)
 
     useParametersMaxFractionOfValuesOutsideToleranceStore().setTolerance(
@@ -81,6 +85,7 @@ export const useParameterStore = defineStore('parameters', () => {
       useParameterNameWorkflowStore(),
       useParameterBlockedWellStore(),
       useParameterBlockedWellLogStore(),
+      useParameterCompactDataTypesStore(),
       useParameterDebugLevelStore(),
       useParameterProbabilityCubeStore(),
       useParameterRealizationStore(),
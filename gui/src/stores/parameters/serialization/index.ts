@@ -4,6 +4,7 @@ import type { ParameterNameStoreSerialization } from '@/stores/parameters/names/
 import { useParameterNameStoreSerialization } from '@/stores/parameters/names/serialization'
 import { useParameterBlockedWellStore } from '@/stores/parameters/blocked-well'
 import { useParameterBlockedWellLogStore } from '@/stores/parameters/blocked-well-log'
+import { useParameterCompactDataTypesStore } from '@/stores/parameters/compact-data-types'
 import { useParametersToleranceOfProbabilityNormalisationStore } from '@/stores/parameters/tolerance'
 import type {
   AvailableOptionSerialization,
@@ -35,6 +36,8 @@ export type ParameterStoreSerialization = {
     number,
     false
   >
+  // Not set by jobs saved before the option was added
+  compactDataTypes?: SelectableSerialization<boolean, false>
   debugLevel: SelectableSerialization<DebugLevel, false>
   names: ParameterNameStoreSerialization
   probabilityCube: AvailableOptionSerialization<ProbabilityCube>
@@ -58,6 +61,9 @@ export function useParameterStoreSerialization(): ParameterStoreSerialization {
       selected:
         useParametersToleranceOfProbabilityNormalisationStore().tolerance,
     },
+    compactDataTypes: {
+      selected: useParameterCompactDataTypesStore().selected,
+    },
     debugLevel: { selected: useParameterDebugLevelStore().level },
     names: useParameterNameStoreSerialization(),
     probabilityCube: {